@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Container Listing - Bulk-Query Backend for container-list
+
+container-list used to run a `docker ps` filter plus about a dozen
+`docker inspect --format` calls and a `docker port` per container, which
+took several seconds for users with a handful of containers.
+
+This backend makes two Docker calls in total:
+1. `docker ps -a` with the owner labels, to find the user's containers
+2. One `docker inspect` of all of them (JSON)
+
+and renders the summary view, the detailed view or JSON from that result.
+Ownership uses the same labels as before: ds01.user, aime.mlc.USER,
+aime.mlc.username, or a devcontainer.local_folder under /home/<user>/.
+
+Usage:
+    container-listing.py [--user USER] [--all] [--view simple|detailed|json] [--guided]
+"""
+
+import os
+import sys
+import json
+import pwd
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_core import Colors
+
+DOCKER_BIN = "/usr/bin/docker"
+OWNER_LABELS = ("ds01.user", "aime.mlc.USER", "aime.mlc.username")
+
+
+class ContainerListing:
+    """A user's containers, fetched with one ps and one bulk inspect."""
+
+    def __init__(self, username: str, user_id: int, docker_bin: str = DOCKER_BIN):
+        self.username = username
+        self.user_id = user_id
+        self.docker_bin = docker_bin
+
+    def _docker(self, *args) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker_bin, *args], capture_output=True, text=True)
+
+    def _owns(self, labels: Dict[str, str]) -> bool:
+        if any(labels.get(label) == self.username for label in OWNER_LABELS):
+            return True
+        return labels.get("devcontainer.local_folder", "").startswith(f"/home/{self.username}/")
+
+    def owned(self, show_all: bool = False) -> List[Dict[str, str]]:
+        """The user's containers as [{'id', 'name', 'status'}] in `docker ps` order."""
+        label_fields = "|".join(f'{{{{.Label "{label}"}}}}'
+                                for label in OWNER_LABELS + ("devcontainer.local_folder",))
+        args = ['ps', '-a', '--format', f'{{{{.ID}}}}|{{{{.Names}}}}|{{{{.Status}}}}|{label_fields}']
+        if not show_all:
+            args[2:2] = ['--filter', 'status=running']
+        result = self._docker(*args)
+        if result.returncode != 0:
+            return []
+        owned = []
+        for line in result.stdout.splitlines():
+            parts = line.split("|")
+            if len(parts) != 7:
+                continue
+            labels = dict(zip(OWNER_LABELS + ("devcontainer.local_folder",), parts[3:]))
+            if self._owns(labels):
+                owned.append({'id': parts[0], 'name': parts[1], 'status': parts[2]})
+        return owned
+
+    def short_name(self, full_name: str) -> str:
+        return full_name.replace(f"._.{self.user_id}", "", 1)
+
+    def inspected(self, show_all: bool = False) -> List[tuple]:
+        """The user's containers as (ps entry, inspect data) pairs (one bulk inspect)."""
+        owned = self.owned(show_all)
+        if not owned:
+            return []
+        result = self._docker('inspect', *[c['id'] for c in owned])
+        try:
+            data = {c['Id'][:12]: c for c in json.loads(result.stdout or "[]")}
+        except ValueError:
+            data = {}
+        return [(c, data.get(c['id'][:12], {})) for c in owned]
+
+    def containers(self, show_all: bool = False) -> List[Dict]:
+        """Full records for the user's containers (one bulk inspect)."""
+        return [self._record(entry, data) for entry, data in self.inspected(show_all)]
+
+    def _record(self, entry: Dict[str, str], data: Dict) -> Dict:
+        config = data.get('Config') or {}
+        host = data.get('HostConfig') or {}
+        labels = config.get('Labels') or {}
+        mounts = {m.get('Destination'): m.get('Source') for m in data.get('Mounts') or []}
+        ports = []
+        for port, bindings in sorted(((data.get('NetworkSettings') or {}).get('Ports') or {}).items()):
+            for binding in bindings or []:
+                host_ip = binding.get('HostIp', '')
+                host_ip = f"[{host_ip}]" if ':' in host_ip else host_ip
+                ports.append(f"{port} -> {host_ip}:{binding.get('HostPort', '')}")
+        nano_cpus = host.get('NanoCpus') or 0
+        memory = host.get('Memory') or 0
+        return {
+            'name': self.short_name(entry['name']),
+            'full_name': entry['name'],
+            'id': (data.get('Id') or entry['id'])[:12],
+            'status': entry['status'],
+            'state': (data.get('State') or {}).get('Status', ''),
+            'image': config.get('Image', ''),
+            'created': (data.get('Created') or '').split('.')[0].replace('T', ' '),
+            'framework': labels.get('aime.mlc.FRAMEWORK', ''),
+            'cpus': nano_cpus // 1_000_000_000,
+            'memory_gb': memory // 1024 ** 3,
+            'gpu': bool(host.get('DeviceRequests')),
+            'gpu_allocated': labels.get('ds01.gpu.allocated', ''),
+            'mounts': {
+                'workspace': mounts.get('/workspace', ''),
+                'data': mounts.get('/data', ''),
+                'models': mounts.get('/models', ''),
+            },
+            'ports': ports,
+        }
+
+
+# =============================================================================
+# Rendering (same layout as the original container-list shell views)
+# =============================================================================
+
+C = Colors
+RULE = f"{C.CYAN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{C.NC}"
+
+
+def format_status(status: str) -> str:
+    if status.startswith("Up"):
+        return f"{C.GREEN}●{C.NC} Paused" if "(Paused)" in status else f"{C.GREEN}●{C.NC} Running"
+    if status.startswith("Exited"):
+        return f"{C.DIM}○{C.NC} Stopped"
+    if status == "Created":
+        return f"{C.BLUE}○{C.NC} Created"
+    return f"{C.DIM}{status}{C.NC}"
+
+
+def format_uptime(status: str) -> str:
+    if status.startswith("Exited"):
+        return "stopped"
+    return status[3:] if status.startswith("Up ") else status
+
+
+def render_simple(records: List[Dict], show_all: bool, guided: bool) -> str:
+    out = [RULE, f"{C.CYAN}{C.BOLD}    Your Containers{C.NC}", RULE + "\n"]
+    if guided:
+        out += [
+            f"{C.CYAN}ℹ {C.NC}{C.BOLD}Understanding Container Status:{C.NC}",
+            f"  • {C.GREEN}Running{C.NC} - Container is active and ready for work",
+            f"  • {C.DIM}Stopped{C.NC} - Container is paused but can be restarted",
+            f"  • {C.BLUE}Created{C.NC} - Container created but never started",
+            "",
+            f"{C.CYAN}ℹ {C.NC}{C.BOLD}What the columns show:{C.NC}",
+            "  • Status - Whether container is running or stopped",
+            "  • Image - The Docker image used (contains software and libraries)",
+            "  • Time - How long container has been running (or when it stopped)",
+            "  • GPU - Whether a GPU is allocated to this container",
+            "",
+            f"{C.CYAN}ℹ {C.NC}{C.BOLD}Behind the scenes:{C.NC}",
+            f"  • Containers are filtered using AIME labels ({C.DIM}aime.mlc.USER{C.NC})",
+            "",
+        ]
+
+    if not records:
+        if show_all:
+            out.append(f"{C.YELLOW}No containers found{C.NC}\n")
+        else:
+            out += [f"{C.YELLOW}No running containers{C.NC}\n",
+                    f"{C.DIM}Show all containers: {C.GREEN}container-list --all{C.NC}", ""]
+        out += [f"{C.BOLD}Deploy a container:{C.NC}", f"  {C.GREEN}container-deploy my-project{C.NC}", ""]
+        return "\n".join(out)
+
+    running = sum(1 for r in records if r['status'].startswith("Up"))
+    for count, record in enumerate(records, start=1):
+        out += [
+            f"{C.BOLD}{count}. {C.CYAN}{record['name']}{C.NC}",
+            f"   Status: {format_status(record['status'])}",
+            f"   Image:  {C.DIM}{record['image'].split(':')[0]}{C.NC}",
+            f"   Time:   {C.DIM}{format_uptime(record['status'])}{C.NC}",
+        ]
+        if record['status'].startswith("Up") and record['gpu']:
+            out.append(f"   GPU:    {C.GREEN}Allocated{C.NC}")
+        out.append("")
+
+    out += [RULE, f"{C.BOLD}Total:{C.NC} {len(records)} container(s)  •  {C.GREEN}{running} running{C.NC}"]
+    if show_all and len(records) > running:
+        out.append(f"       {C.DIM}{len(records) - running} stopped{C.NC}")
+    out += [
+        "",
+        f"{C.YELLOW}💡 For More Info:{C.NC}",
+        f"   Also stopped:           {C.GREEN}container list --all{C.NC}",
+        f"   Detailed metadata:      {C.GREEN}container list --detailed{C.NC}",
+        f"   With walkthrough:       {C.GREEN}container list --guided{C.NC}",
+        "",
+    ]
+    if guided:
+        out += [
+            "",
+            f"{C.YELLOW}💡 Further Quick Commands:{C.NC}",
+            f"   Start:    {C.GREEN}container-run <name>{C.NC}",
+            f"   Stop:     {C.GREEN}container-stop <name>{C.NC}",
+            f"   Stats:    {C.GREEN}container-stats{C.NC}",
+            f"   Cleanup:  {C.GREEN}container-remove{C.NC}",
+            "",
+        ]
+    return "\n".join(out)
+
+
+def render_detailed(records: List[Dict], home: Path) -> str:
+    out = [RULE, f"{C.CYAN}{C.BOLD}    Detailed Container Information{C.NC}", RULE + "\n"]
+    if not records:
+        out.append(f"{C.YELLOW}No containers found{C.NC}\n")
+        return "\n".join(out)
+
+    for count, r in enumerate(records, start=1):
+        out += [
+            f"{C.BOLD}━━━ Container #{count}: {C.CYAN}{r['name']}{C.NC} {C.BOLD}━━━{C.NC}\n",
+            f"{C.BOLD}General:{C.NC}",
+            f"  Name:       {r['name']}",
+            f"  Full Name:  {C.DIM}{r['full_name']}{C.NC}",
+            f"  ID:         {C.DIM}{r['id']}{C.NC}",
+            f"  Status:     {format_status(r['status'])}",
+            f"  Created:    {C.DIM}{r['created']}{C.NC}",
+            f"  Image:      {r['image']}",
+        ]
+        if r['framework']:
+            out.append(f"  Framework:  {C.GREEN}{r['framework']}{C.NC} {C.DIM}(via AIME){C.NC}")
+
+        out.append(f"\n{C.BOLD}Resources:{C.NC}")
+        if r['cpus']:
+            out.append(f"  CPUs:       {C.GREEN}{r['cpus']} cores{C.NC}")
+        if r['memory_gb']:
+            out.append(f"  Memory:     {C.GREEN}{r['memory_gb']}GB{C.NC}")
+        out.append(f"  GPU:        {C.GREEN}Enabled{C.NC}" if r['gpu'] else f"  GPU:        {C.DIM}CPU-only{C.NC}")
+
+        mounts = r['mounts']
+        if mounts['workspace']:
+            out += [f"\n{C.BOLD}Mounts:{C.NC}", f"  Workspace:  {C.BLUE}{mounts['workspace']}{C.NC}"]
+            if mounts['data']:
+                out.append(f"  Data:       {C.BLUE}{mounts['data']}{C.NC}")
+            if mounts['models']:
+                out.append(f"  Models:     {C.BLUE}{mounts['models']}{C.NC} {C.DIM}(AIME v2){C.NC}")
+
+        if r['ports']:
+            out.append(f"\n{C.BOLD}Ports:{C.NC}")
+            out += [f"  {C.GREEN}{port}{C.NC}" for port in r['ports']]
+
+        created_date = _info_created(home / "ds01-config" / "containers" / f"{r['name']}.info")
+        if created_date:
+            out += [f"\n{C.BOLD}Metadata:{C.NC}", f"  Created:    {C.DIM}{created_date}{C.NC}"]
+        out.append("")
+    return "\n".join(out)
+
+
+def _info_created(info_file: Path) -> Optional[str]:
+    try:
+        for line in info_file.read_text().splitlines():
+            if line.startswith("Created:"):
+                return line.split(":", 1)[1].strip() or None
+    except (IOError, OSError):
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List a user's DS01 containers")
+    parser.add_argument('--user', default=None, help="Owner (default: current user)")
+    parser.add_argument('-a', '--all', action='store_true', help="Include stopped containers")
+    parser.add_argument('--view', choices=['simple', 'detailed', 'json'], default='simple')
+    parser.add_argument('--guided', action='store_true', help="Explain the output")
+    args = parser.parse_args()
+
+    entry = pwd.getpwnam(args.user) if args.user else pwd.getpwuid(os.getuid())
+    listing = ContainerListing(entry.pw_name, entry.pw_uid)
+    records = listing.containers(show_all=args.all)
+
+    if args.view == 'json':
+        print(json.dumps(records, indent=2))
+    elif args.view == 'detailed':
+        print(render_detailed(records, Path(entry.pw_dir)))
+    else:
+        print(render_simple(records, args.all, args.guided))
+
+
+if __name__ == "__main__":
+    main()
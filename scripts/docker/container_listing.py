@@ -0,0 +1 @@
+container-listing.py
\ No newline at end of file
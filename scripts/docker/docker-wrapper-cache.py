@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Docker Wrapper Cache - Precomputed Per-User Group/Slice Resolution
+
+docker-wrapper.sh used to run `get_resource_limits.py <user> --group` (YAML
+parse + member files) and `sudo create-user-slice.sh` on every `docker
+run`/`docker create`. This module writes the answer for every known user
+to a fixed-format file that the wrapper reads with bash builtins only:
+
+    # header comment
+    default<TAB><default group>
+    user<TAB><name><TAB><uid or -><TAB><group><TAB><slice>
+
+Users with a user_overrides entry are written with group and slice "-":
+user-overrides.yaml may be unreadable for the calling user, so the wrapper
+keeps resolving them through get_resource_limits.py as before.
+
+Known users are the group members and user overrides (each also under its
+sanitized name), home directories under /home and local accounts with
+UID >= 1000. Anyone else resolves to the default group, exactly as
+get_user_group() does. The wrapper treats the cache as stale (and falls
+back to get_resource_limits.py) while resource-limits.yaml, a
+groups/*.members file or user-overrides.yaml is newer than it;
+ds01-wrapper-cache.path rebuilds it when they change.
+
+Usage:
+    docker-wrapper-cache.py build [--output PATH]
+    docker-wrapper-cache.py show
+"""
+
+import os
+import pwd
+import sys
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from get_resource_limits import ResourceLimitParser, sanitize_username_for_slice
+
+CACHE_FILE = Path("/var/lib/ds01/docker-wrapper.cache")
+HOME_ROOT = Path("/home")
+MIN_UID = 1000
+
+
+def _uid(name: str) -> Optional[int]:
+    """UID of a login name, only if it is the name whoami would print for that UID."""
+    try:
+        uid = pwd.getpwnam(name).pw_uid
+        return uid if pwd.getpwuid(uid).pw_name == name else None
+    except (KeyError, OSError):
+        return None
+
+
+def known_users(parser: ResourceLimitParser, home_root: Path = HOME_ROOT) -> List[str]:
+    """Every username whose group we can precompute."""
+    names = set()
+    for group in (parser.config.get('groups') or {}).values():
+        names.update(str(m) for m in (group or {}).get('members') or [])
+    names.update(str(u) for u in parser.config.get('user_overrides') or {})
+    try:
+        names.update(p.name for p in home_root.iterdir() if p.is_dir())
+    except OSError:
+        pass
+    try:
+        names.update(p.pw_name for p in pwd.getpwall() if p.pw_uid >= MIN_UID and p.pw_uid != 65534)
+    except OSError:
+        pass
+    names.update(sanitize_username_for_slice(name) for name in list(names))
+    names.discard('')
+    return sorted(names)
+
+
+def build_entries(parser: ResourceLimitParser, home_root: Path = HOME_ROOT) -> Tuple[str, List[Dict]]:
+    default = parser.config.get('default_group', 'student')
+    entries = []
+    for name in known_users(parser, home_root):
+        if any(c in name for c in "\t\n"):
+            continue
+        group = parser.get_user_group(name)
+        if group == 'override':
+            entries.append({'name': name, 'uid': _uid(name), 'group': '-', 'slice': '-'})
+            continue
+        entries.append({'name': name, 'uid': _uid(name), 'group': group,
+                        'slice': f"ds01-{group}-{sanitize_username_for_slice(name)}.slice"})
+    return default, entries
+
+
+def write_cache(default: str, entries: List[Dict], path: Path = CACHE_FILE):
+    """Atomically replace the cache file (world-readable; the wrapper runs as the user)."""
+    lines = ["# DS01 docker-wrapper resolution cache - generated by docker-wrapper-cache.py, do not edit",
+             f"default\t{default}"]
+    lines += [f"user\t{e['name']}\t{'-' if e['uid'] is None else e['uid']}\t{e['group']}\t{e['slice']}"
+              for e in entries]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text("\n".join(lines) + "\n")
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="docker-wrapper.sh resolution cache")
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('build', help="Regenerate the cache from the config")
+    p.add_argument('--output', type=Path, default=CACHE_FILE)
+    sub.add_parser('show', help="Print the current cache")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        default, entries = build_entries(ResourceLimitParser())
+        try:
+            write_cache(default, entries, args.output)
+        except OSError as e:
+            print(f"Error: cannot write {args.output}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"docker-wrapper cache: {len(entries)} users, default group {default} -> {args.output}")
+    elif args.command == 'show':
+        try:
+            print(CACHE_FILE.read_text(), end="")
+        except OSError:
+            print(f"No cache at {CACHE_FILE} (run: docker-wrapper-cache.py build)", file=sys.stderr)
+            sys.exit(1)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,8 @@
 #
 # How it works:
 # 1. Intercepts 'docker run' and 'docker create' commands
-# 2. Extracts user's group from resource-limits.yaml
+# 2. Looks up user's group and slice in the precomputed wrapper cache
+#    (falls back to resource-limits.yaml via get_resource_limits.py)
 # 3. Ensures user's slice exists (ds01-{group}-{user}.slice)
 # 4. Injects --cgroup-parent if not already specified
 # 5. Injects --label ds01.user=<username> for ownership tracking
@@ -22,6 +23,9 @@
 #
 # Admin users (in ds01-admin group) see all containers.
 # Non-admin users see only containers with their ds01.user label.
+#
+# Hot path: with a fresh cache (docker-wrapper-cache.py) and an existing slice,
+# run/create forks nothing before exec'ing the real Docker binary.
 
 # Real Docker binary
 REAL_DOCKER="/usr/bin/docker"
@@ -32,6 +36,10 @@ CONFIG_FILE="$INFRA_ROOT/config/resource-limits.yaml"
 RESOURCE_PARSER="$INFRA_ROOT/scripts/docker/get_resource_limits.py"
 CREATE_SLICE="$INFRA_ROOT/scripts/system/create-user-slice.sh"
 USERNAME_UTILS="$INFRA_ROOT/scripts/lib/username-utils.sh"
+OVERRIDES_FILE="$INFRA_ROOT/config/user-overrides.yaml"
+GROUPS_DIR="$INFRA_ROOT/config/groups"
+WRAPPER_CACHE="/var/lib/ds01/docker-wrapper.cache"
+SLICE_DIR="/etc/systemd/system"
 LOG_FILE="/var/log/ds01/docker-wrapper.log"
 
 # Source username sanitization library (fail silently if not available)
@@ -42,21 +50,30 @@ else
     sanitize_username_for_slice() {
         echo "$1" | sed 's/@/-at-/g; s/\./-/g; s/[^a-zA-Z0-9_:-]/-/g; s/--*/-/g; s/^-//; s/-$//'
     }
+    sanitize_username_to_var() {
+        printf -v "$1" '%s' "$(sanitize_username_for_slice "$2")"
+    }
 fi
 
-# Ensure log directory exists
-mkdir -p "$(dirname "$LOG_FILE")" 2>/dev/null || true
-
 # Log function (silent unless DEBUG_DS01_WRAPPER=1)
 log_debug() {
     if [ "${DEBUG_DS01_WRAPPER:-0}" = "1" ]; then
-        echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1" >> "$LOG_FILE" 2>/dev/null || true
+        # Ensure log directory exists
+        mkdir -p "${LOG_FILE%/*}" 2>/dev/null || true
+        printf '[%(%Y-%m-%d %H:%M:%S)T] %s\n' -1 "$1" >> "$LOG_FILE" 2>/dev/null || true
     fi
 }
 
 # Get current user info
-CURRENT_USER=$(whoami)
-CURRENT_UID=$(id -u)
+# CURRENT_USER is resolved lazily (from the wrapper cache when possible)
+# so pass-through commands never fork whoami
+CURRENT_USER=""
+CURRENT_UID=$EUID
+
+# Resolve CURRENT_USER if not yet known
+resolve_current_user() {
+    [ -n "$CURRENT_USER" ] || CURRENT_USER=$(whoami)
+}
 
 # Check if this is a 'run' or 'create' command that needs cgroup injection
 needs_cgroup_injection() {
@@ -96,19 +113,20 @@ has_owner_label() {
 
 # Extract owner from devcontainer.local_folder label if present
 # VS Code dev containers set this label to the project path: /home/USER/...
+# Sets DEVCONTAINER_OWNER (no command substitution, so no subshell)
 get_devcontainer_owner() {
-    local prev_arg=""
+    local prev_arg="" path=""
+    DEVCONTAINER_OWNER=""
     for arg in "$@"; do
         # Check for --label=devcontainer.local_folder=/home/USER/...
         if [[ "$arg" == "--label=devcontainer.local_folder=/home/"* ]]; then
-            local path="${arg#--label=devcontainer.local_folder=}"
-            echo "$path" | cut -d/ -f3
-            return 0
-        fi
+            path="${arg#--label=devcontainer.local_folder=/home/}"
         # Check for --label devcontainer.local_folder=/home/USER/... (two separate args)
-        if [[ "$prev_arg" == "--label" ]] && [[ "$arg" == "devcontainer.local_folder=/home/"* ]]; then
-            local path="${arg#devcontainer.local_folder=}"
-            echo "$path" | cut -d/ -f3
+        elif [[ "$prev_arg" == "--label" ]] && [[ "$arg" == "devcontainer.local_folder=/home/"* ]]; then
+            path="${arg#devcontainer.local_folder=/home/}"
+        fi
+        if [ -n "$path" ]; then
+            DEVCONTAINER_OWNER="${path%%/*}"
             return 0
         fi
         prev_arg="$arg"
@@ -127,11 +145,75 @@ get_user_group() {
     fi
 }
 
+# Check the wrapper cache is newer than every config file it was built from
+cache_is_fresh() {
+    [ -f "$WRAPPER_CACHE" ] || return 1
+    local f
+    for f in "$CONFIG_FILE" "$OVERRIDES_FILE" "$GROUPS_DIR" "$GROUPS_DIR"/*.members; do
+        [ "$f" -nt "$WRAPPER_CACHE" ] && return 1
+    done
+    return 0
+}
+
+# Look up the calling user in the wrapper cache (see docker-wrapper-cache.py)
+# Matches by UID first so the common case needs no whoami; users not in the
+# cache get the default group, as get_resource_limits.py would give them.
+# Sets CURRENT_USER, USER_GROUP and SLICE_NAME. Returns 1 if the cache is
+# missing/stale or the user must be resolved by get_resource_limits.py.
+resolve_from_cache() {
+    cache_is_fresh || return 1
+
+    local kind name uid group slice default="" sanitized=""
+    USER_GROUP=""
+    while IFS=$'\t' read -r kind name uid group slice; do
+        case "$kind" in
+            default) default="$name" ;;
+            user)
+                if [ "$uid" = "$CURRENT_UID" ]; then
+                    CURRENT_USER="$name"
+                    USER_GROUP="$group"
+                    SLICE_NAME="$slice"
+                    break
+                fi
+                ;;
+        esac
+    done < "$WRAPPER_CACHE"
+
+    if [ -z "$USER_GROUP" ]; then
+        # UID not cached (e.g. name differs from passwd) - match by name instead
+        resolve_current_user
+        sanitize_username_to_var sanitized "$CURRENT_USER"
+        while IFS=$'\t' read -r kind name uid group slice; do
+            if [ "$kind" = "user" ] && [ "$name" = "$CURRENT_USER" ]; then
+                USER_GROUP="$group"
+                SLICE_NAME="$slice"
+                break
+            fi
+            if [ "$kind" = "user" ] && [ "$name" = "$sanitized" ] && [ -z "$USER_GROUP" ]; then
+                USER_GROUP="$group"
+                SLICE_NAME="$slice"
+            fi
+        done < "$WRAPPER_CACHE"
+    fi
+
+    if [ -z "$USER_GROUP" ]; then
+        [ -n "$default" ] || return 1
+        USER_GROUP="$default"
+        SLICE_NAME="ds01-${USER_GROUP}-${sanitized}.slice"
+    fi
+
+    # "-" marks users with a user_overrides entry (resolved the slow way)
+    [ "$USER_GROUP" != "-" ]
+}
+
 # Ensure user slice exists
 ensure_user_slice() {
     local group="$1"
     local user="$2"
 
+    # Already provisioned - skip the sudo round-trip
+    [ -f "$SLICE_DIR/$SLICE_NAME" ] && return 0
+
     if [ -f "$CREATE_SLICE" ]; then
         # Try to create slice (requires sudo, will fail silently if not root)
         # The slice creation is idempotent - exits 0 if already exists
@@ -154,6 +236,7 @@ ensure_user_slice() {
 is_admin() {
     # Root is always admin (needed for cron jobs running as root)
     [ "$CURRENT_UID" -eq 0 ] && return 0
+    resolve_current_user
     # Check ds01-admin group membership
     groups "$CURRENT_USER" 2>/dev/null | grep -qE '\bds01-admin\b'
 }
@@ -187,16 +270,21 @@ main() {
 
     # Check if we need to inject for container creation
     if needs_cgroup_injection "$subcommand"; then
-        log_debug "Intercepting '$subcommand' for user $CURRENT_USER"
+        # Get user's group and slice (cache first, then resource-limits.yaml)
+        if resolve_from_cache; then
+            log_debug "Intercepting '$subcommand' for user $CURRENT_USER (cached)"
+        else
+            resolve_current_user
+            log_debug "Intercepting '$subcommand' for user $CURRENT_USER"
 
-        # Get user's group
-        USER_GROUP=$(get_user_group "$CURRENT_USER")
-        log_debug "User group: $USER_GROUP"
+            USER_GROUP=$(get_user_group "$CURRENT_USER")
 
-        # Build the cgroup-parent path (with sanitized username for systemd compatibility)
-        SANITIZED_USER=$(sanitize_username_for_slice "$CURRENT_USER")
-        SLICE_NAME="ds01-${USER_GROUP}-${SANITIZED_USER}.slice"
-        log_debug "Sanitized user: $SANITIZED_USER"
+            # Build the cgroup-parent path (with sanitized username for systemd compatibility)
+            sanitize_username_to_var SANITIZED_USER "$CURRENT_USER"
+            SLICE_NAME="ds01-${USER_GROUP}-${SANITIZED_USER}.slice"
+            log_debug "Sanitized user: $SANITIZED_USER"
+        fi
+        log_debug "User group: $USER_GROUP"
 
         # Ensure the slice exists
         ensure_user_slice "$USER_GROUP" "$CURRENT_USER"
@@ -214,13 +302,12 @@ main() {
         # Inject owner label if not already specified
         if ! has_owner_label "$@"; then
             # Check if this is a VS Code devcontainer with a local_folder path
-            local devcontainer_owner
-            devcontainer_owner=$(get_devcontainer_owner "$@")
-            if [ -n "$devcontainer_owner" ]; then
+            get_devcontainer_owner "$@"
+            if [ -n "$DEVCONTAINER_OWNER" ]; then
                 # VS Code container - extract owner from devcontainer.local_folder path
-                INJECT_ARGS+=("--label" "ds01.user=$devcontainer_owner")
+                INJECT_ARGS+=("--label" "ds01.user=$DEVCONTAINER_OWNER")
                 INJECT_ARGS+=("--label" "ds01.managed=devcontainer")
-                log_debug "Injecting owner label from devcontainer: ds01.user=$devcontainer_owner"
+                log_debug "Injecting owner label from devcontainer: ds01.user=$DEVCONTAINER_OWNER"
             else
                 # Regular container - use current user
                 INJECT_ARGS+=("--label" "ds01.user=$CURRENT_USER")
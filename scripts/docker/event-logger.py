@@ -25,6 +25,10 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Optional, List
 
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import traced
+
 # Configuration
 LOG_DIR = Path("/var/log/ds01")
 EVENTS_FILE = LOG_DIR / "events.jsonl"
@@ -36,6 +40,7 @@ class EventLogger:
         self.log_file = log_file
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
 
+    @traced("events.write")
     def log(self, event_type: str, **kwargs) -> bool:
         """
         Log an event to the append-only log.
@@ -53,6 +58,11 @@ class EventLogger:
             **kwargs
         }
 
+        # Correlate with trace spans (set by mlc-create-wrapper.sh)
+        request_id = os.environ.get('DS01_REQUEST_ID')
+        if request_id:
+            event.setdefault("rid", request_id)
+
         try:
             # Check for rotation
             self._maybe_rotate()
@@ -140,7 +150,7 @@ class EventLogger:
 # Predefined event types
 EVENT_TYPES = {
     # Container lifecycle
-    "container.created": ["user", "container", "interface", "gpu"],
+    "container.created": ["user", "container", "interface", "gpu", "image"],
     "container.started": ["user", "container"],
     "container.stopped": ["user", "container", "reason"],
     "container.removed": ["user", "container", "gpu_released"],
@@ -148,7 +158,7 @@ EVENT_TYPES = {
     # GPU allocation
     "gpu.allocated": ["user", "container", "gpu", "priority"],
     "gpu.released": ["user", "container", "gpu", "reason"],
-    "gpu.rejected": ["user", "container", "reason"],
+    "gpu.rejected": ["user", "container", "reason", "migs"],
 
     # System events
     "health.check": ["status", "checks_passed", "checks_failed"],
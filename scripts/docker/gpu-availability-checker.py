@@ -15,6 +15,11 @@ from pathlib import Path
 
 # Dynamic import for gpu-state-reader.py (hyphenated filename)
 SCRIPT_DIR = Path(__file__).parent
+
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(SCRIPT_DIR.resolve().parent / "lib"))
+from ds01_trace_compat import traced
+
 spec = importlib.util.spec_from_file_location('gpu_state_reader', str(SCRIPT_DIR / 'gpu-state-reader.py'))
 gpu_state_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(gpu_state_module)
@@ -25,6 +30,7 @@ class GPUAvailabilityChecker:
     def __init__(self):
         self.state_reader = GPUStateReader()
 
+    @traced("availability.nvidia_smi_mig")
     def _get_all_mig_instances(self) -> Dict[str, Dict]:
         """
         Get all available MIG instances from nvidia-smi.
@@ -68,6 +74,7 @@ class GPUAvailabilityChecker:
 
         return mig_instances
 
+    @traced("availability.nvidia_smi_gpus")
     def _get_physical_gpus(self) -> Dict[str, Dict]:
         """
         Get all physical GPUs from nvidia-smi.
@@ -101,6 +108,14 @@ class GPUAvailabilityChecker:
 
         return physical_gpus
 
+    def mig_instances(self) -> Dict[str, Dict]:
+        """All MIG instances by slot: {"1.0": {'profile', 'uuid', 'physical_gpu', 'device_id'}}."""
+        return self._get_all_mig_instances()
+
+    def physical_gpus(self) -> Dict[str, Dict]:
+        """All physical GPUs by index: {"0": {'id', 'name', 'uuid'}}."""
+        return self._get_physical_gpus()
+
     def _get_full_gpus_available(self) -> Dict[str, Dict]:
         """
         Get available full GPUs in priority order:
@@ -210,6 +225,7 @@ class GPUAvailabilityChecker:
         # MIG slots have decimal (e.g., "1.0", "1.2")
         return '.' not in str(gpu_slot)
 
+    @traced("availability.suggest")
     def suggest_gpu_for_user(self, username: str, max_gpus: int = None, priority: int = 10,
                              require_full_gpu: bool = False, allow_full_gpu: bool = False,
                              exclude_slots: list = None) -> Dict:
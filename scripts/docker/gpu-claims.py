@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+GPU Claims - Per-Physical-GPU Lock Shards for Concurrent Allocation
+
+Docker labels remain the single source of truth for GPU allocations, but a
+container only gets its labels once mlc-patched.py has created it - long after
+gpu_allocator_v2.py has chosen a slot. This module records short-lived claims
+for that window so concurrent allocations never hand out the same slot.
+
+Each shard (one per physical GPU, one per user) has:
+- A lock file, held only for the brief commit step
+- A state file with a generation counter and the live claims on that shard
+
+Allocations are planned outside any lock against a snapshot of the shards.
+The commit locks only the shards it touches (in sorted order), re-validates
+the snapshot generations and writes the claims. Allocations on different
+GPUs for different users therefore never wait for each other.
+
+The directory and its files belong to the docker group (2770 / 0660):
+only users who may create containers can read or write claims.
+
+Claims expire after a TTL (default 10 min) or are dropped on release; once
+the container exists, its Docker labels take over.
+
+Usage:
+    gpu-claims.py list
+    gpu-claims.py release <container>
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Tuple
+
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import span
+
+CLAIMS_DIR = Path("/var/log/ds01/gpu-locks")
+CLAIMS_GROUP = "docker"
+DEFAULT_CLAIM_TTL = 600  # seconds; covers image pull + container create
+
+
+def physical_gpu(gpu_slot: str) -> str:
+    """Physical GPU index of a slot ("1.2" -> "1", "0" -> "0")."""
+    return str(gpu_slot).split('.')[0]
+
+
+def gpu_shard(gpu_slot: str) -> str:
+    """Shard name for the physical GPU of a slot."""
+    return f"gpu-{physical_gpu(gpu_slot)}"
+
+
+def user_shard(username: str) -> str:
+    """Shard name for a user's limit accounting."""
+    safe = ''.join(c if c.isalnum() or c in '-_' else '-' for c in username)
+    return f"user-{safe}"
+
+
+class GPUClaimLedger:
+    """Sharded claim store used by GPUAllocatorSmart for optimistic commits."""
+
+    def __init__(self, state_dir: Path = CLAIMS_DIR, ttl: int = DEFAULT_CLAIM_TTL):
+        self.state_dir = Path(state_dir)
+        self.ttl = ttl
+
+    def _state_path(self, shard: str) -> Path:
+        return self.state_dir / f"{shard}.json"
+
+    def _lock_path(self, shard: str) -> Path:
+        return self.state_dir / f"{shard}.lock"
+
+    def _ensure_dir(self):
+        if not self.state_dir.exists():
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                shutil.chown(self.state_dir, group=CLAIMS_GROUP)
+            except (OSError, LookupError):
+                pass  # No docker group (tests) or not permitted
+            try:
+                os.chmod(self.state_dir, 0o2770)
+            except OSError:
+                pass  # Permissions are best-effort (deploy.sh sets them)
+
+    def _read_shard(self, shard: str, now: Optional[float] = None) -> Dict:
+        """Read a shard's state, dropping expired claims."""
+        now = now if now is not None else time.time()
+        try:
+            with open(self._state_path(shard)) as f:
+                state = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            state = {}
+
+        claims = {
+            slot: claim for slot, claim in state.get('claims', {}).items()
+            if now - claim.get('ts', 0) < self.ttl
+        }
+        return {'generation': state.get('generation', 0), 'claims': claims}
+
+    def _write_shard(self, shard: str, state: Dict):
+        """Write a shard's state atomically (caller holds the shard lock)."""
+        path = self._state_path(shard)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        try:
+            os.chmod(tmp, 0o660)
+        except OSError:
+            pass
+        os.replace(tmp, path)
+
+    @contextmanager
+    def locked(self, shards: Iterable[str]):
+        """Hold exclusive locks on the given shards (sorted to avoid deadlock)."""
+        shards = sorted(set(shards))
+        self._ensure_dir()
+        fds = []
+        try:
+            with span("allocator.lock_wait", shards=len(shards)):
+                for shard in shards:
+                    fd = os.open(self._lock_path(shard), os.O_RDWR | os.O_CREAT, 0o660)
+                    fds.append(fd)
+                    try:
+                        os.fchmod(fd, 0o660)  # Group-writable despite the umask
+                    except OSError:
+                        pass  # Not ours: created by another docker-group user
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            for fd in reversed(fds):
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def snapshot(self, *usernames: str) -> Dict[str, Dict]:
+        """
+        Read all GPU shards (and the given users' shards) without locking.
+
+        Returns:
+            Dict of shard name -> {'generation': int, 'claims': {slot: claim}}
+        """
+        now = time.time()
+        shards = {}
+        if self.state_dir.exists():
+            for path in self.state_dir.glob("gpu-*.json"):
+                shards[path.stem] = self._read_shard(path.stem, now)
+        for username in usernames:
+            if username:
+                shards[user_shard(username)] = self._read_shard(user_shard(username), now)
+        return shards
+
+    @staticmethod
+    def claimed_slots(snapshot: Dict[str, Dict], exclude_container: Optional[str] = None) -> List[str]:
+        """Slots with a live claim held by another container."""
+        return sorted(
+            slot
+            for shard, state in snapshot.items() if shard.startswith('gpu-')
+            for slot, claim in state['claims'].items()
+            if claim.get('container') != exclude_container
+        )
+
+    @staticmethod
+    def user_pending(snapshot: Dict[str, Dict], username: str,
+                     exclude_containers: Iterable[str] = ()) -> Dict[str, List[str]]:
+        """
+        Claimed slots of a user's containers that Docker does not show yet.
+
+        Returns:
+            Dict of container -> list of claimed slots
+        """
+        skip = set(exclude_containers)
+        pending: Dict[str, List[str]] = {}
+        for shard, state in snapshot.items():
+            if not shard.startswith('gpu-'):
+                continue
+            for slot, claim in state['claims'].items():
+                container = claim.get('container')
+                if claim.get('user') == username and container not in skip:
+                    pending.setdefault(container, []).append(slot)
+        return pending
+
+    def commit(self, slots: List[str], container: str, username: str,
+               snapshot: Dict[str, Dict]) -> bool:
+        """
+        Claim slots for a container if the snapshot is still valid.
+
+        Returns:
+            True if claimed, False on conflict (caller re-plans and retries)
+        """
+        return not self.commit_many([(slots, container, username)], snapshot)
+
+    def commit_many(self, entries: List[Tuple[List[str], str, str]], snapshot: Dict[str, Dict],
+                    all_or_nothing: bool = False) -> List[int]:
+        """
+        Claim slots for several containers under one lock acquisition.
+
+        Locks only the touched GPU shards plus the users' shards. An entry
+        commits only if the generations of all its GPU shards and its user
+        shard are unchanged since the snapshot. Any move counts as a conflict
+        (the caller re-plans): a slot can be claimed, created into a
+        container and released again in between, so "not claimed right now"
+        does not mean "still free".
+
+        Args:
+            entries: List of (slots, container, username)
+            snapshot: Snapshot the entries were planned against
+            all_or_nothing: Write nothing if any entry conflicts
+
+        Returns:
+            Indexes of conflicting entries (not claimed)
+        """
+        gpu_shards = sorted({gpu_shard(s) for slots, _, _ in entries for s in slots})
+        user_shards = sorted({user_shard(username) for _, _, username in entries})
+
+        with self.locked(gpu_shards + user_shards):
+            now = time.time()
+            current = {shard: self._read_shard(shard, now) for shard in gpu_shards + user_shards}
+
+            conflicts = []
+            for i, (slots, container, username) in enumerate(entries):
+                ushard = user_shard(username)
+                if current[ushard]['generation'] != snapshot.get(ushard, {}).get('generation', 0):
+                    conflicts.append(i)
+                    continue
+                for shard in {gpu_shard(s) for s in slots}:
+                    if current[shard]['generation'] != snapshot.get(shard, {}).get('generation', 0):
+                        conflicts.append(i)
+                        break
+
+            if conflicts and all_or_nothing:
+                return conflicts
+
+            touched = set()
+            for i, (slots, container, username) in enumerate(entries):
+                if i in conflicts:
+                    continue
+                for shard in {gpu_shard(s) for s in slots}:
+                    # Drop claims from an earlier attempt of the same container
+                    current[shard]['claims'] = {
+                        slot: claim for slot, claim in current[shard]['claims'].items()
+                        if claim.get('container') != container
+                    }
+                    touched.add(shard)
+                for slot in slots:
+                    current[gpu_shard(slot)]['claims'][slot] = {
+                        'container': container, 'user': username, 'ts': now
+                    }
+                touched.add(user_shard(username))
+
+            for shard in sorted(touched):
+                current[shard]['generation'] += 1
+                self._write_shard(shard, current[shard])
+
+        return conflicts
+
+    def release(self, container: str) -> Dict[str, Dict]:
+        """
+        Drop all claims held by a container.
+
+        Returns:
+            Dict of released slot -> claim
+        """
+        released = {}
+        snapshot = self.snapshot()
+        shards = [shard for shard, state in snapshot.items()
+                  if any(c.get('container') == container for c in state['claims'].values())]
+        if not shards:
+            return released
+
+        with self.locked(shards):
+            for shard in shards:
+                state = self._read_shard(shard)
+                mine = [slot for slot, c in state['claims'].items() if c.get('container') == container]
+                if not mine:
+                    continue
+                for slot in mine:
+                    released[slot] = state['claims'].pop(slot)
+                state['generation'] += 1
+                self._write_shard(shard, state)
+        return released
+
+
+def main():
+    """CLI interface"""
+    if len(sys.argv) < 2:
+        print("Usage: gpu-claims.py <command> [args]")
+        print("\nCommands:")
+        print("  list                 - Show live claims per physical GPU")
+        print("  release <container>  - Drop claims held by a container")
+        sys.exit(1)
+
+    ledger = GPUClaimLedger()
+    command = sys.argv[1]
+
+    if command == "list":
+        snapshot = ledger.snapshot()
+        if not snapshot:
+            print("No claims")
+            return
+        now = time.time()
+        for shard in sorted(snapshot):
+            state = snapshot[shard]
+            print(f"{shard} (generation {state['generation']})")
+            for slot, claim in sorted(state['claims'].items()):
+                age = int(now - claim.get('ts', now))
+                print(f"  {slot:<6} {claim.get('container', '?')} ({claim.get('user', '?')}, {age}s ago)")
+
+    elif command == "release":
+        if len(sys.argv) < 3:
+            print("Error: Container name required")
+            sys.exit(1)
+        released = ledger.release(sys.argv[2])
+        print(f"Released: {','.join(sorted(released))}" if released else "No claims held")
+
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
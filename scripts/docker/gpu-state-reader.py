@@ -14,9 +14,14 @@ import subprocess
 import json
 import re
 import sys
+from pathlib import Path
 from typing import Dict, List, Optional
 from collections import defaultdict
 
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import span, traced
+
 # Real Docker binary - bypasses the wrapper at /usr/local/bin/docker
 # The wrapper filters 'docker ps' for non-admin users, which would cause
 # the GPU state reader to miss allocations from other users, leading to
@@ -42,7 +47,7 @@ class GPUStateReader:
         if self._config is None:
             try:
                 import yaml
-                with open(self.config_path) as f:
+                with span("state.load_config"), open(self.config_path) as f:
                     self._config = yaml.safe_load(f)
             except FileNotFoundError:
                 self._config = {}
@@ -76,12 +81,13 @@ class GPUStateReader:
 
         try:
             # Run nvidia-smi to get MIG instances
-            result = subprocess.run(
-                ["nvidia-smi", "-L"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with span("state.nvidia_smi"):
+                result = subprocess.run(
+                    ["nvidia-smi", "-L"],
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
 
             # Parse output like:
             # GPU 1: NVIDIA A100-PCIE-40GB (UUID: GPU-xxx)
@@ -111,6 +117,13 @@ class GPUStateReader:
         self._mig_uuid_to_slot_cache = mapping
         return mapping
 
+    def seed_mig_slots(self, mapping: Dict[str, str]):
+        """
+        Use a known MIG UUID -> slot map (e.g. the metrics-sampler ring)
+        instead of running nvidia-smi -L on first use.
+        """
+        self._mig_uuid_to_slot_cache = dict(mapping)
+
     def _get_container_inspect(self, container_name: str) -> Optional[Dict]:
         """Get docker inspect output for a container."""
         try:
@@ -285,6 +298,7 @@ class GPUStateReader:
             # nvidia-smi query failed - GPU extraction failed
             return None
 
+    @traced("state.all_allocations")
     def get_all_allocations(self) -> Dict:
         """
         Get all GPU allocations by reading Docker containers.
@@ -347,6 +361,7 @@ class GPUStateReader:
 
         return result
 
+    @traced("state.docker_scan")
     def _get_all_ds01_containers(self) -> List[str]:
         """
         Get ALL containers that should be tracked by DS01.
@@ -446,6 +461,10 @@ class GPUStateReader:
 
         return by_interface
 
+    def gpu_from_inspect(self, container_data: Dict) -> Optional[Dict]:
+        """GPU assignment from `docker inspect` data the caller already has."""
+        return self._extract_gpu_from_container(container_data)
+
     def get_container_gpu(self, container_name: str) -> Optional[Dict]:
         """Get GPU assignment for a specific container."""
         container_data = self._get_container_inspect(container_name)
@@ -453,6 +472,7 @@ class GPUStateReader:
             return None
         return self._extract_gpu_from_container(container_data)
 
+    @traced("state.user_allocations")
     def get_user_allocations(self, username: str) -> List[Dict]:
         """
         Get all GPU allocations for a specific user.
@@ -3,6 +3,8 @@
 GPU Allocator Smart - Stateless GPU Allocation Manager
 Uses Docker labels as single source of truth. No state files maintained.
 Reads current state from Docker via gpu-state-reader.py.
+In-flight allocations are claimed per physical GPU (gpu-claims.py) until the
+container exists, so concurrent requests only contend on the GPUs they touch.
 
 Updated for DS01 Layered Architecture:
 - Interface-specific state handling:
@@ -17,9 +19,12 @@ import yaml
 import subprocess
 import importlib.util
 import fcntl
+import time
+import random
+from itertools import combinations
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List
 
 # Interface constants (from gpu-state-reader.py)
 INTERFACE_ORCHESTRATION = "orchestration"
@@ -46,6 +51,16 @@ except ImportError:
         sanitized = _re.sub(r'-+', '-', sanitized).strip('-')
         return sanitized
 
+# Import timing spans (ds01-trace); tracing is optional and never blocks allocation
+from ds01_trace_compat import span, traced, run_profiled
+
+# GPU interconnect topology (cached `nvidia-smi topo -m`); optional, placement
+# falls back to slot-by-slot suggestions without it
+try:
+    from host_gpu import gpu_topology, locality
+except ImportError:
+    gpu_topology = None
+
 # Dynamic import for gpu-state-reader.py
 spec = importlib.util.spec_from_file_location('gpu_state_reader', str(SCRIPT_DIR / 'gpu-state-reader.py'))
 gpu_state_module = importlib.util.module_from_spec(spec)
@@ -58,6 +73,20 @@ gpu_avail_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(gpu_avail_module)
 GPUAvailabilityChecker = gpu_avail_module.GPUAvailabilityChecker
 
+# Dynamic import for gpu-claims.py (per-physical-GPU lock shards)
+spec = importlib.util.spec_from_file_location('gpu_claims', str(SCRIPT_DIR / 'gpu-claims.py'))
+gpu_claims_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gpu_claims_module)
+GPUClaimLedger = gpu_claims_module.GPUClaimLedger
+
+# Optimistic commit: re-plan this many times if a concurrent request wins a slot
+COMMIT_ATTEMPTS = 8
+COMMIT_BACKOFF = 0.05  # seconds, scaled by attempt number (jittered)
+
+# Topology-aware placement tries every subset of GPUs with free MIG slots
+# (2^n); beyond this many GPUs fall back to slot-by-slot suggestions
+PLACEMENT_MAX_GPUS = 10
+
 
 class GPUAllocatorSmart:
     def __init__(self, config_path="/opt/ds01-infra/config/resource-limits.yaml"):
@@ -71,13 +100,23 @@ class GPUAllocatorSmart:
         self.log_file = self.log_dir / "gpu-allocations.log"
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
-        # Lock file for preventing race conditions
+        # Per-physical-GPU claims (commit step of each allocation)
+        gpu_config = self.config.get('gpu_allocation', {})
+        self.claims = GPUClaimLedger(
+            ttl=gpu_config.get('claim_ttl_seconds', gpu_claims_module.DEFAULT_CLAIM_TTL)
+        )
+
+        # Global lock file - only used if the claim ledger is unusable
         self.lock_file = self.log_dir / "gpu-allocator.lock"
 
+        # Locality of the last topology-planned allocate_multi_gpu() (CLI reporting)
+        self.placement = None
+
     def _acquire_lock(self):
-        """Acquire exclusive lock for GPU allocation operations"""
+        """Acquire global exclusive lock (fallback when claims are unavailable)"""
         self._lock_fd = open(self.lock_file, 'w')
-        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        with span("allocator.lock_wait"):
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
 
     def _release_lock(self):
         """Release the exclusive lock"""
@@ -86,6 +125,7 @@ class GPUAllocatorSmart:
             self._lock_fd.close()
             self._lock_fd = None
 
+    @traced("allocator.load_config")
     def _load_config(self) -> dict:
         """Load YAML configuration"""
         if not self.config_path.exists():
@@ -156,14 +196,47 @@ class GPUAllocatorSmart:
         # MIG slots have decimal (e.g., "1.0", "1.2")
         return '.' not in str(gpu_slot)
 
+    def _get_mig_limits(self, username: str) -> Tuple[int, int]:
+        """
+        Get user's MIG-equivalent limits (unlimited mapped to 999).
+
+        Returns:
+            Tuple of (max_mig_total, max_mig_per_container)
+        """
+        limits = self._get_user_limits(username)
+
+        # Get max MIG instances total and per container
+        max_mig_total = limits.get('max_mig_instances', 2)
+        # Handle None (unlimited) - check key presence, not truthiness
+        if 'max_mig_per_container' in limits:
+            max_mig_per_container = limits['max_mig_per_container']
+        elif 'max_gpus_per_container' in limits:
+            max_mig_per_container = limits['max_gpus_per_container']
+        else:
+            max_mig_per_container = 1
+
+        # Handle unlimited (None or "unlimited" string)
+        if max_mig_total is None or max_mig_total == "unlimited":
+            max_mig_total = 999
+        if max_mig_per_container is None or max_mig_per_container == "unlimited":
+            max_mig_per_container = 999
+
+        return max_mig_total, max_mig_per_container
+
     def _get_user_priority(self, username: str) -> int:
         """Get user's allocation priority"""
         limits = self._get_user_limits(username)
         return limits.get('priority', 10)
 
+    @traced("allocator.log_event")
     def _log_event(self, event_type: str, user: str, container: str,
-                   gpu_id: Optional[str] = None, reason: str = ""):
-        """Log event to centralized event logger (events.jsonl)"""
+                   gpu_id: Optional[str] = None, reason: str = "", migs: Optional[int] = None):
+        """
+        Log event to centralized event logger (events.jsonl).
+
+        migs: MIG-equivalents requested, recorded on capacity rejections so
+        demand that was turned away can be sized (mig-advisor.py).
+        """
         # Map legacy event types to new event types
         event_map = {
             "ALLOCATED": "gpu.allocated",
@@ -181,6 +254,8 @@ class GPUAllocatorSmart:
             args.append(f'gpu={gpu_id}')
         if reason:
             args.append(f'reason={reason}')
+        if migs:
+            args.append(f'migs={migs}')
 
         # Log to centralized event system (fail silently - logging should never block allocation)
         try:
@@ -236,12 +311,67 @@ class GPUAllocatorSmart:
         except subprocess.CalledProcessError:
             return INTERFACE_DOCKER
 
+    def _plan_and_commit(self, username: str, container: str, plan, reject):
+        """
+        Plan an allocation outside any lock, then claim its slots.
+
+        plan(snapshot) returns (slots, result, reason): the slots to claim
+        (empty for rejections / ALREADY_ALLOCATED), the value to return and
+        the ALLOCATED log reason. On conflict (another request claimed one
+        of the slots or changed this user's usage) the plan is redone
+        against a fresh snapshot. reject(reason) builds the give-up result.
+
+        Falls back to the global allocator lock if the claim directory
+        is unusable.
+        """
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                snapshot = self.claims.snapshot(username)
+                slots, result, reason = plan(snapshot)
+                if not slots:
+                    return result
+                committed = self.claims.commit(slots, container, username, snapshot)
+            except OSError as e:
+                print(f"Warning: GPU claim ledger unavailable ({e}), using global lock", file=sys.stderr)
+                return self._plan_locked(username, container, plan)
+
+            if committed:
+                self._log_event("ALLOCATED", username, container, ','.join(slots), reason)
+                return result
+
+            with span("allocator.commit_conflict", attempt=attempt):
+                time.sleep(random.uniform(0, COMMIT_BACKOFF * attempt))
+
+        reason = f"ALLOCATION_CONFLICT (gave up after {COMMIT_ATTEMPTS} attempts)"
+        self._log_event("REJECTED", username, container, reason=reason)
+        return reject(reason)
+
+    def _plan_locked(self, username: str, container: str, plan):
+        """Legacy path: plan under the global allocator lock, without claims."""
+        try:
+            self._acquire_lock()
+            slots, result, reason = plan({})
+            if slots:
+                self._log_event("ALLOCATED", username, container, ','.join(slots), reason)
+            return result
+        finally:
+            self._release_lock()
+
+    def _pending_for_user(self, snapshot: Dict, username: str, container: str,
+                          user_allocs: list) -> list:
+        """Slots claimed by the user's other containers not yet visible in Docker."""
+        known = [alloc['container'] for alloc in user_allocs] + [container]
+        pending = self.claims.user_pending(snapshot, username, known)
+        return [{'container': c, 'gpu_slot': s} for c, slots in pending.items() for s in slots]
+
+    @traced("allocator.allocate")
     def allocate_gpu(self, username: str, container: str,
                      max_gpus: Optional[int] = None,
                      require_full_gpu: bool = False) -> Tuple[Optional[str], str]:
         """
         Allocate GPU for a container (stateless - reads from Docker).
-        Uses file lock to prevent race conditions.
+        Plans without a lock, then claims the slot on its physical GPU shard
+        (see gpu-claims.py), retrying if a concurrent request got there first.
 
         Args:
             username: User requesting GPU
@@ -254,53 +384,55 @@ class GPUAllocatorSmart:
             gpu_id: Slot ID (e.g., "1.2") if successful, None if failed
             status_message: "SUCCESS", "ALREADY_ALLOCATED", or error reason
         """
-        try:
-            # Acquire exclusive lock to prevent race conditions
-            self._acquire_lock()
+        # Get user's limits
+        limits = self._get_user_limits(username)
 
+        if max_gpus is None:
+            max_gpus = limits.get('max_mig_instances', 1)
+            # Handle unlimited
+            if max_gpus is None or max_gpus == "unlimited":
+                max_gpus = 999
+
+        def plan(snapshot):
             # Check if container already has GPU (read from Docker)
             container_gpu = self.state_reader.get_container_gpu(container)
             if container_gpu:
                 gpu_slot = container_gpu['gpu_slot']
-                return gpu_slot, "ALREADY_ALLOCATED"
-
-            # Get user's limits
-            limits = self._get_user_limits(username)
-
-            if max_gpus is None:
-                max_gpus = limits.get('max_mig_instances', 1)
-                # Handle unlimited
-                if max_gpus is None or max_gpus == "unlimited":
-                    max_gpus = 999
+                return [], (gpu_slot, "ALREADY_ALLOCATED"), None
 
             # Check full GPU permission if requesting full GPU
             if require_full_gpu and not self._can_use_full_gpu(username):
                 group = limits.get('_group', 'default')
                 reason = f"FULL_GPU_NOT_ALLOWED (group={group}, allow_full_gpu=false)"
                 self._log_event("REJECTED", username, container, reason=reason)
-                return None, reason
+                return [], (None, reason), None
 
-            # Check user's current GPU count
+            # Check user's current GPU count (Docker + claims not yet in Docker)
             user_allocs = self.state_reader.get_user_allocations(username)
-            current_count = len(user_allocs)
+            pending = self._pending_for_user(snapshot, username, container, user_allocs)
+            current_count = len(user_allocs) + len({p['container'] for p in pending})
 
             if current_count >= max_gpus:
                 reason = f"USER_AT_LIMIT ({current_count}/{max_gpus})"
                 self._log_event("REJECTED", username, container, reason=reason)
-                return None, reason
+                return [], (None, reason), None
 
-            # Find available GPU
+            # Find available GPU, skipping slots claimed by in-flight requests
             # Pass allow_full_gpu to availability checker so it can filter appropriately
             allow_full = self._can_use_full_gpu(username)
             suggestion = self.availability_checker.suggest_gpu_for_user(
                 username, max_gpus, self._get_user_priority(username),
-                require_full_gpu=require_full_gpu, allow_full_gpu=allow_full
+                require_full_gpu=require_full_gpu, allow_full_gpu=allow_full,
+                exclude_slots=self.claims.claimed_slots(snapshot, exclude_container=container)
             )
 
             if not suggestion['success']:
                 reason = suggestion['error']
-                self._log_event("REJECTED", username, container, reason=reason)
-                return None, reason
+                migs = 1
+                if require_full_gpu:
+                    migs = self.config.get('gpu_allocation', {}).get('mig_instances_per_gpu', 4)
+                self._log_event("REJECTED", username, container, reason=reason, migs=migs)
+                return [], (None, reason), None
 
             gpu_slot = suggestion['gpu_slot']
 
@@ -308,24 +440,22 @@ class GPUAllocatorSmart:
             if self._is_full_gpu(gpu_slot) and not allow_full:
                 reason = f"FULL_GPU_NOT_ALLOWED (got slot {gpu_slot}, user cannot use full GPUs)"
                 self._log_event("REJECTED", username, container, reason=reason)
-                return None, reason
+                return [], (None, reason), None
 
-            # Log allocation
             reason = f"ALLOCATED (user has {current_count + 1}/{max_gpus} GPUs)"
-            self._log_event("ALLOCATED", username, container, gpu_slot, reason)
-
-            return gpu_slot, "SUCCESS"
+            return [gpu_slot], (gpu_slot, "SUCCESS"), reason
 
-        finally:
-            # Always release the lock
-            self._release_lock()
+        return self._plan_and_commit(username, container, plan,
+                                     reject=lambda reason: (None, reason))
 
+    @traced("allocator.allocate_multi")
     def allocate_multi_gpu(self, username: str, container: str,
                            num_migs: int = 1,
                            prefer_full_gpu: bool = False) -> Tuple[list, int, str]:
         """
         Allocate multiple MIG instances or full GPUs for a container.
         Supports distributed containers across multiple GPU slots.
+        Claims all chosen slots in one commit (locking only their physical GPUs).
 
         Args:
             username: User requesting GPUs
@@ -339,58 +469,44 @@ class GPUAllocatorSmart:
             actual_mig_equiv: Total MIG-equivalents allocated (full GPU = mig_instances_per_gpu)
             status_message: "SUCCESS", "ALREADY_ALLOCATED", or error reason
         """
-        try:
-            # Acquire exclusive lock
-            self._acquire_lock()
+        # Get mig_instances_per_gpu from config
+        gpu_config = self.config.get('gpu_allocation', {})
+        mig_per_gpu = gpu_config.get('mig_instances_per_gpu', 4)
 
+        # Get user's MIG limits (total and per container)
+        max_mig_total, max_mig_per_container = self._get_mig_limits(username)
+        self.placement = None
+
+        def plan(snapshot):
             # Check if container already has GPU(s)
             container_gpu = self.state_reader.get_container_gpu(container)
             if container_gpu:
                 gpu_slot = container_gpu['gpu_slot']
-                return [gpu_slot], 1, "ALREADY_ALLOCATED"
-
-            # Get user's limits
-            limits = self._get_user_limits(username)
-
-            # Get mig_instances_per_gpu from config
-            gpu_config = self.config.get('gpu_allocation', {})
-            mig_per_gpu = gpu_config.get('mig_instances_per_gpu', 4)
-
-            # Get max MIG instances total and per container
-            max_mig_total = limits.get('max_mig_instances', 2)
-            # Handle None (unlimited) - check key presence, not truthiness
-            if 'max_mig_per_container' in limits:
-                max_mig_per_container = limits['max_mig_per_container']
-            elif 'max_gpus_per_container' in limits:
-                max_mig_per_container = limits['max_gpus_per_container']
-            else:
-                max_mig_per_container = 1
-
-            # Handle unlimited (None or "unlimited" string)
-            if max_mig_total is None or max_mig_total == "unlimited":
-                max_mig_total = 999
-            if max_mig_per_container is None or max_mig_per_container == "unlimited":
-                max_mig_per_container = 999
+                return [], ([gpu_slot], 1, "ALREADY_ALLOCATED"), None
 
             # Check per-container limit
             if num_migs > max_mig_per_container:
                 reason = f"EXCEEDS_CONTAINER_LIMIT ({num_migs}>{max_mig_per_container})"
                 self._log_event("REJECTED", username, container, reason=reason)
-                return [], 0, reason
+                return [], ([], 0, reason), None
 
-            # Check user's current usage
+            # Check user's current usage (Docker + claims not yet in Docker)
             user_allocs = self.state_reader.get_user_allocations(username)
-            current_mig_equiv = self._calculate_mig_equivalents(user_allocs, mig_per_gpu)
+            pending = self._pending_for_user(snapshot, username, container, user_allocs)
+            current_mig_equiv = self._calculate_mig_equivalents(user_allocs + pending, mig_per_gpu)
             remaining_migs = max_mig_total - current_mig_equiv
 
             if num_migs > remaining_migs:
                 reason = f"EXCEEDS_TOTAL_LIMIT ({num_migs}+{current_mig_equiv}>{max_mig_total})"
                 self._log_event("REJECTED", username, container, reason=reason)
-                return [], 0, reason
+                return [], ([], 0, reason), None
 
             # Check full GPU permission
             can_use_full = self._can_use_full_gpu(username)
 
+            # Slots claimed by in-flight requests are never suggested
+            claimed = self.claims.claimed_slots(snapshot, exclude_container=container)
+
             # Determine allocation strategy
             allocated_slots = []
             total_mig_equiv = 0
@@ -404,7 +520,7 @@ class GPUAllocatorSmart:
                     suggestion = self.availability_checker.suggest_gpu_for_user(
                         username, max_mig_total, self._get_user_priority(username),
                         require_full_gpu=True, allow_full_gpu=True,
-                        exclude_slots=allocated_slots
+                        exclude_slots=claimed + allocated_slots
                     )
                     if suggestion['success']:
                         # Handle virtual full GPU (all MIG slots from one physical GPU)
@@ -427,23 +543,35 @@ class GPUAllocatorSmart:
                     suggestion = self.availability_checker.suggest_gpu_for_user(
                         username, max_mig_total, self._get_user_priority(username),
                         require_full_gpu=False, allow_full_gpu=can_use_full,
-                        exclude_slots=allocated_slots
+                        exclude_slots=claimed + allocated_slots
                     )
                     if suggestion['success']:
                         allocated_slots.append(suggestion['gpu_slot'])
                         total_mig_equiv += 1
                     else:
-                        # Can't allocate remaining, release what we got and fail
+                        # Can't allocate remaining - nothing claimed yet, just fail
                         reason = suggestion.get('error', 'NO_GPU_AVAILABLE')
-                        self._log_event("REJECTED", username, container, reason=reason)
-                        return [], 0, reason
+                        self._log_event("REJECTED", username, container, reason=reason, migs=num_migs)
+                        return [], ([], 0, reason), None
             else:
-                # Allocate MIGs first (default behavior)
+                # Allocate MIGs first (default behavior): co-locate the slices
+                # on one GPU, else on the closest set of GPUs
+                placement = self._place_multi_mig(num_migs, claimed) if num_migs > 1 else None
+                if placement:
+                    allocated_slots = placement['slots']
+                    total_mig_equiv = num_migs
+                    self.placement = placement
+                    score = 'n/a' if placement['locality'] is None else placement['locality']
+                    slots_str = ','.join(allocated_slots)
+                    reason = (f"ALLOCATED ({total_mig_equiv} MIG-equiv, slots: {slots_str}, "
+                              f"locality: {placement['link']} {score})")
+                    return allocated_slots, (allocated_slots, total_mig_equiv, "SUCCESS"), reason
+
                 for _ in range(num_migs):
                     suggestion = self.availability_checker.suggest_gpu_for_user(
                         username, max_mig_total, self._get_user_priority(username),
                         require_full_gpu=False, allow_full_gpu=can_use_full,
-                        exclude_slots=allocated_slots
+                        exclude_slots=claimed + allocated_slots
                     )
                     if suggestion['success']:
                         slot = suggestion['gpu_slot']
@@ -455,23 +583,312 @@ class GPUAllocatorSmart:
                             total_mig_equiv += 1
                     else:
                         reason = suggestion.get('error', 'NO_GPU_AVAILABLE')
-                        self._log_event("REJECTED", username, container, reason=reason)
-                        return [], 0, reason
+                        self._log_event("REJECTED", username, container, reason=reason, migs=num_migs)
+                        return [], ([], 0, reason), None
 
             if not allocated_slots:
                 reason = "NO_GPU_AVAILABLE"
-                self._log_event("REJECTED", username, container, reason=reason)
-                return [], 0, reason
+                self._log_event("REJECTED", username, container, reason=reason, migs=num_migs)
+                return [], ([], 0, reason), None
 
-            # Log allocation
             slots_str = ','.join(allocated_slots)
             reason = f"ALLOCATED ({total_mig_equiv} MIG-equiv, slots: {slots_str})"
-            self._log_event("ALLOCATED", username, container, slots_str, reason)
+            return allocated_slots, (allocated_slots, total_mig_equiv, "SUCCESS"), reason
 
-            return allocated_slots, total_mig_equiv, "SUCCESS"
+        return self._plan_and_commit(username, container, plan,
+                                     reject=lambda reason: ([], 0, reason))
 
-        finally:
-            self._release_lock()
+    def _place_multi_mig(self, num_migs: int, exclude: List[str]) -> Optional[Dict]:
+        """
+        Topology-aware placement of a multi-MIG request (one availability scan).
+
+        Picks the set of physical GPUs whose free MIG slots cover the request
+        with the best locality (worst link between any two of them, see
+        host_gpu.locality): one GPU beats an NVLink pair, which beats GPUs
+        on one PCIe switch, then one host bridge / NUMA node, then SYS.
+        Ties go to fewer GPUs, then the tightest fit, so partly used GPUs
+        fill up and whole GPUs stay free. Slots are taken from the chosen
+        GPU with the fewest free slots first.
+
+        Args:
+            num_migs: MIG slots wanted
+            exclude: Slots claimed by in-flight requests
+
+        Returns:
+            {'slots', 'gpus', 'link', 'locality'} (locality None when the
+            topology is unknown), or None to fall back to slot-by-slot
+            suggestions (no topology lib, not enough free MIG slots, too
+            many GPUs to search)
+        """
+        if gpu_topology is None:
+            return None
+
+        free_migs: Dict[str, List[str]] = {}
+        for slot, info in self.availability_checker.get_available_gpus().items():
+            if slot not in exclude and not self._is_full_gpu(slot):
+                free_migs.setdefault(info['physical_gpu'], []).append(slot)
+        gpus = sorted(free_migs, key=int)
+        if sum(len(slots) for slots in free_migs.values()) < num_migs or len(gpus) > PLACEMENT_MAX_GPUS:
+            return None
+
+        with span("allocator.placement", gpus=len(gpus), num_migs=num_migs):
+            topology = gpu_topology()
+            best = None
+            for size in range(1, len(gpus) + 1):
+                for chosen in combinations(gpus, size):
+                    free = sum(len(free_migs[g]) for g in chosen)
+                    if free < num_migs:
+                        continue
+                    score, link = locality(topology, chosen)
+                    key = (-(score or 0.0), size, free - num_migs, [int(g) for g in chosen])
+                    if best is None or key < best[0]:
+                        best = (key, chosen, score, link)
+
+        _, chosen, score, link = best
+        slots = []
+        for gpu in sorted(chosen, key=lambda g: (len(free_migs[g]), int(g))):
+            for slot in sorted(free_migs[gpu], key=lambda s: int(s.split('.')[1])):
+                if len(slots) < num_migs:
+                    slots.append(slot)
+        return {'slots': slots, 'gpus': sorted({s.split('.')[0] for s in slots}, key=int),
+                'link': link, 'locality': score}
+
+    @traced("allocator.allocate_batch")
+    def allocate_batch(self, requests: List[Dict], all_or_nothing: bool = False,
+                       pack: bool = True) -> List[Dict]:
+        """
+        Allocate GPUs for many containers in one pass (e.g. a lab group).
+
+        All requests are planned jointly against one nvidia-smi inventory and
+        one Docker scan per attempt, and claimed under one lock acquisition
+        (see gpu-claims.py). Like _plan_and_commit(), each attempt reads
+        Docker after taking its claim snapshot, so a claim released since
+        the snapshot belongs to a container the scan already shows.
+        Requests are served in order; per-user and per-container limits from
+        _get_user_limits() apply across the whole batch.
+
+        Args:
+            requests: List of {'user', 'container', 'num_migs' (default 1)}
+            all_or_nothing: Allocate nothing unless every request succeeds
+            pack: Fill partially used physical GPUs first so whole GPUs stay
+                  free (False: spread over the least-allocated GPUs)
+
+        Returns:
+            List of per-request results in request order:
+            {'user', 'container', 'gpu_slots', 'docker_ids', 'mig_equiv', 'status'}
+            status: "SUCCESS", "ALREADY_ALLOCATED", or error reason
+        """
+        gpu_config = self.config.get('gpu_allocation', {})
+        mig_per_gpu = gpu_config.get('mig_instances_per_gpu', 4)
+
+        # Hardware inventory once; Docker allocations are re-read on every attempt
+        hardware = {
+            'migs': self.availability_checker.mig_instances(),
+            'gpus': self.availability_checker.physical_gpus(),
+            'mig_per_gpu': mig_per_gpu,
+        }
+
+        def scan():
+            return dict(hardware, allocations=self.state_reader.get_all_allocations())
+
+        users = sorted({r['user'] for r in requests})
+
+        results: List[Optional[Dict]] = [None] * len(requests)
+        todo = list(range(len(requests)))
+
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                snapshot = self.claims.snapshot(*users)
+            except OSError as e:
+                print(f"Warning: GPU claim ledger unavailable ({e}), using global lock", file=sys.stderr)
+                try:
+                    self._acquire_lock()
+                    planned = self._plan_batch(requests, todo, {}, scan(), all_or_nothing, pack)
+                    for i, result in planned.items():
+                        results[i] = result
+                    self._log_batch(results, todo)
+                finally:
+                    self._release_lock()
+                return results
+
+            planned = self._plan_batch(requests, todo, snapshot, scan(), all_or_nothing, pack)
+            for i, result in planned.items():
+                results[i] = result
+
+            to_claim = [i for i in todo if planned[i]['status'] == "SUCCESS"]
+            entries = [(planned[i]['gpu_slots'], requests[i]['container'], requests[i]['user'])
+                       for i in to_claim]
+            try:
+                conflicts = self.claims.commit_many(entries, snapshot, all_or_nothing) if entries else []
+            except OSError:
+                conflicts = list(range(len(entries)))
+
+            conflicted = [to_claim[c] for c in conflicts]
+            if conflicted and all_or_nothing:
+                # Nothing was written: re-plan every claimable request
+                conflicted = to_claim
+            self._log_batch(results, [i for i in todo if i not in conflicted])
+
+            if not conflicted:
+                return results
+
+            todo = conflicted
+            with span("allocator.commit_conflict", attempt=attempt, requests=len(todo)):
+                time.sleep(random.uniform(0, COMMIT_BACKOFF * attempt))
+
+        reason = f"ALLOCATION_CONFLICT (gave up after {COMMIT_ATTEMPTS} attempts)"
+        for i in todo:
+            results[i].update(gpu_slots=[], docker_ids=[], mig_equiv=0, status=reason)
+            self._log_event("REJECTED", requests[i]['user'], requests[i]['container'], reason=reason)
+        return results
+
+    def _plan_batch(self, requests: List[Dict], todo: List[int], snapshot: Dict,
+                    inventory: Dict, all_or_nothing: bool, pack: bool) -> Dict[int, Dict]:
+        """Plan the requests at indexes todo against one snapshot (no side effects)."""
+        mig_per_gpu = inventory['mig_per_gpu']
+        allocations = inventory['allocations']
+
+        def equiv(slot):
+            return mig_per_gpu if self._is_full_gpu(slot) else 1
+
+        # Claims held by batch containers being (re)planned are replaced on commit
+        replanning = {requests[i]['container'] for i in todo}
+        claims = [
+            (slot, claim)
+            for shard, state in snapshot.items() if shard.startswith('gpu-')
+            for slot, claim in state['claims'].items()
+            if claim.get('container') not in replanning
+        ]
+
+        # Current usage: Docker labels + claims of containers Docker doesn't show yet
+        container_slots: Dict[str, List[str]] = {}
+        user_equiv: Dict[str, int] = {}
+        for slot, info in allocations.items():
+            for container in info['containers']:
+                container_slots.setdefault(container, []).append(slot)
+            for user, count in info['users'].items():
+                user_equiv[user] = user_equiv.get(user, 0) + equiv(slot) * count
+        for slot, claim in claims:
+            if claim.get('container') not in container_slots:
+                user = claim.get('user')
+                user_equiv[user] = user_equiv.get(user, 0) + equiv(slot)
+
+        # Free pool, grouped by physical GPU
+        used = set(allocations) | {slot for slot, _ in claims}
+        free_migs: Dict[str, List[str]] = {}
+        for slot, info in inventory['migs'].items():
+            if slot not in used:
+                free_migs.setdefault(info['physical_gpu'], []).append(slot)
+        mig_gpus = {info['physical_gpu'] for info in inventory['migs'].values()}
+        free_full = sorted((g for g in inventory['gpus'] if g not in mig_gpus and g not in used), key=int)
+
+        planned = {}
+        for i in todo:
+            request = requests[i]
+            user, container = request['user'], request['container']
+            num_migs = int(request.get('num_migs', 1))
+            result = {'user': user, 'container': container, 'gpu_slots': [],
+                      'docker_ids': [], 'mig_equiv': 0, 'status': ''}
+            planned[i] = result
+
+            if container in container_slots:
+                result['gpu_slots'] = sorted(container_slots[container])
+                result['mig_equiv'] = sum(equiv(s) for s in result['gpu_slots'])
+                result['status'] = "ALREADY_ALLOCATED"
+                continue
+
+            max_mig_total, max_mig_per_container = self._get_mig_limits(user)
+            current = user_equiv.get(user, 0)
+            if num_migs > max_mig_per_container:
+                result['status'] = f"EXCEEDS_CONTAINER_LIMIT ({num_migs}>{max_mig_per_container})"
+                continue
+            if num_migs > max_mig_total - current:
+                result['status'] = f"EXCEEDS_TOTAL_LIMIT ({num_migs}+{current}>{max_mig_total})"
+                continue
+
+            slots = self._place_batch_request(num_migs, free_migs, free_full,
+                                              self._can_use_full_gpu(user), mig_per_gpu, pack)
+            if not slots:
+                result['status'] = "NO_GPU_AVAILABLE"
+                continue
+
+            for slot in slots:
+                if self._is_full_gpu(slot):
+                    free_full.remove(slot)
+                else:
+                    free_migs[slot.split('.')[0]].remove(slot)
+            result['gpu_slots'] = slots
+            result['mig_equiv'] = sum(equiv(s) for s in slots)
+            result['status'] = "SUCCESS"
+            user_equiv[user] = current + result['mig_equiv']
+
+        if all_or_nothing:
+            failed = [i for i in todo if planned[i]['status'] not in ("SUCCESS", "ALREADY_ALLOCATED")]
+            if failed:
+                for i in todo:
+                    if planned[i]['status'] == "SUCCESS":
+                        planned[i].update(gpu_slots=[], mig_equiv=0,
+                                          status=f"ABORTED (all-or-nothing: {len(failed)} request(s) failed)")
+
+        # Docker IDs from the inventory already read (no extra nvidia-smi calls)
+        uuids = {slot: info['uuid'] for slot, info in inventory['migs'].items()}
+        uuids.update({gpu: info['uuid'] for gpu, info in inventory['gpus'].items()})
+        for result in planned.values():
+            result['docker_ids'] = [uuids.get(s, s) for s in result['gpu_slots']]
+
+        return planned
+
+    def _place_batch_request(self, num_migs: int, free_migs: Dict[str, List[str]],
+                             free_full: List[str], allow_full: bool,
+                             mig_per_gpu: int, pack: bool) -> List[str]:
+        """
+        Choose slots for one batch request (MIG slots first, then full GPUs).
+
+        pack=True takes MIG slots from the physical GPUs with the fewest free
+        slots first, so untouched GPUs stay available as whole GPUs. Full
+        GPUs only cover whole multiples of mig_per_gpu so a request never
+        exceeds the MIG-equivalents its limits were checked against.
+
+        Returns:
+            List of slots, or [] if the request cannot be satisfied
+        """
+        def gpu_order(gpu):
+            free = len(free_migs[gpu])
+            return (free if pack else -free, int(gpu))
+
+        def slot_order(slot):
+            gpu, device = slot.split('.')
+            return (int(gpu), int(device))
+
+        chosen = []
+        needed = num_migs
+        for gpu in sorted(free_migs, key=gpu_order):
+            for slot in sorted(free_migs[gpu], key=slot_order):
+                if needed <= 0:
+                    break
+                chosen.append(slot)
+                needed -= 1
+
+        if needed > 0 and allow_full:
+            for gpu in free_full:
+                if needed < mig_per_gpu:
+                    break
+                chosen.append(gpu)
+                needed -= mig_per_gpu
+
+        return chosen if needed <= 0 else []
+
+    def _log_batch(self, results: List[Optional[Dict]], indexes: List[int]):
+        """Log ALLOCATED/REJECTED events for settled batch requests."""
+        for i in indexes:
+            result = results[i]
+            if result['status'] == "SUCCESS":
+                slots_str = ','.join(result['gpu_slots'])
+                self._log_event("ALLOCATED", result['user'], result['container'], slots_str,
+                                f"ALLOCATED (batch, {result['mig_equiv']} MIG-equiv, slots: {slots_str})")
+            elif result['status'] != "ALREADY_ALLOCATED":
+                self._log_event("REJECTED", result['user'], result['container'],
+                                reason=result['status'])
 
     def _calculate_mig_equivalents(self, allocations: list, mig_per_gpu: int) -> int:
         """Calculate total MIG-equivalents from a list of allocations."""
@@ -484,6 +901,7 @@ class GPUAllocatorSmart:
                 total += 1
         return total
 
+    @traced("allocator.docker_id")
     def get_docker_id(self, gpu_slot: str) -> str:
         """
         Get Docker-compatible device ID for a GPU slot.
@@ -535,7 +953,8 @@ class GPUAllocatorSmart:
     def release_gpu(self, container: str) -> Tuple[Optional[str], str]:
         """
         Release GPU from container (stateless - just logs event).
-        Actual release happens when container is removed from Docker.
+        Actual release happens when container is removed from Docker;
+        any pending claim (container never created) is dropped here.
 
         Args:
             container: Container name
@@ -543,10 +962,21 @@ class GPUAllocatorSmart:
         Returns:
             Tuple of (gpu_id, status_message)
         """
+        try:
+            claimed = self.claims.release(container)
+        except OSError:
+            claimed = {}
+
         # Read GPU assignment from Docker
         container_gpu = self.state_reader.get_container_gpu(container)
 
         if not container_gpu:
+            if claimed:
+                slots_str = ','.join(sorted(claimed))
+                username = next(iter(claimed.values())).get('user', 'unknown')
+                self._log_event("RELEASED", username, container, slots_str,
+                                "RELEASED (pending claim, container not created)")
+                return slots_str, "SUCCESS"
             return None, "NOT_ALLOCATED"
 
         gpu_slot = container_gpu['gpu_slot']
@@ -723,6 +1153,8 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description='GPU Allocator Smart - Stateless GPU allocation')
+    parser.add_argument('--profile', action='store_true',
+                        help='Dump a cProfile of this invocation (see ds01-trace)')
     subparsers = parser.add_subparsers(dest='command', help='Command')
 
     # allocate command
@@ -754,12 +1186,48 @@ def main():
     parser_multi.add_argument('num_migs', type=int, help='Number of MIG-equivalents to allocate')
     parser_multi.add_argument('--prefer-full', action='store_true', help='Prefer full GPUs over MIGs')
 
+    # allocate-batch command (provision a whole lab group in one pass)
+    parser_batch = subparsers.add_parser('allocate-batch', help='Allocate GPUs for many containers in one pass')
+    parser_batch.add_argument('requests_file',
+                              help='JSON list of {user, container, num_migs} or lines "user container [num_migs]" ("-" for stdin)')
+    parser_batch.add_argument('--all-or-nothing', action='store_true',
+                              help='Allocate nothing unless every request can be satisfied')
+    parser_batch.add_argument('--spread', action='store_true',
+                              help='Spread over least-allocated GPUs instead of packing')
+    parser_batch.add_argument('--json', action='store_true', help='Output per-request results as JSON')
+
     args = parser.parse_args()
 
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
+    run_profiled(run_command, f"allocator-{args.command}", args.profile, args)
+
+
+def read_batch_requests(source: str) -> List[Dict]:
+    """Parse allocate-batch input: a JSON list, or lines of "user container [num_migs]"."""
+    text = sys.stdin.read() if source == '-' else Path(source).read_text()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+
+    requests = []
+    for line in text.splitlines():
+        fields = line.split('#', 1)[0].split()
+        if not fields:
+            continue
+        if len(fields) < 2:
+            raise ValueError(f"Invalid request line: {line.strip()}")
+        requests.append({
+            'user': fields[0],
+            'container': fields[1],
+            'num_migs': int(fields[2]) if len(fields) > 2 else 1,
+        })
+    return requests
+
+
+def run_command(args):
+    """Execute a parsed CLI command"""
     allocator = GPUAllocatorSmart()
 
     if args.command == 'allocate':
@@ -825,6 +1293,9 @@ def main():
             print(f"GPU_SLOTS={slots_str}")
             print(f"DOCKER_IDS={docker_ids_str}")  # For mlc-create-wrapper parsing
             print(f"MIG_EQUIV={mig_equiv}")
+            if allocator.placement:
+                score = allocator.placement['locality']
+                print(f"LOCALITY={'unknown' if score is None else score} ({allocator.placement['link']})")
         elif reason == "ALREADY_ALLOCATED":
             slots_str = ','.join(gpu_slots)
             docker_ids = [allocator.get_docker_id(slot) for slot in gpu_slots]
@@ -836,6 +1307,33 @@ def main():
             print(f"✗ Allocation failed: {reason}")
             sys.exit(1)
 
+    elif args.command == 'allocate-batch':
+        try:
+            requests = read_batch_requests(args.requests_file)
+        except (OSError, ValueError) as e:
+            print(f"✗ Invalid batch input: {e}")
+            sys.exit(1)
+
+        results = allocator.allocate_batch(requests, all_or_nothing=args.all_or_nothing,
+                                           pack=not args.spread)
+        ok = [r for r in results if r['status'] in ("SUCCESS", "ALREADY_ALLOCATED")]
+
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                slots_str = ','.join(r['gpu_slots'])
+                if r['status'] == "SUCCESS":
+                    print(f"✓ {r['container']}: {slots_str} ({r['mig_equiv']} MIG-equiv)")
+                elif r['status'] == "ALREADY_ALLOCATED":
+                    print(f"⚠ {r['container']}: already has {slots_str}")
+                else:
+                    print(f"✗ {r['container']}: {r['status']}")
+            print(f"\n{len(ok)}/{len(results)} request(s) allocated")
+
+        if len(ok) < len(results):
+            sys.exit(1)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1 @@
+gpu-claims.py
\ No newline at end of file
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Image Resolver - Skip-Pull-When-Present Image Resolution for mlc-patched.py
+
+mlc-patched.py used to run `docker pull` for every catalog image on every
+create (and for custom images when missing). On the lab network each pull
+is a registry round-trip even when the image is already local, and a
+registry outage blocked creates outright.
+
+Resolution checks the local image first and only pulls according to a
+refresh policy:
+- never          - use the local image; pull only if it is missing
+- if-older-than  - pull if the local copy was pulled longer ago than max_age
+- always         - pull on every create (the old behaviour)
+
+A small index (/var/log/ds01/image-index.json, root-owned 0644) records,
+per image reference, the image ID and when root (prefetch cron) last pulled
+it. Any docker user can `docker tag` an arbitrary image under a catalog
+name, so a local copy is only trusted when its ID matches the index entry,
+or when its RepoDigests show it was pulled from that same repository (then
+the tag time Docker recorded is its age). Anything else is pulled again,
+whatever the policy. If a refresh pull fails but a trusted copy is present
+locally, it is used with a warning.
+
+Prefetch warms the most-created catalog images (container.created events
+in events.jsonl) ahead of time, e.g. from cron during off-hours, so
+daytime creates find them local and fresh.
+
+Usage:
+    image-resolver.py status [--json]
+    image-resolver.py resolve <image> [--policy never|if-older-than|always]
+    image-resolver.py prefetch [--top N] [--since 30d] [--dry-run]
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import span
+
+from ds01_core import parse_duration
+from root_state import read_root_json, write_root_json
+
+CONFIG_PATH = Path("/opt/ds01-infra/config/resource-limits.yaml")
+INDEX_FILE = Path("/var/log/ds01/image-index.json")
+CATALOG_FILE = Path("/opt/ds01-infra/aime-ml-containers/ml_images.repo")
+EVENTS_DIR = Path("/var/log/ds01")
+
+POLICIES = ('never', 'if-older-than', 'always')
+
+# needs_pull() reasons for which there is no usable local copy to fall back on
+NOT_LOCAL = "not present locally"
+UNTRUSTED = "local copy was not pulled from the registry"
+
+DEFAULT_CONFIG = {
+    'refresh_policy': 'if-older-than',
+    'max_age': '7d',
+    'prefetch_top': 5,
+    'prefetch_lookback': '30d',
+}
+
+
+def load_config(config_path: Path = CONFIG_PATH) -> Dict:
+    """Read the image_resolution section of resource-limits.yaml (with defaults)."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        import yaml
+        with open(config_path) as f:
+            config.update((yaml.safe_load(f) or {}).get('image_resolution') or {})
+    except (ImportError, IOError, OSError):
+        pass
+    if config['refresh_policy'] not in POLICIES:
+        config['refresh_policy'] = DEFAULT_CONFIG['refresh_policy']
+    return config
+
+
+def catalog_images(catalog_file: Path = CATALOG_FILE) -> Optional[set]:
+    """Docker images listed in ml_images.repo, or None if the catalog is unavailable."""
+    try:
+        with open(catalog_file) as f:
+            return {line.split(',')[3].strip() for line in f if line.count(',') >= 3}
+    except (IOError, OSError):
+        return None
+
+
+def _repository(image: str) -> str:
+    """Repository part of an image reference, as Docker lists it in RepoDigests."""
+    repo = image.split('@', 1)[0]
+    if ':' in repo.rsplit('/', 1)[-1]:
+        repo = repo.rsplit(':', 1)[0]
+    for prefix in ('docker.io/library/', 'docker.io/'):
+        if repo.startswith(prefix):
+            return repo[len(prefix):]
+    return repo
+
+
+def _parse_tag_time(value: str) -> Optional[float]:
+    """Epoch seconds of a Docker timestamp (None for Docker's zero time)."""
+    if not value or value.startswith('0001-'):
+        return None
+    value = re.sub(r'\.\d+', '', value.strip()).replace('Z', '+00:00')
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class ImageResolver:
+    """Resolve image references against local images and a pull index."""
+
+    def __init__(self, index_path: Path = INDEX_FILE, docker_bin: str = 'docker'):
+        self.index_path = Path(index_path)
+        self.docker_bin = docker_bin
+
+    def _docker(self, *args) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker_bin, *args], capture_output=True, text=True)
+
+    def load_index(self) -> Dict[str, Dict]:
+        """Pull index, or {} if missing or not root-owned."""
+        index = read_root_json(self.index_path)
+        return index if isinstance(index, dict) else {}
+
+    def _record_pull(self, image: str, image_id: str):
+        """Record a successful pull in the index (root only, best-effort)."""
+        index = self.load_index()
+        index[image] = {'id': image_id, 'pulled_at': time.time()}
+        write_root_json(self.index_path, index, indent=2, sort_keys=True)
+
+    def local_image(self, image: str) -> Optional[Dict]:
+        """
+        Local state of an image reference.
+
+        Returns:
+            {'id': image ID, 'trusted': bool, 'pulled_at': epoch or None if
+            unknown}, or None if not local
+        """
+        result = self._docker('image', 'inspect', '--format',
+                              '{{.Id}}|{{.Metadata.LastTagTime}}|{{json .RepoDigests}}', image)
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        image_id, _, rest = result.stdout.strip().partition('|')
+        tag_time, _, digests = rest.partition('|')
+        entry = self.load_index().get(image)
+        if entry and entry.get('id') == image_id:
+            return {'id': image_id, 'trusted': True, 'pulled_at': entry.get('pulled_at')}
+        try:
+            repos = {_repository(d) for d in json.loads(digests) or []}
+        except (ValueError, TypeError, AttributeError):
+            repos = set()
+        if _repository(image) in repos:
+            return {'id': image_id, 'trusted': True, 'pulled_at': _parse_tag_time(tag_time)}
+        return {'id': image_id, 'trusted': False, 'pulled_at': None}
+
+    def needs_pull(self, image: str, policy: str, max_age: int) -> Tuple[bool, str]:
+        """
+        Decide whether image must be pulled under policy.
+
+        Args:
+            max_age: Seconds (if-older-than only; -1 = never stale)
+
+        Returns:
+            (pull?, reason)
+        """
+        local = self.local_image(image)
+        if local is None:
+            return True, NOT_LOCAL
+        if not local['trusted']:
+            return True, UNTRUSTED
+        if policy == 'always':
+            return True, "refresh policy 'always'"
+        if policy == 'if-older-than' and max_age >= 0:
+            if local['pulled_at'] is None:
+                return True, "local copy has unknown age"
+            age = time.time() - local['pulled_at']
+            if age > max_age:
+                return True, f"local copy is {age / 86400:.1f} days old"
+        return False, "present locally"
+
+    def pull(self, image: str, quiet: bool = False) -> bool:
+        """Pull image (progress goes to the terminal unless quiet) and index it."""
+        with span("mlc.image_pull", image=image) as s:
+            result = subprocess.run([self.docker_bin, 'pull', image],
+                                    capture_output=quiet, text=True)
+            s['ok'] = result.returncode == 0
+        if result.returncode != 0:
+            return False
+        local = self._docker('image', 'inspect', '--format', '{{.Id}}', image)
+        if local.returncode == 0:
+            self._record_pull(image, local.stdout.strip())
+        return True
+
+    def resolve(self, image: str, policy: str = DEFAULT_CONFIG['refresh_policy'],
+                max_age: int = 7 * 86400, quiet: bool = False,
+                decision: Optional[Tuple[bool, str]] = None) -> str:
+        """
+        Make image available locally according to policy.
+
+        Args:
+            decision: needs_pull() result the caller already has (skips a
+                second `docker image inspect`)
+
+        Returns:
+            'present' (used local copy), 'pulled', 'stale' (refresh failed,
+            trusted local copy used) or 'failed' (not available)
+        """
+        with span("mlc.image_resolve", policy=policy) as s:
+            pull, reason = decision or self.needs_pull(image, policy, max_age)
+            s['pull'] = pull
+            if not pull:
+                s['outcome'] = 'present'
+                return 'present'
+            present = reason not in (NOT_LOCAL, UNTRUSTED)
+            if self.pull(image, quiet=quiet):
+                s['outcome'] = 'pulled'
+            else:
+                s['outcome'] = 'stale' if present else 'failed'
+            return s['outcome']
+
+    def prefetch(self, images: List[str], policy: str, max_age: int,
+                 dry_run: bool = False) -> Dict[str, str]:
+        """Resolve each image quietly; returns image -> outcome ('would-pull' in dry-run)."""
+        outcomes = {}
+        for image in images:
+            if dry_run:
+                pull, _ = self.needs_pull(image, policy, max_age)
+                outcomes[image] = 'would-pull' if pull else 'present'
+            else:
+                outcomes[image] = self.resolve(image, policy, max_age, quiet=True)
+        return outcomes
+
+
+def prefetch_candidates(top: int, lookback_days: float, events_dir: Path = EVENTS_DIR,
+                        catalog: Optional[set] = None) -> List[str]:
+    """Most-created catalog images over the lookback window (events.jsonl)."""
+    from warm_pool import image_demand
+
+    demand = image_demand(events_dir, lookback_days=lookback_days)
+    ranked = sorted(demand.items(), key=lambda item: (-item[1]['total'], item[0]))
+    images = [image for image, _ in ranked if catalog is None or image in catalog]
+    return images[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DS01 image resolution and prefetch")
+    sub = parser.add_subparsers(dest='command')
+    status_parser = sub.add_parser('status', help="Show indexed images and their age")
+    status_parser.add_argument('--json', action='store_true', help="Output JSON")
+    resolve_parser = sub.add_parser('resolve', help="Make an image available per refresh policy")
+    resolve_parser.add_argument('image')
+    resolve_parser.add_argument('--policy', choices=POLICIES, default=None)
+    prefetch_parser = sub.add_parser('prefetch', help="Warm the most-created catalog images")
+    prefetch_parser.add_argument('--top', type=int, default=None, help="Number of images")
+    prefetch_parser.add_argument('--since', default=None, help="Event history window (e.g. 30d)")
+    prefetch_parser.add_argument('--dry-run', action='store_true', help="Show what would be pulled")
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    config = load_config()
+    max_age = parse_duration(config['max_age'])
+    resolver = ImageResolver(docker_bin='/usr/bin/docker')
+
+    if args.command == 'status':
+        index = resolver.load_index()
+        if args.json:
+            print(json.dumps({'policy': config['refresh_policy'], 'max_age': config['max_age'],
+                              'index': index}, indent=2))
+            return
+        print(f"Refresh policy: {config['refresh_policy']} (max age {config['max_age']})")
+        now = time.time()
+        for image, entry in sorted(index.items()):
+            print(f"  {image}  pulled {(now - entry['pulled_at']) / 86400:.1f}d ago  {entry['id'][:19]}")
+        if not index:
+            print("  (no images pulled through DS01 yet)")
+
+    elif args.command == 'resolve':
+        outcome = resolver.resolve(args.image, args.policy or config['refresh_policy'], max_age)
+        print(f"{args.image}: {outcome}")
+        sys.exit(1 if outcome == 'failed' else 0)
+
+    elif args.command == 'prefetch':
+        started_at = time.time()
+        top = args.top if args.top is not None else int(config['prefetch_top'])
+        since = parse_duration(args.since or config['prefetch_lookback'])
+        images = prefetch_candidates(top, max(since, 0) / 86400, catalog=catalog_images())
+        outcomes = resolver.prefetch(images, config['refresh_policy'], max_age, dry_run=args.dry_run)
+        for image, outcome in outcomes.items():
+            print(f"  {image}: {outcome}")
+        print(f"Prefetched {len(outcomes)} images ({time.time() - started_at:.1f}s)")
+        sys.exit(1 if 'failed' in outcomes.values() else 0)
+
+
+if __name__ == "__main__":
+    main()
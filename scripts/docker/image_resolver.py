@@ -0,0 +1 @@
+image-resolver.py
\ No newline at end of file
@@ -26,6 +26,14 @@ ORIGINAL_MLC="$INFRA_ROOT/aime-ml-containers/mlc-create"  # Fallback for v1
 # Source username sanitization library for LDAP/SSSD support
 source "$INFRA_ROOT/scripts/lib/username-utils.sh"
 
+# Phase timing (ds01-trace --phases) - no-op if the library is unavailable
+if [ -f "$INFRA_ROOT/scripts/lib/ds01-trace.sh" ]; then
+    source "$INFRA_ROOT/scripts/lib/ds01-trace.sh"
+else
+    ds01_phase_begin() { :; }
+    ds01_phase_end() { :; }
+fi
+
 # Colors for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -75,6 +83,8 @@ ${BLUE}Options:${NC}
   --cpu-only     Create CPU-only container (no GPU)
   --show-limits  Show your resource limits
   --dry-run      Show what would be created without creating
+  --pull=<when>  Re-pull a local image: never, if-older-than, always (default: config)
+  --profile      Dump cProfile data for the allocator and mlc-patched.py (see ds01-trace)
   -h, --help     Show this help message
 
 ${BLUE}Examples:${NC}
@@ -159,6 +169,7 @@ CPU_ONLY=false
 DRY_RUN=false
 NUM_MIGS=1              # Number of MIG-equivalents to request (default: 1)
 PREFER_FULL_GPU=false   # Prefer full GPU over MIGs
+PULL_POLICY=""          # Image refresh policy (empty = image_resolution.refresh_policy)
 
 # Parse container name
 CONTAINER_NAME="$1"
@@ -221,6 +232,20 @@ while [[ $# -gt 0 ]]; do
         --dry-run)
             DRY_RUN=true
             ;;
+        --pull=*)
+            PULL_POLICY="${1#*=}"
+            case "$PULL_POLICY" in
+                never|if-older-than|always) ;;
+                *)
+                    log_error "Invalid --pull policy: $PULL_POLICY (use never, if-older-than or always)"
+                    exit 1
+                    ;;
+            esac
+            ;;
+        --profile)
+            # Inherited by gpu_allocator_v2.py and mlc-patched.py (ds01_trace.run_profiled)
+            export DS01_PROFILE=1
+            ;;
         -h|--help)
             print_usage
             exit 0
@@ -274,6 +299,19 @@ fi
 CURRENT_USER=$(whoami)
 USER_ID=$(id -u)
 
+# Request ID for ds01-trace: shared by every Python helper spawned below so
+# allocator, state reader, event logger and mlc-patched.py spans correlate.
+# Keep a caller-provided ID (e.g. from container-deploy).
+if [ -z "${DS01_REQUEST_ID:-}" ]; then
+    DS01_REQUEST_ID=$(tr -d '-' < /proc/sys/kernel/random/uuid 2>/dev/null | cut -c1-12)
+    DS01_REQUEST_ID="${DS01_REQUEST_ID:-$$-$(date +%s)}"
+fi
+export DS01_REQUEST_ID
+
+# End-to-end span, recorded on every exit path with the exit status
+ds01_phase_begin wrapper.total
+trap 'ds01_phase_end wrapper.total status=$?' EXIT
+
 # Validate container name
 if [[ -z "$CONTAINER_NAME" ]]; then
     log_error "Container name is required"
@@ -290,7 +328,10 @@ fi
 
 # Check if container already exists
 CONTAINER_TAG="${CONTAINER_NAME}._.$USER_ID"
-if docker ps -a --filter "name=^${CONTAINER_TAG}$" --format '{{.Names}}' | grep -q "^${CONTAINER_TAG}$"; then
+ds01_phase_begin wrapper.container_exists
+CONTAINER_EXISTS=$(docker ps -a --filter "name=^${CONTAINER_TAG}$" --format '{{.Names}}')
+ds01_phase_end wrapper.container_exists
+if [ "$CONTAINER_EXISTS" = "$CONTAINER_TAG" ]; then
     log_error "Container '$CONTAINER_NAME' already exists"
     log_info "Use container-remove to remove it first, or choose a different name"
     exit 1
@@ -305,7 +346,10 @@ if [ -n "$REQUESTED_GPU" ]; then
 fi
 
 # Run pre-flight checks
+# (docker info repeats the daemon check the docker ps above already did)
+ds01_phase_begin wrapper.preflight
 preflight_checks
+ds01_phase_end wrapper.preflight hint=skippable
 
 # Ensure workspace directory exists
 mkdir -p "$WORKSPACE_DIR"
@@ -319,10 +363,12 @@ if [ -f "$RESOURCE_PARSER" ] && [ -f "$CONFIG_FILE" ]; then
     log_info "Loading resource limits from configuration..."
     # Capture exit codes separately to avoid $? being overwritten
     set +e
+    ds01_phase_begin wrapper.resource_limits
     RESOURCE_LIMITS=$(python3 "$RESOURCE_PARSER" "$CURRENT_USER" --docker-args 2>/dev/null)
     LIMITS_EXIT=$?
     USER_GROUP=$(python3 "$RESOURCE_PARSER" "$CURRENT_USER" --group 2>/dev/null)
     GROUP_EXIT=$?
+    ds01_phase_end wrapper.resource_limits hint=parallel:limits
     set -e
 
     # Use defaults if either command failed or returned empty
@@ -348,11 +394,17 @@ fi
 # Username is sanitized for systemd compatibility (LDAP users may have @ and . chars)
 USER_SLICE_SCRIPT="$SCRIPT_DIR/../system/create-user-slice.sh"
 SANITIZED_USER=$(sanitize_username_for_slice "$CURRENT_USER")
-if [ -f "$USER_SLICE_SCRIPT" ]; then
+if [ -f "/etc/systemd/system/ds01-${USER_GROUP}-${SANITIZED_USER}.slice" ]; then
+    # Pre-provisioned (provision-user-slices.py) or created earlier - no sudo/reload needed
+    log_info "User slice ready: ds01-${USER_GROUP}-${SANITIZED_USER}.slice"
+elif [ -f "$USER_SLICE_SCRIPT" ]; then
     log_info "Ensuring user slice exists: ds01-${USER_GROUP}-${SANITIZED_USER}.slice"
+    ds01_phase_begin wrapper.user_slice
     if sudo "$USER_SLICE_SCRIPT" "$USER_GROUP" "$CURRENT_USER" 2>/dev/null; then
+        ds01_phase_end wrapper.user_slice
         log_info "User slice ready"
     else
+        ds01_phase_end wrapper.user_slice status=failed
         log_warning "Could not create user slice (will use group slice instead)"
         # Fall back to group slice if user slice creation fails
         RESOURCE_LIMITS=$(echo "$RESOURCE_LIMITS" | sed "s/ds01-${USER_GROUP}-${SANITIZED_USER}.slice/ds01-${USER_GROUP}.slice/")
@@ -367,30 +419,33 @@ fi
 # CHECK CONTAINER LIMIT BEFORE GPU ALLOCATION
 # =============================================================================
 if [ -f "$RESOURCE_PARSER" ]; then
+    ds01_phase_begin wrapper.container_limit
     MAX_CONTAINERS=$(python3 "$RESOURCE_PARSER" "$CURRENT_USER" --max-containers 2>/dev/null || echo "3")
 
     # Skip check if unlimited
+    CURRENT_CONTAINERS=""
     if [ "$MAX_CONTAINERS" != "unlimited" ] && [ "$MAX_CONTAINERS" != "null" ] && [ -n "$MAX_CONTAINERS" ]; then
         # Count user's current containers (including stopped ones)
         # Use aime.mlc.USER label which contains the username
         CURRENT_CONTAINERS=$(docker ps -a --filter "label=aime.mlc.USER=$CURRENT_USER" --format "{{.ID}}" 2>/dev/null | wc -l)
+    fi
+    ds01_phase_end wrapper.container_limit hint=parallel:limits
 
-        if [ "$CURRENT_CONTAINERS" -ge "$MAX_CONTAINERS" ]; then
-            # Use friendly error messages
-            ERROR_MESSAGES="$SCRIPT_DIR/../lib/error-messages.sh"
+    if [ -n "$CURRENT_CONTAINERS" ] && [ "$CURRENT_CONTAINERS" -ge "$MAX_CONTAINERS" ]; then
+        # Use friendly error messages
+        ERROR_MESSAGES="$SCRIPT_DIR/../lib/error-messages.sh"
+        echo ""
+        if [ -f "$ERROR_MESSAGES" ]; then
+            source "$ERROR_MESSAGES"
+            show_limit_error "CONTAINER_LIMIT ($CURRENT_CONTAINERS/$MAX_CONTAINERS)" "$CURRENT_USER" "$CONTAINER_TAG"
+        else
+            log_error "Container limit reached: You have $CURRENT_CONTAINERS containers (limit: $MAX_CONTAINERS)"
             echo ""
-            if [ -f "$ERROR_MESSAGES" ]; then
-                source "$ERROR_MESSAGES"
-                show_limit_error "CONTAINER_LIMIT ($CURRENT_CONTAINERS/$MAX_CONTAINERS)" "$CURRENT_USER" "$CONTAINER_TAG"
-            else
-                log_error "Container limit reached: You have $CURRENT_CONTAINERS containers (limit: $MAX_CONTAINERS)"
-                echo ""
-                echo "To create a new container, first remove an existing one:"
-                echo "  container-list           # See your containers"
-                echo "  container-retire <name>  # Remove one"
-            fi
-            exit 1
+            echo "To create a new container, first remove an existing one:"
+            echo "  container-list           # See your containers"
+            echo "  container-retire <name>  # Remove one"
         fi
+        exit 1
     fi
 fi
 
@@ -416,8 +471,10 @@ else
 
         if [ -f "$GPU_ALLOCATOR" ] && [ -f "$RESOURCE_PARSER" ]; then
             # Get user's GPU limits and priority
+            ds01_phase_begin wrapper.gpu_limits
             MAX_GPUS=$(python3 "$RESOURCE_PARSER" "$CURRENT_USER" --max-gpus 2>/dev/null || echo "2")
             PRIORITY=$(python3 "$RESOURCE_PARSER" "$CURRENT_USER" --priority 2>/dev/null || echo "10")
+            ds01_phase_end wrapper.gpu_limits hint=parallel:limits
 
             # Convert "unlimited" to a large number for allocator
             if [ "$MAX_GPUS" = "unlimited" ] || [ "$MAX_GPUS" = "null" ]; then
@@ -434,8 +491,10 @@ else
                     ALLOC_CMD="$ALLOC_CMD --prefer-full"
                 fi
 
+                ds01_phase_begin wrapper.gpu_allocate
                 ALLOC_OUTPUT=$($ALLOC_CMD 2>&1)
                 ALLOC_EXIT=$?
+                ds01_phase_end wrapper.gpu_allocate status=$ALLOC_EXIT
 
                 if [ $ALLOC_EXIT -eq 0 ] && echo "$ALLOC_OUTPUT" | grep -q "✓ Allocated"; then
                     # Extract GPU slots and Docker IDs
@@ -482,8 +541,10 @@ else
                 # Single GPU allocation (original behavior)
                 log_info "Allocating GPU via gpu_allocator_v2.py (priority: $PRIORITY, max: $MAX_GPUS)..."
 
+                ds01_phase_begin wrapper.gpu_allocate
                 ALLOC_OUTPUT=$(python3 "$GPU_ALLOCATOR" allocate "$CURRENT_USER" "$CONTAINER_TAG" "$MAX_GPUS" "$PRIORITY" 2>&1)
                 ALLOC_EXIT=$?
+                ds01_phase_end wrapper.gpu_allocate status=$ALLOC_EXIT
 
                 if [ $ALLOC_EXIT -eq 0 ] && echo "$ALLOC_OUTPUT" | grep -q "✓ Allocated"; then
                     # Extract friendly GPU ID (for logging: "1.1", "2.0", etc.)
@@ -500,7 +561,10 @@ else
                         log_success "GPU $ALLOCATED_GPU allocated successfully"
 
                         # Check soft limits (warn at 80%+)
+                        # (the allocator has just computed this total itself)
+                        ds01_phase_begin wrapper.mig_total
                         CURRENT_MIG_TOTAL=$(python3 "$SCRIPT_DIR/gpu-state-reader.py" user-mig-total "$CURRENT_USER" 2>/dev/null || echo "0")
+                        ds01_phase_end wrapper.mig_total hint=skippable
                         CURRENT_MIG_TOTAL="${CURRENT_MIG_TOTAL//[^0-9]/}"
                         CURRENT_MIG_TOTAL="${CURRENT_MIG_TOTAL:-0}"
                         if [ "$MAX_GPUS" != "999" ] && [ "$MAX_GPUS" -gt 0 ] 2>/dev/null; then
@@ -585,6 +649,11 @@ if [ -n "$CUSTOM_IMAGE" ]; then
     log_info "Using custom image: $CUSTOM_IMAGE"
 fi
 
+# Add image refresh policy (optional, default from image_resolution config)
+if [ -n "$PULL_POLICY" ]; then
+    MLC_ARGS="$MLC_ARGS --pull $PULL_POLICY"
+fi
+
 # Add GPU argument (optional)
 if [ -n "$GPU_ARG" ]; then
     MLC_ARGS="$MLC_ARGS $GPU_ARG"
@@ -670,8 +739,10 @@ fi
 
 # Temporarily disable set -e to capture exit code and allow error handling
 set +e
+ds01_phase_begin wrapper.mlc_patched
 MLC_OUTPUT=$(python3 "$MLC_PATCHED" $MLC_ARGS 2>&1)
 MLC_EXIT_CODE=$?
+ds01_phase_end wrapper.mlc_patched status=$MLC_EXIT_CODE
 set -e
 
 if [ $MLC_EXIT_CODE -ne 0 ]; then
@@ -767,6 +838,8 @@ fi
 log_info "Applying resource limits to container..."
 
 # Verify container was created
+# (mlc-patched.py already exits non-zero when docker create fails)
+ds01_phase_begin wrapper.verify
 if ! docker inspect "$CONTAINER_TAG" &>/dev/null; then
     echo ""
     log_error "Container $CONTAINER_TAG was not created successfully"
@@ -809,11 +882,13 @@ if ! docker inspect "$CONTAINER_TAG" &>/dev/null; then
     echo ""
     exit 1
 fi
+ds01_phase_end wrapper.verify hint=skippable
 
 # === GPU ALLOCATION RACE CONDITION CHECK ===
 # Verify the GPU in the container matches what we allocated.
 # This prevents double-allocation when two processes allocate the same GPU
 # between lock release (in gpu_allocator_v2.py) and container creation.
+ds01_phase_begin wrapper.gpu_verify
 if [ -n "$DOCKER_ID" ]; then
     ACTUAL_GPU=$(docker inspect -f '{{index .Config.Labels "ds01.gpu.uuids"}}' "$CONTAINER_TAG" 2>/dev/null || echo "")
 
@@ -841,7 +916,11 @@ if [ -n "$DOCKER_ID" ]; then
         echo ""
         exit 1
     fi
+
+    # Container labels now record the allocation - drop the in-flight claim
+    python3 "$SCRIPT_DIR/gpu-claims.py" release "$CONTAINER_TAG" &>/dev/null || true
 fi
+ds01_phase_end wrapper.gpu_verify
 
 # Build docker update command
 UPDATE_CMD="docker update"
@@ -869,13 +948,28 @@ for arg in $RESOURCE_LIMITS; do
 done
 
 # Apply the update
+ds01_phase_begin wrapper.apply_limits
 if $UPDATE_CMD "$CONTAINER_TAG" &>/dev/null; then
+    ds01_phase_end wrapper.apply_limits
     log_info "Resource limits applied successfully"
 else
+    ds01_phase_end wrapper.apply_limits status=failed
     log_warning "Some resource limits could not be applied"
 fi
 
 # Stop container (user will start it with mlc-open)
+ds01_phase_begin wrapper.stop
 docker stop "$CONTAINER_TAG" &>/dev/null || true
+ds01_phase_end wrapper.stop
+
+# Log creation with the base image (warm-pool.py sizes its pool from these events)
+if command -v log_container_created &>/dev/null; then
+    BASE_IMAGE=$(docker inspect --format '{{index .Config.Labels "aime.mlc.DS01_BASE_IMAGE"}}' "$CONTAINER_TAG" 2>/dev/null || true)
+    log_container_created "$CURRENT_USER" "$CONTAINER_TAG" "${ALLOCATED_GPU:-}" "${DS01_INTERFACE:-atomic}" "$BASE_IMAGE"
+fi
 
-log_success "Container '$CONTAINER_NAME' created successfully!"
\ No newline at end of file
+log_success "Container '$CONTAINER_NAME' created successfully!"
+
+if [ -n "${DS01_PROFILE:-}" ]; then
+    log_info "Timing breakdown: ds01-trace --request $DS01_REQUEST_ID"
+fi
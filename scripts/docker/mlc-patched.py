@@ -75,6 +75,52 @@ except ImportError:
             sanitized = sanitized[:27].rstrip('_') + '_' + hash_suffix
         return sanitized
 
+# DS01 PATCH: Cached host GPU detection (falls back to `apt list --installed`)
+try:
+    import host_gpu
+except ImportError:
+    host_gpu = None
+
+# DS01 PATCH: Compiled ml_images.repo index (falls back to parsing the CSV)
+try:
+    import aime_catalog
+except ImportError:
+    aime_catalog = None
+
+# DS01 PATCH: Timing spans for ds01-trace (no-op if library not available)
+from ds01_trace_compat import span, traced, run_profiled
+
+import importlib.util
+
+def _load_ds01_module(name, filename):
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(os.path.dirname(os.path.realpath(__file__)), filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# DS01 PATCH: Warm pool of pre-prepared setup containers (optional, None if disabled)
+try:
+    warm_pool = _load_ds01_module("warm_pool", "warm-pool.py").WarmPool.from_config(docker_bin='docker')
+except Exception:
+    warm_pool = None
+
+# DS01 PATCH: Cache of committed user-setup images (optional, None if disabled)
+try:
+    _setup_cache_module = _load_ds01_module("setup_cache", "setup-cache.py")
+    setup_cache = _setup_cache_module.UserSetupCache.from_config()
+except Exception:
+    _setup_cache_module = None
+    setup_cache = None
+
+# DS01 PATCH: Skip-pull-when-present image resolution (optional)
+try:
+    _image_resolver_module = _load_ds01_module("image_resolver", "image-resolver.py")
+    image_resolver = _image_resolver_module.ImageResolver()
+except Exception:
+    _image_resolver_module = None
+    image_resolver = None
+
 # Set Default values  AIME mlc
 mlc_container_version = 4     # Version number of AIME MLC setup (mlc create). In version 4: data and models directories included
 mlc_version = "2.1.2"         # Version number of AIME MLC
@@ -248,6 +294,14 @@ def get_flags():
         help='Cgroup parent slice (e.g., ds01-admin.slice). '
              'Used for systemd resource management in DS01.'
     )
+    parser_create.add_argument(
+        '--pull',
+        type=str,
+        default=None,
+        choices=['never', 'if-older-than', 'always'],
+        help='When to pull an image that is already local: never, if-older-than '
+             '(image_resolution.max_age) or always. Default: image_resolution.refresh_policy.'
+    )
     parser_create.add_argument(
         '--ds01-label',
         action='append',
@@ -563,7 +617,12 @@ def extract_from_ml_images(filename, filter_architecture = None):
     """
     if filter_architecture is None:
         _, filter_architecture, _ = get_host_gpu_architecture()
-        
+
+    # DS01 PATCH: Read the compiled catalog index (rebuilt when the repo file changes)
+    catalog = aime_catalog.load_catalog(filename) if aime_catalog is not None else None
+    if catalog is not None:
+        return aime_catalog.frameworks_for(catalog, filter_architecture)
+
     frameworks_dict = {}
     headers = ['framework', 'version', 'architecture', 'docker image']
     separator = ";"
@@ -684,6 +743,14 @@ def get_gpu_architectures(filename):
         list: provides a list of the available gpu architectures.
     """
     
+    # DS01 PATCH: Read the compiled catalog index (rebuilt when the repo file changes)
+    catalog = aime_catalog.load_catalog(filename) if aime_catalog is not None else None
+    if catalog is not None:
+        if not catalog['architectures']:
+            print(f"{ERROR}No gpu architectures found.{RESET}")
+            exit(1)
+        return list(catalog['architectures'])
+
     # Creating a set to keep only unique items
     unique_architectures = set() 
     
@@ -807,6 +874,7 @@ def get_docker_image(version, images):
     raise ValueError("No version available") 
 
 
+@traced("mlc.host_arch")
 def get_host_gpu_architecture():
     """Detects the GPU architecture (CUDA or ROCm) installed on the host system.
 
@@ -822,6 +890,15 @@ def get_host_gpu_architecture():
 
     """    
     
+    # DS01 PATCH: Read the host capability cache (invalidated on dpkg/driver change)
+    if host_gpu is not None:
+        try:
+            with span("mlc.host_gpu_arch"):
+                return host_gpu.host_gpu_architecture()
+        except host_gpu.HostGpuError as e:
+            print(f"\n{ERROR}{e} {RESET}\n")
+            exit(1)
+
     try:
         # Run the apt command to get installed packages
         cuda_version_command = [
@@ -1047,6 +1124,7 @@ def run_docker_command_popen(command):
     stderr = process.communicate()  # Communicate handles interactive input/output
     return stderr, process.returncode
 
+@traced("mlc.image_pull")
 def run_docker_pull_image(docker_command):
     """Pull a docker image and return its output usign subprocess.run().
 
@@ -1398,7 +1476,8 @@ def build_docker_run_command(
         user_name, 
         user_id, 
         group_id,
-        dir_to_be_added
+        dir_to_be_added,
+        skip_package_install=False   # DS01 PATCH: Warm pool member already ran apt-get
     ):
     """Constructs a 'docker run' command based on the host GPU architecture and user setup.
 
@@ -1417,6 +1496,7 @@ def build_docker_run_command(
         user_name (str): Username to be created inside the container.
         user_id (int): User ID to assign.
         group_id (int): Group ID to assign.
+        skip_package_install (bool): Omit apt-get steps (done by warm-pool.py).
 
     Returns:
         list: A list representing the full Docker command to run in subprocess or shell.
@@ -1488,9 +1568,16 @@ def build_docker_run_command(
     bash_lines = [
         f'echo "export HOME=/home/{container_username}" >> /etc/skel/.bashrc;',
         f'echo "export PATH=\\"{dir_to_be_added}:\\$PATH\\"" >> /etc/skel/.bashrc;'
-        f"echo \"export PS1='[{validated_container_name}] \\$(whoami)@\\$(hostname):\\${{PWD#*}}$ '\" >> /etc/skel/.bashrc;",
-        "apt-get update -y > /dev/null 2>&1;",
-        "apt-get install sudo git -q -y > /dev/null 2>&1;",
+        # DS01 PATCH: Name comes from DS01_CONTAINER_NAME at runtime so the layer is reusable (setup-cache.py)
+        f"echo \"export PS1='[\\${{DS01_CONTAINER_NAME}}] \\$(whoami)@\\$(hostname):\\${{PWD#*}}$ '\" >> /etc/skel/.bashrc;",
+    ]
+    # DS01 PATCH: Package install is shared by all users of an image (warm pool runs it ahead)
+    if not skip_package_install:
+        bash_lines.extend([
+            "apt-get update -y > /dev/null 2>&1;",
+            "apt-get install sudo git -q -y > /dev/null 2>&1;",
+        ])
+    bash_lines.extend([
         # DS01 FIX: Robust user/group creation with conflict resolution
         # Step 1: Remove any existing group with same GID (prevents conflicts)
         f"echo 'DS01 DEBUG Step 1: Checking for GID {group_id} conflicts'; "
@@ -1543,7 +1630,7 @@ def build_docker_run_command(
         f"chown -R {user_id}:{group_id} /home/{container_username}/.local;",
         f"cp /etc/skel/.bashrc /home/{container_username}/.bashrc 2>/dev/null || true;",
         f"chown {user_id}:{group_id} /home/{container_username}/.bashrc 2>/dev/null || true;",
-    ]
+    ])
 
     # Add ROCm-specific line if needed
     if 'ROCM' in architecture:
@@ -1600,7 +1687,8 @@ def build_docker_create_command(
         shm_size=None,           # DS01 PATCH: Resource limits
         cgroup_parent=None,      # DS01 PATCH: Resource limits
         ds01_labels=None,        # DS01 PATCH: GPU tracking labels
-        skip_user_setup=False    # DS01 PATCH: Use original image if user pre-configured
+        skip_user_setup=False,   # DS01 PATCH: Use original image if user pre-configured
+        committed_image=None     # DS01 PATCH: Image from setup-cache.py (overrides <base>:latest)
     ):
     """Constructs a 'docker create' command customized for a machine learning container environment.
 
@@ -1654,8 +1742,11 @@ def build_docker_create_command(
         # ========== DS01 PATCH: DS01 Management Labels ==========
         '--label', f'{container_label}.DS01_MANAGED=true',
         '--label', f'{container_label}.CUSTOM_IMAGE={"" if selected_docker_image.startswith("aimehub/") else selected_docker_image}',
+        '--label', f'{container_label}.DS01_BASE_IMAGE={selected_docker_image}',  # Warm-pool demand (container.created image=)
         # VS Code Dev Containers integration - sets workspace folder when attaching
         '--label', f'devcontainer.workspaceFolder={workspace}',
+        # Container name for the prompt (PS1 in the user-setup layer reads it)
+        '-e', f'DS01_CONTAINER_NAME={validated_container_name}',
         # ========== END DS01 PATCH ==========
         '--user', f'{user_id}:{group_id}',
         '--tty',
@@ -1763,7 +1854,10 @@ def build_docker_create_command(
 
     # Assemble full command
     # DS01 FIX: Determine which image to use based on skip_user_setup flag
-    if skip_user_setup:
+    if committed_image:
+        # User-setup layer from setup-cache.py (hit or freshly committed)
+        image_with_tag = committed_image
+    elif skip_user_setup:
         # User was pre-configured in the image at build time (via image-create)
         # Use the original image directly - no docker commit was performed
         image_with_tag = selected_docker_image
@@ -2223,6 +2317,26 @@ def main():
                     print(f"\n{NEUTRAL}Custom image not found locally, attempting to pull...{RESET}\n")
                     docker_command_pull_image = ['docker', 'pull', selected_docker_image]
                     run_docker_pull_image(docker_command_pull_image)
+            elif image_resolver is not None:
+                # DS01 PATCH: Standard AIME catalog image - pull only per refresh policy
+                resolution = _image_resolver_module.load_config()
+                pull_policy = args.pull or resolution['refresh_policy']
+                max_age = _image_resolver_module.parse_duration(resolution['max_age'])
+                pull, reason = image_resolver.needs_pull(selected_docker_image, pull_policy, max_age)
+                if pull:
+                    print(f"\n{NEUTRAL}Acquiring container image ({reason}) ... {RESET}\n")
+                    outcome = image_resolver.resolve(selected_docker_image, pull_policy, max_age,
+                                                     decision=(pull, reason))
+                    if outcome == 'pulled':
+                        print(f"\n{INFO}Docker image pulled successfully.{RESET}")
+                    elif outcome == 'stale':
+                        print(f"\n{WARNING}Could not refresh image, using local copy:{RESET} {INPUT}{selected_docker_image}{RESET}")
+                    else:
+                        print(f"\n{ERROR}Docker pull image failed. Try mlc create again.{RESET}")
+                        exit(1)
+                else:
+                    print(f"\n{NEUTRAL}Using local image:{RESET} {INPUT}{selected_docker_image}{RESET} "
+                          f"{HINT}(pull policy: {pull_policy}){RESET}")
             else:
                 # Standard AIME catalog image - always pull to get latest
                 print(f"\n{NEUTRAL}Acquiring container image ... {RESET}\n")
@@ -2241,25 +2355,55 @@ def main():
             container_username_for_path = sanitize_username_for_container(user_name)
             dir_to_be_added = f'/home/{container_username_for_path}/.local/bin'
 
+            setup_run_args = (
+                architecture,
+                workspace_dir,
+                workspace,
+                container_tag,
+                args.num_gpus,
+                selected_docker_image,
+                validated_container_name,
+                user_name,
+                user_id,
+                group_id,
+                dir_to_be_added
+            )
+
+            # DS01 OPTIMIZATION: Reuse a committed user-setup image for the same
+            # (base image ID, UID, GID, setup script) - skips run + commit entirely
+            setup_key = None
+            cached_image = None
+            if not skip_user_setup and setup_cache is not None:
+                base_image_id = setup_cache.base_image_id(selected_docker_image)
+                if base_image_id:
+                    setup_script = build_docker_run_command(*setup_run_args)[-1]
+                    setup_key = _setup_cache_module.setup_key(base_image_id, user_id, group_id, setup_script)
+                    cached_image = setup_cache.lookup(setup_key)
+                    if cached_image:
+                        print(f"{NEUTRAL}Reusing cached user setup:{RESET} {INPUT}{cached_image}{RESET}")
+            if cached_image:
+                skip_user_setup = True
+
+            # DS01 OPTIMIZATION: Claim a warm-pool member that already ran the package step
+            warm_claimed = False
+            if not skip_user_setup and warm_pool is not None and 'CUDA' in architecture:
+                warm_claimed = warm_pool.claim(selected_docker_image, container_tag)
+
             # DS01 OPTIMIZATION: Skip user setup if image already has it configured
             if not skip_user_setup:
                 # Generating the Docker command for running
                 docker_prepare_container = build_docker_run_command(
-                    architecture,
-                    workspace_dir,
-                    workspace,
-                    container_tag,
-                    args.num_gpus,
-                    selected_docker_image,
-                    validated_container_name,
-                    user_name,
-                    user_id,
-                    group_id,
-                    dir_to_be_added
+                    *setup_run_args,
+                    skip_package_install=warm_claimed
                 )
 
                 # ToDo: compare subprocess.Popen with subprocess.run
-                result_run_cmd = subprocess.run(docker_prepare_container, capture_output=True, text=True )
+                with span("mlc.user_setup_run", warm=warm_claimed):
+                    if warm_claimed:
+                        # Same setup script (last argument), run inside the claimed member
+                        result_run_cmd = warm_pool.run_setup(container_tag, docker_prepare_container[-1])
+                    else:
+                        result_run_cmd = subprocess.run(docker_prepare_container, capture_output=True, text=True )
 
                 # DS01: Print user setup result for debugging
                 if 'User setup: FAILED' in result_run_cmd.stdout:
@@ -2283,7 +2427,25 @@ def main():
                         print(f"{HINT}stderr: {result_run_cmd.stderr[-300:]}{RESET}")
 
             # DS01 OPTIMIZATION: Skip commit if user is already configured in image
-            if not skip_user_setup:
+            if cached_image:
+                committed_image = cached_image
+            elif setup_key:
+                # Commit to the setup cache instead of overwriting <base>:latest
+                with span("mlc.user_setup_commit", cached=True):
+                    committed_image = setup_cache.store(container_tag, setup_key, selected_docker_image,
+                                                        user_id, group_id)
+                if not committed_image:
+                    print(f"{ERROR}Error committing container to image:{RESET}")
+                    print(f"  Command: docker commit {container_tag} {setup_cache.image_for(setup_key)}")
+                    if setup_cache.last_error:
+                        print(f"  Error: {setup_cache.last_error}")
+                    sys.exit(1)
+
+                # Remove the setup container, then keep the cache within its bounds
+                result_remove = subprocess.run(['docker', 'rm', container_tag], capture_output=True, text=True)
+                with span("mlc.setup_cache_prune"):
+                    setup_cache.prune()
+            elif not skip_user_setup:
                 # Commit the container: saves the current state of the container as a new image.
                 # DS01 FIX: Use :latest tag for consistency with image-create
                 # This ensures all DS01 images use the same tagging convention
@@ -2296,7 +2458,8 @@ def main():
                 bash_command_commit = [
                     'docker', 'commit', container_tag, committed_image
                 ]
-                result_commit = subprocess.run(bash_command_commit, capture_output=True, text=True)
+                with span("mlc.user_setup_commit"):
+                    result_commit = subprocess.run(bash_command_commit, capture_output=True, text=True)
 
                 # DS01 FIX: Check if commit succeeded
                 if result_commit.returncode != 0:
@@ -2364,11 +2527,13 @@ def main():
                 shm_size=getattr(args, 'shm_size', None),           # DS01 PATCH
                 cgroup_parent=getattr(args, 'cgroup_parent', None), # DS01 PATCH
                 ds01_labels=getattr(args, 'ds01_labels', []),       # DS01 PATCH
-                skip_user_setup=skip_user_setup                     # DS01 PATCH: Use original image if pre-configured
+                skip_user_setup=skip_user_setup,                    # DS01 PATCH: Use original image if pre-configured
+                committed_image=committed_image                     # DS01 PATCH: Setup-cache or committed image
             )
             
             # ToDo: compare subprocess.Popen with subprocess.run
-            result_create_cmd = subprocess.run(docker_create_cmd, capture_output= True, text=True)
+            with span("mlc.docker_create"):
+                result_create_cmd = subprocess.run(docker_create_cmd, capture_output= True, text=True)
 
             # DS01 PATCH: Check if container creation succeeded
             if result_create_cmd.returncode != 0:
@@ -2839,7 +3004,8 @@ def main():
    
              
 if __name__ == '__main__':
-    main()
+    # DS01 PATCH: DS01_PROFILE=1 dumps a cProfile of this invocation (ds01-trace)
+    run_profiled(main, "mlc-patched")
 
     
     
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Setup Cache - Reusable User-Setup Images for mlc-patched.py
+
+For images without a baked-in user, mlc-patched.py runs a setup container
+(user/group creation, sudoers, .bashrc), commits it and creates the real
+container from the result. The committed layer only depends on the base
+image, the user's UID/GID and the setup script, so it can be reused.
+
+Committed images are stored as ds01-user-setup:<key> where the key is a
+hash of (base image ID, UID, GID, setup-script hash). On a hit mlc-patched.py
+skips the run + commit + inspect + rm cycle; on a miss it commits to the
+cache tag instead of overwriting <base>:latest (which other users' creates
+also relied on).
+
+Each entry has a stamp file (mtime = last hit, so no locking is needed)
+recording the ID of the image that was committed. The key inputs are not
+secret and any docker user can tag an image ds01-user-setup:<key>, so a hit
+needs a stamp written by the current user (or root), not writable by anyone
+else, whose image ID still exists; the container is then created from that
+ID, never from the tag. Eviction removes least-recently-used entries beyond
+setup_cache.max_entries / max_size_gb; images still used by a container
+are kept (docker rmi without -f refuses them).
+
+Usage:
+    setup-cache.py list
+    setup-cache.py prune
+    setup-cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import span
+
+CONFIG_PATH = Path("/opt/ds01-infra/config/resource-limits.yaml")
+CACHE_DIR = Path("/var/log/ds01/setup-cache")
+CACHE_REPO = "ds01-user-setup"
+KEY_LABEL = "aime.mlc.DS01_SETUP_KEY"
+
+DEFAULT_CONFIG = {
+    'enabled': True,
+    'max_entries': 200,
+    'max_size_gb': 50,
+}
+
+
+def load_config(config_path: Path = CONFIG_PATH) -> Dict:
+    """Read the setup_cache section of resource-limits.yaml (with defaults)."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        import yaml
+        with open(config_path) as f:
+            config.update((yaml.safe_load(f) or {}).get('setup_cache') or {})
+    except (ImportError, IOError, OSError):
+        pass
+    return config
+
+
+def setup_key(base_image_id: str, user_id, group_id, setup_script: str) -> str:
+    """Content key of a user-setup layer."""
+    script_hash = hashlib.sha256(setup_script.encode()).hexdigest()
+    material = f"{base_image_id}|{user_id}|{group_id}|{script_hash}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class UserSetupCache:
+    """Cache of committed user-setup images keyed by setup_key()."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, docker_bin: str = 'docker',
+                 max_entries: int = DEFAULT_CONFIG['max_entries'],
+                 max_size_gb: float = DEFAULT_CONFIG['max_size_gb']):
+        self.cache_dir = Path(cache_dir)
+        self.docker_bin = docker_bin
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(float(max_size_gb) * 1024 ** 3)
+        self.last_error = ""
+
+    @classmethod
+    def from_config(cls, config_path: Path = CONFIG_PATH, **kwargs) -> Optional['UserSetupCache']:
+        """Cache configured from resource-limits.yaml, or None if disabled."""
+        config = load_config(config_path)
+        if not config.get('enabled'):
+            return None
+        return cls(max_entries=config['max_entries'], max_size_gb=config['max_size_gb'], **kwargs)
+
+    def _docker(self, *args) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker_bin, *args], capture_output=True, text=True)
+
+    @staticmethod
+    def image_for(key: str) -> str:
+        return f"{CACHE_REPO}:{key[:24]}"
+
+    def _stamp(self, key: str) -> Path:
+        return self.cache_dir / f"{key[:24]}.json"
+
+    def _ensure_dir(self):
+        # deploy.sh creates the real directory (root:docker 1730)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _record(self, key: str) -> Optional[Dict]:
+        """Stamp for key, if written by this user or root and writable by nobody else."""
+        stamp = self._stamp(key)
+        try:
+            st = stamp.stat()
+            if st.st_uid not in (0, os.geteuid()) or st.st_mode & 0o022:
+                return None
+            return json.loads(stamp.read_text())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def base_image_id(self, image: str) -> Optional[str]:
+        """Content-addressed ID of the base image (changes on re-pull)."""
+        result = self._docker('image', 'inspect', '--format', '{{.Id}}', image)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def touch(self, key: str, **info):
+        """Mark an entry as used now (best-effort)."""
+        stamp = self._stamp(key)
+        try:
+            self._ensure_dir()
+            if info or not stamp.exists():
+                stamp.write_text(json.dumps({'key': key, **info}))
+                os.chmod(stamp, 0o644)
+            else:
+                os.utime(stamp)
+        except (IOError, OSError):
+            pass
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the ID of the cached image for key (and mark it used), or None."""
+        with span("mlc.setup_cache_lookup") as s:
+            image_id = (self._record(key) or {}).get('image_id')
+            s['hit'] = False
+            if image_id:
+                result = self._docker('image', 'inspect', '--format',
+                                      f'{{{{.Id}}}}|{{{{index .Config.Labels "{KEY_LABEL}"}}}}', image_id)
+                s['hit'] = result.returncode == 0 and result.stdout.strip() == f"{image_id}|{key}"
+        if not s['hit']:
+            return None
+        self.touch(key)
+        return image_id
+
+    def store(self, container: str, key: str, base_image: str, user_id, group_id) -> Optional[str]:
+        """
+        Commit a finished setup container as the cache entry for key.
+
+        Returns:
+            ID of the committed image, or None if the commit failed
+        """
+        image = self.image_for(key)
+        result = self._docker(
+            'commit',
+            '--change', f'LABEL {KEY_LABEL}={key}',
+            '--change', f'LABEL aime.mlc.DS01_USER_ID={user_id}',
+            '--change', f'LABEL aime.mlc.DS01_GROUP_ID={group_id}',
+            container, image
+        )
+        image_id = result.stdout.strip()
+        if result.returncode != 0 or not image_id:
+            self.last_error = result.stderr
+            return None
+
+        # Size of the committed layer alone (base layers are shared)
+        history = self._docker('history', '--human=false', '--format', '{{.Size}}', image_id)
+        try:
+            size = int(history.stdout.split()[0])
+        except (IndexError, ValueError):
+            size = 0
+        self.touch(key, image=image, image_id=image_id, base_image=base_image, user_id=user_id,
+                   group_id=group_id, size=size, created=time.time())
+        return image_id
+
+    def entries(self) -> List[Dict]:
+        """
+        Cached images, least recently used first.
+
+        Returns:
+            List of {'image', 'key', 'size', 'last_used', ...}
+        """
+        result = self._docker('images', CACHE_REPO, '--format', '{{.Tag}}')
+        tags = set(result.stdout.split()) if result.returncode == 0 else set()
+        entries = []
+        for tag in tags:
+            stamp = self.cache_dir / f"{tag}.json"
+            try:
+                info = json.loads(stamp.read_text())
+                last_used = stamp.stat().st_mtime
+            except (IOError, OSError, ValueError):
+                info, last_used = {}, 0.0  # Unknown entries are evicted first
+            info.update(image=f"{CACHE_REPO}:{tag}", last_used=last_used)
+            info.setdefault('size', 0)
+            entries.append(info)
+        entries.sort(key=lambda e: (e['last_used'], e['image']))
+        return entries
+
+    def prune(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> List[str]:
+        """
+        Evict least-recently-used entries until within the entry and size bounds.
+
+        Returns:
+            Images removed
+        """
+        max_entries = self.max_entries if max_entries is None else max_entries
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        count = len(entries)
+        total = sum(e['size'] for e in entries)
+        removed = []
+        for entry in entries:
+            if count <= max_entries and total <= max_bytes:
+                break
+            if self._docker('rmi', entry['image']).returncode != 0:
+                continue  # Still used by a container
+            removed.append(entry['image'])
+            count -= 1
+            total -= entry['size']
+            try:
+                (self.cache_dir / f"{entry['image'].split(':', 1)[1]}.json").unlink()
+            except OSError:
+                pass
+        return removed
+
+
+def main():
+    """CLI interface"""
+    if len(sys.argv) < 2:
+        print("Usage: setup-cache.py <command>")
+        print("\nCommands:")
+        print("  list   - Show cached user-setup images (least recently used first)")
+        print("  prune  - Evict entries beyond setup_cache.max_entries / max_size_gb")
+        print("  clear  - Remove every entry not used by a container")
+        sys.exit(1)
+
+    config = load_config()
+    cache = UserSetupCache(docker_bin='/usr/bin/docker', max_entries=config['max_entries'],
+                           max_size_gb=config['max_size_gb'])
+    command = sys.argv[1]
+
+    if command == "list":
+        entries = cache.entries()
+        if not entries:
+            print("Setup cache is empty")
+            return
+        now = time.time()
+        for entry in entries:
+            age = f"{(now - entry['last_used']) / 3600:.1f}h ago" if entry['last_used'] else "unknown"
+            print(f"  {entry['image']}  uid={entry.get('user_id', '?')}  "
+                  f"{entry['size'] / 1024 ** 2:.0f} MB  used {age}  ({entry.get('base_image', '?')})")
+        total = sum(e['size'] for e in entries)
+        print(f"{len(entries)} entries, {total / 1024 ** 3:.2f} GB "
+              f"(limits: {cache.max_entries} entries, {config['max_size_gb']} GB)")
+
+    elif command in ("prune", "clear"):
+        if command == "clear":
+            removed = cache.prune(max_entries=0, max_bytes=0)
+        else:
+            removed = cache.prune()
+        print(f"Removed {len(removed)} cached images")
+        for image in removed:
+            print(f"  - {image}")
+
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+setup-cache.py
\ No newline at end of file
@@ -6,17 +6,30 @@ DS01 Container Ownership Sync
 Maintains a JSON file mapping container IDs to their owners for OPA authorization.
 This script runs periodically (via cron or systemd timer) to keep the mapping current.
 
+Watch mode is event-driven: after one full snapshot it applies Docker
+create/rename/destroy events to the in-memory map as they arrive (the
+event stream starts at the snapshot time, so nothing falls in between),
+which bounds staleness for new containers by event delivery rather than a
+polling interval. A full resync (including the admin group) runs every
+--resync seconds to recover from anything missed; if the event stream is
+unavailable it falls back to polling every --interval seconds.
+
+The file is written compactly and only when its content (everything but
+updated_at) changes, so OPA does not reload identical data.
+
 Output file: /var/lib/ds01/opa/container-owners.json
 
 Usage:
     sudo python3 sync-container-owners.py           # Update ownership mapping
     sudo python3 sync-container-owners.py --once    # Single update (for cron)
-    sudo python3 sync-container-owners.py --watch   # Continuous updates (for systemd)
+    sudo python3 sync-container-owners.py --watch   # Event-driven updates (for systemd)
 """
 
 import argparse
+import hashlib
 import json
 import os
+import select
 import subprocess
 import sys
 import time
@@ -28,7 +41,9 @@ OUTPUT_DIR = Path("/var/lib/ds01/opa")
 OUTPUT_FILE = OUTPUT_DIR / "container-owners.json"
 ADMIN_CACHE_FILE = OUTPUT_DIR / "admin-users.json"
 RESOURCE_LIMITS = Path("/opt/ds01-infra/config/resource-limits.yaml")
-WATCH_INTERVAL = 5  # seconds between updates in watch mode
+WATCH_INTERVAL = 5  # seconds between updates when polling (event stream unavailable)
+RESYNC_INTERVAL = 300  # seconds between full resyncs in event-driven watch mode
+SERVICE_USERS = ["ds01-dashboard"]  # Service accounts with full access
 
 
 def get_container_owner(labels: Dict[str, str]) -> Optional[str]:
@@ -143,10 +158,76 @@ def get_all_containers() -> list:
         return []
 
 
-def build_ownership_data() -> Dict[str, Any]:
+def container_entry(labels: Dict[str, str], name: str) -> Dict[str, Any]:
+    """Ownership entry for one container from its labels."""
+    return {
+        "owner": get_container_owner(labels),
+        "name": name,
+        "ds01_managed": labels.get("ds01.managed") == "true" or
+                        labels.get("aime.mlc.DS01_MANAGED") == "true"
+    }
+
+
+class OwnershipMap:
+    """Container ownership keyed by full container ID, updated from snapshots or Docker events."""
+
+    def __init__(self):
+        self.containers: Dict[str, Dict[str, Any]] = {}
+
+    def load(self, inspected: list):
+        """Replace the map with a full `docker inspect` snapshot."""
+        self.containers = {}
+        for container in inspected:
+            full_id = container.get("Id", "")
+            if full_id:
+                labels = container.get("Config", {}).get("Labels", {}) or {}
+                self.containers[full_id] = container_entry(labels, container.get("Name", "").lstrip("/"))
+
+    def apply_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply one `docker events` container event (create, rename, destroy).
+
+        Container events carry the container's labels and (new) name as actor
+        attributes, so no inspect is needed. Returns True if the map changed.
+        """
+        action = event.get("Action") or event.get("status", "")
+        actor = event.get("Actor") or {}
+        full_id = actor.get("ID") or event.get("id", "")
+        attributes = actor.get("Attributes") or {}
+        if not full_id:
+            return False
+        if action == "destroy":
+            return self.containers.pop(full_id, None) is not None
+        if action == "create":
+            entry = container_entry(attributes, attributes.get("name", "").lstrip("/"))
+        elif action == "rename" and full_id in self.containers:
+            entry = dict(self.containers[full_id], name=attributes.get("name", "").lstrip("/"))
+        else:
+            return False
+        changed = self.containers.get(full_id) != entry
+        self.containers[full_id] = entry
+        return changed
+
+    def lookup(self) -> Dict[str, Dict[str, Any]]:
+        """OPA lookup table: each entry under its short ID, full ID and name."""
+        containers = {}
+        for full_id, entry in self.containers.items():
+            containers[full_id[:12]] = entry
+            containers[full_id] = entry
+            if entry["name"]:
+                containers[entry["name"]] = entry
+        return containers
+
+
+def build_ownership_data(ownership: Optional[OwnershipMap] = None,
+                         admins: Optional[list] = None) -> Dict[str, Any]:
     """
     Build the complete ownership data structure for OPA.
 
+    Args:
+        ownership: Current map (default: a fresh snapshot of all containers)
+        admins: Admin users (default: resolved now)
+
     Returns:
         {
             "containers": {
@@ -162,38 +243,33 @@ def build_ownership_data() -> Dict[str, Any]:
             "updated_at": "<timestamp>"
         }
     """
-    containers = {}
-
-    for container in get_all_containers():
-        container_id = container.get("Id", "")[:12]  # Short ID
-        full_id = container.get("Id", "")
-        name = container.get("Name", "").lstrip("/")
-        labels = container.get("Config", {}).get("Labels", {}) or {}
-
-        owner = get_container_owner(labels)
-        ds01_managed = labels.get("ds01.managed") == "true" or \
-                       labels.get("aime.mlc.DS01_MANAGED") == "true"
-
-        # Store both short and full ID for lookup
-        entry = {
-            "owner": owner,
-            "name": name,
-            "ds01_managed": ds01_managed
-        }
-        containers[container_id] = entry
-        containers[full_id] = entry
-        # Also store by name for convenience
-        if name:
-            containers[name] = entry
+    if ownership is None:
+        ownership = OwnershipMap()
+        ownership.load(get_all_containers())
 
     return {
-        "containers": containers,
-        "admins": get_admin_users(),
-        "service_users": ["ds01-dashboard"],  # Service accounts with full access
+        "containers": ownership.lookup(),
+        "admins": get_admin_users() if admins is None else admins,
+        "service_users": SERVICE_USERS,
         "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     }
 
 
+def content_hash(data: Dict[str, Any]) -> str:
+    """Hash of the ownership data without its timestamp (what OPA decisions depend on)."""
+    content = {k: v for k, v in data.items() if k != "updated_at"}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _current_hash() -> Optional[str]:
+    """Content hash of the file on disk (None if missing or unreadable)."""
+    try:
+        with open(OUTPUT_FILE) as f:
+            return content_hash(json.load(f))
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+
+
 def write_ownership_data(data: Dict[str, Any]) -> bool:
     """
     Atomically write ownership data to file.
@@ -202,10 +278,10 @@ def write_ownership_data(data: Dict[str, Any]) -> bool:
     try:
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-        # Write to temp file first
+        # Write to temp file first (compact - OPA parses it on every reload)
         temp_file = OUTPUT_FILE.with_suffix(".tmp")
         with open(temp_file, "w") as f:
-            json.dump(data, f, indent=2)
+            json.dump(data, f, sort_keys=True, separators=(",", ":"))
 
         # Atomic rename
         temp_file.rename(OUTPUT_FILE)
@@ -219,28 +295,111 @@ def write_ownership_data(data: Dict[str, Any]) -> bool:
         return False
 
 
-def sync_once() -> bool:
-    """Perform a single sync operation."""
-    data = build_ownership_data()
-    success = write_ownership_data(data)
+class OwnershipWriter:
+    """Writes ownership data only when its content hash changes."""
+
+    def __init__(self):
+        self.last_hash = _current_hash()
 
-    if success:
+    def write(self, data: Dict[str, Any]) -> Optional[bool]:
+        """True if written, None if unchanged, False on error."""
+        digest = content_hash(data)
+        if digest == self.last_hash:
+            return None
+        if not write_ownership_data(data):
+            return False
+        self.last_hash = digest
+        return True
+
+
+def _report(data: Dict[str, Any], written: Optional[bool]):
+    if written:
         container_count = len([k for k in data["containers"] if len(k) == 12])  # Count short IDs only
-        admin_count = len(data["admins"])
-        print(f"Synced {container_count} containers, {admin_count} admins")
+        print(f"Synced {container_count} containers, {len(data['admins'])} admins", flush=True)
+
+
+def sync_once(writer: Optional[OwnershipWriter] = None) -> bool:
+    """Perform a single sync operation (skips the write if nothing changed)."""
+    data = build_ownership_data()
+    written = (writer or OwnershipWriter()).write(data)
+    if written is None:
+        print("Ownership data unchanged")
+    _report(data, written)
+    return written is not False
+
+
+def _event_stream(since: float) -> subprocess.Popen:
+    """`docker events` for container create/rename/destroy since a Unix timestamp, one JSON per line."""
+    return subprocess.Popen(
+        ["docker", "events", "--since", f"{since:.3f}", "--format", "{{json .}}",
+         "--filter", "type=container", "--filter", "event=create",
+         "--filter", "event=rename", "--filter", "event=destroy"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
 
-    return success
 
+def watch_events(ownership: OwnershipMap, writer: OwnershipWriter, admins: list,
+                 stream: subprocess.Popen, resync: float) -> bool:
+    """
+    Apply events from `stream` until the next full resync is due.
 
-def watch_mode(interval: int = None):
-    """Continuously sync ownership data."""
+    Each event that changes the map is written immediately (write-on-change).
+    Returns False if the stream ended (Docker restarted or events unavailable).
+    """
+    fd = stream.stdout.fileno()
+    buffer = b""
+    deadline = time.monotonic() + resync
+    while True:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return True
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            continue
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        changed = False
+        for line in lines:
+            try:
+                changed |= ownership.apply_event(json.loads(line))
+            except ValueError:
+                continue
+        if changed:
+            data = build_ownership_data(ownership, admins)
+            _report(data, writer.write(data))
+
+
+def watch_mode(interval: int = None, resync: int = None):
+    """Keep ownership data current from Docker events, with periodic full resyncs."""
     if interval is None:
         interval = WATCH_INTERVAL
-    print(f"Starting watch mode (interval: {interval}s)")
-    print(f"Output: {OUTPUT_FILE}")
+    if resync is None:
+        resync = RESYNC_INTERVAL
+    print(f"Starting watch mode (events, full resync every {resync}s)")
+    print(f"Output: {OUTPUT_FILE}", flush=True)
 
+    writer = OwnershipWriter()
+    ownership = OwnershipMap()
     while True:
-        sync_once()
+        # Full snapshot; the event stream starts at the snapshot time so no change falls in between
+        since = time.time()
+        ownership.load(get_all_containers())
+        admins = get_admin_users()
+        data = build_ownership_data(ownership, admins)
+        _report(data, writer.write(data))
+
+        stream = _event_stream(since)
+        try:
+            if watch_events(ownership, writer, admins, stream, resync):
+                continue
+        finally:
+            stream.kill()
+            stream.wait()
+        # Event stream unavailable - poll until the next attempt
+        print(f"Docker event stream ended, polling every {interval}s", file=sys.stderr, flush=True)
         time.sleep(interval)
 
 
@@ -262,13 +421,19 @@ def main():
         "--interval",
         type=int,
         default=WATCH_INTERVAL,
-        help=f"Watch interval in seconds (default: {WATCH_INTERVAL})"
+        help=f"Poll interval in seconds if Docker events are unavailable (default: {WATCH_INTERVAL})"
+    )
+    parser.add_argument(
+        "--resync",
+        type=int,
+        default=RESYNC_INTERVAL,
+        help=f"Full resync interval in watch mode, seconds (default: {RESYNC_INTERVAL})"
     )
 
     args = parser.parse_args()
 
     if args.watch:
-        watch_mode(args.interval)
+        watch_mode(args.interval, args.resync)
     else:
         success = sync_once()
         sys.exit(0 if success else 1)
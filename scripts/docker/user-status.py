@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+User Status - One-Shot Limits, Usage, Containers and Queue for a User
+
+check-limits used to spawn get_resource_limits.py, `gpu-state-reader.py
+user-mig-total` (a fleet-wide scan with one `docker inspect` per
+container), two `docker ps` filters and an inline python3 for the queue;
+the login check, ds01-status and container-list each rebuilt parts of the
+same picture. This gathers it once, in one process:
+
+- limits      resource-limits.yaml via ResourceLimitParser (no subprocess)
+- containers  one `docker ps -a` + one bulk `docker inspect` of the user's
+              own containers (container-listing.py)
+- gpu         MIG-equivalents from those inspects, same rules as
+              gpu-state-reader.py (full GPU = mig_instances_per_gpu);
+              MIG UUID -> slot from the metrics-sampler ring when fresh
+- storage     disk-usage index summary (no du)
+- queue       /var/lib/ds01/gpu-queue.json entries with positions
+- alerts      /var/lib/ds01/alerts/<user>.json
+- notices     limits reached / above the soft threshold (80%)
+
+Sections can be limited (--sections) so callers that need no Docker data
+(the login check) don't query Docker at all.
+
+Usage:
+    user-status.py [USER] [--json]                  # Full status (JSON or summary)
+    user-status.py [USER] --shell [--sections ...]  # STATUS_* assignments for bash `eval`
+"""
+
+import os
+import pwd
+import sys
+import json
+import shlex
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+INFRA_ROOT = Path("/opt/ds01-infra")
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "docker"))
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "lib"))
+from get_resource_limits import ResourceLimitParser
+from container_listing import ContainerListing
+from disk_usage import INDEX_DIR as DISK_INDEX_DIR, load_summary, used_bytes
+
+# Live samples published by metrics-sampler.py (shared-memory ring) - optional
+try:
+    from metrics_ring import latest as ring_latest
+except ImportError:
+    ring_latest = None
+
+STATE_DIR = Path("/var/lib/ds01")
+QUEUE_FILE = STATE_DIR / "gpu-queue.json"
+ALERTS_DIR = STATE_DIR / "alerts"
+SOFT_LIMIT_PERCENT = 80
+
+SECTIONS = ('limits', 'containers', 'gpu', 'storage', 'queue', 'alerts')
+
+
+def _mig_per_container(limits: Dict):
+    # None means unlimited, so check key presence (as get_resource_limits.py does)
+    if 'max_mig_per_container' in limits:
+        return limits['max_mig_per_container']
+    return limits.get('max_gpus_per_container', 1)
+
+
+def summarize_limits(limits: Dict) -> Dict:
+    """The effective limits user commands show, from ResourceLimitParser.get_user_limits()."""
+    return {
+        'group': limits.get('_group'),
+        'max_gpus': limits.get('max_gpus_per_user') or limits.get('max_mig_instances', 1),
+        'max_mig_per_container': _mig_per_container(limits),
+        'allow_full_gpu': bool(limits.get('allow_full_gpu', False)),
+        'max_containers': limits.get('max_containers_per_user', 3),
+        'priority': limits.get('priority', 10),
+        'storage_workspace': limits.get('storage_workspace'),
+        'idle_timeout': limits.get('idle_timeout'),
+        'max_runtime': limits.get('max_runtime'),
+        'gpu_hold_after_stop': limits.get('gpu_hold_after_stop'),
+        'container_hold_after_stop': limits.get('container_hold_after_stop'),
+    }
+
+
+def _read_json(path: Path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+class UserStatus:
+    """Everything check-limits and friends show about one user, gathered once."""
+
+    def __init__(self, username: str, parser: Optional[ResourceLimitParser] = None,
+                 listing: Optional[ContainerListing] = None, state_reader=None,
+                 queue_file: Path = QUEUE_FILE, alerts_dir: Path = ALERTS_DIR,
+                 disk_index_dir: Path = DISK_INDEX_DIR):
+        self.username = username
+        self.parser = parser or ResourceLimitParser()
+        if listing is None:
+            try:
+                uid = pwd.getpwnam(username).pw_uid
+            except KeyError:
+                uid = -1
+            listing = ContainerListing(username, uid)
+        self.listing = listing
+        self._state_reader = state_reader
+        self.queue_file = Path(queue_file)
+        self.alerts_dir = Path(alerts_dir)
+        self.disk_index_dir = Path(disk_index_dir)
+
+    @property
+    def state_reader(self):
+        """gpu-state-reader's GPUStateReader, seeded with the ring's MIG UUID -> slot map."""
+        if self._state_reader is None:
+            from gpu_state_reader import GPUStateReader
+            self._state_reader = GPUStateReader()
+            migs = ring_latest('mig') if ring_latest else None
+            if migs:
+                self._state_reader.seed_mig_slots({m['id']: m['key'] for m in migs})
+        return self._state_reader
+
+    def limits(self) -> Dict:
+        return summarize_limits(self.parser.get_user_limits(self.username))
+
+    def containers(self) -> List[Dict]:
+        """The user's containers (running and stopped) with their GPU allocation."""
+        found = []
+        for entry, data in self.listing.inspected(show_all=True):
+            gpu = self.state_reader.gpu_from_inspect(data) if data else None
+            state = data.get('State') or {}
+            found.append({
+                'name': self.listing.short_name(entry['name']),
+                'full_name': entry['name'],
+                'id': entry['id'][:12],
+                'status': entry['status'],
+                'running': bool(state.get('Running', entry['status'].startswith('Up'))),
+                'gpu_slots': gpu['gpu_slots'] if gpu else [],
+                'mig_equiv': gpu['mig_equiv'] if gpu else 0,
+            })
+        return found
+
+    def storage(self) -> Optional[Dict]:
+        summary = load_summary(self.username, self.disk_index_dir)
+        if summary is None:
+            return None
+        quota = summary.get('quota') or {}
+        return {
+            'used_bytes': used_bytes(summary),
+            'home_bytes': summary.get('home_bytes'),
+            'workspace_bytes': summary.get('workspace_bytes'),
+            'quota_hard_bytes': quota.get('hard_bytes'),
+            'updated': summary.get('updated'),
+        }
+
+    def queue(self) -> List[Dict]:
+        entries = _read_json(self.queue_file, [])
+        return [{'position': i, 'container': e.get('container'), 'max_gpus': e.get('max_gpus', 1),
+                 'requested_at': e.get('requested_at'), 'notified': bool(e.get('notified'))}
+                for i, e in enumerate(entries if isinstance(entries, list) else [], start=1)
+                if isinstance(e, dict) and e.get('user') == self.username]
+
+    def alerts(self) -> List[Dict]:
+        alerts = _read_json(self.alerts_dir / f"{self.username}.json", [])
+        return [a for a in alerts if isinstance(a, dict)] if isinstance(alerts, list) else []
+
+    def gather(self, sections: Iterable[str] = SECTIONS) -> Dict:
+        """Status dict with the requested sections (plus notices derived from them)."""
+        sections = set(sections)
+        status = {'user': self.username}
+        limits = self.limits()
+        status['group'] = limits['group']
+        if 'limits' in sections:
+            status['limits'] = limits
+        if sections & {'containers', 'gpu'}:
+            containers = self.containers()
+            status['containers'] = {
+                'total': len(containers),
+                'running': sum(1 for c in containers if c['running']),
+                'limit': limits['max_containers'],
+                'list': containers,
+            }
+            mig_equiv = sum(c['mig_equiv'] for c in containers)
+            status['gpu'] = {
+                'mig_equiv': mig_equiv,
+                'limit': limits['max_gpus'],
+                'remaining': max(limits['max_gpus'] - mig_equiv, 0) if limits['max_gpus'] is not None else None,
+                'allocations': [{'container': c['name'], 'slots': c['gpu_slots'], 'mig_equiv': c['mig_equiv'],
+                                 'running': c['running']} for c in containers if c['gpu_slots']],
+            }
+        if 'storage' in sections:
+            status['storage'] = self.storage()
+        if 'queue' in sections:
+            status['queue'] = self.queue()
+        if 'alerts' in sections:
+            status['alerts'] = self.alerts()
+        status['notices'] = notices(status)
+        return status
+
+
+def notices(status: Dict) -> List[Dict]:
+    """Limits reached ('limit') or above SOFT_LIMIT_PERCENT ('high') for GPU and containers."""
+    found = []
+    for kind, used_key in (('gpu', 'mig_equiv'), ('containers', 'total')):
+        section = status.get(kind)
+        if not section or not section.get('limit'):
+            continue
+        used, limit = section[used_key], section['limit']
+        percent = used * 100 // limit
+        if used >= limit:
+            found.append({'type': f"{kind}_limit", 'used': used, 'limit': limit, 'percent': percent})
+        elif percent >= SOFT_LIMIT_PERCENT:
+            found.append({'type': f"{kind}_high", 'used': used, 'limit': limit, 'percent': percent})
+    return found
+
+
+def shell_assignments(status: Dict) -> str:
+    """STATUS_* variable assignments (shell-quoted) for `eval` in bash callers."""
+    def value(v):
+        if isinstance(v, bool):
+            return "true" if v else "false"
+        return "None" if v is None else str(v)
+
+    out = {'STATUS_USER': status['user'], 'STATUS_GROUP': status['group']}
+    for key, v in (status.get('limits') or {}).items():
+        out[f"STATUS_{key.upper()}"] = v
+    if 'containers' in status:
+        out['STATUS_CONTAINERS_TOTAL'] = status['containers']['total']
+        out['STATUS_CONTAINERS_RUNNING'] = status['containers']['running']
+        out['STATUS_GPU_USED'] = status['gpu']['mig_equiv']
+    if 'storage' in status:
+        storage = status['storage'] or {}
+        for key in ('used_bytes', 'workspace_bytes', 'quota_hard_bytes'):
+            out[f"STATUS_{key.upper()}"] = storage.get(key)
+    if 'queue' in status:
+        out['STATUS_QUEUE'] = "\n".join(f"#{q['position']}: {q['container']}" for q in status['queue'])
+    if 'alerts' in status:
+        out['STATUS_ALERT_COUNT'] = len(status['alerts'])
+        out['STATUS_ALERTS'] = "\n".join(f"{a.get('type', '')}\t{' '.join(str(a.get('message', '')).split())}"
+                                          for a in status['alerts'])
+    out['STATUS_NOTICES'] = " ".join(n['type'] for n in status['notices'])
+    return "\n".join(f"{name}={shlex.quote(value(v))}" for name, v in out.items())
+
+
+def format_summary(status: Dict) -> str:
+    """A few lines for ds01-status and the plain CLI."""
+    lines = [f"User: {status['user']} (group: {status['group']})"]
+    if 'gpu' in status:
+        gpu, containers = status['gpu'], status['containers']
+        limit = gpu['limit'] if gpu['limit'] is not None else "unlimited"
+        lines.append(f"GPU: {gpu['mig_equiv']}/{limit} MIG-equivalents"
+                     + (f" ({', '.join(s for a in gpu['allocations'] for s in a['slots'])})"
+                        if gpu['allocations'] else ""))
+        limit = containers['limit'] if containers['limit'] is not None else "unlimited"
+        lines.append(f"Containers: {containers['total']}/{limit} ({containers['running']} running)")
+    if status.get('storage'):
+        lines.append(f"Storage: {status['storage']['used_bytes'] / 1024 ** 3:.1f}G used")
+    for q in status.get('queue') or []:
+        lines.append(f"GPU queue: #{q['position']} for {q['container']}")
+    if status.get('alerts'):
+        lines.append(f"Alerts: {len(status['alerts'])} (run check-limits)")
+    for n in status['notices']:
+        lines.append(f"Notice: {n['type'].replace('_', ' ')} ({n['used']}/{n['limit']})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One-shot status of a user's limits, usage, containers and queue")
+    parser.add_argument('user', nargs='?', default=None, help="User (default: current user)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--json', action='store_true', help="Full status as JSON")
+    output.add_argument('--shell', action='store_true', help="STATUS_* assignments for bash eval")
+    parser.add_argument('--sections', default=",".join(SECTIONS),
+                        help=f"Comma-separated subset of: {', '.join(SECTIONS)}")
+    args = parser.parse_args()
+
+    username = args.user or pwd.getpwuid(os.getuid()).pw_name
+    sections = [s for s in args.sections.split(',') if s]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+
+    try:
+        status = UserStatus(username).gather(sections)
+    except ValueError as e:  # Empty or invalid resource-limits.yaml
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(status, indent=2))
+    elif args.shell:
+        print(shell_assignments(status))
+    else:
+        print(format_summary(status))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+user-status.py
\ No newline at end of file
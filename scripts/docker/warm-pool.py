@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Warm Pool - Pre-Prepared Setup Containers for Popular Framework Images
+
+Every container create in mlc-patched.py first runs a throw-away setup
+container (apt-get update, apt-get install sudo git, user creation), commits
+it and only then runs the real `docker create`. The package step dominates
+that time and is identical for every user of an image.
+
+This module keeps a small pool of GPU-less containers per popular image
+that have already run the package step and then sleep. On create,
+mlc-patched.py claims one by renaming it to the container tag, runs only the
+user-specific part of the setup inside it and commits it as usual. Owner
+labels, cgroup parent and GPU assignment are applied by the final
+`docker create` from the committed image, exactly as without the pool
+(Docker cannot change those on an existing container).
+
+Pool members:
+- Are named ds01-warm-<image key>-<suffix> and carry no ds01 labels, so
+  they are never counted as user containers or GPU allocations
+- Are created with /usr/bin/docker (bypassing docker-wrapper.sh), so they
+  get the default group's per-container limits under its group slice
+  (ds01-<group>.slice) explicitly - they belong to no user yet
+- Go stale when their image tag is re-pulled; refill replaces them
+
+Pool sizes follow demand: for the most-created images in events.jsonl
+(container.created with image=...), the target is the peak number of
+creates within one hour over the lookback window, clamped to the
+configured bounds.
+
+Usage:
+    warm-pool.py status [--json]
+    warm-pool.py refill [--dry-run]
+    warm-pool.py drain
+"""
+
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Timing spans (ds01-trace) - optional, no-op if the library is unavailable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_trace_compat import span
+
+DOCKER_BIN = "/usr/bin/docker"
+CONFIG_PATH = Path("/opt/ds01-infra/config/resource-limits.yaml")
+EVENTS_DIR = Path("/var/log/ds01")
+
+POOL_PREFIX = "ds01-warm-"
+POOL_OWNER = "ds01-warm-pool"  # Not a user: resolves to the default group's limits
+READY_MARKER = "/.ds01-warm-ready"
+READY_TIMEOUT = 300  # seconds a claimed member may still be preparing
+
+# Generic part of the mlc-patched.py user-setup script (no user data)
+PREPARE_COMMAND = (
+    "apt-get update -y > /dev/null 2>&1; "
+    "apt-get install sudo git -q -y > /dev/null 2>&1; "
+)
+
+DEFAULT_CONFIG = {
+    'enabled': False,
+    'lookback_days': 7,
+    'max_images': 3,
+    'min_per_image': 0,
+    'max_per_image': 5,
+}
+
+
+def image_key(image: str) -> str:
+    """Short, name-safe key for an image reference."""
+    return hashlib.sha1(image.encode()).hexdigest()[:10]
+
+
+def load_config(config_path: Path = CONFIG_PATH) -> Dict:
+    """Read the warm_pool section of resource-limits.yaml (with defaults)."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        import yaml
+        with open(config_path) as f:
+            config.update((yaml.safe_load(f) or {}).get('warm_pool') or {})
+    except (ImportError, IOError, OSError):
+        pass
+    return config
+
+
+def member_docker_args(config_path: Path = CONFIG_PATH) -> Optional[List[str]]:
+    """
+    Resource limit and cgroup-parent arguments for pool members.
+
+    Returns:
+        Default group's `docker run` limits with its group slice as cgroup
+        parent, or None if the limits cannot be read
+    """
+    try:
+        from get_resource_limits import ResourceLimitParser
+        parser = ResourceLimitParser(config_path)
+        group = parser.get_user_limits(POOL_OWNER).get('_group', 'student')
+        args = parser.get_docker_args(POOL_OWNER)
+    except Exception:
+        return None
+    return [arg for arg in args if not arg.startswith('--cgroup-parent=')] + [f'--cgroup-parent=ds01-{group}.slice']
+
+
+def image_demand(events_dir: Path = EVENTS_DIR, lookback_days: int = 7,
+                 now: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Count container creates per image from events.jsonl (and rotated files).
+
+    Returns:
+        Dict of image -> {'total': creates, 'peak_hourly': max creates in one hour}
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=lookback_days)
+    hourly: Dict[str, Counter] = defaultdict(Counter)
+
+    for path in sorted(Path(events_dir).glob("events*.jsonl")):
+        try:
+            if datetime.fromtimestamp(path.stat().st_mtime, timezone.utc) < cutoff:
+                continue
+            with open(path) as f:
+                for line in f:
+                    if '"container.created"' not in line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                        ts = datetime.strptime(event['ts'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    image = event.get('image')
+                    if image and ts >= cutoff:
+                        hourly[image][ts.strftime("%Y-%m-%dT%H")] += 1
+        except (IOError, OSError):
+            continue
+
+    return {
+        image: {'total': sum(hours.values()), 'peak_hourly': max(hours.values())}
+        for image, hours in hourly.items()
+    }
+
+
+def pool_targets(demand: Dict[str, Dict[str, int]], config: Dict) -> Dict[str, int]:
+    """Target pool size per image: peak hourly creates, clamped, top images only."""
+    if not config.get('enabled'):
+        return {}
+    ranked = sorted(demand.items(), key=lambda item: (-item[1]['total'], item[0]))
+    targets = {}
+    for image, stats in ranked[:int(config['max_images'])]:
+        size = max(int(config['min_per_image']), min(int(config['max_per_image']), stats['peak_hourly']))
+        if size > 0:
+            targets[image] = size
+    return targets
+
+
+class WarmPool:
+    """Manages and claims pre-prepared setup containers."""
+
+    def __init__(self, docker_bin: str = DOCKER_BIN, run_args: Optional[List[str]] = None):
+        self.docker_bin = docker_bin
+        self.run_args = run_args  # Limits and cgroup parent for spawn(); None = cannot spawn
+
+    @classmethod
+    def from_config(cls, config_path: Path = CONFIG_PATH, **kwargs) -> Optional['WarmPool']:
+        """Pool configured from resource-limits.yaml, or None if disabled."""
+        if not load_config(config_path).get('enabled'):
+            return None
+        return cls(run_args=member_docker_args(config_path), **kwargs)
+
+    def _docker(self, *args, **kwargs) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker_bin, *args], capture_output=True, text=True, **kwargs)
+
+    def members(self, image: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        List pool members (newest first, as docker ps orders them).
+
+        Returns:
+            List of {'name', 'image', 'state'}; 'image' is an image ID once
+            the member's tag has been re-pulled (member is stale)
+        """
+        prefix = POOL_PREFIX + (f"{image_key(image)}-" if image else "")
+        result = self._docker('ps', '-a', '--filter', f'name=^{prefix}',
+                              '--format', '{{.Names}}|{{.Image}}|{{.State}}')
+        if result.returncode != 0:
+            return []
+        members = []
+        for line in result.stdout.strip().splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[0].startswith(prefix):
+                members.append({'name': parts[0], 'image': parts[1], 'state': parts[2]})
+        return members
+
+    def spawn(self, image: str) -> Optional[str]:
+        """Start one pool member for an image; returns its name or None."""
+        if self.run_args is None:
+            return None
+        name = f"{POOL_PREFIX}{image_key(image)}-{uuid.uuid4().hex[:6]}"
+        command = f"{PREPARE_COMMAND}touch {READY_MARKER}; exec sleep infinity"
+        result = self._docker(
+            'run', '-d', '--name', name,
+            *self.run_args,
+            '-w', '/workspace',
+            '--network', 'host',
+            image, 'bash', '-c', command
+        )
+        return name if result.returncode == 0 else None
+
+    def remove(self, name: str) -> bool:
+        return self._docker('rm', '-f', name).returncode == 0
+
+    def refill(self, targets: Dict[str, int], dry_run: bool = False) -> Dict[str, List[str]]:
+        """
+        Bring the pool to its targets: drop stale, dead and surplus members,
+        then start missing ones.
+
+        Returns:
+            {'removed': [names], 'started': [names or images when dry_run]}
+        """
+        removed, started = [], []
+        by_image = defaultdict(list)
+        keys = {image_key(image): image for image in targets}
+
+        for member in self.members():
+            key = member['name'][len(POOL_PREFIX):].split('-')[0]
+            image = keys.get(key)
+            if image is None or member['image'] != image or member['state'] != 'running':
+                removed.append(member['name'])
+            else:
+                by_image[image].append(member['name'])
+
+        for image, target in targets.items():
+            live = by_image[image]
+            # Keep the oldest members (most likely already prepared)
+            removed.extend(live[:max(0, len(live) - target)])
+            started.extend([image] * max(0, target - len(live)))
+
+        if dry_run:
+            return {'removed': removed, 'started': started}
+
+        for name in removed:
+            self.remove(name)
+        started = [name for name in (self.spawn(image) for image in started) if name]
+        return {'removed': removed, 'started': started}
+
+    def drain(self) -> List[str]:
+        """Remove every pool member."""
+        names = [member['name'] for member in self.members()]
+        for name in names:
+            self.remove(name)
+        return names
+
+    def claim(self, image: str, container_tag: str) -> bool:
+        """
+        Take a running member for the image by renaming it to container_tag.
+
+        `docker rename` is atomic, so concurrent creates never get the same
+        member; the loser simply tries the next one.
+        """
+        with span("mlc.warm_claim") as s:
+            members = [m for m in self.members(image) if m['image'] == image and m['state'] == 'running']
+            s['available'] = len(members)
+            for member in reversed(members):
+                if self._docker('rename', member['name'], container_tag).returncode == 0:
+                    s['claimed'] = True
+                    return True
+            s['claimed'] = False
+            return False
+
+    def run_setup(self, container_tag: str, bash_command: str) -> subprocess.CompletedProcess:
+        """
+        Run the user-specific setup inside a claimed member, then stop it
+        so it can be committed like a regular setup container.
+        """
+        wait_ready = (
+            f"for i in $(seq {READY_TIMEOUT * 2}); do [ -f {READY_MARKER} ] && break; sleep 0.5; done; "
+            f"rm -f {READY_MARKER}; "
+        )
+        result = self._docker('exec', container_tag, 'bash', '-c', wait_ready + bash_command)
+        self._docker('kill', container_tag)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the DS01 warm container pool")
+    sub = parser.add_subparsers(dest='command')
+    status_parser = sub.add_parser('status', help="Show demand, targets and pool members")
+    status_parser.add_argument('--json', action='store_true', help="Output JSON")
+    refill_parser = sub.add_parser('refill', help="Resize the pool to current demand")
+    refill_parser.add_argument('--dry-run', action='store_true', help="Show changes without applying them")
+    sub.add_parser('drain', help="Remove all pool members")
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    config = load_config()
+    pool = WarmPool(run_args=member_docker_args())
+
+    if args.command == 'status':
+        demand = image_demand(lookback_days=config['lookback_days'])
+        targets = pool_targets(demand, config)
+        members = pool.members()
+        if args.json:
+            print(json.dumps({'enabled': config['enabled'], 'demand': demand,
+                              'targets': targets, 'members': members}, indent=2))
+            return
+        print(f"Warm pool: {'enabled' if config['enabled'] else 'disabled'} "
+              f"(lookback {config['lookback_days']}d, max {config['max_images']} images)")
+        for image, stats in sorted(demand.items(), key=lambda item: -item[1]['total']):
+            live = sum(1 for m in members if m['image'] == image and m['state'] == 'running')
+            print(f"  {image}: {stats['total']} creates, peak {stats['peak_hourly']}/h, "
+                  f"pool {live}/{targets.get(image, 0)}")
+        stale = [m['name'] for m in members if m['image'] not in targets or m['state'] != 'running']
+        if stale:
+            print(f"  stale members: {', '.join(stale)}")
+
+    elif args.command == 'refill':
+        started_at = time.time()
+        targets = pool_targets(image_demand(lookback_days=config['lookback_days']), config)
+        changes = pool.refill(targets, dry_run=args.dry_run)
+        verb = "Would" if args.dry_run else "Did"
+        print(f"{verb} remove {len(changes['removed'])}, start {len(changes['started'])} "
+              f"({time.time() - started_at:.1f}s)")
+        for name in changes['removed']:
+            print(f"  - {name}")
+        for name in changes['started']:
+            print(f"  + {name}")
+
+    elif args.command == 'drain':
+        removed = pool.drain()
+        print(f"Removed {len(removed)} pool members")
+
+
+if __name__ == "__main__":
+    main()
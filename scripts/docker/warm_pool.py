@@ -0,0 +1 @@
+warm-pool.py
\ No newline at end of file
@@ -9,7 +9,16 @@
 
 detect_cuda_arch() {
     # Auto-detect appropriate CUDA architecture based on host driver
-    # Driver 535+ supports CUDA 12.x, older drivers use CUDA 11.8
+    # Prefer the cached host detection shared with mlc-patched.py (host_gpu.py),
+    # so images are built for the architecture containers are created with
+    local arch
+    arch=$(python3 /opt/ds01-infra/scripts/lib/host_gpu.py arch 2>/dev/null)
+    if [[ "$arch" == CUDA_* ]]; then
+        echo "$arch"
+        return 0
+    fi
+
+    # Fallback: Driver 535+ supports CUDA 12.x, older drivers use CUDA 11.8
     local driver_major
     driver_major=$(nvidia-smi --query-gpu=driver_version --format=csv,noheader 2>/dev/null | head -1 | cut -d. -f1)
 
@@ -42,16 +51,22 @@ get_base_image() {
         # Driver 535+ supports CUDA 12.x (CUDA_ADA), older drivers use CUDA 11.8 (CUDA_AMPERE)
         local arch="${MLC_ARCH:-$(detect_cuda_arch)}"
 
-        # Look up specific version or latest
+        # Look up specific version or latest (compiled index shared with mlc-patched.py)
         local image=""
-        if [ -n "$version" ]; then
+        local catalog_cli="/opt/ds01-infra/scripts/lib/aime_catalog.py"
+        if [ -f "$catalog_cli" ]; then
+            if [ -n "$version" ]; then
+                image=$(python3 "$catalog_cli" image "$framework_capital" "$arch" "$version" 2>/dev/null)
+            fi
+            [ -z "$image" ] && image=$(python3 "$catalog_cli" image "$framework_capital" "$arch" 2>/dev/null)
+        elif [ -n "$version" ]; then
             # Find exact version match (architecture in brackets: [CUDA_ADA])
             image=$(awk -F', ' -v fw="$framework_capital" -v ver="$version" -v arch="[$arch]" \
                 '$1 == fw && $2 == ver && $3 == arch {print $4; exit}' "$AIME_REPO")
         fi
 
         # If no version specified or not found, get latest for this architecture
-        if [ -z "$image" ]; then
+        if [ -z "$image" ] && [ ! -f "$catalog_cli" ]; then
             image=$(awk -F', ' -v fw="$framework_capital" -v arch="[$arch]" \
                 '$1 == fw && $3 == arch {print $4; exit}' "$AIME_REPO")
         fi
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/aime_catalog.py
+Compiled index of the AIME image catalog (aime-ml-containers/ml_images.repo).
+
+mlc-patched.py CSV-parsed ml_images.repo several times per create
+(get_gpu_architectures, extract_from_ml_images) and the shell tooling
+awk-scanned it again. This module compiles the catalog once per catalog
+change into /var/log/ds01/aime-catalog.json:
+
+    architectures: {arch: {framework: [[version, image], ...]}}   (newest version first)
+    images:        {image: {framework, version, architectures}}
+
+The compiled index is keyed by the catalog's path, mtime and size, so an
+updated submodule is picked up on the next query. The index decides which
+image a create pulls, so only root writes it (`rebuild` from deploy.sh), as
+0644, and it is ignored unless root-owned and not writable by others; other
+users compile the catalog in memory until root rebuilds it.
+
+Usage:
+    from aime_catalog import load_catalog, frameworks_for, find_image
+
+    catalog = load_catalog()
+    frameworks_for(catalog, "CUDA_ADA")                    # {'Pytorch': [('2.5.1', 'aimehub/...'), ...]}
+    find_image(catalog, "pytorch", "CUDA_ADA")             # latest PyTorch image
+    catalog['images'].get("aimehub/pytorch-2.5.1-...")     # reverse lookup
+
+    # Shell (aime-images.sh, image-list, dockerfile-generator.sh):
+    python3 /opt/ds01-infra/scripts/lib/aime_catalog.py image pytorch CUDA_ADA [2.5.1]
+    python3 /opt/ds01-infra/scripts/lib/aime_catalog.py info <image>
+
+Exit codes: 0 found, 1 not in catalog, 2 catalog unavailable.
+"""
+
+import os
+import re
+import sys
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from root_state import read_root_json, write_root_json
+
+CATALOG_FILE = Path("/opt/ds01-infra/aime-ml-containers/ml_images.repo")
+INDEX_FILE = Path("/var/log/ds01/aime-catalog.json")
+
+
+def version_key(version: str) -> Tuple:
+    """Sort key for versions like 2.5.1 / 2.14.0 / 24.01 (numeric parts compared numerically)."""
+    return tuple((0, int(part)) if part.isdigit() else (1, part)
+                 for part in re.split(r'[.\-]', version))
+
+
+def _fingerprint(catalog_file: Path) -> Optional[str]:
+    try:
+        st = os.stat(catalog_file)
+    except OSError:
+        return None
+    return f"{Path(catalog_file).resolve()}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def compile_catalog(catalog_file: Path = CATALOG_FILE) -> Dict:
+    """Parse ml_images.repo (framework, version, [ARCH;ARCH], image) into the index layout."""
+    architectures: Dict[str, Dict[str, List]] = {}
+    images: Dict[str, Dict] = {}
+    headers = ['framework', 'version', 'architecture', 'docker image']
+    with open(catalog_file, mode='r') as f:
+        for row in csv.DictReader(f, fieldnames=headers):
+            if not row.get('docker image'):
+                continue
+            framework = row['framework'].strip()
+            version = row['version'].strip()
+            archs = [a for a in row['architecture'].strip().strip("[]").split(";") if a]
+            image = row['docker image'].strip()
+            for arch in archs:
+                architectures.setdefault(arch, {}).setdefault(framework, []).append([version, image])
+            images[image] = {'framework': framework, 'version': version, 'architectures': archs}
+
+    for frameworks in architectures.values():
+        for versions in frameworks.values():
+            versions.sort(key=lambda entry: version_key(entry[0]), reverse=True)
+    return {'architectures': architectures, 'images': images}
+
+
+def load_catalog(catalog_file: Path = CATALOG_FILE, index_file: Path = INDEX_FILE) -> Optional[Dict]:
+    """
+    Compiled catalog, rebuilt only when ml_images.repo changed.
+
+    Returns:
+        Index dict, or None if the catalog file does not exist
+    """
+    fingerprint = _fingerprint(catalog_file)
+    if fingerprint is None:
+        return None
+    index = read_root_json(index_file)
+    if isinstance(index, dict) and index.get('fingerprint') == fingerprint:
+        return index
+
+    index = compile_catalog(catalog_file)
+    index['fingerprint'] = fingerprint
+    write_root_json(index_file, index)  # Root only - others keep the compiled result in memory
+    return index
+
+
+def frameworks_for(catalog: Dict, architecture: str) -> Dict[str, List[Tuple[str, str]]]:
+    """Framework -> [(version, image), ...] (newest first) for one architecture."""
+    return {framework: [tuple(entry) for entry in versions]
+            for framework, versions in catalog['architectures'].get(architecture, {}).items()}
+
+
+def find_image(catalog: Dict, framework: str, architecture: str,
+               version: Optional[str] = None) -> Optional[str]:
+    """Image for framework (case-insensitive) on architecture; latest if version is None."""
+    for name, versions in catalog['architectures'].get(architecture, {}).items():
+        if name.lower() != framework.lower():
+            continue
+        for entry_version, image in versions:
+            if version is None or entry_version == version:
+                return image
+    return None
+
+
+def main():
+    usage = ("Usage: aime_catalog.py <command>\n\n"
+             "Commands:\n"
+             "  archs                                   - Architectures in the catalog\n"
+             "  frameworks <arch>                       - Frameworks for an architecture\n"
+             "  versions <framework> <arch>             - Versions (newest first) and images\n"
+             "  image <framework> <arch> [version]      - Image (latest if no version)\n"
+             "  info <image>                            - framework<TAB>version<TAB>arch;arch\n"
+             "  rebuild                                 - Recompile the index (written only as root)\n")
+    args = sys.argv[1:]
+    if not args:
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+
+    if args[0] == "rebuild":
+        try:
+            INDEX_FILE.unlink()
+        except OSError:
+            pass
+    catalog = load_catalog()
+    if catalog is None:
+        print(f"aime_catalog: {CATALOG_FILE} not found", file=sys.stderr)
+        sys.exit(2)
+
+    command = args[0]
+    if command == "rebuild":
+        print(f"{len(catalog['images'])} images, {len(catalog['architectures'])} architectures")
+    elif command == "archs":
+        print("\n".join(sorted(catalog['architectures'])))
+    elif command == "frameworks" and len(args) == 2:
+        frameworks = sorted(frameworks_for(catalog, args[1]))
+        if not frameworks:
+            sys.exit(1)
+        print("\n".join(frameworks))
+    elif command == "versions" and len(args) == 3:
+        versions = next((v for name, v in frameworks_for(catalog, args[2]).items()
+                         if name.lower() == args[1].lower()), None)
+        if not versions:
+            sys.exit(1)
+        for version, image in versions:
+            print(f"{version}\t{image}")
+    elif command == "image" and len(args) in (3, 4):
+        image = find_image(catalog, args[1], args[2], args[3] if len(args) == 4 else None)
+        if image is None:
+            sys.exit(1)
+        print(image)
+    elif command == "info" and len(args) == 2:
+        info = catalog['images'].get(args[1])
+        if info is None:
+            sys.exit(1)
+        print(f"{info['framework']}\t{info['version']}\t{';'.join(info['architectures'])}")
+    else:
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -68,9 +68,9 @@ log_container_operation() {
 
 # Convenience functions for common events
 log_container_created() {
-    local user="$1" container="$2" gpu="${3:-}" interface="${4:-atomic}"
+    local user="$1" container="$2" gpu="${3:-}" interface="${4:-atomic}" image="${5:-}"
     log_event "container.created" user="$user" container="$container" \
-        ${gpu:+gpu="$gpu"} interface="$interface"
+        ${gpu:+gpu="$gpu"} interface="$interface" ${image:+image="$image"}
 }
 
 log_container_started() {
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/disk_usage.py
+Incremental per-user home/workspace disk-usage index.
+
+ds01-login-check ran `du -sk $HOME` on every login, quota-check ran `du -sh`
+and `du -sb` over the same home, and check-limits walked it again - seconds
+each on homes with conda envs and HF caches (millions of small files).
+
+`update` (cron, root) walks each /home/<user> once and keeps, per directory,
+the size of its own entries keyed by (inode, mtime). A directory's mtime
+only changes when entries are added, removed or renamed, so later runs
+lstat() every directory but re-list only changed ones; files growing in
+place are caught by re-listing any directory not scanned for RESCAN_AFTER
+seconds or by `update --full`. Each directory expires after a fixed share
+(half to all) of RESCAN_AFTER taken from its inode, so the directories of
+one first scan are re-listed over many runs rather than all in one. Hard-linked files (conda
+package cache -> envs) are counted once per tree, like du. The walk stays
+on the home's filesystem (du -x).
+
+Where filesystem quotas are enabled, one `repquota -O csv` per run supplies
+exact usage and limits; readers prefer those over the walk.
+
+Files (root-written):
+    /var/lib/ds01/disk-usage/<user>.json          summary, 644 (read by everyone)
+    /var/lib/ds01/disk-usage/.state/<user>.json   directory cache, root-only
+
+Summary: user, updated, home_bytes, home_files, workspace_bytes,
+workspace_files, quota ({used_bytes, soft_bytes, hard_bytes} or null),
+elapsed, rescanned (directories re-listed), dirs.
+
+Usage:
+    from disk_usage import load_summary, used_bytes
+
+    summary = load_summary('alice')
+    used_bytes(summary)                      # quota usage if known, else home walk
+
+    # Shell:
+    python3 /opt/ds01-infra/scripts/lib/disk_usage.py update [--user U] [--full]
+    python3 /opt/ds01-infra/scripts/lib/disk_usage.py show [USER] [--json]
+    python3 /opt/ds01-infra/scripts/lib/disk_usage.py get USER used_bytes home_bytes ...
+"""
+
+import os
+import csv
+import sys
+import json
+import stat
+import time
+import zlib
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+INDEX_DIR = Path("/var/lib/ds01/disk-usage")
+HOME_ROOT = Path("/home")
+WORKSPACE = "workspace"
+RESCAN_AFTER = 24 * 3600
+
+# Directory cache entry: [mtime_ns, scanned_at, own_bytes, own_files, {child name: ino}, {linked ino: bytes}]
+MTIME, SCANNED, BYTES, FILES, CHILDREN, LINKS = range(6)
+
+
+def _atomic_write(path: Path, text: str, mode: int):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(text)
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+
+def _list_dir(path: str, dev: int):
+    """Own usage of one directory: (bytes, files, {subdir: ino}, {linked ino: bytes})."""
+    own_bytes = own_files = 0
+    children, links = {}, {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if st.st_dev == dev:
+                    children[entry.name] = st.st_ino
+                continue
+            size = st.st_blocks * 512
+            own_files += 1
+            if st.st_nlink > 1:
+                links[str(st.st_ino)] = size
+            else:
+                own_bytes += size
+    return own_bytes, own_files, children, links
+
+
+def _expires_after(key: str, rescan_after: float) -> float:
+    """Per-directory cache lifetime: between half and all of rescan_after."""
+    return rescan_after * (0.5 + (zlib.crc32(key.encode()) % 1024) / 2048)
+
+
+def scan(root: Path, cache: Dict[str, list], now: Optional[float] = None,
+         rescan_after: float = RESCAN_AFTER, full: bool = False) -> Dict:
+    """
+    Walk `root`, reusing cache entries of directories whose mtime is
+    unchanged. Returns {'dirs': new cache, 'rescanned': n, 'root': ino key}.
+    """
+    now = time.time() if now is None else now
+    try:
+        root_st = os.lstat(root)
+    except OSError:
+        return {'dirs': {}, 'rescanned': 0, 'root': None}
+    dirs, rescanned = {}, 0
+    stack = [(str(root), root_st)]
+    while stack:
+        path, st = stack.pop()
+        key = str(st.st_ino)
+        if key in dirs:
+            continue
+        old = cache.get(key)
+        if (old and not full and old[MTIME] == st.st_mtime_ns and now - old[SCANNED] < _expires_after(key, rescan_after)):
+            entry = old
+        else:
+            try:
+                own_bytes, own_files, children, links = _list_dir(path, root_st.st_dev)
+            except OSError:
+                continue
+            entry = [st.st_mtime_ns, now, own_bytes + st.st_blocks * 512, own_files, children, links]
+            rescanned += 1
+        children = {}
+        for name in entry[CHILDREN]:
+            child = os.path.join(path, name)
+            try:
+                child_st = os.lstat(child)
+            except OSError:
+                continue
+            if stat.S_ISDIR(child_st.st_mode) and child_st.st_dev == root_st.st_dev:
+                children[name] = child_st.st_ino
+                stack.append((child, child_st))
+        entry[CHILDREN] = children
+        dirs[key] = entry
+    return {'dirs': dirs, 'rescanned': rescanned, 'root': str(root_st.st_ino)}
+
+
+def tree_total(dirs: Dict[str, list], root_key: Optional[str]):
+    """(bytes, files) of the subtree under root_key, hard links counted once."""
+    if root_key not in dirs:
+        return 0, 0
+    total_bytes = total_files = 0
+    links: Dict[str, int] = {}
+    seen, stack = set(), [root_key]
+    while stack:
+        key = stack.pop()
+        entry = dirs.get(key)
+        if entry is None or key in seen:
+            continue
+        seen.add(key)
+        total_bytes += entry[BYTES]
+        total_files += entry[FILES]
+        links.update(entry[LINKS])
+        stack.extend(str(ino) for ino in entry[CHILDREN].values())
+    return total_bytes + sum(links.values()), total_files
+
+
+def _mountpoint(path: Path) -> Path:
+    path = path.resolve()
+    dev = os.stat(path).st_dev
+    while path.parent != path and os.stat(path.parent).st_dev == dev:
+        path = path.parent
+    return path
+
+
+def read_quotas(home_root: Path = HOME_ROOT) -> Dict[str, Dict]:
+    """User quotas on the home filesystem via one `repquota -O csv` ({} if unavailable)."""
+    if not shutil.which('repquota'):
+        return {}
+    try:
+        out = subprocess.run(['repquota', '-u', '-O', 'csv', str(_mountpoint(home_root))],
+                             capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    if out.returncode != 0:
+        return {}
+    quotas = {}
+    for row in csv.DictReader(out.stdout.splitlines()):
+        try:
+            quotas[row['User'].lstrip('#')] = {
+                'used_bytes': int(row['BlockUsed']) * 1024,
+                'soft_bytes': int(row['BlockSoftLimit']) * 1024 or None,
+                'hard_bytes': int(row['BlockHardLimit']) * 1024 or None,
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return quotas
+
+
+def index_user(user: str, home: Path, index_dir: Path = INDEX_DIR, quota: Optional[Dict] = None,
+               full: bool = False, now: Optional[float] = None) -> Dict:
+    """Update one user's directory cache and summary; returns the summary."""
+    now = time.time() if now is None else now
+    state_dir = index_dir / ".state"
+    state_dir.mkdir(parents=True, exist_ok=True)
+    os.chmod(state_dir, 0o700)
+    state_file = state_dir / f"{user}.json"
+    try:
+        cache = json.loads(state_file.read_text())
+    except (IOError, OSError, ValueError):
+        cache = {}
+
+    started = time.monotonic()
+    result = scan(home, cache, now=now, full=full)
+    dirs = result['dirs']
+    home_bytes, home_files = tree_total(dirs, result['root'])
+    workspace_key = None
+    if result['root'] in dirs:
+        ino = dirs[result['root']][CHILDREN].get(WORKSPACE)
+        workspace_key = None if ino is None else str(ino)
+    workspace_bytes, workspace_files = tree_total(dirs, workspace_key)
+
+    summary = {'user': user, 'updated': int(now),
+               'home_bytes': home_bytes, 'home_files': home_files,
+               'workspace_bytes': workspace_bytes, 'workspace_files': workspace_files,
+               'quota': quota, 'elapsed': round(time.monotonic() - started, 3),
+               'rescanned': result['rescanned'], 'dirs': len(dirs)}
+    _atomic_write(state_file, json.dumps(dirs, separators=(',', ':')), 0o600)
+    _atomic_write(index_dir / f"{user}.json", json.dumps(summary, indent=2), 0o644)
+    return summary
+
+
+def home_users(home_root: Path = HOME_ROOT) -> List[str]:
+    try:
+        return sorted(p.name for p in home_root.iterdir() if p.is_dir() and not p.is_symlink())
+    except OSError:
+        return []
+
+
+def update(users: Optional[Iterable[str]] = None, home_root: Path = HOME_ROOT,
+           index_dir: Path = INDEX_DIR, full: bool = False) -> List[Dict]:
+    """Index the given users (default: every /home directory)."""
+    quotas = read_quotas(home_root)
+    summaries = []
+    for user in users or home_users(home_root):
+        summaries.append(index_user(user, home_root / user, index_dir, quotas.get(user), full=full))
+    # Drop indexes of removed homes
+    if users is None and summaries:
+        keep = {f"{s['user']}.json" for s in summaries}
+        for path in list(index_dir.glob("*.json")) + list((index_dir / ".state").glob("*.json")):
+            if path.name not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    return summaries
+
+
+def load_summary(user: str, index_dir: Path = INDEX_DIR) -> Optional[Dict]:
+    try:
+        return json.loads((index_dir / f"{user}.json").read_text())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def used_bytes(summary: Dict) -> int:
+    """Usage to compare against limits: quota accounting if available, else the home walk."""
+    quota = summary.get('quota') or {}
+    return quota['used_bytes'] if quota.get('used_bytes') is not None else summary.get('home_bytes', 0)
+
+
+def _field(summary: Dict, name: str):
+    quota = summary.get('quota') or {}
+    if name == 'used_bytes':
+        return used_bytes(summary)
+    if name == 'age':
+        return int(time.time()) - summary.get('updated', 0)
+    if name.startswith('quota_'):
+        return quota.get(name[len('quota_'):])
+    return summary.get(name)
+
+
+def _human(n: Optional[int]) -> str:
+    if n is None:
+        return '-'
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if n < 1024 or unit == 'T':
+            return f"{n:.1f}{unit}" if unit != 'B' else f"{n}B"
+        n /= 1024
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="DS01 incremental disk-usage index")
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('update', help="Re-index homes (root)")
+    p.add_argument('--user', action='append', help="Only this user (repeatable)")
+    p.add_argument('--full', action='store_true', help="Re-list every directory")
+    p = sub.add_parser('show', help="Print summaries")
+    p.add_argument('user', nargs='?')
+    p.add_argument('--json', action='store_true')
+    p = sub.add_parser('get', help="Print summary fields for shell scripts ('-' if unknown)")
+    p.add_argument('user')
+    p.add_argument('fields', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'update':
+        try:
+            summaries = update(args.user, full=args.full)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        rescanned = sum(s['rescanned'] for s in summaries)
+        dirs = sum(s['dirs'] for s in summaries)
+        print(f"disk-usage index: {len(summaries)} users, {rescanned}/{dirs} directories re-listed")
+    elif args.command == 'show':
+        users = [args.user] if args.user else [p.stem for p in sorted(INDEX_DIR.glob("*.json"))]
+        summaries = [s for s in (load_summary(u) for u in users) if s]
+        if args.json:
+            print(json.dumps(summaries if not args.user else (summaries or [None])[0], indent=2))
+        else:
+            print(f"{'USER':<32} {'HOME':>8} {'WORKSPACE':>10} {'FILES':>10} {'QUOTA':>8} UPDATED")
+            for s in summaries:
+                quota = s.get('quota') or {}
+                print(f"{s['user']:<32} {_human(s['home_bytes']):>8} {_human(s['workspace_bytes']):>10} "
+                      f"{s['home_files']:>10} {_human(quota.get('hard_bytes')):>8} "
+                      f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(s['updated']))}")
+        if args.user and not summaries:
+            return 1
+    elif args.command == 'get':
+        summary = load_summary(args.user)
+        if summary is None:
+            return 1
+        print(" ".join('-' if v is None else str(v) for v in (_field(summary, f) for f in args.fields)))
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -102,6 +102,19 @@ generate_dockerfile() {
     # Create output directory
     mkdir -p "$(dirname "$output")"
 
+    # Catalog metadata of the base image (compiled AIME index, empty if not a catalog image)
+    local base_labels=""
+    local catalog_info
+    catalog_info=$(python3 /opt/ds01-infra/scripts/lib/aime_catalog.py info "$base_image" 2>/dev/null)
+    if [ -n "$catalog_info" ]; then
+        local base_framework base_version base_archs
+        IFS=$'\t' read -r base_framework base_version base_archs <<< "$catalog_info"
+        base_labels="
+LABEL ds01.base.framework=\"$base_framework\"
+LABEL ds01.base.version=\"$base_version\"
+LABEL ds01.base.architectures=\"$base_archs\""
+    fi
+
     # === HEADER ===
     cat > "$output" << EOF
 # DS01 Project Dockerfile
@@ -122,6 +135,7 @@ LABEL ds01.project="$project"
 LABEL ds01.framework="$framework"
 LABEL ds01.created="$(date -Iseconds)"
 LABEL ds01.managed="true"
+LABEL ds01.base_image="$base_image"${base_labels}
 
 # Build arguments (set automatically by DS01)
 ARG DS01_USER_ID=${user_id}
@@ -0,0 +1,70 @@
+#!/bin/bash
+# /opt/ds01-infra/scripts/lib/ds01-trace.sh
+# Phase timing for shell scripts - bash counterpart of ds01_trace.py
+#
+# Writes one span per phase to the same trace log as the Python spans
+# (/var/log/ds01/trace.jsonl), tagged with DS01_REQUEST_ID, so ds01-trace
+# can show wrapper phases next to allocator and mlc-patched.py spans.
+#
+# Uses only bash builtins ($EPOCHREALTIME, printf) - timing a phase never
+# forks. Requires bash 5; on older shells the helpers are no-ops.
+#
+# Usage:
+#   source /opt/ds01-infra/scripts/lib/ds01-trace.sh
+#   ds01_phase_begin wrapper.resource_limits
+#   ...
+#   ds01_phase_end wrapper.resource_limits hint=parallel:limits
+#
+# Attributes (key=value) are recorded on the span. ds01-trace --phases
+# reports phases carrying hint=skippable or hint=parallel:<group> as
+# optimisation candidates.
+#
+# Environment: DS01_TRACE=0 disables recording, DS01_TRACE_FILE overrides the log.
+
+declare -gA _DS01_PHASE_START=()
+
+_ds01_trace_enabled() {
+    [ -n "${EPOCHREALTIME:-}" ] || return 1
+    case "${DS01_TRACE:-1}" in
+        0|false|off|no) return 1 ;;
+    esac
+    return 0
+}
+
+# Microseconds since the epoch (EPOCHREALTIME without the decimal point)
+_ds01_now_us() {
+    printf -v "$1" '%s' "${EPOCHREALTIME/[.,]/}"
+}
+
+# Start timing a phase
+# Usage: ds01_phase_begin <span-name>
+ds01_phase_begin() {
+    _ds01_trace_enabled || return 0
+    _ds01_now_us "_DS01_PHASE_START[$1]"
+}
+
+# Stop timing a phase and append its span
+# Usage: ds01_phase_end <span-name> [key=value ...]
+ds01_phase_end() {
+    _ds01_trace_enabled || return 0
+    local name="$1" start now ts attrs="" kv
+    shift
+    start="${_DS01_PHASE_START[$name]:-}"
+    [ -n "$start" ] || return 0
+    unset "_DS01_PHASE_START[$name]"
+    _ds01_now_us now
+
+    for kv in "$@"; do
+        [[ "$kv" == *=* ]] || continue
+        local value="${kv#*=}"
+        value="${value//\\/\\\\}"
+        value="${value//\"/\\\"}"
+        attrs+=",\"${kv%%=*}\":\"${value}\""
+    done
+
+    TZ=UTC printf -v ts '%(%Y-%m-%dT%H:%M:%SZ)T' -1
+    local us=$((now - start))
+    printf '{"ts":"%s","rid":"%s","span":"%s","ms":%d.%03d,"pid":%d%s}\n' \
+        "$ts" "${DS01_REQUEST_ID:-}" "$name" $((us / 1000)) $((us % 1000)) "$$" "$attrs" \
+        2>/dev/null >> "${DS01_TRACE_FILE:-/var/log/ds01/trace.jsonl}" || true
+}
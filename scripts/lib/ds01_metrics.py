@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/ds01_metrics.py
+Metrics segment store written by metrics-sampler.py, and its reader API.
+
+The sampler appends one JSON record per line to a per-day segment file,
+/var/log/ds01/metrics/YYYY-MM-DD.jsonl (local days, matching the daily
+reports). Every record carries
+`ts` (epoch seconds) and `kind`:
+
+    gpu        index, uuid, name, util, mem_util, mem_used, mem_total, temp, power,
+               power_limit, mig (MIG mode enabled)
+    gpu_proc   uuid, pid, uid, user, mem, container (short ID, None outside containers)
+    mig        slot, gpu, uuid, profile, mem_used, procs, containers   (from the compute processes)
+    gpu_container  id, name, user, gpu_mem, procs, devices (GPU indexes / MIG slots)
+               (one per container with GPU compute processes)
+    host       cpu, load1, load5, load15, mem_total, mem_used, mem_avail, buff_cache,
+               swap_total, swap_used                      (memory in MB, cpu in %)
+    user       user, uid, cpu, mem, procs                  (cpu in % of one core, mem in MB)
+    container  id, name, user, cpu, mem, mem_limit, pids, blk_read, blk_write, net_rx, net_tx
+               (I/O in bytes since container start)
+    disk       mount, total_gb, used_gb, avail_gb, pct, inode_pct
+    home       user, home_gb, workspace_gb, files, quota_used_gb, quota_gb
+               (from the disk-usage index, only when it was updated)
+
+The sampler also publishes its in-memory ring buffer (the last N samples of
+each kind) to latest.json in the same directory, so live readers don't have
+to re-collect anything.
+
+Usage:
+    from ds01_metrics import read_samples, recent
+
+    for rec in read_samples(kinds={'gpu'}, since=time.time() - 3600):
+        ...
+    recent('container')          # ring buffer contents, oldest first
+
+    # Shell:
+    python3 /opt/ds01-infra/scripts/lib/ds01_metrics.py tail gpu --since 1h
+    python3 /opt/ds01-infra/scripts/lib/ds01_metrics.py latest
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+METRICS_DIR = Path("/var/log/ds01/metrics")
+LATEST_FILE = "latest.json"
+
+KINDS = ('gpu', 'gpu_proc', 'gpu_container', 'mig', 'host', 'user', 'container', 'disk', 'home')
+
+
+def day_of(ts: float) -> str:
+    """Segment day (local time) for a timestamp."""
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+
+def segment_path(day: str, metrics_dir: Path = METRICS_DIR) -> Path:
+    """Segment file for a YYYY-MM-DD day."""
+    return Path(metrics_dir) / f"{day}.jsonl"
+
+
+def append_records(records: Iterable[Dict], metrics_dir: Path = METRICS_DIR):
+    """Append records to their day segments (one write per segment)."""
+    by_day: Dict[str, List[str]] = {}
+    for rec in records:
+        by_day.setdefault(day_of(rec['ts']), []).append(json.dumps(rec, separators=(',', ':')))
+    for day, lines in by_day.items():
+        with open(segment_path(day, metrics_dir), 'a') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def segments(since: Optional[float] = None, until: Optional[float] = None,
+             metrics_dir: Path = METRICS_DIR) -> List[Path]:
+    """Segment files overlapping [since, until], oldest first."""
+    first = day_of(since) if since is not None else None
+    last = day_of(until) if until is not None else None
+    try:
+        names = sorted(p.name for p in Path(metrics_dir).glob("????-??-??.jsonl"))
+    except OSError:
+        return []
+    return [Path(metrics_dir) / name for name in names
+            if (first is None or name[:10] >= first) and (last is None or name[:10] <= last)]
+
+
+def read_samples(kinds: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, metrics_dir: Path = METRICS_DIR) -> Iterator[Dict]:
+    """
+    Stream records from the segment files, oldest first.
+
+    Args:
+        kinds: Only these record kinds (None = all)
+        since/until: Epoch bounds (inclusive)
+    """
+    kinds = set(kinds) if kinds else None
+    for path in segments(since, until, metrics_dir):
+        try:
+            f = open(path)
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line while the sampler writes
+                if kinds is not None and rec.get('kind') not in kinds:
+                    continue
+                ts = rec.get('ts', 0)
+                if (since is not None and ts < since) or (until is not None and ts > until):
+                    continue
+                yield rec
+
+
+def publish_latest(ring: Dict[str, List[Dict]], metrics_dir: Path = METRICS_DIR):
+    """Atomically replace latest.json with the sampler's ring buffer."""
+    path = Path(metrics_dir) / LATEST_FILE
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    try:
+        tmp.write_text(json.dumps({'ts': time.time(), 'samples': ring}, separators=(',', ':')))
+        os.replace(tmp, path)
+    except (IOError, OSError):
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def recent(kind: Optional[str] = None, metrics_dir: Path = METRICS_DIR) -> List[Dict]:
+    """Ring-buffer samples published by the sampler (oldest first); [] if not running."""
+    try:
+        data = json.loads((Path(metrics_dir) / LATEST_FILE).read_text())
+    except (IOError, OSError, ValueError):
+        return []
+    samples = data.get('samples', {})
+    if kind is not None:
+        return samples.get(kind, [])
+    return sorted((rec for recs in samples.values() for rec in recs), key=lambda r: r.get('ts', 0))
+
+
+def prune_segments(retention_days: int, metrics_dir: Path = METRICS_DIR) -> int:
+    """Delete segments older than retention_days. Returns the number removed."""
+    if retention_days < 0:
+        return 0
+    cutoff = day_of(time.time() - retention_days * 86400)
+    removed = 0
+    for path in segments(metrics_dir=metrics_dir):
+        if path.name[:10] < cutoff:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def main():
+    usage = ("Usage: ds01_metrics.py <command>\n\n"
+             "Commands:\n"
+             "  tail <kind|all> [--since 1h]   - Records from the segment files (JSON lines)\n"
+             "  latest [kind]                  - Sampler ring buffer (JSON)\n")
+    args = sys.argv[1:]
+    if args and args[0] == "tail" and len(args) in (2, 4):
+        since = None
+        if len(args) == 4 and args[2] == "--since":
+            from ds01_core import parse_duration
+            since = time.time() - max(parse_duration(args[3]), 0)
+        kinds = None if args[1] == "all" else {args[1]}
+        for rec in read_samples(kinds, since=since):
+            print(json.dumps(rec, separators=(',', ':')))
+    elif args and args[0] == "latest" and len(args) <= 2:
+        print(json.dumps(recent(args[1] if len(args) == 2 else None), indent=2))
+    else:
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/ds01_trace.py
+Lightweight timing spans for DS01 hot paths (allocation, state reads, logging).
+
+This module provides:
+- Timing spans (span context manager, traced decorator)
+- Request ID propagation across processes (DS01_REQUEST_ID)
+- Optional cProfile dumps for a single invocation (run_profiled)
+- Trace log reading and per-span percentile summaries (load_spans, summarize)
+- Phase breakdowns for shell scripts timed with ds01-trace.sh (phase_report)
+
+Spans are buffered in memory and appended to the trace log as compact JSON
+lines when the process exits. Tracing is best-effort: a missing or read-only
+log directory never breaks the caller.
+
+Usage:
+    from ds01_trace import span, traced
+
+    with span("allocator.lock_wait"):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    @traced("state.docker_scan")
+    def _get_all_ds01_containers(self): ...
+
+Environment:
+    DS01_REQUEST_ID   Correlation ID shared by every process of one request
+                      (exported by mlc-create-wrapper.sh, generated if unset)
+    DS01_TRACE=0      Disable span recording
+    DS01_TRACE_FILE   Override trace log path (default: /var/log/ds01/trace.jsonl)
+    DS01_PROFILE      Dump a cProfile per invocation ("1" = default directory,
+                      otherwise the directory to write .prof files to)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import atexit
+import tempfile
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator
+
+LOG_DIR = Path("/var/log/ds01")
+TRACE_FILE = LOG_DIR / "trace.jsonl"
+PROFILE_DIR = LOG_DIR / "profiles"
+
+# Flush early in long-running processes so the buffer stays small
+FLUSH_THRESHOLD = 64
+
+_buffer: List[Dict] = []
+
+
+def tracing_enabled() -> bool:
+    """Return False when DS01_TRACE=0 (or 'false'/'off')."""
+    return os.environ.get('DS01_TRACE', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def trace_file() -> Path:
+    """Return the active trace log path."""
+    return Path(os.environ.get('DS01_TRACE_FILE', str(TRACE_FILE)))
+
+
+def get_request_id() -> str:
+    """
+    Return the request ID for this process.
+
+    Uses DS01_REQUEST_ID if set; otherwise generates one and exports it so
+    child processes (allocator, event logger, mlc-patched.py) share it.
+    """
+    rid = os.environ.get('DS01_REQUEST_ID')
+    if not rid:
+        rid = uuid.uuid4().hex[:12]
+        os.environ['DS01_REQUEST_ID'] = rid
+    return rid
+
+
+def record(name: str, duration_ms: float, **attrs) -> None:
+    """Record a completed span (buffered until flush)."""
+    if not tracing_enabled():
+        return
+    entry = {
+        "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "rid": get_request_id(),
+        "span": name,
+        "ms": round(duration_ms, 3),
+        "pid": os.getpid(),
+    }
+    entry.update(attrs)
+    _buffer.append(entry)
+    if len(_buffer) >= FLUSH_THRESHOLD:
+        flush()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict]:
+    """
+    Time a block of code and record it as a span.
+
+    The yielded dict can be used to attach attributes discovered inside
+    the block (e.g. result counts):
+
+        with span("state.docker_scan") as s:
+            names = scan()
+            s["containers"] = len(names)
+    """
+    extra = dict(attrs)
+    start = time.perf_counter()
+    try:
+        yield extra
+    except BaseException as e:
+        extra.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        record(name, (time.perf_counter() - start) * 1000.0, **extra)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def flush() -> None:
+    """Append buffered spans to the trace log (best-effort)."""
+    global _buffer
+    if not _buffer:
+        return
+    pending, _buffer = _buffer, []
+    path = trace_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in pending)
+        # Single write per flush keeps concurrent appenders line-atomic
+        with open(path, 'a') as f:
+            f.write(data)
+    except (IOError, OSError):
+        pass  # Tracing must never break the traced operation
+
+
+atexit.register(flush)
+
+
+# =============================================================================
+# Profiling
+# =============================================================================
+
+def profile_requested() -> bool:
+    """Check whether DS01_PROFILE asks for a cProfile dump."""
+    return bool(os.environ.get('DS01_PROFILE'))
+
+
+def _profile_dir() -> Path:
+    value = os.environ.get('DS01_PROFILE', '')
+    if value and value not in ('1', 'true', 'yes'):
+        return Path(value)
+    return PROFILE_DIR
+
+
+def run_profiled(func, label: str, enabled: bool = False, *args, **kwargs):
+    """
+    Run func(*args, **kwargs), dumping a cProfile if enabled or DS01_PROFILE is set.
+
+    The profile is written to <profile dir>/<label>-<request id>.prof, falling
+    back to the system temp directory if the log directory is not writable.
+    SystemExit from CLI main() functions is propagated after the dump.
+    """
+    if not (enabled or profile_requested()):
+        return func(*args, **kwargs)
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        filename = f"{label}-{get_request_id()}.prof"
+        target = _profile_dir() / filename
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(target))
+        except (IOError, OSError):
+            target = Path(tempfile.gettempdir()) / filename
+            profiler.dump_stats(str(target))
+        print(f"Profile written: {target}", file=sys.stderr)
+
+
+# =============================================================================
+# Reading / Summaries
+# =============================================================================
+
+def trace_files(path: Path, since: Optional[datetime] = None) -> List[Path]:
+    """
+    The trace log plus its logrotate copies (trace.jsonl-YYYYMMDD[.gz]),
+    oldest first. Rotated copies dated before `since` are skipped.
+    """
+    path = Path(path)
+    since_day = since.strftime("%Y%m%d") if since else ""
+    rotated = []
+    for candidate in path.parent.glob(f"{path.name}-*"):
+        stamp = candidate.name[len(path.name) + 1:].split('.')[0]
+        if stamp.isdigit() and stamp >= since_day:
+            rotated.append((stamp, candidate))
+    return [candidate for _, candidate in sorted(rotated)] + [path]
+
+
+def load_spans(path: Optional[Path] = None, since: Optional[datetime] = None,
+               request_id: Optional[str] = None, include_rotated: bool = False) -> List[Dict]:
+    """
+    Load spans from the trace log.
+
+    Args:
+        path: Trace log (default: active trace file)
+        since: Only spans at or after this UTC time
+        request_id: Only spans from this request
+        include_rotated: Also read rotated (and gzipped) copies, for multi-day windows
+
+    Returns:
+        List of span dicts in file order
+    """
+    path = path or trace_file()
+    since_str = since.strftime("%Y-%m-%dT%H:%M:%SZ") if since else None
+    paths = trace_files(path, since) if include_rotated else [path]
+    spans = []
+    for source in paths:
+        try:
+            if source.suffix == '.gz':
+                import gzip
+                f = gzip.open(source, 'rt')
+            else:
+                f = open(source)
+            with f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if since_str and entry.get('ts', '') < since_str:
+                        continue
+                    if request_id and entry.get('rid') != request_id:
+                        continue
+                    spans.append(entry)
+        except (IOError, OSError, EOFError):
+            continue
+    return spans
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0 for empty input)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(spans: List[Dict]) -> Dict[str, Dict]:
+    """
+    Aggregate spans by name.
+
+    Returns:
+        Dict of span name -> {count, p50, p95, max, total} (milliseconds)
+    """
+    by_name: Dict[str, List[float]] = {}
+    for entry in spans:
+        name = entry.get('span')
+        if not name:
+            continue
+        by_name.setdefault(name, []).append(float(entry.get('ms', 0)))
+
+    return {
+        name: {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'max': max(values),
+            'total': sum(values),
+        }
+        for name, values in by_name.items()
+    }
+
+
+def phase_report(spans: List[Dict], prefix: str = "wrapper.", total: str = "wrapper.total") -> Dict:
+    """
+    Per-phase breakdown of a shell script traced with ds01-trace.sh.
+
+    Phases are the spans under `prefix` except the end-to-end `total` span.
+    A phase's share is its summed time over the summed end-to-end time of
+    the same requests. Phases recorded with hint=skippable or
+    hint=parallel:<group> are listed as optimisation candidates; a parallel
+    group's saving is everything but its slowest member.
+
+    Returns:
+        {'requests': int, 'total': stats, 'phases': {name: stats + share/hint},
+         'candidates': [{'kind', 'phases', 'p50_saving'}]}
+    """
+    phase_spans = [s for s in spans if str(s.get('span', '')).startswith(prefix)]
+    totals = [s for s in phase_spans if s.get('span') == total]
+    requests = {s.get('rid') for s in totals} or {s.get('rid') for s in phase_spans}
+    total_ms = sum(float(s.get('ms', 0)) for s in totals)
+
+    phases = summarize([s for s in phase_spans if s.get('span') != total and s.get('rid') in requests])
+    for name, stats in phases.items():
+        hints = {s.get('hint') for s in phase_spans if s.get('span') == name and s.get('hint')}
+        stats['hint'] = sorted(hints)[0] if hints else None
+        stats['share'] = stats['total'] / total_ms if total_ms else 0.0
+
+    candidates = []
+    groups: Dict[str, List[str]] = {}
+    for name, stats in phases.items():
+        hint = stats['hint'] or ''
+        if hint == 'skippable':
+            candidates.append({'kind': 'skip', 'phases': [name], 'p50_saving': stats['p50']})
+        elif hint.startswith('parallel:'):
+            groups.setdefault(hint.split(':', 1)[1], []).append(name)
+    for group, names in groups.items():
+        if len(names) > 1:
+            p50s = [phases[n]['p50'] for n in names]
+            candidates.append({'kind': f'parallel ({group})', 'phases': sorted(names),
+                               'p50_saving': sum(p50s) - max(p50s)})
+    candidates.sort(key=lambda c: c['p50_saving'], reverse=True)
+
+    return {
+        'requests': len(requests),
+        'total': summarize(totals).get(total),
+        'phases': phases,
+        'candidates': candidates,
+    }
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/ds01_trace_compat.py
+Timing spans that degrade to no-ops when ds01_trace cannot be imported.
+
+Tracing is optional for every caller (allocator, state reader, event
+logger, mlc-patched.py, ...) and must never block container creation. This
+is the single fallback they share instead of each carrying its own stubs.
+
+Usage:
+    sys.path.insert(0, "/opt/ds01-infra/scripts/lib")
+    from ds01_trace_compat import span, traced, run_profiled
+"""
+
+try:
+    from ds01_trace import span, traced, run_profiled
+    TRACING_AVAILABLE = True
+except ImportError:
+    from contextlib import contextmanager
+
+    TRACING_AVAILABLE = False
+
+    @contextmanager
+    def span(name, **attrs):
+        yield {}
+
+    def traced(name):
+        return lambda func: func
+
+    def run_profiled(func, label, enabled=False, *args, **kwargs):
+        return func(*args, **kwargs)
+
+__all__ = ['span', 'traced', 'run_profiled', 'TRACING_AVAILABLE']
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/gpu_attribution.py
+Per-container and per-device (GPU or MIG UUID) GPU attribution.
+
+The monitors attributed GPU activity by parent GPU index: every MIG
+instance got its physical GPU's utilization.gpu, and container-stats looked
+a container's GPU up by index. nvidia-smi reports no utilization per MIG
+instance, but it does report every compute process with the device (MIG
+UUID) it runs on. This takes one such sample, maps each PID to its
+container through /proc/<pid>/cgroup, and sums memory and process counts
+per container and per device UUID - a real per-slice signal:
+
+    a slice is busy   <=> it has compute processes
+    a container is    <=> its own processes hold GPU memory
+    using its GPU
+
+Processes outside any container (bare metal) are attributed to container
+None.
+
+Usage:
+    from gpu_attribution import query_compute_apps, attribute
+
+    result = attribute(query_compute_apps())
+    result['devices']['MIG-...']      # {'mem': 4096.0, 'procs': 2, 'containers': ['3f2a...']}
+    result['containers']['3f2a...']   # {'mem': 4096.0, 'procs': 2, 'devices': ['MIG-...']}
+
+    # Shell:
+    python3 /opt/ds01-infra/scripts/lib/gpu_attribution.py [--json]
+"""
+
+import re
+import sys
+import json
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROC_ROOT = Path("/proc")
+
+# Container scope in the cgroup tree: docker-<id>.scope (systemd driver) or <id> under
+# /docker or a --cgroup-parent slice (cgroupfs); containerd/podman scopes alike.
+# Shared by every /proc and /sys/fs/cgroup reader (metrics-sampler, process_inventory,
+# detect-bare-metal) so they agree on what is a container.
+CONTAINER_SCOPE = r'(?:[a-z][a-z-]*-)?([0-9a-f]{64})(?:\.scope)?'
+# ...as a cgroup directory name
+SCOPE_DIR = re.compile(rf'^{CONTAINER_SCOPE}$')
+# ...anywhere in /proc/<pid>/cgroup (nested cgroups inside the scope included)
+CONTAINER_CGROUP = re.compile(rf'/{CONTAINER_SCOPE}(?:/|$)', re.MULTILINE)
+
+
+def parse_compute_apps(output: str) -> List[Dict]:
+    """`nvidia-smi --query-compute-apps=pid,gpu_uuid,used_memory --format=csv,noheader,nounits` rows."""
+    apps = []
+    for line in output.splitlines():
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue
+        try:
+            mem = float(parts[2])
+        except ValueError:
+            mem = None   # [N/A]
+        apps.append({'pid': int(parts[0]), 'uuid': parts[1], 'mem': mem})
+    return apps
+
+
+def query_compute_apps(timeout: int = 10) -> Optional[List[Dict]]:
+    """One compute-apps sample, or None if nvidia-smi is unavailable."""
+    try:
+        result = subprocess.run(['nvidia-smi', '--query-compute-apps=pid,gpu_uuid,used_memory',
+                                 '--format=csv,noheader,nounits'],
+                                capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return parse_compute_apps(result.stdout) if result.returncode == 0 else None
+
+
+def container_id_from_cgroup(content: str) -> Optional[str]:
+    """Full container ID if a /proc/<pid>/cgroup text places the process in a container."""
+    match = CONTAINER_CGROUP.search(content)
+    return match.group(1) if match else None
+
+
+def container_of(pid: int, proc_root: Path = PROC_ROOT) -> Optional[str]:
+    """Full container ID of a host PID (None for processes outside containers or gone)."""
+    try:
+        with open(Path(proc_root) / str(pid) / "cgroup") as f:
+            content = f.read()
+    except (IOError, OSError):
+        return None
+    return container_id_from_cgroup(content)
+
+
+def aggregate(processes: List[Dict]) -> Dict:
+    """
+    Sum attributed processes ({uuid, mem, container}) per container and per device UUID.
+
+    Returns {'containers': {id: {'mem', 'procs', 'devices'}},
+             'devices': {uuid: {'mem', 'procs', 'containers'}}}
+    (container None = processes outside containers).
+    """
+    containers, devices = {}, {}
+    for proc in processes:
+        cid, uuid, mem = proc.get('container'), proc['uuid'], proc.get('mem') or 0
+        c = containers.setdefault(cid, {'mem': 0.0, 'procs': 0, 'devices': []})
+        c['mem'] += mem
+        c['procs'] += 1
+        if uuid not in c['devices']:
+            c['devices'].append(uuid)
+        d = devices.setdefault(uuid, {'mem': 0.0, 'procs': 0, 'containers': []})
+        d['mem'] += mem
+        d['procs'] += 1
+        if cid not in d['containers']:
+            d['containers'].append(cid)
+    return {'containers': containers, 'devices': devices}
+
+
+def attribute(apps: Optional[List[Dict]], proc_root: Path = PROC_ROOT) -> Dict:
+    """
+    Attribute a compute-apps sample to containers and aggregate it.
+
+    Returns aggregate()'s result plus 'processes': [{pid, uuid, mem, container}].
+    """
+    processes = [dict(app, container=container_of(app['pid'], proc_root)) for app in apps or []]
+    result = aggregate(processes)
+    result['processes'] = processes
+    return result
+
+
+def main(argv: List[str]) -> int:
+    apps = query_compute_apps()
+    if apps is None:
+        print("gpu_attribution: nvidia-smi unavailable", file=sys.stderr)
+        return 2
+    result = attribute(apps)
+    if '--json' in argv:
+        print(json.dumps({'containers': {k or '-': v for k, v in result['containers'].items()},
+                          'devices': {k: dict(v, containers=[c or '-' for c in v['containers']])
+                                      for k, v in result['devices'].items()}}, indent=2))
+        return 0
+    # container (short id or '-'), device uuid, mem MB, procs - one line per container/device pair
+    pairs: Dict[tuple, List[float]] = {}
+    for p in result['processes']:
+        entry = pairs.setdefault(((p['container'] or '-')[:12], p['uuid']), [0.0, 0])
+        entry[0] += p['mem'] or 0
+        entry[1] += 1
+    for (cid, uuid), (mem, procs) in sorted(pairs.items()):
+        print(f"{cid}\t{uuid}\t{mem:g}\t{procs}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/host_gpu.py
+Cached host GPU capability detection (driver type, architecture, driver version)
+and GPU interconnect topology.
+
+mlc-patched.py picked the image architecture from `apt list --installed`
+on every create, which takes a second or more. This module reads the dpkg
+status file directly (same package patterns) and caches the result in
+/var/log/ds01/host-gpu.json. Only root writes the cache (deploy.sh, cron),
+as 0644; it is ignored unless root-owned and not writable by others, and
+other users then detect in memory.
+
+The cache is keyed by a fingerprint of the inputs that can change the
+answer - the dpkg status file (mtime, size) and the loaded kernel driver
+versions (/proc/driver/nvidia/version, /sys/module/amdgpu/version) - so
+a package install or driver upgrade invalidates it without any fork.
+
+The `nvidia-smi topo -m` matrix (link type between every pair of GPUs,
+NUMA affinity per GPU) is cached the same way (root-written, 0644) in
+/var/log/ds01/gpu-topology.json, with the set of GPUs the driver sees added
+to the fingerprint. The GPU
+allocator uses it to keep multi-MIG containers on nearby GPUs.
+
+Usage:
+    from host_gpu import host_gpu_architecture, HostGpuError
+
+    driver_type, architecture, version = host_gpu_architecture()
+    # ('CUDA', 'CUDA_ADA', 12.2)
+
+    from host_gpu import gpu_topology, locality
+
+    topology = gpu_topology()          # {} when nvidia-smi is unavailable
+    locality(topology, ['0', '1'])     # (0.75, 'PIX') - worst link between them
+
+    # Shell (aime-images.sh detect_cuda_arch):
+    python3 /opt/ds01-infra/scripts/lib/host_gpu.py arch     # CUDA_ADA
+    python3 /opt/ds01-infra/scripts/lib/host_gpu.py topo     # topology record
+    python3 /opt/ds01-infra/scripts/lib/host_gpu.py --json   # full record
+"""
+
+import os
+import re
+import sys
+import json
+import subprocess
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from root_state import read_root_json, write_root_json
+
+CACHE_FILE = Path("/var/log/ds01/host-gpu.json")
+DPKG_STATUS = Path("/var/lib/dpkg/status")
+DRIVER_VERSION_FILES = (
+    Path("/proc/driver/nvidia/version"),
+    Path("/sys/module/amdgpu/version"),
+)
+TOPOLOGY_CACHE_FILE = Path("/var/log/ds01/gpu-topology.json")
+NVIDIA_GPUS_DIR = Path("/proc/driver/nvidia/gpus")
+
+# Locality of `nvidia-smi topo -m` link types, nearest first (NV# = any NVLink count)
+LINK_LOCALITY = {'X': 1.0, 'NV': 0.9, 'PIX': 0.75, 'PXB': 0.6, 'PHB': 0.4, 'NODE': 0.25, 'SYS': 0.1}
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+class HostGpuError(Exception):
+    """No usable CUDA/ROCm installation found on the host."""
+
+
+def fingerprint(dpkg_status: Path = DPKG_STATUS, driver_files=DRIVER_VERSION_FILES) -> str:
+    """Cheap identity of everything detection depends on (stat + small reads only)."""
+    parts = []
+    try:
+        st = os.stat(dpkg_status)
+        parts.append(f"dpkg:{st.st_mtime_ns}:{st.st_size}")
+    except OSError:
+        parts.append("dpkg:-")
+    for path in driver_files:
+        try:
+            with open(path) as f:
+                parts.append(f"{path.name}:{f.readline().strip()}")
+        except (IOError, OSError):
+            parts.append(f"{path.name}:-")
+    return "|".join(parts)
+
+
+def installed_packages(dpkg_status: Path = DPKG_STATUS) -> str:
+    """Installed packages as `name/now version` lines (the `apt list --installed` shape)."""
+    lines = []
+    package = version = None
+    installed = False
+    with open(dpkg_status, errors='replace') as f:
+        for line in f:
+            if line.startswith("Package: "):
+                package = line[9:].strip()
+            elif line.startswith("Version: "):
+                version = line[9:].strip()
+            elif line.startswith("Status: "):
+                installed = line.split()[-1] == "installed"
+            elif not line.strip():
+                if package and installed:
+                    lines.append(f"{package}/now {version or ''}")
+                package = version = None
+                installed = False
+    if package and installed:
+        lines.append(f"{package}/now {version or ''}")
+    return "\n".join(lines)
+
+
+def detect(packages: str) -> Tuple[str, str, object]:
+    """
+    Map an installed-package listing to (driver type, architecture, version).
+
+    Same rules as the original mlc.py detection: the CUDA version comes from
+    cuda-X-Y, cuda-toolkit-X-Y or a +cudaX.Y package version; ROCm from rocm-dev.
+
+    Raises:
+        HostGpuError: no CUDA/ROCm installation or unknown version
+    """
+    cuda_lines, rocm_lines = [], []
+    for line in packages.split("\n"):
+        if "cuda" in line.lower():
+            cuda_lines.append(line)
+        elif "rocm" in line:
+            rocm_lines.append(line)
+
+    if cuda_lines:
+        cuda_text = "\n".join(cuda_lines)
+        release = None
+        # Highest version among the matches, not the first in dpkg's file order
+        for pattern in (r'cuda-(\d+)-(\d+)', r'cuda-toolkit-(\d+)-(\d+)', r'\+cuda(\d+)\.(\d+)'):
+            candidates = [(int(major), int(minor)) for major, minor in re.findall(pattern, cuda_text)]
+            if candidates:
+                release = max(candidates)
+                break
+        if release is None:
+            raise HostGpuError("CUDA driver version not found.")
+        version = float(f"{release[0]}.{release[1]}")
+        if release <= (11, 8):
+            return "CUDA", "CUDA_AMPERE", version
+        if release >= (12, 8):
+            return "CUDA", "CUDA_BLACKWELL", version
+        if release >= (12, 0):
+            return "CUDA", "CUDA_ADA", version
+        raise HostGpuError("Unknown CUDA architecture.")
+
+    if rocm_lines:
+        match = re.search(r'rocm-dev/[^\s]+\s+(\d+\.\d+\.\d+)', "\n".join(rocm_lines))
+        if not match:
+            raise HostGpuError("ROCm driver version not found.")
+        version = match.group(1)
+        return "ROCM", f"ROCM{int(version.split('.')[0])}", version
+
+    raise HostGpuError("Neither CUDA nor ROCm were found among the installed APT packages.")
+
+
+def _read_cache(cache_file: Path, key: str) -> Optional[Dict]:
+    """Cached record for key, if the file is root-owned and writable by nobody else."""
+    record = read_root_json(cache_file)
+    return record if isinstance(record, dict) and record.get('fingerprint') == key else None
+
+
+def _write_cache(cache_file: Path, record: Dict):
+    """Atomic, best-effort write as 0644; only root writes (others recompute each time)."""
+    write_root_json(cache_file, record)
+
+
+def host_gpu_info(cache_file: Path = CACHE_FILE, dpkg_status: Path = DPKG_STATUS,
+                  driver_files=DRIVER_VERSION_FILES) -> Dict:
+    """
+    Host GPU capabilities, from the cache while its fingerprint still matches.
+
+    Returns:
+        {'driver_type', 'architecture', 'version', 'driver', 'fingerprint'}
+
+    Raises:
+        HostGpuError: detection failed (failures are not cached)
+    """
+    key = fingerprint(dpkg_status, driver_files)
+    record = _read_cache(cache_file, key)
+    if record is not None:
+        return record
+
+    try:
+        packages = installed_packages(dpkg_status)
+    except (IOError, OSError) as e:
+        raise HostGpuError(f"Cannot read {dpkg_status}: {e}")
+    driver_type, architecture, version = detect(packages)
+    driver = None
+    for path in driver_files:
+        try:
+            match = re.search(r'(\d+\.\d+(\.\d+)*)', path.read_text())
+        except (IOError, OSError):
+            continue
+        if match:
+            driver = match.group(1)
+            break
+    record = {'driver_type': driver_type, 'architecture': architecture, 'version': version,
+              'driver': driver, 'fingerprint': key}
+    _write_cache(cache_file, record)
+    return record
+
+
+def host_gpu_architecture(**kwargs) -> Tuple[str, str, object]:
+    """(driver type, architecture, version) - drop-in for mlc.py get_host_gpu_architecture()."""
+    info = host_gpu_info(**kwargs)
+    return info['driver_type'], info['architecture'], info['version']
+
+
+def parse_topology(text: str) -> Dict:
+    """
+    Parse `nvidia-smi topo -m` output.
+
+    Returns:
+        {'links': {'0': {'1': 'NV12', '2': 'SYS'}, ...}, 'numa': {'0': '0', ...}}
+        (NIC rows/columns are ignored; NUMA is omitted where reported as N/A)
+    """
+    rows = [ANSI_ESCAPE.sub('', line).rstrip() for line in text.splitlines()]
+    header = next((line.split('\t') for line in rows if re.search(r'\tGPU\d+', line)), None)
+    if header is None:
+        return {'links': {}, 'numa': {}}
+    columns = [cell.strip() for cell in header]
+
+    links, numa = {}, {}
+    for line in rows:
+        cells = [cell.strip() for cell in line.split('\t')]
+        match = re.match(r'^GPU(\d+)$', cells[0])
+        if not match:
+            continue
+        gpu = match.group(1)
+        links[gpu] = {}
+        for column, cell in zip(columns[1:], cells[1:]):
+            peer = re.match(r'^GPU(\d+)$', column)
+            if peer and peer.group(1) != gpu and cell:
+                links[gpu][peer.group(1)] = cell
+            elif column == 'NUMA Affinity' and cell and cell != 'N/A':
+                numa[gpu] = cell
+    return {'links': links, 'numa': numa}
+
+
+def link_locality(link: str) -> float:
+    """Locality score (0-1] of one topology link type; unknown types score as SYS."""
+    if link.startswith('NV'):
+        link = 'NV'
+    return LINK_LOCALITY.get(link, LINK_LOCALITY['SYS'])
+
+
+def locality(topology: Dict, gpus: Iterable[str]) -> Tuple[Optional[float], str]:
+    """
+    Locality of a set of physical GPUs: the worst link between any two of them.
+
+    Pairs missing from the link matrix fall back to NUMA affinity (NODE when
+    both GPUs share a node, SYS otherwise).
+
+    Returns:
+        (score, link): (1.0, 'same-gpu') for a single GPU, (None, 'unknown')
+        when the topology does not cover the GPUs
+    """
+    gpus = sorted({str(g) for g in gpus}, key=int)
+    if len(gpus) <= 1:
+        return 1.0, 'same-gpu'
+    links, numa = topology.get('links', {}), topology.get('numa', {})
+    worst = None
+    for a, b in combinations(gpus, 2):
+        link = links.get(a, {}).get(b)
+        if link is None:
+            if a not in numa or b not in numa:
+                return None, 'unknown'
+            link = 'NODE' if numa[a] == numa[b] else 'SYS'
+        if worst is None or link_locality(link) < link_locality(worst):
+            worst = link
+    return link_locality(worst), worst
+
+
+def topology_fingerprint(dpkg_status: Path = DPKG_STATUS, driver_files=DRIVER_VERSION_FILES,
+                         gpus_dir: Path = NVIDIA_GPUS_DIR) -> str:
+    """fingerprint() plus the PCI addresses of the GPUs the driver has bound."""
+    try:
+        bus_ids = ",".join(sorted(os.listdir(gpus_dir)))
+    except OSError:
+        bus_ids = "-"
+    return f"{fingerprint(dpkg_status, driver_files)}|gpus:{bus_ids}"
+
+
+def gpu_topology(cache_file: Path = TOPOLOGY_CACHE_FILE, dpkg_status: Path = DPKG_STATUS,
+                 driver_files=DRIVER_VERSION_FILES, gpus_dir: Path = NVIDIA_GPUS_DIR) -> Dict:
+    """
+    GPU interconnect topology, from the cache while its fingerprint still matches.
+
+    Returns:
+        {'links', 'numa', 'fingerprint'} (see parse_topology), or {} when
+        nvidia-smi is unavailable (failures are not cached)
+    """
+    key = topology_fingerprint(dpkg_status, driver_files, gpus_dir)
+    record = _read_cache(cache_file, key)
+    if record is not None:
+        return record
+
+    try:
+        result = subprocess.run(["nvidia-smi", "topo", "-m"], capture_output=True,
+                                text=True, timeout=10, check=True)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return {}
+    topology = parse_topology(result.stdout)
+    if not topology['links']:
+        return {}
+    record = dict(topology, fingerprint=key)
+    _write_cache(cache_file, record)
+    return record
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "topo":
+        topology = gpu_topology()
+        if not topology:
+            print("host_gpu: GPU topology unavailable (nvidia-smi topo -m failed)", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(topology, indent=2))
+        sys.exit(0)
+    try:
+        info = host_gpu_info()
+    except HostGpuError as e:
+        print(f"host_gpu: {e}", file=sys.stderr)
+        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] == "arch":
+        print(info['architecture'])
+    else:
+        print(json.dumps(info, indent=2))
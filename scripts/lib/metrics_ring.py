@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/metrics_ring.py
+Shared-memory ring buffer of live GPU, MIG and container metrics.
+
+metrics-sampler.py publishes every sample into a memory-mapped file
+(/dev/shm/ds01-metrics.ring); dashboards and CLI tools read it instead of
+running nvidia-smi and `docker stats --no-stream` (~2s each) themselves, so
+any number of concurrent viewers costs no extra collection.
+
+Layout (little-endian, fixed size):
+
+    header   magic "DS01RNG1", version, slots, depth, reserved, published (epoch), generation
+    slot[i]  seq, count, kind, key, id, label, user      (SLOT_HEADER)
+             depth x (ts, 8 values)                      (SAMPLE, NaN = missing)
+
+One slot per entity (a GPU, a MIG instance, a container or a container's
+GPU use); each slot holds the entity's last `depth` samples. The single
+writer brackets every slot update with a sequence counter (odd while
+writing), and readers retry a slot whose counter was odd or changed while
+copying it - no locks.
+
+Per-kind values (see FIELDS):
+    gpu        key = index, id = GPU UUID, label = name
+    mig        key = slot "gpu.instance", id = MIG UUID, label = profile
+    container  key = name, id = short container ID, user = ds01.user
+    gpu_container  key = name, id = short container ID, user = ds01.user,
+               label = devices (GPU indexes / MIG slots) - only containers
+               with GPU compute processes
+
+Usage:
+    from metrics_ring import latest
+
+    gpus = latest('gpu')           # [{'key': '0', 'util': 87.0, ...}], None if no fresh ring
+    if gpus is None:
+        ...                        # sampler not running - fall back to nvidia-smi
+
+    # Shell (dashboards, container-stats):
+    python3 /opt/ds01-infra/scripts/lib/metrics_ring.py gpu
+    python3 /opt/ds01-infra/scripts/lib/metrics_ring.py stats [container...]
+    python3 /opt/ds01-infra/scripts/lib/metrics_ring.py gpu-containers
+
+Exit codes: 0 ok, 2 ring missing or stale (sampler not running).
+"""
+
+import os
+import sys
+import json
+import math
+import mmap
+import time
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+RING_FILE = Path("/dev/shm/ds01-metrics.ring")
+MAGIC = b"DS01RNG1"
+VERSION = 1
+DEFAULT_MAX_AGE = 180  # Seconds since the last publish before readers fall back
+
+HEADER = struct.Struct("<8sIIIIdQ")   # magic, version, slots, depth, reserved, published, generation
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<QQB7x64s64s64s64s")
+VALUES = 8
+SAMPLE = struct.Struct(f"<d{VALUES}d")
+SEQ = struct.Struct("<Q")
+
+KIND_IDS = {'gpu': 1, 'mig': 2, 'container': 3, 'gpu_container': 4}
+KIND_NAMES = {v: k for k, v in KIND_IDS.items()}
+FIELDS = {
+    'gpu': ('util', 'mem_util', 'mem_used', 'mem_total', 'temp', 'power', 'power_limit', 'mig'),
+    'mig': ('gpu', 'mem_used', 'procs', 'containers'),
+    'container': ('cpu', 'mem', 'mem_limit', 'pids', 'blk_read', 'blk_write', 'net_rx', 'net_tx'),
+    'gpu_container': ('gpu_mem', 'procs'),
+}
+
+
+class RingUnavailable(Exception):
+    """No ring file, or not a ring this reader understands."""
+
+
+def slot_size(depth: int) -> int:
+    return SLOT_HEADER.size + depth * SAMPLE.size
+
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode(errors='replace')
+
+
+def _encode(text: Optional[str]) -> bytes:
+    return (text or "").encode()[:64]
+
+
+class RingWriter:
+    """Single publisher (metrics-sampler.py). Recreates the file on start."""
+
+    def __init__(self, path: Path = RING_FILE, slots: int = 256, depth: int = 60):
+        self.path = Path(path)
+        self.slots = slots
+        self.depth = depth
+        self.size = HEADER_SIZE + slots * slot_size(depth)
+        self.generation = 0
+        self._index: Dict[tuple, int] = {}
+        self._free = list(range(slots - 1, -1, -1))
+
+        # Build the new file aside and swap it in, so readers never map a short file
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+        with open(tmp, 'wb') as f:
+            f.truncate(self.size)
+        os.chmod(tmp, 0o644)
+        self._file = open(tmp, 'r+b')
+        self.mm = mmap.mmap(self._file.fileno(), self.size)
+        self.mm[:HEADER.size] = HEADER.pack(MAGIC, VERSION, slots, depth, 0, 0.0, 0)
+        os.replace(tmp, self.path)
+
+    def _offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * slot_size(self.depth)
+
+    def _begin(self, off: int) -> int:
+        seq = SEQ.unpack_from(self.mm, off)[0] + 1
+        SEQ.pack_into(self.mm, off, seq)  # Odd: update in progress
+        return seq
+
+    def publish(self, kind: str, key: str, ts: float, values: Dict,
+                ident: str = "", label: str = "", user: str = ""):
+        """Append one sample for an entity (allocating its slot on first sight)."""
+        slot = self._index.get((kind, key))
+        if slot is None:
+            if not self._free:
+                return  # Ring full - entity is skipped until a slot frees up
+            slot = self._free.pop()
+            self._index[(kind, key)] = slot
+            count = 0
+        else:
+            count = struct.unpack_from("<Q", self.mm, self._offset(slot) + 8)[0]
+
+        off = self._offset(slot)
+        seq = self._begin(off)
+        SLOT_HEADER.pack_into(self.mm, off, seq, count + 1, KIND_IDS[kind], str(key).encode()[:64],
+                              _encode(ident), _encode(label), _encode(user))
+        row = [math.nan if values.get(name) is None else float(values[name]) for name in FIELDS[kind]]
+        row += [math.nan] * (VALUES - len(row))
+        SAMPLE.pack_into(self.mm, off + SLOT_HEADER.size + (count % self.depth) * SAMPLE.size, ts, *row)
+        SEQ.pack_into(self.mm, off, seq + 1)
+
+    def retire(self, kind: str, live_keys: Iterable[str]):
+        """Free the slots of entities of `kind` that are gone (stopped container, MIG reconfig)."""
+        live = set(str(k) for k in live_keys)
+        for (k, key), slot in list(self._index.items()):
+            if k != kind or key in live:
+                continue
+            off = self._offset(slot)
+            seq = self._begin(off)
+            self.mm[off + 8:off + SLOT_HEADER.size] = bytes(SLOT_HEADER.size - 8)
+            SEQ.pack_into(self.mm, off, seq + 1)
+            del self._index[(k, key)]
+            self._free.append(slot)
+
+    def commit(self):
+        """Mark the ring as freshly published."""
+        self.generation += 1
+        struct.pack_into("<dQ", self.mm, 24, time.time(), self.generation)
+
+    def close(self):
+        self.mm.close()
+        self._file.close()
+
+
+class RingReader:
+    """Lock-free reader; any number may run concurrently."""
+
+    def __init__(self, path: Path = RING_FILE):
+        try:
+            with open(path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise RingUnavailable(f"{path}: {e}")
+        if len(self.mm) < HEADER_SIZE:
+            raise RingUnavailable(f"{path}: truncated")
+        magic, version, self.slots, self.depth, _, _, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise RingUnavailable(f"{path}: not a DS01 metrics ring")
+        if len(self.mm) < HEADER_SIZE + self.slots * slot_size(self.depth):
+            raise RingUnavailable(f"{path}: truncated")
+
+    @property
+    def published(self) -> float:
+        """Epoch time of the last publish (0 if never)."""
+        return struct.unpack_from("<d", self.mm, 24)[0]
+
+    def _read_slot(self, slot: int, retries: int = 10) -> Optional[bytes]:
+        off = HEADER_SIZE + slot * slot_size(self.depth)
+        size = slot_size(self.depth)
+        for _ in range(retries):
+            seq = SEQ.unpack_from(self.mm, off)[0]
+            if seq % 2:
+                time.sleep(0.0001)
+                continue
+            data = self.mm[off:off + size]
+            if SEQ.unpack_from(self.mm, off)[0] == seq:
+                return data
+        return None  # Writer kept it busy - skip this entity for now
+
+    def _decode(self, data: bytes, history: bool) -> Optional[Dict]:
+        _, count, kind_id, key, ident, label, user = SLOT_HEADER.unpack_from(data, 0)
+        kind = KIND_NAMES.get(kind_id)
+        if kind is None or count == 0:
+            return None
+        entity = {'kind': kind, 'key': _text(key), 'id': _text(ident),
+                  'label': _text(label), 'user': _text(user) or None}
+        first = count - min(count, self.depth) if history else count - 1
+        samples = []
+        for n in range(first, count):
+            ts, *values = SAMPLE.unpack_from(data, SLOT_HEADER.size + (n % self.depth) * SAMPLE.size)
+            sample = {'ts': ts}
+            for name, value in zip(FIELDS[kind], values):
+                sample[name] = None if math.isnan(value) else value
+            samples.append(sample)
+        if history:
+            entity['samples'] = samples
+        else:
+            entity.update(samples[-1])
+        return entity
+
+    def entities(self, kind: Optional[str] = None, history: bool = False) -> List[Dict]:
+        """
+        Every live entity (optionally of one kind), sorted by key.
+
+        Args:
+            history: Include all buffered samples as 'samples' (oldest first)
+                     instead of merging the latest sample into the entity
+        """
+        found = []
+        for slot in range(self.slots):
+            data = self._read_slot(slot)
+            if data is None:
+                continue
+            entity = self._decode(data, history)
+            if entity is not None and (kind is None or entity['kind'] == kind):
+                found.append(entity)
+        return sorted(found, key=lambda e: (e['kind'], _sort_key(e['key'])))
+
+    def close(self):
+        self.mm.close()
+
+
+def _sort_key(key: str):
+    """Numeric order for GPU/MIG keys ("2" < "10", "1.2" < "1.10"); names as text."""
+    parts = key.split('.')
+    if all(p.isdigit() for p in parts):
+        return (0, tuple(int(p) for p in parts), key)
+    return (1, (), key)
+
+
+def latest(kind: Optional[str] = None, max_age: float = DEFAULT_MAX_AGE,
+           path: Path = RING_FILE) -> Optional[List[Dict]]:
+    """Latest sample per entity, or None if the ring is missing or older than max_age."""
+    try:
+        reader = RingReader(path)
+    except RingUnavailable:
+        return None
+    try:
+        if time.time() - reader.published > max_age:
+            return None
+        return reader.entities(kind)
+    finally:
+        reader.close()
+
+
+def _human_bytes(n: Optional[float]) -> str:
+    """docker stats style: 1.5GiB, 120MiB, 0B."""
+    if n is None:
+        return "--"
+    for unit, scale in (("GiB", 1024 ** 3), ("MiB", 1024 ** 2), ("KiB", 1024)):
+        if n >= scale:
+            return f"{n / scale:.2f}{unit}"
+    return f"{n:.0f}B"
+
+
+def _human_io(n: Optional[float]) -> str:
+    """docker stats style (decimal units) for network/block I/O."""
+    if n is None:
+        return "--"
+    for unit, scale in (("GB", 1e9), ("MB", 1e6), ("kB", 1e3)):
+        if n >= scale:
+            return f"{n / scale:.3g}{unit}"
+    return f"{n:.0f}B"
+
+
+def stats_line(c: Dict) -> str:
+    """One container as `docker stats --format` tab-separated fields:
+    Name, CPUPerc, MemUsage, MemPerc, NetIO, BlockIO, PIDs."""
+    mib = 1024 ** 2
+    mem = c['mem'] * mib if c.get('mem') is not None else None
+    limit = c['mem_limit'] * mib if c.get('mem_limit') is not None else None
+    mem_perc = f"{100 * mem / limit:.2f}%" if mem is not None and limit else "--"
+    cpu = f"{c['cpu']:.2f}%" if c.get('cpu') is not None else "--"
+    pids = f"{c['pids']:.0f}" if c.get('pids') is not None else "--"
+    return "\t".join([c['key'], cpu, f"{_human_bytes(mem)} / {_human_bytes(limit)}", mem_perc,
+                      f"{_human_io(c.get('net_rx'))} / {_human_io(c.get('net_tx'))}",
+                      f"{_human_io(c.get('blk_read'))} / {_human_io(c.get('blk_write'))}", pids])
+
+
+def _num(value: Optional[float]) -> str:
+    return "N/A" if value is None else f"{value:g}"
+
+
+def main():
+    usage = ("Usage: metrics_ring.py <command> [--max-age SECONDS]\n\n"
+             "Commands (tab-separated output):\n"
+             "  gpu                  - index, name, util, mem_used, mem_total, temp, mig (1/0), uuid\n"
+             "  mig                  - slot, uuid, profile, mem_used, procs, containers\n"
+             "  stats [container...] - docker stats fields: name, CPU%, mem usage/limit, mem%, net, block, pids\n"
+             "  gpu-containers       - name, short id, user, gpu_mem, procs, devices (containers using a GPU)\n"
+             "  json                 - Every entity with its buffered samples\n")
+    args = sys.argv[1:]
+    max_age = DEFAULT_MAX_AGE
+    if "--max-age" in args:
+        i = args.index("--max-age")
+        try:
+            max_age = float(args[i + 1])
+        except (IndexError, ValueError):
+            print(usage, file=sys.stderr)
+            sys.exit(2)
+        del args[i:i + 2]
+    if not args or args[0] not in ("gpu", "mig", "stats", "gpu-containers", "json"):
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        reader = RingReader()
+    except RingUnavailable as e:
+        print(f"metrics_ring: {e}", file=sys.stderr)
+        sys.exit(2)
+    if time.time() - reader.published > max_age:
+        print("metrics_ring: ring is stale (sampler not running?)", file=sys.stderr)
+        sys.exit(2)
+
+    command = args[0]
+    if command == "gpu":
+        for g in reader.entities('gpu'):
+            print("\t".join([g['key'], g['label'], _num(g['util']), _num(g['mem_used']),
+                             _num(g['mem_total']), _num(g['temp']), "1" if g['mig'] else "0", g['id']]))
+    elif command == "mig":
+        for m in reader.entities('mig'):
+            print("\t".join([m['key'], m['id'], m['label'], _num(m['mem_used']), _num(m['procs']),
+                             _num(m['containers'])]))
+    elif command == "stats":
+        wanted = set(args[1:])
+        for c in reader.entities('container'):
+            if not wanted or c['key'] in wanted:
+                print(stats_line(c))
+    elif command == "gpu-containers":
+        for c in reader.entities('gpu_container'):
+            print("\t".join([c['key'], c['id'], c['user'] or "-", _num(c['gpu_mem']), _num(c['procs']),
+                             c['label']]))
+    else:
+        print(json.dumps({'published': reader.published, 'entities': reader.entities(history=True)},
+                         indent=2))
+
+
+if __name__ == "__main__":
+    main()
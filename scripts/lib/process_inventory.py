@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/process_inventory.py
+Host-side process inventory of every container, without entering containers.
+
+track-user-processes.sh ran `docker exec <container> ps aux` twice per
+running container and check-idle-containers.sh once more for activity -
+each exec spawns a process inside the user's container and fails on
+minimal images without `ps`. This reads, in one sweep from the host:
+
+    <scope>/cgroup.procs          member PIDs of each container scope
+                                  (nested cgroups included)
+    /proc/<pid>/stat, cmdline     command, CPU time, start time, RSS
+    /proc/<pid>/root/workspace/   the container's .keep-alive marker,
+        .keep-alive               through any member's root
+
+CPU % is lifetime average per process (CPU time / elapsed), the same
+figure `ps aux --sort=-%cpu` sorts by. A container is "busy" when it runs
+processes other than shells and sleepers (IDLE_COMMANDS). Per-user counts
+are by process UID, split into host and container processes.
+
+Usage:
+    from process_inventory import inventory
+
+    result = inventory()
+    result['containers']['3f2a...']   # {'procs': 5, 'busy': 2, 'cpu_percent': 97.5,
+                                      #  'top': [{'pid', 'comm', 'cmdline', 'cpu_percent'}],
+                                      #  'keep_alive': False}
+    result['users'][1001]             # {'host': 3, 'containers': 5}
+
+    # Shell:
+    python3 /opt/ds01-infra/scripts/lib/process_inventory.py [containers]  # id procs busy keep_alive cpu% top
+    python3 /opt/ds01-infra/scripts/lib/process_inventory.py users         # uid host_procs container_procs
+    python3 /opt/ds01-infra/scripts/lib/process_inventory.py --json
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from gpu_attribution import SCOPE_DIR
+
+PROC_ROOT = Path("/proc")
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+KEEP_ALIVE = "workspace/.keep-alive"
+TOP_PROCESSES = 3
+
+# Processes that keep a container alive without doing work
+IDLE_COMMANDS = frozenset({'bash', 'sh', 'dash', 'zsh', 'sleep', 'tail', 'ps',
+                           'tini', 'docker-init', 'dumb-init', 'sshd'})
+
+
+
+def container_scopes(cgroup_root: Path = CGROUP_ROOT) -> Dict[str, Path]:
+    """Full container ID -> cgroup scope directory."""
+    scopes = {}
+    for dirpath, dirnames, _ in os.walk(cgroup_root):
+        for name in dirnames:
+            match = SCOPE_DIR.match(name)
+            if match:
+                scopes[match.group(1)] = Path(dirpath) / name
+        # Containers sit in slices, never inside another container scope
+        dirnames[:] = [d for d in dirnames if not SCOPE_DIR.match(d) and
+                       (d.endswith('.slice') or d in ('docker', 'system.slice'))]
+    return scopes
+
+
+def scope_pids(scope: Path) -> List[int]:
+    """PIDs in a container scope, including nested cgroups (systemd or docker-in-docker inside)."""
+    pids = []
+    for dirpath, _, filenames in os.walk(scope):
+        if 'cgroup.procs' in filenames:
+            try:
+                with open(os.path.join(dirpath, 'cgroup.procs')) as f:
+                    pids.extend(int(line) for line in f if line.strip())
+            except (IOError, OSError, ValueError):
+                continue  # Container stopped mid-sweep
+    return pids
+
+
+def read_process(pid: int, proc_root: Path = PROC_ROOT, uptime: Optional[float] = None,
+                 clock_ticks: Optional[int] = None) -> Optional[Dict]:
+    """{pid, uid, comm, cmdline, cpu_seconds, cpu_percent, rss_kb} or None if the process is gone."""
+    base = Path(proc_root) / str(pid)
+    clock_ticks = clock_ticks or os.sysconf('SC_CLK_TCK')
+    try:
+        uid = os.stat(base).st_uid
+        with open(base / "stat") as f:
+            stat = f.read()
+        with open(base / "cmdline", 'rb') as f:
+            cmdline = f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+    except (IOError, OSError):
+        return None
+    comm = stat[stat.find('(') + 1:stat.rfind(')')]
+    fields = stat[stat.rfind(')') + 2:].split()
+    if len(fields) < 22:
+        return None
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / clock_ticks
+    elapsed = uptime - int(fields[19]) / clock_ticks if uptime is not None else 0
+    return {
+        'pid': pid,
+        'uid': uid,
+        'comm': comm,
+        'cmdline': cmdline or f"[{comm}]",
+        'cpu_seconds': round(cpu_seconds, 2),
+        'cpu_percent': round(100 * cpu_seconds / elapsed, 1) if elapsed > 0 else 0.0,
+        'rss_kb': int(fields[21]) * os.sysconf('SC_PAGE_SIZE') // 1024,
+    }
+
+
+def has_keep_alive(pids: List[int], proc_root: Path = PROC_ROOT) -> bool:
+    """Whether the container (any of its PIDs) has /workspace/.keep-alive, seen through /proc/<pid>/root."""
+    for pid in pids:
+        root = Path(proc_root) / str(pid) / "root"
+        try:
+            if root.is_dir():
+                return (root / KEEP_ALIVE).exists()
+        except OSError:
+            continue  # Process exited or root not readable
+    return False
+
+
+def _uptime(proc_root: Path) -> Optional[float]:
+    try:
+        with open(Path(proc_root) / "uptime") as f:
+            return float(f.read().split()[0])
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def inventory(cgroup_root: Path = CGROUP_ROOT, proc_root: Path = PROC_ROOT,
+              top: int = TOP_PROCESSES) -> Dict:
+    """
+    One sweep over every container scope and every host process.
+
+    Returns {'containers': {full id: {'procs', 'busy', 'cpu_percent', 'top', 'keep_alive'}},
+             'users': {uid: {'host', 'containers'}}}
+    """
+    uptime = _uptime(proc_root)
+    clock_ticks = os.sysconf('SC_CLK_TCK')
+    containers, users = {}, {}
+    in_containers = set()
+
+    for cid, scope in container_scopes(cgroup_root).items():
+        pids = scope_pids(scope)
+        procs = [p for p in (read_process(pid, proc_root, uptime, clock_ticks) for pid in pids) if p]
+        in_containers.update(pids)
+        for p in procs:
+            users.setdefault(p['uid'], {'host': 0, 'containers': 0})['containers'] += 1
+        ranked = sorted(procs, key=lambda p: p['cpu_percent'], reverse=True)
+        containers[cid] = {
+            'procs': len(procs),
+            'busy': sum(1 for p in procs if p['comm'] not in IDLE_COMMANDS),
+            'cpu_percent': round(sum(p['cpu_percent'] for p in procs), 1),
+            'top': [{k: p[k] for k in ('pid', 'comm', 'cmdline', 'cpu_percent')} for p in ranked[:top]],
+            'keep_alive': has_keep_alive(pids, proc_root),
+        }
+
+    with os.scandir(proc_root) as entries:
+        for entry in entries:
+            if not entry.name.isdigit() or int(entry.name) in in_containers:
+                continue
+            try:
+                uid = entry.stat(follow_symlinks=False).st_uid
+            except OSError:
+                continue  # Process exited
+            users.setdefault(uid, {'host': 0, 'containers': 0})['host'] += 1
+
+    return {'containers': containers, 'users': users}
+
+
+def main(argv: List[str]) -> int:
+    result = inventory()
+    if '--json' in argv:
+        print(json.dumps(result, indent=2))
+        return 0
+    if argv and argv[0] == 'users':
+        for uid, counts in sorted(result['users'].items()):
+            print(f"{uid}\t{counts['host']}\t{counts['containers']}")
+        return 0
+    # short id, procs, busy, keep-alive (0/1), CPU %, top commands (comma-separated) - one line per container
+    for cid, c in sorted(result['containers'].items()):
+        top = ",".join(p['comm'] for p in c['top'])
+        print(f"{cid[:12]}\t{c['procs']}\t{c['busy']}\t{int(c['keep_alive'])}\t{c['cpu_percent']:g}\t{top or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
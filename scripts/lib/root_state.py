@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+/opt/ds01-infra/scripts/lib/root_state.py
+Shared JSON state files that only root may write.
+
+Caches under /var/log/ds01 (image index, host GPU and topology caches,
+compiled AIME catalog) are read by every user's commands, and what they
+contain decides which image a container is created from. A file is only
+trusted when root owns it and neither group nor others can write it; it
+is only written by root (deploy.sh, cron), as 0644. Non-root callers
+recompute the value in memory instead.
+
+Usage:
+    from root_state import read_root_json, write_root_json
+
+    record = read_root_json(CACHE_FILE)       # None if missing or untrusted
+    if record is None:
+        record = compute()
+        write_root_json(CACHE_FILE, record)   # No-op unless running as root
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+OWNER_UID = 0
+FILE_MODE = 0o644
+
+
+def is_trusted(st: os.stat_result) -> bool:
+    """Owned by root and not writable by group or others."""
+    return st.st_uid == OWNER_UID and not st.st_mode & 0o022
+
+
+def read_root_json(path: Path) -> Optional[Any]:
+    """Parsed contents of path, or None if it is missing, invalid or untrusted."""
+    try:
+        with open(path) as f:
+            if not is_trusted(os.fstat(f.fileno())):
+                return None
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_root_json(path: Path, data: Any, **dump_kwargs) -> bool:
+    """
+    Atomically replace path with data as JSON (mode 0644).
+
+    Returns:
+        True if written; False when not running as root or the write failed
+    """
+    if os.geteuid() != OWNER_UID:
+        return False
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    try:
+        tmp.write_text(json.dumps(data, **dump_kwargs))
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+        return True
+    except (IOError, OSError):
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return False
@@ -15,52 +15,67 @@
 # Strips domain (@...), replaces dots with underscores, removes invalid characters
 # Uses underscores (not hyphens) to avoid systemd hierarchy interpretation
 sanitize_username_for_slice() {
-    local username="$1"
+    local result
+    sanitize_username_to_var result "$1"
+    echo "$result"
+}
+
+# Same as sanitize_username_for_slice, but stores the result in variable $1
+# instead of printing it. Uses only builtins (no subshell, no sed), so hot
+# paths like docker-wrapper.sh can call it without forking; only names longer
+# than 32 characters need md5sum for the hash suffix.
+# Usage: sanitize_username_to_var <varname> <username>
+# (<varname> must not be one of its locals: __var, __username, __sanitized, __hash)
+sanitize_username_to_var() {
+    local __var="$1"
+    local __username="$2"
+    local __sanitized="$__username"
 
     # Return empty if input is empty
-    if [[ -z "$username" ]]; then
-        echo ""
+    if [[ -z "$__username" ]]; then
+        printf -v "$__var" '%s' ""
         return
     fi
 
-    local sanitized="$username"
-
     # Strip domain part (everything after @) for cleaner container usernames
     # e.g., "c.fusarbassini@hertie-school.lan" -> "c.fusarbassini"
-    sanitized="${sanitized%%@*}"
+    __sanitized="${__sanitized%%@*}"
 
     # Replace dots with underscores (NOT hyphens!)
     # IMPORTANT: Systemd interprets hyphens as hierarchy separators
     # Using hyphens causes slice names like "ds01-student-h-baker.slice" to create
     # nested hierarchy: ds01.slice/ds01-student.slice/ds01-student-h.slice/ds01-student-h-baker.slice
     # The intermediate slices don't have CPU accounting enabled, causing container start failures
-    sanitized="${sanitized//./_}"
+    __sanitized="${__sanitized//./_}"
 
     # Replace any remaining invalid characters with underscores
-    # Valid systemd chars: a-zA-Z0-9_:-
+    # Valid systemd chars: a-zA-Z0-9_:
     # We use underscores to avoid hierarchy issues with hyphens
-    sanitized=$(echo "$sanitized" | sed 's/[^a-zA-Z0-9_:]/_/g')
+    __sanitized="${__sanitized//[^a-zA-Z0-9_:]/_}"
 
     # Collapse multiple consecutive underscores to single underscore
-    sanitized=$(echo "$sanitized" | sed 's/__*/_/g')
+    while [[ "$__sanitized" == *__* ]]; do
+        __sanitized="${__sanitized//__/_}"
+    done
 
     # Trim leading and trailing underscores
-    sanitized=$(echo "$sanitized" | sed 's/^_//; s/_$//')
+    __sanitized="${__sanitized#_}"
+    __sanitized="${__sanitized%_}"
 
     # Truncate to 32 characters (Linux username/groupname limit)
     # groupadd/useradd fail with names > 32 chars
     # Use hash suffix to avoid collisions when truncating
-    if [[ ${#sanitized} -gt 32 ]]; then
+    if [[ ${#__sanitized} -gt 32 ]]; then
         # Generate 4-char hash from original username to avoid collisions
-        local hash=$(echo -n "$username" | md5sum | cut -c1-4)
+        local __hash=$(echo -n "$__username" | md5sum | cut -c1-4)
         # Truncate to 27 chars + hyphen + 4-char hash = 32 chars
-        sanitized="${sanitized:0:27}"
+        __sanitized="${__sanitized:0:27}"
         # Remove trailing hyphen if truncation created one
-        sanitized="${sanitized%-}"
-        sanitized="${sanitized}-${hash}"
+        __sanitized="${__sanitized%-}"
+        __sanitized="${__sanitized}-${__hash}"
     fi
 
-    echo "$sanitized"
+    printf -v "$__var" '%s' "$__sanitized"
 }
 
 # Get the full slice name for a user
@@ -76,4 +91,5 @@ get_user_slice_name() {
 
 # Export functions for use in subshells
 export -f sanitize_username_for_slice
+export -f sanitize_username_to_var
 export -f get_user_slice_name
@@ -20,6 +20,10 @@ INFRA_ROOT="$(dirname "$(dirname "$SCRIPT_DIR")")"
 CONFIG_FILE="$INFRA_ROOT/config/resource-limits.yaml"
 STATE_DIR="/var/lib/ds01/container-states"
 LOG_FILE="/var/log/ds01/idle-cleanup.log"
+# Containers with GPU compute processes (names, one per line) - loaded once per run
+GPU_ACTIVE_CONTAINERS=""
+# Host-side process inventory: name <TAB> procs <TAB> busy <TAB> keep-alive - loaded once per run
+PROCESS_INVENTORY=""
 
 # Source shared library for colors and utilities
 source "$INFRA_ROOT/scripts/lib/init.sh"
@@ -140,9 +144,51 @@ update_activity() {
     fi
 }
 
+# Containers running GPU compute processes: the sampler ring's per-container
+# attribution, else one nvidia-smi compute-apps sample mapped via /proc/<pid>/cgroup
+load_gpu_active_containers() {
+    if GPU_ACTIVE_CONTAINERS=$(python3 "$INFRA_ROOT/scripts/lib/metrics_ring.py" gpu-containers 2>/dev/null); then
+        GPU_ACTIVE_CONTAINERS=$(cut -f1 <<< "$GPU_ACTIVE_CONTAINERS")
+        return
+    fi
+    local short_ids
+    short_ids=$(python3 "$INFRA_ROOT/scripts/lib/gpu_attribution.py" 2>/dev/null | cut -f1 | grep -v '^-$' | sort -u) || true
+    if [ -n "$short_ids" ]; then
+        GPU_ACTIVE_CONTAINERS=$(docker ps --format '{{.ID}} {{.Names}}' | \
+            awk 'NR == FNR {ids[$1]; next} $1 in ids {print $2}' <(echo "$short_ids") -)
+    else
+        GPU_ACTIVE_CONTAINERS=""
+    fi
+}
+
+# Process counts and .keep-alive markers of all containers from one host-side sweep
+# (cgroup.procs + /proc, no docker exec), keyed by container name
+load_process_inventory() {
+    local inventory
+    inventory=$(python3 "$INFRA_ROOT/scripts/lib/process_inventory.py" 2>/dev/null) || inventory=""
+    if [ -n "$inventory" ]; then
+        PROCESS_INVENTORY=$(docker ps --format '{{.ID}} {{.Names}}' | \
+            awk -F'\t' 'NR == FNR {row[$1] = $2 "\t" $3 "\t" $4; next}
+                 {split($0, c, " ")} c[1] in row {print c[2] "\t" row[c[1]]}' <(echo "$inventory") -)
+    else
+        PROCESS_INVENTORY=""
+    fi
+}
+
+# Inventory field for a container (2 = procs, 3 = busy, 4 = keep-alive); empty if not inventoried
+inventory_field() {
+    awk -F'\t' -v name="$1" -v field="$2" '$1 == name {print $field}' <<< "$PROCESS_INVENTORY"
+}
+
 # Check if container is active
 is_container_active() {
     local container="$1"
+
+    # Running GPU work counts as activity even when CPU and network are quiet
+    if [ -n "$GPU_ACTIVE_CONTAINERS" ] && grep -qxF "$container" <<< "$GPU_ACTIVE_CONTAINERS"; then
+        echo "true"
+        return
+    fi
     
     # Check CPU usage
     local cpu=$(docker stats "$container" --no-stream --format "{{.CPUPerc}}" 2>/dev/null | sed 's/%//' || echo "0")
@@ -153,9 +199,13 @@ is_container_active() {
         return
     fi
     
-    # Check for active processes (excluding bash/sleep)
-    local procs=$(docker exec "$container" ps aux 2>/dev/null | grep -v "ps aux" | grep -v "bash" | grep -v "sleep" | wc -l)
-    if [ "$procs" -gt 2 ]; then
+    # Check for active processes (excluding shells/sleep) - from the host-side inventory,
+    # asking the container only if it was not inventoried
+    local busy=$(inventory_field "$container" 3)
+    if [ -z "$busy" ]; then
+        busy=$(( $(docker exec "$container" ps aux 2>/dev/null | grep -v "ps aux" | grep -v "bash" | grep -v "sleep" | wc -l) - 1 ))
+    fi
+    if [ "$busy" -gt 1 ]; then
         echo "true"
         return
     fi
@@ -238,8 +288,10 @@ stop_idle_container() {
 
     log_color "Stopping idle container: $container (user: $username)" "$YELLOW"
 
-    # Check for .keep-alive file
-    if docker exec "$container" test -f /workspace/.keep-alive 2>/dev/null; then
+    # Check for .keep-alive file (seen from the host through /proc/<pid>/root)
+    local keep_alive=$(inventory_field "$container" 4)
+    if [ "$keep_alive" = "1" ] || { [ -z "$keep_alive" ] && \
+            docker exec "$container" test -f /workspace/.keep-alive 2>/dev/null; }; then
         log_color "Container $container has .keep-alive file - skipping" "$GREEN"
         return
     fi
@@ -332,6 +384,9 @@ monitor_containers() {
     local stopped_count=0
     local warned_count=0
 
+    load_gpu_active_containers
+    load_process_inventory
+
     for container in $containers; do
         # Verify container still exists (race condition protection)
         if ! docker ps --format "{{.Names}}" | grep -q "^${container}$"; then
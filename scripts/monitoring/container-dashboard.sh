@@ -17,6 +17,22 @@ CYAN='\033[0;36m'
 BOLD='\033[1m'
 NC='\033[0m'
 
+# Live samples from metrics-sampler.py (shared-memory ring, shared by all viewers)
+RING_READER="/opt/ds01-infra/scripts/lib/metrics_ring.py"
+
+# Container stats as CPU|MEM USAGE|MEM %|NET I/O - ring first, docker stats if not sampled
+container_stats() {
+    local container="$1"
+    local line=""
+    if [ -n "$RING_STATS" ]; then
+        line=$(awk -F'\t' -v n="$container" '$1 == n {print $2 "|" $3 "|" $4 "|" $5}' <<< "$RING_STATS")
+    fi
+    if [ -z "$line" ]; then
+        line=$(docker stats "$container" --no-stream --format "{{.CPUPerc}}|{{.MemUsage}}|{{.MemPerc}}|{{.NetIO}}" 2>/dev/null)
+    fi
+    echo "$line"
+}
+
 # Get terminal size
 get_terminal_size() {
     TERM_ROWS=$(tput lines)
@@ -99,7 +115,9 @@ draw_containers() {
         echo "No containers found"
         return
     fi
-    
+
+    RING_STATS=$(python3 "$RING_READER" stats 2>/dev/null) || RING_STATS=""
+
     for container in $containers; do
         # Get container info
         local short_name=$(echo "$container" | cut -d'.' -f1)
@@ -108,7 +126,7 @@ draw_containers() {
         
         if [ "$status" = "running" ]; then
             # Get real-time stats
-            local stats=$(docker stats "$container" --no-stream --format "{{.CPUPerc}}|{{.MemUsage}}|{{.MemPerc}}|{{.NetIO}}" 2>/dev/null)
+            local stats=$(container_stats "$container")
             
             local cpu=$(echo "$stats" | cut -d'|' -f1)
             local mem=$(echo "$stats" | cut -d'|' -f2)
@@ -144,8 +162,24 @@ draw_gpu_status() {
     echo -e "${BOLD}GPU Status:${NC}"
     echo ""
     
-    # Get GPU info using nvidia-smi
-    if command -v nvidia-smi &> /dev/null; then
+    # GPU info from the sampler ring; nvidia-smi if the sampler is not running
+    local ring_gpus
+    ring_gpus=$(python3 "$RING_READER" gpu 2>/dev/null) || ring_gpus=""
+    if [ -n "$ring_gpus" ]; then
+        while IFS=$'\t' read -r idx name util mem_used mem_total temp mig; do
+            local mem_perc="N/A"
+            if [ "$mem_used" != "N/A" ] && [ "$mem_total" != "N/A" ] && [ "$mem_total" != "0" ]; then
+                mem_perc=$(echo "scale=1; $mem_used * 100 / $mem_total" | bc)
+            fi
+
+            util_colored=$(usage_color "${util}%")
+            mem_colored=$(usage_color "${mem_perc}%")
+
+            echo -e "  GPU${idx}: ${name}"
+            echo -e "    Utilization: ${util_colored}  |  Memory: ${mem_used}MB / ${mem_total}MB (${mem_colored})  |  Temp: ${temp}°C"
+            echo ""
+        done <<< "$ring_gpus"
+    elif command -v nvidia-smi &> /dev/null; then
         nvidia-smi --query-gpu=index,name,utilization.gpu,memory.used,memory.total,temperature.gpu \
             --format=csv,noheader,nounits | while IFS=, read -r idx name util mem_used mem_total temp; do
             
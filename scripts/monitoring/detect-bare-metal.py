@@ -16,22 +16,34 @@ What we exclude:
 - Short-lived processes (< 1 minute)
 - Whitelisted processes (shells, editors, etc.)
 
+How processes are classified (one /proc sweep, no per-container docker calls):
+- The owner UID comes from stat() on /proc/<pid> (no read)
+- /proc/<pid>/stat gives name, age, CPU time and RSS in one read
+- /proc/<pid>/cgroup tells container scopes (docker-<id>.scope, /docker/<id>)
+  from user sessions; it and cmdline are read once per process and cached
+  in a state file keyed by (pid, start time), so later runs skip them
+- GPU processes come from a single `nvidia-smi --query-compute-apps` call
+
 Usage:
     detect-bare-metal.py [--json] [--warn-only] [--exclude-user USER]
 """
 
 import os
-import sys
 import json
+import pwd
 import subprocess
-import re
+import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+import gpu_attribution
 
 # Configuration
 MIN_UID = 1000  # Minimum UID to consider (skip system users)
 MIN_RUNTIME_SECONDS = 60  # Minimum runtime to report
+STATE_FILE = Path("/var/log/ds01/bare-metal-state.json")
 
 # Whitelisted process names (common user utilities, not compute workloads)
 WHITELIST = {
@@ -65,134 +77,110 @@ COMPUTE_INDICATORS = {
 }
 
 
-class BareMetalDetector:
-    def __init__(self):
-        self.container_pids: Set[int] = set()
-        self._load_container_pids()
-
-    def _load_container_pids(self):
-        """Get all PIDs running inside containers."""
-        self.container_pids = set()
-
-        try:
-            # Get all container IDs
-            result = subprocess.run(
-                ['docker', 'ps', '-q'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            container_ids = [cid.strip() for cid in result.stdout.split('\n') if cid.strip()]
-
-            # Get PIDs for each container
-            for cid in container_ids:
-                result = subprocess.run(
-                    ['docker', 'top', cid, '-o', 'pid'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-
-                for line in result.stdout.split('\n')[1:]:  # Skip header
-                    pid_str = line.strip()
-                    if pid_str.isdigit():
-                        self.container_pids.add(int(pid_str))
-
-        except Exception as e:
-            print(f"Warning: Could not get container PIDs: {e}", file=sys.stderr)
-
-    def _get_process_info(self, pid: int) -> Optional[Dict]:
-        """Get information about a process."""
-        try:
-            # Read /proc/[pid]/stat
-            stat_path = Path(f"/proc/{pid}/stat")
-            if not stat_path.exists():
-                return None
-
-            with open(stat_path) as f:
-                stat = f.read()
-
-            # Parse stat - format: pid (comm) state ppid ...
-            match = re.match(r'(\d+) \((.+)\) (\S) (\d+)', stat)
-            if not match:
-                return None
+def container_id_from_cgroup(cgroup: str) -> Optional[str]:
+    """Short container ID if a /proc/<pid>/cgroup text places the process in a container."""
+    cid = gpu_attribution.container_id_from_cgroup(cgroup)
+    return cid[:12] if cid else None
 
-            # Read /proc/[pid]/status for UID
-            status_path = Path(f"/proc/{pid}/status")
-            uid = None
-            with open(status_path) as f:
-                for line in f:
-                    if line.startswith('Uid:'):
-                        uid = int(line.split()[1])
-                        break
 
-            if uid is None or uid < MIN_UID:
-                return None
+def gpu_compute_pids() -> Dict[int, int]:
+    """PID -> GPU memory (MiB, summed over GPUs) of all GPU compute processes (one nvidia-smi call)."""
+    pids = {}
+    for app in gpu_attribution.query_compute_apps() or []:
+        pids[app['pid']] = pids.get(app['pid'], 0) + int(app['mem'] or 0)
+    return pids
 
-            # Get command line
-            cmdline_path = Path(f"/proc/{pid}/cmdline")
-            cmdline = ""
-            with open(cmdline_path) as f:
-                cmdline = f.read().replace('\x00', ' ').strip()
 
-            # Get username
+class BareMetalDetector:
+    def __init__(self, proc_root: Path = Path('/proc'), state_file: Optional[Path] = STATE_FILE):
+        self.proc_root = Path(proc_root)
+        self.state_file = state_file
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_kb = os.sysconf('SC_PAGE_SIZE') // 1024
+        self._usernames: Dict[int, str] = {}
+        self._state = self._load_state()
+        self._seen: Dict[str, Dict] = {}
+
+    def _load_state(self) -> Dict[str, Dict]:
+        """Per-process classification from earlier runs, keyed by "pid:starttime"."""
+        if self.state_file is None:
+            return {}
+        try:
+            return json.loads(Path(self.state_file).read_text())
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """Keep entries of live processes only (atomic, best-effort)."""
+        if self.state_file is None:
+            return
+        tmp = Path(self.state_file).with_name(f".{Path(self.state_file).name}.{os.getpid()}")
+        try:
+            tmp.write_text(json.dumps(self._seen))
+            os.replace(tmp, self.state_file)
+        except (IOError, OSError):
             try:
-                import pwd
-                username = pwd.getpwuid(uid).pw_name
-            except (KeyError, ImportError):
-                username = str(uid)
-
-            # Get start time and calculate runtime
-            # /proc/[pid]/stat field 22 is starttime in clock ticks
-            stat_parts = stat.split()
-            if len(stat_parts) >= 22:
-                starttime_ticks = int(stat_parts[21])
-                # Get system boot time and clock ticks per second
-                with open('/proc/uptime') as f:
-                    uptime_seconds = float(f.read().split()[0])
-                clock_ticks = os.sysconf('SC_CLK_TCK')
-
-                # Calculate runtime
-                process_age = uptime_seconds - (starttime_ticks / clock_ticks)
-            else:
-                process_age = 0
+                tmp.unlink()
+            except OSError:
+                pass
 
-            # Get CPU and memory usage
-            cpu_percent = 0
-            mem_mb = 0
+    def _username(self, uid: int) -> str:
+        if uid not in self._usernames:
             try:
-                # Use ps for accurate CPU/memory
-                result = subprocess.run(
-                    ['ps', '-p', str(pid), '-o', '%cpu,%mem,rss', '--no-headers'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    parts = result.stdout.strip().split()
-                    if len(parts) >= 3:
-                        cpu_percent = float(parts[0])
-                        mem_mb = int(parts[2]) / 1024  # RSS in KB to MB
-            except Exception:
-                pass
+                self._usernames[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                self._usernames[uid] = str(uid)
+        return self._usernames[uid]
 
-            return {
-                'pid': pid,
-                'name': match.group(2),
-                'state': match.group(3),
-                'ppid': int(match.group(4)),
-                'uid': uid,
-                'username': username,
-                'cmdline': cmdline[:200],  # Truncate long command lines
-                'runtime_seconds': int(process_age),
-                'cpu_percent': cpu_percent,
-                'mem_mb': round(mem_mb, 1)
-            }
+    def _read(self, pid: int, name: str) -> str:
+        with open(f"{self.proc_root}/{pid}/{name}", errors='replace') as f:
+            return f.read()
 
-        except Exception:
+    def _get_process_info(self, pid: int, uid: int, uptime: float) -> Optional[Dict]:
+        """Process details from /proc/<pid>/stat (cgroup/cmdline cached per process)."""
+        try:
+            stat = self._read(pid, "stat")
+        except (IOError, OSError):
             return None
 
+        # Format: pid (comm) state ppid ... - comm may contain spaces/parens
+        lparen, rparen = stat.find('('), stat.rfind(')')
+        fields = stat[rparen + 2:].split()
+        if lparen < 0 or len(fields) < 22:
+            return None
+        starttime = int(fields[19])
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        runtime = uptime - starttime / self.clock_ticks
+
+        proc = {
+            'pid': pid,
+            'name': stat[lparen + 1:rparen],
+            'state': fields[0],
+            'ppid': int(fields[1]),
+            'uid': uid,
+            'username': self._username(uid),
+            'runtime_seconds': int(runtime),
+            # Lifetime average, as reported by ps %cpu
+            'cpu_percent': round(100 * cpu_seconds / runtime, 1) if runtime > 0 else 0.0,
+            'mem_mb': round(int(fields[21]) * self.page_kb / 1024, 1),
+            '_key': f"{pid}:{starttime}",
+        }
+        return proc
+
+    def _classify(self, proc: Dict) -> Optional[Dict]:
+        """Container ID and cmdline, read once per process lifetime."""
+        key = proc.pop('_key')
+        known = self._state.get(key)
+        if known is None:
+            try:
+                cgroup = self._read(proc['pid'], "cgroup")
+                cmdline = self._read(proc['pid'], "cmdline").replace('\x00', ' ').strip()
+            except (IOError, OSError):
+                return None
+            known = {'container': container_id_from_cgroup(cgroup), 'cmdline': cmdline[:200]}
+        self._seen[key] = known
+        return known
+
     def _is_whitelisted(self, proc: Dict) -> bool:
         """Check if process is whitelisted."""
         name = proc['name'].lower()
@@ -208,6 +196,10 @@ class BareMetalDetector:
             if indicator in name or indicator in cmdline:
                 return True
 
+        # Anything holding GPU memory is a compute workload
+        if 'gpu_mem_mb' in proc:
+            return True
+
         # High CPU or memory is suspicious
         if proc.get('cpu_percent', 0) > 50 or proc.get('mem_mb', 0) > 1000:
             return True
@@ -221,40 +213,56 @@ class BareMetalDetector:
         Returns:
             Dict with 'warning', 'processes', 'summary'
         """
-        exclude_users = exclude_users or []
+        exclude_users = set(exclude_users or [])
         bare_metal_processes = []
+        gpu_pids = gpu_compute_pids()
 
-        # Scan /proc for user processes
-        for entry in Path('/proc').iterdir():
-            if not entry.name.isdigit():
-                continue
-
-            pid = int(entry.name)
-
-            # Skip container processes
-            if pid in self.container_pids:
-                continue
-
-            proc = self._get_process_info(pid)
-            if proc is None:
-                continue
-
-            # Skip excluded users
-            if proc['username'] in exclude_users:
-                continue
-
-            # Skip whitelisted processes
-            if self._is_whitelisted(proc):
-                continue
-
-            # Skip short-lived processes
-            if proc['runtime_seconds'] < MIN_RUNTIME_SECONDS:
-                continue
-
-            # Flag compute workloads
-            proc['is_compute'] = self._is_compute_workload(proc)
-
-            bare_metal_processes.append(proc)
+        try:
+            with open(self.proc_root / "uptime") as f:
+                uptime = float(f.read().split()[0])
+        except (IOError, OSError, ValueError):
+            uptime = 0.0
+
+        # One sweep over /proc; system processes cost a single stat()
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    uid = entry.stat(follow_symlinks=False).st_uid
+                except OSError:
+                    continue  # Process exited
+                if uid < MIN_UID:
+                    continue
+
+                pid = int(entry.name)
+                proc = self._get_process_info(pid, uid, uptime)
+                if proc is None:
+                    continue
+
+                # Skip excluded users, whitelisted and short-lived processes
+                # before touching cgroup/cmdline
+                if proc['username'] in exclude_users or self._is_whitelisted(proc):
+                    continue
+                if proc['runtime_seconds'] < MIN_RUNTIME_SECONDS:
+                    continue
+
+                # Skip container processes (classified from the cgroup path)
+                known = self._classify(proc)
+                if known is None or known['container']:
+                    continue
+
+                proc['cmdline'] = known['cmdline']
+                proc['in_container'] = False
+                if pid in gpu_pids:
+                    proc['gpu_mem_mb'] = gpu_pids[pid]
+
+                # Flag compute workloads
+                proc['is_compute'] = self._is_compute_workload(proc)
+
+                bare_metal_processes.append(proc)
+
+        self._save_state()
 
         # Group by user
         by_user = {}
@@ -5,6 +5,10 @@ DS01 GPU Utilization Monitor
 
 Tracks actual GPU usage (not just allocation) and identifies underutilized GPUs.
 
+Each allocation is annotated with its container's own GPU compute processes
+and memory (scripts/lib/gpu_attribution.py), so a container on a MIG slice
+is judged by what it runs, not by the utilization of the shared parent GPU.
+
 Usage:
     gpu-utilization-monitor.py                 # Current utilization snapshot
     gpu-utilization-monitor.py --json          # JSON output
@@ -33,6 +37,17 @@ DOCKER_BIN = "/usr/bin/docker"
 WASTE_THRESHOLD = 5  # GPU utilization below this % is considered "wasted"
 WASTE_DURATION_MINUTES = 30  # Must be wasted for this long to alert
 
+# Live samples published by metrics-sampler.py (shared-memory ring) - optional
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "lib"))
+try:
+    from metrics_ring import latest as ring_latest
+except ImportError:
+    ring_latest = None
+try:
+    from gpu_attribution import query_compute_apps, attribute
+except ImportError:
+    query_compute_apps = None
+
 # Cache for gpu-state-reader module (imported once, reused)
 _gpu_state_module = None
 
@@ -62,7 +77,19 @@ def now_utc_iso():
 
 
 def get_gpu_utilization():
-    """Get current GPU utilization from nvidia-smi."""
+    """Get current GPU utilization (sampler ring if fresh, else nvidia-smi)."""
+    gpus = ring_latest('gpu') if ring_latest else None
+    if gpus:
+        return [{
+            "index": int(g['key']),
+            "name": g['label'],
+            "gpu_util_percent": int(g['util'] or 0),
+            "mem_util_percent": int(g['mem_util'] or 0),
+            "mem_used_mb": int(g['mem_used'] or 0),
+            "mem_total_mb": int(g['mem_total'] or 0),
+            "temperature_c": int(g['temp'] or 0)
+        } for g in gpus]
+
     try:
         result = subprocess.run(
             [
@@ -160,6 +187,50 @@ def get_container_gpu_allocations():
         return []
 
 
+def get_container_gpu_usage():
+    """
+    GPU compute processes and memory per container name.
+
+    From the sampler ring's per-container attribution if fresh, else one
+    nvidia-smi compute-apps sample mapped to containers via /proc/<pid>/cgroup.
+    Returns {name: {"procs": n, "gpu_mem_mb": mb}}, or None if unavailable.
+    """
+    usage = ring_latest('gpu_container') if ring_latest else None
+    if usage is not None:
+        return {c['key']: {"procs": int(c['procs'] or 0), "gpu_mem_mb": int(c['gpu_mem'] or 0)}
+                for c in usage}
+
+    apps = query_compute_apps() if query_compute_apps else None
+    if apps is None:
+        return None
+    containers = attribute(apps)['containers']
+    if not any(containers):
+        return {}
+    try:
+        result = subprocess.run(
+            [DOCKER_BIN, "ps", "--no-trunc", "--format", "{{.ID}}|{{.Names}}"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except Exception:
+        return None
+    names = dict(line.split('|', 1) for line in result.stdout.splitlines() if '|' in line)
+    return {names[cid]: {"procs": c["procs"], "gpu_mem_mb": int(c["mem"])}
+            for cid, c in containers.items() if cid in names}
+
+
+def add_container_usage(allocations, usage):
+    """Annotate allocations with their container's attributed GPU processes and memory."""
+    if usage is None:
+        return allocations
+    for alloc in allocations:
+        found = usage.get(alloc["container"], {})
+        alloc["procs"] = found.get("procs", 0)
+        alloc["gpu_mem_mb"] = found.get("gpu_mem_mb", 0)
+    return allocations
+
+
 def can_write_log():
     """Check if we can write to the log file."""
     try:
@@ -185,7 +256,8 @@ def record_utilization(gpus, allocations):
         "timestamp": now_utc_iso(),
         "gpus": gpus,
         "allocations": [
-            {"container": a["container"], "user": a["user"], "gpu_slot": a["gpu_slot"]}
+            dict({"container": a["container"], "user": a["user"], "gpu_slot": a["gpu_slot"]},
+                 **{k: a[k] for k in ("procs", "gpu_mem_mb") if k in a})
             for a in allocations
         ]
     }
@@ -244,7 +316,14 @@ def check_wasted_allocations():
                     "low_util_samples": 0
                 }
 
-            # Check GPU utilization for this container's GPU
+            # Attributed compute processes of the container itself (MIG-accurate)
+            if "procs" in alloc:
+                container_usage[container]["samples"] += 1
+                if alloc["procs"] == 0:
+                    container_usage[container]["low_util_samples"] += 1
+                continue
+
+            # Recorded before attribution: utilization of the (parent) GPU
             gpu_slot = alloc.get("gpu_slot", "")
             if "." in gpu_slot:
                 gpu_idx = int(gpu_slot.split(".")[0])
@@ -321,6 +400,9 @@ def format_utilization_display(gpus, allocations):
             slot = alloc.get("gpu_slot", "")
             if slot.startswith(f"{idx}.") or slot == str(idx):
                 container_info = f" -> {alloc['user']}:{alloc['container']}"
+                if "procs" in alloc:
+                    container_info += (f" ({alloc['procs']} proc, {alloc['gpu_mem_mb']}MB)"
+                                       if alloc["procs"] else " (idle)")
                 break
 
         lines.append(f"GPU {idx}: {gpu['name']}")
@@ -359,6 +441,8 @@ def main():
         sys.exit(1)
 
     allocations = get_container_gpu_allocations()
+    if not args.check_waste:
+        allocations = add_container_usage(allocations, get_container_gpu_usage())
 
     # Record if requested
     if args.record:
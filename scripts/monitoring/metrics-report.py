@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+DS01 Metrics Report
+/opt/ds01-infra/scripts/monitoring/metrics-report.py
+
+Daily and multi-day performance reports from the metrics sampler's segment
+files (/var/log/ds01/metrics/YYYY-MM-DD.jsonl, see scripts/lib/ds01_metrics.py).
+
+A day is aggregated in one streaming pass over its segment: every GPU, MIG
+slot, user, container, host and disk statistic (mean, p95, max, samples) is
+folded into fixed-size accumulators, so memory does not grow with the number
+of samples. The result is cached as a day summary
+(/var/log/ds01/metrics/summaries/YYYY-MM-DD.json, kept after the raw segment
+is pruned); weekly and other multi-day rollups merge those summaries instead
+of re-reading samples.
+
+Usage:
+    metrics-report.py day [DATE] [--format md|json] [--output DIR]
+    metrics-report.py range START END [--format md|json] [--output DIR]
+    metrics-report.py week [--end DATE] [--format md|json] [--output DIR]
+
+    # Cron (via compile-daily-report.sh):
+    metrics-report.py day 2026-10-12 --output /var/log/ds01-infra/reports/daily
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_metrics import METRICS_DIR, read_samples, segment_path
+
+SUMMARY_DIR = METRICS_DIR / "summaries"
+SUMMARY_VERSION = 1
+
+HOST_STATS = ('cpu', 'load1', 'load5', 'load15', 'mem_used', 'swap_used')
+GPU_STATS = ('util', 'mem_util', 'mem_used', 'temp', 'power')
+DISK_FIELDS = ('total_gb', 'used_gb', 'avail_gb', 'pct', 'inode_pct')
+
+
+class Stat:
+    """
+    Streaming count/sum/min/max plus a log-bucketed histogram for quantiles.
+
+    Buckets are powers of GAMMA, so quantiles are within ~1% of the true value
+    and the number of buckets depends on the value range, not the sample count.
+    Two Stats merge exactly (day summaries -> weekly rollups).
+    """
+
+    GAMMA = 1.02
+    __slots__ = ('count', 'total', 'min', 'max', 'zeros', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.zeros = 0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, value: Optional[float]):
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+        else:
+            index = math.ceil(math.log(value, self.GAMMA))
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: 'Stat') -> 'Stat':
+        if other.count:
+            self.count += other.count
+            self.total += other.total
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            self.zeros += other.zeros
+            for index, n in other.buckets.items():
+                self.buckets[index] = self.buckets.get(index, 0) + n
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return max(min(0.0, self.max), self.min)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self.GAMMA ** index / (self.GAMMA + 1)
+                return max(min(value, self.max), self.min)
+        return self.max
+
+    def summary(self) -> Dict:
+        """Rendered values for reports and JSON output."""
+        def rnd(value):
+            return None if value is None else round(value, 2)
+        return {'mean': rnd(self.mean), 'p95': rnd(self.quantile(0.95)),
+                'max': rnd(self.max), 'min': rnd(self.min), 'samples': self.count}
+
+    def to_json(self) -> Dict:
+        return {'_stat': [self.count, self.total, self.min, self.max, self.zeros,
+                          {str(i): n for i, n in self.buckets.items()}]}
+
+    @classmethod
+    def from_json(cls, data: list) -> 'Stat':
+        stat = cls()
+        stat.count, stat.total, stat.min, stat.max, stat.zeros, buckets = data
+        stat.buckets = {int(i): n for i, n in buckets.items()}
+        return stat
+
+
+def _stats(names: Iterable[str]) -> Dict[str, Stat]:
+    return {name: Stat() for name in names}
+
+
+class DayAggregator:
+    """Folds a stream of sampler records into a day summary."""
+
+    def __init__(self):
+        self.samples: Dict[str, int] = {}
+        self._last_ts: Dict[str, float] = {}
+        self.first_ts = None
+        self.last_ts = None
+        self.host = dict(_stats(HOST_STATS), mem_total=None, swap_total=None)
+        self.gpus: Dict[str, Dict] = {}
+        self.migs: Dict[str, Dict] = {}
+        self.users: Dict[str, Dict] = {}
+        self.containers: Dict[str, Dict] = {}
+        self.disks: Dict[str, Dict] = {}
+        # gpu_proc records of one sample are summed per user before they count
+        self._proc_ts = None
+        self._proc_mem: Dict[str, float] = {}
+
+    def _user(self, name: str) -> Dict:
+        if name not in self.users:
+            self.users[name] = _stats(('cpu', 'mem', 'gpu_mem'))
+        return self.users[name]
+
+    def _flush_procs(self):
+        for user, mem in self._proc_mem.items():
+            self._user(user)['gpu_mem'].add(mem)
+        self._proc_mem = {}
+
+    def add(self, rec: Dict):
+        kind, ts = rec.get('kind'), rec.get('ts', 0)
+        if self._last_ts.get(kind) != ts:
+            self._last_ts[kind] = ts
+            self.samples[kind] = self.samples.get(kind, 0) + 1
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+
+        if kind == 'gpu':
+            gpu = self.gpus.setdefault(str(rec.get('index')), _stats(GPU_STATS))
+            gpu['name'], gpu['mem_total'] = rec.get('name'), rec.get('mem_total')
+            for name in GPU_STATS:
+                gpu[name].add(rec.get(name))
+        elif kind == 'gpu_proc':
+            if ts != self._proc_ts:
+                self._flush_procs()
+                self._proc_ts = ts
+            user = rec.get('user') or str(rec.get('uid'))
+            self._proc_mem[user] = self._proc_mem.get(user, 0) + (rec.get('mem') or 0)
+        elif kind == 'mig':
+            mig = self.migs.setdefault(str(rec.get('slot')), _stats(('mem_used', 'busy')))
+            mig['gpu'], mig['profile'] = rec.get('gpu'), rec.get('profile')
+            mig['mem_used'].add(rec.get('mem_used'))
+            mig['busy'].add(100 if rec.get('procs') else 0)
+        elif kind == 'host':
+            for name in HOST_STATS:
+                self.host[name].add(rec.get(name))
+            self.host['mem_total'], self.host['swap_total'] = rec.get('mem_total'), rec.get('swap_total')
+        elif kind == 'user':
+            user = self._user(rec.get('user') or str(rec.get('uid')))
+            user['cpu'].add(rec.get('cpu'))
+            user['mem'].add(rec.get('mem'))
+        elif kind == 'container':
+            name = rec.get('name') or rec.get('id')
+            container = self.containers.setdefault(name, _stats(('cpu', 'mem', 'pids')))
+            container['user'] = rec.get('user')
+            for field in ('cpu', 'mem', 'pids'):
+                container[field].add(rec.get(field))
+        elif kind == 'disk':
+            disk = self.disks.setdefault(rec.get('mount'), {'peak_pct': Stat()})
+            disk.update((field, rec.get(field)) for field in DISK_FIELDS)
+            disk['peak_pct'].add(rec.get('pct'))
+
+    def finish(self, day: str) -> Dict:
+        self._flush_procs()
+        return {'version': SUMMARY_VERSION, 'start': day, 'end': day, 'days': 1,
+                'first_ts': self.first_ts, 'last_ts': self.last_ts, 'samples': self.samples,
+                'host': self.host, 'gpus': self.gpus, 'migs': self.migs, 'users': self.users,
+                'containers': self.containers, 'disks': self.disks}
+
+
+# ----------------------------------------------------------------------
+# Day summaries (cached) and rollups
+# ----------------------------------------------------------------------
+
+def _day_bounds(day: str):
+    start = time.mktime(time.strptime(day, "%Y-%m-%d"))
+    end = time.mktime((date.fromisoformat(day) + timedelta(days=1)).timetuple())
+    return start, end - 0.001
+
+
+def _fingerprint(path: Path) -> Optional[list]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_size, int(st.st_mtime)]
+
+
+def save_summary(summary: Dict, path: Path):
+    """Atomically write a summary (Stats serialized with their histograms)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(summary, default=Stat.to_json, separators=(',', ':')))
+        os.replace(tmp, path)
+    except (IOError, OSError):
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def load_summary(path: Path) -> Optional[Dict]:
+    try:
+        summary = json.loads(path.read_text(),
+                             object_hook=lambda d: Stat.from_json(d['_stat']) if '_stat' in d else d)
+    except (IOError, OSError, ValueError):
+        return None
+    return summary if summary.get('version') == SUMMARY_VERSION else None
+
+
+def day_summary(day: str, metrics_dir: Path = METRICS_DIR,
+                summary_dir: Path = SUMMARY_DIR, refresh: bool = False) -> Optional[Dict]:
+    """
+    Summary of one day: the cached one if its segment has not changed since,
+    otherwise one pass over the segment (then cached). None if there is no data.
+    """
+    cache = Path(summary_dir) / f"{day}.json"
+    source = _fingerprint(segment_path(day, metrics_dir))
+    cached = None if refresh else load_summary(cache)
+    if cached is not None and (source is None or cached.get('source') == source):
+        return cached  # Unchanged, or the raw segment was already pruned
+    if source is None:
+        return None
+
+    aggregator = DayAggregator()
+    since, until = _day_bounds(day)
+    for rec in read_samples(since=since, until=until, metrics_dir=metrics_dir):
+        aggregator.add(rec)
+    summary = aggregator.finish(day)
+    summary['source'] = source
+    save_summary(summary, cache)
+    return summary
+
+
+def _merge(into: Dict, other: Dict):
+    for key, value in other.items():
+        current = into.get(key)
+        if isinstance(value, Stat):
+            into[key] = current.merge(value) if isinstance(current, Stat) else value
+        elif isinstance(value, dict) and isinstance(current, dict):
+            _merge(current, value)
+        elif value is not None or key not in into:
+            into[key] = value  # Labels/snapshots: later day wins
+
+
+def merge_summaries(summaries: Iterable[Dict]) -> Optional[Dict]:
+    """Combine day summaries (oldest first) into one rollup."""
+    result = None
+    for summary in summaries:
+        if result is None:
+            result = {key: value for key, value in summary.items() if key != 'source'}
+            result['samples'] = dict(summary['samples'])
+            continue
+        for kind, n in summary['samples'].items():
+            result['samples'][kind] = result['samples'].get(kind, 0) + n
+        for key, pick in (('first_ts', min), ('last_ts', max)):
+            values = [t for t in (result[key], summary[key]) if t is not None]
+            result[key] = pick(values) if values else None
+        result['days'] += 1
+        _merge(result, {key: value for key, value in summary.items()
+                        if key in ('end', 'host', 'gpus', 'migs', 'users', 'containers', 'disks')})
+    return result
+
+
+def rollup(start: str, end: str, metrics_dir: Path = METRICS_DIR,
+           summary_dir: Path = SUMMARY_DIR) -> Optional[Dict]:
+    """Merged summary of the days START..END (inclusive); days without data are skipped."""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    days = [(first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+    result = merge_summaries(s for s in (day_summary(d, metrics_dir, summary_dir) for d in days)
+                             if s is not None)
+    if result is not None:
+        result['start'], result['end'] = start, end
+    return result
+
+
+# ----------------------------------------------------------------------
+# Output
+# ----------------------------------------------------------------------
+
+def render_json(summary: Dict) -> Dict:
+    """Summary with each Stat rendered as mean/p95/max/min/samples."""
+    if isinstance(summary, Stat):
+        return summary.summary()
+    if isinstance(summary, dict):
+        return {key: render_json(value) for key, value in summary.items() if key != 'source'}
+    return summary
+
+
+def _fmt(value, spec: str = ".1f", unit: str = "") -> str:
+    return "-" if value is None else f"{value:{spec}}{unit}"
+
+
+def render_markdown(summary: Dict) -> str:
+    """Report in the layout of the original compile-daily-report.sh, plus p95 columns."""
+    out = []
+    add = out.append
+    samples = summary['samples']
+    if summary['days'] == 1 and summary['start'] == summary['end']:
+        add("# 📊 Daily Server Performance Report")
+        add("")
+        add(f"**Date:** {date.fromisoformat(summary['start']).strftime('%A, %B %d, %Y')}")
+    else:
+        add("# 📊 Server Performance Report")
+        add("")
+        add(f"**Period:** {summary['start']} to {summary['end']} ({summary['days']} days with data)")
+    add(f"**Report Generated:** {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    add("")
+    add("**Samples:** " + ", ".join(f"{kind} {samples[kind]}" for kind in
+                                    ('gpu', 'host', 'container', 'disk') if kind in samples))
+    add("")
+    add("---")
+    add("")
+
+    # GPU
+    add("## 🎮 GPU Utilization Summary")
+    add("")
+    if summary['gpus']:
+        add("| GPU | Model | Avg Util | P95 Util | Max Util | Avg Mem Used | Max Mem Used | Mem Total "
+            "| Avg Temp | Max Temp | Avg Power | Samples |")
+        add("|-----|-------|----------|----------|----------|--------------|--------------|-----------"
+            "|----------|----------|-----------|---------|")
+        for index in sorted(summary['gpus'], key=lambda i: (len(i), i)):
+            g = summary['gpus'][index]
+            add(f"| {index} | {g.get('name') or '-'} | {_fmt(g['util'].mean, '.1f', '%')} "
+                f"| {_fmt(g['util'].quantile(0.95), '.1f', '%')} | {_fmt(g['util'].max, '.1f', '%')} "
+                f"| {_fmt(g['mem_used'].mean, '.0f', ' MB')} | {_fmt(g['mem_used'].max, '.0f', ' MB')} "
+                f"| {_fmt(g.get('mem_total'), '.0f', ' MB')} | {_fmt(g['temp'].mean, '.1f', '°C')} "
+                f"| {_fmt(g['temp'].max, '.1f', '°C')} | {_fmt(g['power'].mean, '.1f', ' W')} "
+                f"| {g['mem_used'].count} |")
+    else:
+        add("*No GPU data available*")
+    add("")
+
+    if summary['migs']:
+        add("### MIG Instances")
+        add("")
+        add("| Slot | Profile | Busy | Avg Mem Used | P95 Mem Used | Max Mem Used | Samples |")
+        add("|------|---------|------|--------------|--------------|--------------|---------|")
+        for slot in sorted(summary['migs']):
+            m = summary['migs'][slot]
+            add(f"| {slot} | {m.get('profile') or '-'} | {_fmt(m['busy'].mean, '.0f', '%')} "
+                f"| {_fmt(m['mem_used'].mean, '.0f', ' MB')} | {_fmt(m['mem_used'].quantile(0.95), '.0f', ' MB')} "
+                f"| {_fmt(m['mem_used'].max, '.0f', ' MB')} | {m['busy'].count} |")
+        add("")
+
+    def user_table(title: str, field: str, header: str, spec: str, unit: str, empty: str):
+        add(title)
+        add("")
+        rows = sorted(((u, s[field]) for u, s in summary['users'].items() if s[field].count),
+                      key=lambda row: -row[1].mean)
+        if not rows:
+            add(empty)
+            add("")
+            return
+        add(f"| User | Avg {header} | P95 {header} | Peak {header} | Samples |")
+        add("|------|" + "|".join("-" * (len(f"{col} {header}") + 2) for col in ("Avg", "P95", "Peak"))
+            + "|---------|")
+        for user, stat in rows:
+            add(f"| {user} | {_fmt(stat.mean, spec, unit)} | {_fmt(stat.quantile(0.95), spec, unit)} "
+                f"| {_fmt(stat.max, spec, unit)} | {stat.count} |")
+        add("")
+
+    user_table("### Per-User GPU Memory Usage", 'gpu_mem', "GPU Memory", ".0f", " MB", "*No GPU usage detected*")
+
+    # CPU
+    host = summary['host']
+    add("## 💻 CPU Utilization Summary")
+    add("")
+    if host['cpu'].count:
+        cpu = host['cpu']
+        add(f"- **Average CPU Utilization**: {_fmt(cpu.mean)}%")
+        add(f"- **P95 CPU Utilization**: {_fmt(cpu.quantile(0.95))}%")
+        add(f"- **Peak CPU Utilization**: {_fmt(cpu.max)}%")
+        add(f"- **Minimum CPU Utilization**: {_fmt(cpu.min)}%")
+        add(f"- **Average Load (1/5/15 min)**: {_fmt(host['load1'].mean, '.2f')} / "
+            f"{_fmt(host['load5'].mean, '.2f')} / {_fmt(host['load15'].mean, '.2f')}")
+        add(f"- **Peak Load (1 min)**: {_fmt(host['load1'].max, '.2f')}")
+        add(f"- **Samples**: {cpu.count}")
+    else:
+        add("*No CPU data available*")
+    add("")
+    user_table("### Per-User CPU Usage", 'cpu', "CPU %", ".1f", "%", "*No user processes sampled*")
+
+    # Memory
+    add("## 🧠 Memory Summary")
+    add("")
+    mem = host['mem_used']
+    if mem.count:
+        total = host.get('mem_total')
+        def pct(value):
+            return f" ({value / total * 100:.1f}%)" if total and value is not None else ""
+        add(f"- **Total Memory**: {_fmt(total, '.0f')} MB ({_fmt(total and total / 1024, '.1f')} GB)")
+        add(f"- **Average Used**: {_fmt(mem.mean, '.0f')} MB{pct(mem.mean)}")
+        add(f"- **P95 Used**: {_fmt(mem.quantile(0.95), '.0f')} MB{pct(mem.quantile(0.95))}")
+        add(f"- **Peak Used**: {_fmt(mem.max, '.0f')} MB{pct(mem.max)}")
+        if host.get('swap_total'):
+            add(f"- **Total Swap**: {_fmt(host['swap_total'], '.0f')} MB")
+            add(f"- **Average Swap Used**: {_fmt(host['swap_used'].mean, '.0f')} MB")
+            add(f"- **Peak Swap Used**: {_fmt(host['swap_used'].max, '.0f')} MB")
+        add(f"- **Samples**: {mem.count}")
+    else:
+        add("*No memory data available*")
+    add("")
+    user_table("### Per-User Memory Usage", 'mem', "Memory", ".0f", " MB", "*No user processes sampled*")
+
+    # Disk
+    add("## 💾 Disk Usage Summary")
+    add("")
+    if summary['disks']:
+        add("**Latest Disk Space** (from last sample):")
+        add("")
+        add("| Mounted On | Size | Used | Available | Use% | Peak Use% | Inode Use% |")
+        add("|------------|------|------|-----------|------|-----------|------------|")
+        for mount in sorted(summary['disks']):
+            d = summary['disks'][mount]
+            add(f"| {mount} | {_fmt(d.get('total_gb'), '.0f', 'G')} | {_fmt(d.get('used_gb'), '.0f', 'G')} "
+                f"| {_fmt(d.get('avail_gb'), '.0f', 'G')} | {_fmt(d.get('pct'), '.0f', '%')} "
+                f"| {_fmt(d['peak_pct'].max, '.0f', '%')} | {_fmt(d.get('inode_pct'), '.0f', '%')} |")
+    else:
+        add("*No disk data available*")
+    add("")
+
+    # Containers
+    add("## 🐳 Docker Container Activity")
+    add("")
+    if summary['containers']:
+        add("| Container | User | Avg CPU % | P95 CPU % | Peak CPU % | Avg Memory | Peak Memory | Samples |")
+        add("|-----------|------|-----------|-----------|------------|------------|-------------|---------|")
+        for name, c in sorted(summary['containers'].items(), key=lambda item: -item[1]['mem'].count):
+            add(f"| `{name}` | {c.get('user') or '-'} | {_fmt(c['cpu'].mean, '.1f', '%')} "
+                f"| {_fmt(c['cpu'].quantile(0.95), '.1f', '%')} | {_fmt(c['cpu'].max, '.1f', '%')} "
+                f"| {_fmt(c['mem'].mean, '.0f', ' MB')} | {_fmt(c['mem'].max, '.0f', ' MB')} | {c['mem'].count} |")
+    else:
+        add("*No Docker containers detected*")
+    add("")
+
+    add("---")
+    add("")
+    add("*Report generated by compile-daily-report.sh (metrics-report.py)*")
+    add(f"*Source metrics: {METRICS_DIR}/*")
+    return "\n".join(out) + "\n"
+
+
+def write_report(summary: Dict, name: str, output_dir: Path):
+    """NAME.md and NAME.json in output_dir."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for suffix, text in (('.md', render_markdown(summary)),
+                         ('.json', json.dumps(render_json(summary), indent=2) + "\n")):
+        path = output_dir / f"{name}{suffix}"
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(text)
+        os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DS01 metrics reports")
+    parser.add_argument('--metrics-dir', type=Path, default=METRICS_DIR)
+    parser.add_argument('--summary-dir', type=Path, default=None,
+                        help="Day summary cache (default: <metrics-dir>/summaries)")
+    sub = parser.add_subparsers(dest='command')
+
+    def add_output(p):
+        p.add_argument('--format', choices=('md', 'json'), default='md')
+        p.add_argument('--output', type=Path, help="Write NAME.md and NAME.json to this directory")
+
+    p = sub.add_parser('day', help="One day (default: today)")
+    p.add_argument('date', nargs='?', default=date.today().isoformat())
+    p.add_argument('--refresh', action='store_true', help="Ignore the cached day summary")
+    add_output(p)
+    p = sub.add_parser('range', help="Rollup of START..END from day summaries")
+    p.add_argument('start')
+    p.add_argument('end')
+    add_output(p)
+    p = sub.add_parser('week', help="Rollup of the 7 days ending at --end (default: yesterday)")
+    p.add_argument('--end', default=(date.today() - timedelta(days=1)).isoformat())
+    add_output(p)
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    summary_dir = args.summary_dir or args.metrics_dir / "summaries"
+    try:
+        if args.command == 'day':
+            name = args.date
+            summary = day_summary(args.date, args.metrics_dir, summary_dir, refresh=args.refresh)
+        else:
+            if args.command == 'week':
+                start = (date.fromisoformat(args.end) - timedelta(days=6)).isoformat()
+                end = args.end
+            else:
+                start, end = args.start, args.end
+            name = f"{start}_{end}"
+            summary = rollup(start, end, args.metrics_dir, summary_dir)
+    except ValueError as e:
+        print(f"metrics-report: {e}", file=sys.stderr)
+        sys.exit(2)
+    if summary is None:
+        print(f"metrics-report: no samples for {name} in {args.metrics_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        write_report(summary, name, args.output)
+        print(f"Report written: {args.output / name}.md ({sum(summary['samples'].values())} samples)")
+    elif args.format == 'json':
+        print(json.dumps(render_json(summary), indent=2))
+    else:
+        print(render_markdown(summary), end="")
+
+
+if __name__ == "__main__":
+    main()
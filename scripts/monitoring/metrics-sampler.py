@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+DS01 Metrics Sampler
+/opt/ds01-infra/scripts/monitoring/metrics-sampler.py
+
+One resident sampler for GPU, host, per-user, container and disk metrics.
+
+Replaces the five cron'd collect-*-metrics.sh scripts, which forked
+nvidia-smi, `docker stats` (~2s each), ps, df and a chain of xargs/awk per
+field every 5 minutes and wrote pipe-delimited text that had to be re-parsed.
+
+Sources (each on its own interval from the metrics_sampler config section):
+- gpu        one `nvidia-smi --query-gpu` call (+ one --query-compute-apps);
+             MIG instances from `nvidia-smi -L`, re-listed every few minutes;
+             compute processes attributed to containers via /proc/<pid>/cgroup
+             (scripts/lib/gpu_attribution.py) - per-MIG-instance and
+             per-container GPU activity instead of the parent GPU's utilization
+- host/user  /proc/stat, /proc/meminfo, /proc/loadavg and one /proc sweep;
+             CPU % are deltas between samples, not lifetime averages
+- container  cgroup v2 counters (cpu.stat, memory.*, pids.current, io.stat) of
+             each container scope plus /proc/<pid>/net/dev of one member;
+             one `docker ps` maps IDs to names/owners
+- disk       os.statvfs() per mount (no df); per-user home usage from the
+             disk-usage index (scripts/lib/disk_usage.py), once per index update
+
+Records go to per-day segment files (/var/log/ds01/metrics/YYYY-MM-DD.jsonl,
+format in scripts/lib/ds01_metrics.py) and into a small in-memory ring
+buffer, published to latest.json after every sample. GPU, MIG, container and
+per-container GPU samples are also published to the shared-memory ring (scripts/lib/metrics_ring.py)
+that dashboards and container-stats read instead of nvidia-smi / docker stats.
+
+Usage:
+    metrics-sampler.py run                   # Daemon (ds01-metrics-sampler.service)
+    metrics-sampler.py once [--dry-run]      # Sample every source once
+"""
+
+import os
+import pwd
+import re
+import sys
+import time
+import json
+import signal
+import argparse
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from ds01_core import parse_duration
+from ds01_metrics import METRICS_DIR, KINDS, append_records, publish_latest, prune_segments
+from metrics_ring import RING_FILE, RingWriter
+from disk_usage import INDEX_DIR as DISK_INDEX_DIR
+from gpu_attribution import SCOPE_DIR, parse_compute_apps, container_of, aggregate
+
+CONFIG_PATH = Path("/opt/ds01-infra/config/resource-limits.yaml")
+# Use real docker binary directly (bypass wrapper filtering)
+DOCKER_BIN = "/usr/bin/docker"
+MIN_UID = 1000  # Per-user aggregation skips system users
+MIG_LIST_TTL = 300  # Re-list MIG instances (nvidia-smi -L) at least this often
+
+DEFAULT_CONFIG = {
+    'gpu_interval': '30s',
+    'host_interval': '60s',
+    'container_interval': '60s',
+    'disk_interval': '5m',
+    'ring_size': 120,
+    'shm_slots': 256,
+    'shm_depth': 60,
+    'retention': '30d',
+    'disk_mounts': [],
+}
+
+# `nvidia-smi -L` lines
+GPU_LINE = re.compile(r'GPU\s+(\d+):\s+(.+?)\s+\(UUID:\s+(GPU-[a-f0-9-]+)\)')
+MIG_LINE = re.compile(r'\s+MIG\s+(\S+)\s+Device\s+(\d+):\s+\(UUID:\s+(MIG-[a-f0-9-]+)\)')
+
+# Filesystems worth reporting when disk_mounts is empty
+DISK_FSTYPES = {'ext2', 'ext3', 'ext4', 'xfs', 'btrfs', 'zfs', 'nfs', 'nfs4', 'cifs'}
+
+
+def load_config(config_path: Path = CONFIG_PATH) -> Dict:
+    """Read the metrics_sampler section of resource-limits.yaml (with defaults)."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        import yaml
+        with open(config_path) as f:
+            config.update((yaml.safe_load(f) or {}).get('metrics_sampler') or {})
+    except (ImportError, IOError, OSError):
+        pass
+    return config
+
+
+def _number(value: str) -> Optional[float]:
+    """nvidia-smi field as a number ([N/A], [Not Supported] -> None)."""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class MetricsSampler:
+    SOURCES = ('gpu', 'host', 'container', 'disk')
+
+    def __init__(self, config: Optional[Dict] = None, metrics_dir: Path = METRICS_DIR,
+                 proc_root: Path = Path('/proc'), cgroup_root: Path = Path('/sys/fs/cgroup'),
+                 docker_bin: str = DOCKER_BIN, disk_index_dir: Path = DISK_INDEX_DIR):
+        self.config = config or load_config()
+        self.metrics_dir = Path(metrics_dir)
+        self.proc_root = Path(proc_root)
+        self.cgroup_root = Path(cgroup_root)
+        self.docker_bin = docker_bin
+        self.disk_index_dir = Path(disk_index_dir)
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+        self.ring = {kind: deque(maxlen=int(self.config['ring_size'])) for kind in KINDS}
+        self.intervals = {source: max(parse_duration(str(self.config[f'{source}_interval'])), 1)
+                          for source in self.SOURCES}
+        self._usernames: Dict[int, str] = {}
+        self._cgroup_dirs: Dict[str, Path] = {}
+        # Counters from the previous sample (CPU % are deltas)
+        self._cpu_prev: Optional[List[int]] = None
+        self._proc_prev: Dict[str, int] = {}
+        self._proc_prev_uptime: Optional[float] = None
+        self._cgroup_prev: Dict[str, tuple] = {}
+        self._mig_instances: Optional[List[Dict]] = None
+        self._mig_listed = 0.0
+        self._home_updated: Dict[str, int] = {}
+        self._container_names: Dict[str, tuple] = {}  # Short ID -> (name, ds01.user)
+        self.shm: Optional[RingWriter] = None
+        self._stop = False
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _run(self, *cmd: str) -> Optional[str]:
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    def _read(self, path) -> str:
+        with open(path, errors='replace') as f:
+            return f.read()
+
+    def _username(self, uid: int) -> str:
+        if uid not in self._usernames:
+            try:
+                self._usernames[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                self._usernames[uid] = str(uid)
+        return self._usernames[uid]
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    def sample_gpu(self, ts: int) -> List[Dict]:
+        """Per-GPU device records and per-process GPU memory."""
+        out = self._run('nvidia-smi',
+                        '--query-gpu=index,uuid,name,utilization.gpu,utilization.memory,memory.used,'
+                        'memory.total,temperature.gpu,power.draw,power.limit,mig.mode.current',
+                        '--format=csv,noheader,nounits')
+        if out is None:
+            return []
+        records = []
+        for line in out.splitlines():
+            parts = [p.strip() for p in line.split(',')]
+            if len(parts) != 11 or not parts[0].isdigit():
+                continue
+            util, mem_util, mem_used, mem_total, temp, power, power_limit = map(_number, parts[3:10])
+            records.append({'ts': ts, 'kind': 'gpu', 'index': int(parts[0]), 'uuid': parts[1],
+                            'name': parts[2], 'util': util, 'mem_util': mem_util, 'mem_used': mem_used,
+                            'mem_total': mem_total, 'temp': temp, 'power': power,
+                            'power_limit': power_limit, 'mig': parts[10] == 'Enabled'})
+
+        out = self._run('nvidia-smi', '--query-compute-apps=pid,gpu_uuid,used_memory',
+                        '--format=csv,noheader,nounits') or ""
+        for app in parse_compute_apps(out):
+            try:
+                uid = os.stat(self.proc_root / str(app['pid'])).st_uid
+            except OSError:
+                uid = None
+            cid = container_of(app['pid'], self.proc_root)
+            records.append({'ts': ts, 'kind': 'gpu_proc', 'uuid': app['uuid'], 'pid': app['pid'], 'uid': uid,
+                            'user': self._username(uid) if uid is not None else None,
+                            'mem': app['mem'], 'container': cid[:12] if cid else None})
+        mig = self._sample_mig(ts, records)
+        return records + mig + self._gpu_containers(ts, records + mig)
+
+    def _list_mig(self, force: bool = False) -> List[Dict]:
+        """MIG instances from `nvidia-smi -L` (cached; MIG layouts change rarely)."""
+        if force or self._mig_instances is None or time.monotonic() - self._mig_listed > MIG_LIST_TTL:
+            out = self._run('nvidia-smi', '-L')
+            instances, gpu = [], None
+            for line in (out or "").splitlines():
+                match = GPU_LINE.match(line)
+                if match:
+                    gpu = int(match.group(1))
+                    continue
+                match = MIG_LINE.match(line)
+                if match and gpu is not None:
+                    instances.append({'gpu': gpu, 'slot': f"{gpu}.{match.group(2)}",
+                                      'uuid': match.group(3), 'profile': match.group(1)})
+            self._mig_instances = instances
+            self._mig_listed = time.monotonic()
+        return self._mig_instances
+
+    def _sample_mig(self, ts: int, gpu_records: List[Dict]) -> List[Dict]:
+        """Per-MIG-instance process memory, count and containers (from the compute-apps sample)."""
+        procs = [rec for rec in gpu_records if rec['kind'] == 'gpu_proc' and rec['uuid'].startswith('MIG-')]
+        usage = aggregate(procs)['devices']
+        if not any(rec['kind'] == 'gpu' and rec['mig'] for rec in gpu_records):
+            return []
+        instances = self._list_mig()
+        if set(usage) - {inst['uuid'] for inst in instances}:
+            instances = self._list_mig(force=True)  # Repartitioned since the last listing
+        idle = {'mem': 0.0, 'procs': 0, 'containers': []}
+        return [{'ts': ts, 'kind': 'mig', 'slot': inst['slot'], 'gpu': inst['gpu'], 'uuid': inst['uuid'],
+                 'profile': inst['profile'], 'mem_used': usage.get(inst['uuid'], idle)['mem'],
+                 'procs': usage.get(inst['uuid'], idle)['procs'],
+                 'containers': len([c for c in usage.get(inst['uuid'], idle)['containers'] if c])}
+                for inst in instances]
+
+    def _gpu_containers(self, ts: int, gpu_records: List[Dict]) -> List[Dict]:
+        """Per-container GPU memory, process count and devices (GPU index or MIG slot)."""
+        devices = {rec['uuid']: str(rec['index']) for rec in gpu_records if rec['kind'] == 'gpu'}
+        devices.update((rec['uuid'], rec['slot']) for rec in gpu_records if rec['kind'] == 'mig')
+        procs = [rec for rec in gpu_records if rec['kind'] == 'gpu_proc']
+        records = []
+        for cid, usage in sorted(aggregate(procs)['containers'].items(), key=lambda c: c[0] or ''):
+            if cid is None:
+                continue  # Bare-metal processes stay in the gpu_proc records
+            name, user = self._container_names.get(cid, (None, None))
+            records.append({'ts': ts, 'kind': 'gpu_container', 'id': cid, 'name': name, 'user': user,
+                            'gpu_mem': usage['mem'], 'procs': usage['procs'],
+                            'devices': [devices.get(uuid, uuid) for uuid in usage['devices']]})
+        return records
+
+    def sample_host(self, ts: int) -> List[Dict]:
+        """Host CPU/memory/load record plus one record per active user."""
+        host = {'ts': ts, 'kind': 'host', 'cpu': None}
+        try:
+            counters = [int(v) for v in self._read(self.proc_root / "stat").split("\n", 1)[0].split()[1:]]
+            if self._cpu_prev is not None:
+                delta = [a - b for a, b in zip(counters, self._cpu_prev)]
+                total = sum(delta[:8])
+                idle = delta[3] + delta[4]  # idle + iowait
+                host['cpu'] = round(100 * (total - idle) / total, 1) if total > 0 else 0.0
+            self._cpu_prev = counters
+        except (IOError, OSError, ValueError, IndexError):
+            pass
+        try:
+            load = self._read(self.proc_root / "loadavg").split()
+            host.update(load1=float(load[0]), load5=float(load[1]), load15=float(load[2]))
+        except (IOError, OSError, ValueError, IndexError):
+            pass
+        try:
+            meminfo = {}
+            for line in self._read(self.proc_root / "meminfo").splitlines():
+                key, _, value = line.partition(':')
+                meminfo[key] = int(value.split()[0]) // 1024 if value.split() else 0
+            buff_cache = meminfo.get('Buffers', 0) + meminfo.get('Cached', 0) + meminfo.get('SReclaimable', 0)
+            host.update(mem_total=meminfo.get('MemTotal'),
+                        mem_used=meminfo.get('MemTotal', 0) - meminfo.get('MemFree', 0) - buff_cache,
+                        mem_avail=meminfo.get('MemAvailable'), buff_cache=buff_cache,
+                        swap_total=meminfo.get('SwapTotal'),
+                        swap_used=meminfo.get('SwapTotal', 0) - meminfo.get('SwapFree', 0))
+        except (IOError, OSError, ValueError):
+            pass
+        return [host] + self._sample_users(ts)
+
+    def _sample_users(self, ts: int) -> List[Dict]:
+        """Per-user CPU (delta since last sweep), RSS and process count from one /proc sweep."""
+        try:
+            uptime = float(self._read(self.proc_root / "uptime").split()[0])
+        except (IOError, OSError, ValueError, IndexError):
+            return []
+        prev_uptime = self._proc_prev_uptime
+        elapsed = uptime - prev_uptime if prev_uptime is not None else 0
+        users: Dict[int, Dict] = {}
+        ticks_now: Dict[str, int] = {}
+
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    uid = entry.stat(follow_symlinks=False).st_uid
+                    if uid < MIN_UID:
+                        continue
+                    stat = self._read(f"{entry.path}/stat")
+                except OSError:
+                    continue  # Process exited
+                fields = stat[stat.rfind(')') + 2:].split()
+                if len(fields) < 22:
+                    continue
+                ticks = int(fields[11]) + int(fields[12])
+                starttime = int(fields[19])
+                key = f"{entry.name}:{starttime}"
+                ticks_now[key] = ticks
+                if key in self._proc_prev:
+                    delta = ticks - self._proc_prev[key]
+                elif prev_uptime is not None and starttime / self.clock_ticks >= prev_uptime:
+                    delta = ticks  # Started since the last sweep
+                else:
+                    delta = 0
+
+                user = users.setdefault(uid, {'ticks': 0, 'mem': 0.0, 'procs': 0})
+                user['ticks'] += delta
+                user['mem'] += int(fields[21]) * self.page_mb
+                user['procs'] += 1
+
+        self._proc_prev = ticks_now
+        self._proc_prev_uptime = uptime
+        return [{'ts': ts, 'kind': 'user', 'user': self._username(uid), 'uid': uid,
+                 'cpu': round(100 * u['ticks'] / self.clock_ticks / elapsed, 1) if elapsed > 0 else None,
+                 'mem': round(u['mem'], 1), 'procs': u['procs']}
+                for uid, u in sorted(users.items())]
+
+    def _find_cgroup_dirs(self, wanted: set):
+        """Locate container scopes under the cgroup tree (only when a new container appears)."""
+        for dirpath, dirnames, _ in os.walk(self.cgroup_root):
+            for name in dirnames:
+                match = SCOPE_DIR.match(name)
+                if match:
+                    self._cgroup_dirs[match.group(1)] = Path(dirpath) / name
+            # Containers sit in slices, never inside another container scope
+            dirnames[:] = [d for d in dirnames if not SCOPE_DIR.match(d) and
+                           (d.endswith('.slice') or d in ('docker', 'system.slice'))]
+            if wanted.issubset(self._cgroup_dirs):
+                break
+
+    def _cgroup_io(self, path: Path) -> tuple:
+        """(bytes read, bytes written) summed over devices from io.stat."""
+        read = written = 0
+        try:
+            for line in self._read(path / "io.stat").splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition('=')
+                    if key == 'rbytes':
+                        read += int(value)
+                    elif key == 'wbytes':
+                        written += int(value)
+        except (IOError, OSError, ValueError):
+            return None, None
+        return read, written
+
+    def _container_net(self, path: Path) -> tuple:
+        """(rx, tx) bytes of the container's network namespace, via one member process."""
+        try:
+            pid = self._read(path / "cgroup.procs").split()[0]
+            rx = tx = 0
+            for line in self._read(self.proc_root / pid / "net" / "dev").splitlines()[2:]:
+                iface, _, counters = line.partition(':')
+                if iface.strip() != 'lo':
+                    fields = counters.split()
+                    rx += int(fields[0])
+                    tx += int(fields[8])
+            return rx, tx
+        except (IOError, OSError, ValueError, IndexError):
+            return None, None
+
+    def sample_container(self, ts: int) -> List[Dict]:
+        """Per-container CPU %, memory (MB, excluding page cache), PIDs and I/O from cgroup counters."""
+        out = self._run(self.docker_bin, 'ps', '--no-trunc',
+                        '--format', '{{.ID}}|{{.Names}}|{{.Label "ds01.user"}}')
+        if out is None:
+            return []
+        containers = {}
+        for line in out.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3:
+                containers[parts[0]] = (parts[1], parts[2] or None)
+        self._container_names = {cid[:12]: owner for cid, owner in containers.items()}
+
+        if set(containers) - set(self._cgroup_dirs):
+            self._find_cgroup_dirs(set(containers))
+        for cid in set(self._cgroup_dirs) - set(containers):
+            del self._cgroup_dirs[cid]
+            self._cgroup_prev.pop(cid, None)
+
+        records = []
+        now = time.monotonic()
+        for cid, (name, user) in sorted(containers.items(), key=lambda c: c[1][0]):
+            path = self._cgroup_dirs.get(cid)
+            if path is None:
+                continue
+            try:
+                usage_usec = 0
+                for line in self._read(path / "cpu.stat").splitlines():
+                    if line.startswith("usage_usec "):
+                        usage_usec = int(line.split()[1])
+                mem = int(self._read(path / "memory.current"))
+                for line in self._read(path / "memory.stat").splitlines():
+                    if line.startswith("inactive_file "):
+                        mem -= int(line.split()[1])
+                        break
+                pids = int(self._read(path / "pids.current"))
+                limit = self._read(path / "memory.max").strip()
+            except (IOError, OSError, ValueError):
+                continue  # Container stopped between ps and the read
+            blk_read, blk_write = self._cgroup_io(path)
+            net_rx, net_tx = self._container_net(path)
+            cpu = None
+            if cid in self._cgroup_prev:
+                prev_usec, prev_time = self._cgroup_prev[cid]
+                if now > prev_time:
+                    cpu = round((usage_usec - prev_usec) / 1e4 / (now - prev_time), 1)
+            self._cgroup_prev[cid] = (usage_usec, now)
+            records.append({'ts': ts, 'kind': 'container', 'id': cid[:12], 'name': name, 'user': user,
+                            'cpu': cpu, 'mem': round(max(mem, 0) / (1024 * 1024), 1),
+                            'mem_limit': round(int(limit) / (1024 * 1024), 1) if limit.isdigit() else None,
+                            'pids': pids, 'blk_read': blk_read, 'blk_write': blk_write,
+                            'net_rx': net_rx, 'net_tx': net_tx})
+        return records
+
+    def _disk_mounts(self) -> List[str]:
+        if self.config.get('disk_mounts'):
+            return list(self.config['disk_mounts'])
+        mounts = []
+        try:
+            for line in self._read(self.proc_root / "mounts").splitlines():
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] in DISK_FSTYPES and parts[1] not in mounts:
+                    mounts.append(parts[1].replace('\\040', ' '))
+        except (IOError, OSError):
+            pass
+        return mounts or ['/']
+
+    def sample_disk(self, ts: int) -> List[Dict]:
+        """Space and inode usage per mount (df's Use% arithmetic)."""
+        records = []
+        gb = 1024 ** 3
+        for mount in self._disk_mounts():
+            try:
+                st = os.statvfs(mount)
+            except OSError:
+                continue
+            total = st.f_blocks * st.f_frsize
+            avail = st.f_bavail * st.f_frsize
+            used = total - st.f_bfree * st.f_frsize
+            inodes_used = st.f_files - st.f_ffree
+            records.append({'ts': ts, 'kind': 'disk', 'mount': mount,
+                            'total_gb': round(total / gb, 1), 'used_gb': round(used / gb, 1),
+                            'avail_gb': round(avail / gb, 1),
+                            'pct': round(100 * used / (used + avail), 1) if used + avail else 0.0,
+                            'inode_pct': round(100 * inodes_used / st.f_files, 1) if st.f_files else 0.0})
+        return records + self._home_usage(ts)
+
+    def _home_usage(self, ts: int) -> List[Dict]:
+        """Per-user home usage from disk-usage index summaries that changed since the last sample."""
+        records = []
+        gb = 1024 ** 3
+        try:
+            paths = list(self.disk_index_dir.glob("*.json"))
+        except OSError:
+            return records
+        for path in paths:
+            try:
+                summary = json.loads(path.read_text())
+            except (IOError, OSError, ValueError):
+                continue
+            user = summary.get('user')
+            if not user or self._home_updated.get(user) == summary.get('updated'):
+                continue
+            self._home_updated[user] = summary.get('updated')
+            quota = summary.get('quota') or {}
+            records.append({'ts': ts, 'kind': 'home', 'user': user,
+                            'home_gb': round(summary.get('home_bytes', 0) / gb, 2),
+                            'workspace_gb': round(summary.get('workspace_bytes', 0) / gb, 2),
+                            'files': summary.get('home_files'),
+                            'quota_used_gb': round(quota['used_bytes'] / gb, 2) if quota.get('used_bytes') else None,
+                            'quota_gb': round(quota['hard_bytes'] / gb, 2) if quota.get('hard_bytes') else None})
+        return records
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+
+    def sample(self, sources=SOURCES, write: bool = True) -> List[Dict]:
+        """Sample the given sources once; append to segments and the ring buffer."""
+        ts = int(time.time())
+        records = []
+        for source in sources:
+            try:
+                records.extend(getattr(self, f"sample_{source}")(ts))
+            except Exception as e:  # One broken source must not stop the others
+                print(f"metrics-sampler: {source} failed: {e}", file=sys.stderr)
+        for rec in records:
+            self.ring[rec['kind']].append(rec)
+        if write and records:
+            try:
+                append_records(records, self.metrics_dir)
+            except (IOError, OSError) as e:
+                print(f"metrics-sampler: cannot write segment: {e}", file=sys.stderr)
+            publish_latest({kind: list(ring) for kind, ring in self.ring.items()}, self.metrics_dir)
+        if write and self.shm is not None:
+            self._publish_shm(sources, records)
+        return records
+
+    def _publish_shm(self, sources, records: List[Dict]):
+        """GPU, MIG and container samples into the shared-memory ring; retire vanished entities."""
+        live = {'gpu': [], 'mig': [], 'container': [], 'gpu_container': []}
+        for rec in records:
+            kind = rec['kind']
+            if kind == 'gpu':
+                key = str(rec['index'])
+                self.shm.publish('gpu', key, rec['ts'], rec, ident=rec['uuid'], label=rec['name'])
+            elif kind == 'mig':
+                key = rec['slot']
+                self.shm.publish('mig', key, rec['ts'], rec, ident=rec['uuid'], label=rec['profile'])
+            elif kind == 'container':
+                key = rec['name']
+                self.shm.publish('container', key, rec['ts'], rec, ident=rec['id'], user=rec['user'])
+            elif kind == 'gpu_container':
+                key = rec['name'] or rec['id']
+                self.shm.publish('gpu_container', key, rec['ts'], rec, ident=rec['id'],
+                                 label=",".join(rec['devices']), user=rec['user'])
+            else:
+                continue
+            live[kind].append(key)
+        if 'gpu' in sources:
+            self.shm.retire('gpu', live['gpu'])
+            self.shm.retire('mig', live['mig'])
+            self.shm.retire('gpu_container', live['gpu_container'])
+        if 'container' in sources:
+            self.shm.retire('container', live['container'])
+        self.shm.commit()
+
+    def prime(self):
+        """Read the delta counters once so the first sample has CPU %."""
+        self.sample(('host', 'container'), write=False)
+        for kind in ('host', 'user', 'container'):
+            self.ring[kind].clear()
+
+    def stop(self, *_):
+        self._stop = True
+
+    def prune(self) -> int:
+        """Delete day segments older than the configured retention."""
+        retention_days = parse_duration(str(self.config['retention']))
+        retention_days = retention_days // 86400 if retention_days > 0 else -1
+        return prune_segments(retention_days, self.metrics_dir)
+
+    def run(self):
+        """Sample each source on its interval until SIGTERM/SIGINT."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            self.shm = RingWriter(RING_FILE, int(self.config['shm_slots']), int(self.config['shm_depth']))
+        except (IOError, OSError) as e:
+            print(f"metrics-sampler: shared-memory ring disabled: {e}", file=sys.stderr)
+        print(f"metrics-sampler: started, intervals {self.intervals}", flush=True)
+
+        self.prime()
+        next_due = {source: time.monotonic() for source in self.SOURCES}
+        pruned_day = None
+        while not self._stop:
+            now = time.monotonic()
+            due = [source for source in self.SOURCES if next_due[source] <= now]
+            if due:
+                self.sample(due)
+                for source in due:
+                    next_due[source] = max(next_due[source] + self.intervals[source], now)
+            today = time.strftime("%Y-%m-%d")
+            if today != pruned_day:
+                self.prune()
+                pruned_day = today
+            # Short sleeps keep shutdown prompt
+            time.sleep(max(0.0, min(1.0, min(next_due.values()) - time.monotonic())))
+        if self.shm is not None:
+            self.shm.close()
+        print("metrics-sampler: stopped", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DS01 metrics sampler")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('run', help='Run as daemon')
+    once = sub.add_parser('once', help='Sample every source once')
+    once.add_argument('--dry-run', action='store_true', help='Print records instead of writing')
+    sub.add_parser('prune', help='Delete segments older than the retention (cron backstop)')
+    args = parser.parse_args()
+
+    sampler = MetricsSampler()
+    if args.command == 'run':
+        sampler.run()
+    elif args.command == 'once':
+        sampler.prime()
+        time.sleep(1)
+        if not args.dry_run:
+            sampler.metrics_dir.mkdir(parents=True, exist_ok=True)
+        for rec in sampler.sample(write=not args.dry_run):
+            print(json.dumps(rec, separators=(',', ':')))
+    elif args.command == 'prune':
+        print(f"metrics-sampler: pruned {sampler.prune()} segments")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
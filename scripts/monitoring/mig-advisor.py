@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+DS01 MIG Layout Advisor
+/opt/ds01-infra/scripts/monitoring/mig-advisor.py
+
+Recommends a MIG layout (which GPUs stay whole, which are partitioned)
+from observed demand instead of guesswork, as a plan ds01-mig-partition
+can apply.
+
+Demand is rebuilt from events.jsonl (rotated files included):
+
+    gpu.allocated   one request per container: its slots (whole GPUs if any
+                    slot is a full GPU, MIG slices otherwise), held until
+                    gpu.released / gpu.removed_stale / container.removed
+    gpu.rejected    capacity rejections ("No ... available") only - limit
+                    rejections are not fixed by a layout. A container
+                    rejected and later allocated is one request that
+                    arrived at its first rejection; one never allocated is
+                    sized from the event's migs field (or its reason) and
+                    held for the median observed duration
+
+Each candidate layout (F full GPUs, the rest split into
+mig_instances_per_gpu slices, F >= --min-full) replays that demand:
+MIG requests take free slices (one GPU when one fits, like the
+allocator), full-GPU requests take a whole GPU or a GPU with all slices
+free, and anything that does not fit queues until it does or --max-wait
+passes (then counts as rejected). Layouts are ranked by full-GPU
+rejections (researcher capacity first), then all rejections, then total
+queue wait, then the number of GPUs to repartition.
+
+Usage:
+    mig-advisor.py                          # Last 30 days, summary + plan
+    mig-advisor.py --days 90 --max-wait 120 # Queue patience in minutes
+    mig-advisor.py --min-full 2             # Keep at least 2 whole GPUs
+    mig-advisor.py --output plan.yaml       # Write the plan file
+    mig-advisor.py --json
+
+    sudo ds01-mig-partition --config plan.yaml --dry-run
+"""
+
+import re
+import sys
+import json
+import heapq
+import argparse
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+INFRA_ROOT = Path("/opt/ds01-infra")
+CONFIG_FILE = INFRA_ROOT / "config" / "resource-limits.yaml"
+EVENTS_FILE = Path("/var/log/ds01/events.jsonl")
+DEFAULT_MIG_PER_GPU = 4
+DEFAULT_PROFILE = "1g.10gb"
+DEFAULT_DAYS = 30
+DEFAULT_MAX_WAIT = 240        # minutes a request waits in the queue before it counts as rejected
+DEFAULT_DURATION = 3600       # seconds held, when no allocation has been observed at all
+
+RELEASE_EVENTS = ('gpu.released', 'gpu.removed_stale', 'container.removed')
+# Rejections a different layout could have avoided (the rest are user limits)
+CAPACITY_REJECTION = re.compile(r'^No .*available|NO_GPU_AVAILABLE')
+
+
+def _ts(event: Dict) -> Optional[float]:
+    try:
+        return datetime.strptime(event['ts'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def read_events(events_file: Path = EVENTS_FILE, since: float = 0) -> Iterator[Dict]:
+    """gpu.* and container.removed events at or after since, oldest file first."""
+    events_file = Path(events_file)
+    paths = sorted(events_file.parent.glob(f"{events_file.stem}.*.jsonl")) + [events_file]
+    for path in paths:
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                if b'"gpu.' not in line and b'"container.removed"' not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                ts = _ts(event)
+                if ts is not None and ts >= since:
+                    event['_ts'] = ts
+                    yield event
+
+
+def build_demand(events: Iterator[Dict], mig_per_gpu: int, now: float) -> List[Dict]:
+    """
+    One request per container allocation or unserved rejection episode.
+
+    Returns:
+        [{'user', 'container', 'arrival', 'duration', 'size', 'full'}] sorted by arrival;
+        'size' is MIG slices, or whole GPUs for full-GPU requests
+    """
+    requests, held, rejected = [], {}, {}
+    for event in sorted(events, key=lambda e: e['_ts']):
+        kind, ts = event.get('event'), event['_ts']
+        container = event.get('container')
+        if not container:
+            continue
+        if kind == 'gpu.allocated':
+            slots = [s.strip() for s in str(event.get('gpu') or '').split(',') if s.strip()]
+            if not slots:
+                continue
+            full = [s for s in slots if '.' not in s]
+            request = {'user': event.get('user'), 'container': container,
+                       'arrival': ts, 'start': ts, 'duration': None,
+                       'size': len(full) if full else len(slots), 'full': bool(full)}
+            pending = rejected.pop(container, None)
+            if pending:
+                request['arrival'] = pending['arrival']
+            held[container] = request
+            requests.append(request)
+        elif kind in RELEASE_EVENTS:
+            request = held.pop(container, None)
+            if request:
+                request['duration'] = ts - request['start']
+        elif kind == 'gpu.rejected' and CAPACITY_REJECTION.search(str(event.get('reason') or '')):
+            if container in rejected or container in held:
+                continue
+            full = str(event.get('reason')).startswith('No full GPU')
+            try:
+                migs = int(event.get('migs') or 0)
+            except ValueError:
+                migs = 0
+            if full:
+                size = max(1, migs // mig_per_gpu)
+            else:
+                size = migs or 1
+            rejected[container] = {'user': event.get('user'), 'container': container, 'arrival': ts,
+                                   'start': None, 'duration': None, 'size': size, 'full': full}
+
+    for request in held.values():
+        request['duration'] = now - request['start']
+    observed = [r['duration'] for r in requests if r['duration'] and r['duration'] > 0]
+    typical = median(observed) if observed else DEFAULT_DURATION
+    for request in rejected.values():
+        request['duration'] = typical
+        requests.append(request)
+    for request in requests:
+        request['duration'] = max(request['duration'] or typical, 1)
+        del request['start']
+    return sorted(requests, key=lambda r: r['arrival'])
+
+
+def candidate_layouts(current: Dict[str, int], mig_per_gpu: int, min_full: int) -> List[Dict[str, int]]:
+    """
+    Layouts with F whole GPUs for every F >= min_full ({gpu: slices}, 0 = whole GPU).
+
+    The GPUs to keep whole are the currently whole ones first, then the
+    highest-numbered, so each candidate repartitions as few GPUs as possible.
+    """
+    gpus = sorted(current, key=int)
+    whole_first = sorted(gpus, key=lambda g: (current[g] != 0, -int(g)))
+    layouts = []
+    for full in range(min(min_full, len(gpus)), len(gpus) + 1):
+        whole = set(whole_first[:full])
+        layouts.append({g: 0 if g in whole else mig_per_gpu for g in gpus})
+    return layouts
+
+
+class Cluster:
+    """Free capacity of one layout during a replay."""
+
+    def __init__(self, layout: Dict[str, int]):
+        self.layout = layout
+        self.free = dict(layout)                         # MIG GPU -> free slices
+        self.idle = {g for g, n in layout.items() if n == 0}   # whole GPUs not in use
+
+    def place(self, request: Dict) -> Optional[List[Tuple[str, int]]]:
+        """Take capacity for a request; [(gpu, slices)] (0 = whole GPU) or None."""
+        mig = {g: n for g, n in self.free.items() if self.layout[g]}
+        if request['full']:
+            whole = sorted(self.idle, key=int)
+            virtual = sorted((g for g, n in mig.items() if n == self.layout[g]), key=int)
+            chosen = (whole + virtual)[:request['size']]
+            if len(chosen) < request['size']:
+                return None
+            taken = []
+            for g in chosen:
+                if g in self.idle:
+                    self.idle.discard(g)
+                    taken.append((g, 0))
+                else:
+                    taken.append((g, self.free[g]))
+                    self.free[g] = 0
+            return taken
+
+        needed = request['size']
+        if sum(mig.values()) < needed:
+            return None
+        fits = [g for g, n in mig.items() if n >= needed]
+        if fits:
+            order = [min(fits, key=lambda g: (mig[g], int(g)))]
+        else:
+            order = sorted(mig, key=lambda g: (-mig[g], int(g)))
+        taken = []
+        for g in order:
+            n = min(needed, mig[g])
+            if n:
+                self.free[g] -= n
+                taken.append((g, n))
+                needed -= n
+            if not needed:
+                break
+        return taken
+
+    def release(self, taken: List[Tuple[str, int]]):
+        for g, n in taken:
+            if n:
+                self.free[g] += n
+            else:
+                self.idle.add(g)
+
+
+def simulate(requests: List[Dict], layout: Dict[str, int], max_wait: float) -> Dict:
+    """
+    Replay demand against a layout with a first-fit queue.
+
+    Returns:
+        {'requests', 'rejected', 'rejected_full', 'waited', 'wait_hours'}
+    """
+    cluster = Cluster(layout)
+    timeline = [(r['arrival'], 1, i) for i, r in enumerate(requests)]
+    heapq.heapify(timeline)
+    queue: List[int] = []
+    result = {'requests': len(requests), 'rejected': 0, 'rejected_full': 0, 'waited': 0, 'wait_hours': 0.0}
+
+    def reject(i):
+        result['rejected'] += 1
+        result['rejected_full'] += int(requests[i]['full'])
+
+    def start(i, now):
+        taken = cluster.place(requests[i])
+        if taken is None:
+            return False
+        wait = now - requests[i]['arrival']
+        if wait > 0:
+            result['waited'] += 1
+            result['wait_hours'] += wait / 3600
+        heapq.heappush(timeline, (now + requests[i]['duration'], 0, taken))
+        return True
+
+    while timeline:
+        now, kind, item = heapq.heappop(timeline)
+        if kind == 0:                       # Departure: free capacity, serve the queue
+            cluster.release(item)
+            waiting = []
+            for i in queue:
+                if now - requests[i]['arrival'] > max_wait:
+                    reject(i)
+                elif not start(i, now):
+                    waiting.append(i)
+            queue = waiting
+        elif not start(item, now):
+            queue.append(item)
+
+    for i in queue:
+        reject(i)
+    result['wait_hours'] = round(result['wait_hours'], 2)
+    return result
+
+
+def advise(requests: List[Dict], current: Dict[str, int], mig_per_gpu: int,
+           min_full: int = 0, max_wait: float = DEFAULT_MAX_WAIT * 60) -> List[Dict]:
+    """
+    Simulate every candidate layout; best first.
+
+    Returns:
+        [{'layout', 'full_gpus', 'changes', 'current', **simulate()}]
+    """
+    results = []
+    layouts = candidate_layouts(current, mig_per_gpu, min_full)
+    if current not in layouts:
+        layouts.append(dict(current))
+    for layout in layouts:
+        result = simulate(requests, layout, max_wait)
+        result.update(layout=layout, full_gpus=sum(1 for n in layout.values() if n == 0),
+                      changes=sum(1 for g in layout if layout[g] != current.get(g)),
+                      current=layout == current)
+        results.append(result)
+    eligible = [r for r in results if r['full_gpus'] >= min_full]
+    eligible.sort(key=lambda r: (r['rejected_full'], r['rejected'], r['wait_hours'], r['changes']))
+    return eligible + [r for r in results if r['full_gpus'] < min_full]
+
+
+def plan_yaml(result: Dict, profile: str, summary: List[str]) -> str:
+    """The recommended layout in the gpu_allocation.mig_gpus form ds01-mig-partition reads."""
+    mig_gpus = {}
+    for gpu, slices in sorted(result['layout'].items(), key=lambda item: int(item[0])):
+        if slices:
+            mig_gpus[int(gpu)] = {'enable': True, 'profile': profile, 'instances': slices}
+        else:
+            mig_gpus[int(gpu)] = {'enable': False, 'profile': None}
+    header = "".join(f"# {line}\n" for line in summary)
+    return header + yaml.safe_dump({'gpu_allocation': {'mig_gpus': mig_gpus}}, default_flow_style=None,
+                                   sort_keys=False)
+
+
+def current_layout(mig_per_gpu: int) -> Tuple[Dict[str, int], Optional[str]]:
+    """({gpu: slices, 0 = whole}, most common MIG profile) from `nvidia-smi -L`."""
+    try:
+        output = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True,
+                                timeout=10, check=True).stdout
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return {}, None
+    layout, profiles, gpu = {}, {}, None
+    for line in output.splitlines():
+        match = re.match(r'GPU (\d+):', line)
+        if match:
+            gpu = match.group(1)
+            layout[gpu] = 0
+            continue
+        match = re.match(r'\s+MIG\s+(\S+)\s+Device\s+\d+:', line)
+        if match and gpu is not None:
+            layout[gpu] += 1
+            profiles[match.group(1)] = profiles.get(match.group(1), 0) + 1
+    profile = max(profiles, key=profiles.get) if profiles else None
+    return layout, profile
+
+
+def configured_layout(config: Dict, mig_per_gpu: int) -> Dict[str, int]:
+    """{gpu: slices} from gpu_allocation.mig_gpus (fallback when nvidia-smi is unavailable)."""
+    mig_gpus = (config.get('gpu_allocation') or {}).get('mig_gpus') or {}
+    return {str(gpu): (int(settings.get('instances') or mig_per_gpu) if settings.get('enable') else 0)
+            for gpu, settings in mig_gpus.items()}
+
+
+def describe(layout: Dict[str, int]) -> str:
+    whole = [g for g in sorted(layout, key=int) if not layout[g]]
+    split = [g for g in sorted(layout, key=int) if layout[g]]
+    parts = []
+    if whole:
+        parts.append(f"full: {','.join(whole)}")
+    if split:
+        parts.append(f"MIG: {','.join(split)}")
+    return "; ".join(parts) or "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DS01 MIG layout advisor (demand replay)")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f"History window (default: {DEFAULT_DAYS})")
+    parser.add_argument('--max-wait', type=int, default=DEFAULT_MAX_WAIT,
+                        help=f"Minutes a request may queue before it counts as rejected (default: {DEFAULT_MAX_WAIT})")
+    parser.add_argument('--min-full', type=int, help="Whole GPUs to keep (default: 1 if full GPUs were requested)")
+    parser.add_argument('--profile', help="MIG profile for partitioned GPUs (default: current)")
+    parser.add_argument('--events', type=Path, default=EVENTS_FILE)
+    parser.add_argument('--config', type=Path, default=CONFIG_FILE)
+    parser.add_argument('--output', type=Path, help="Write the plan (YAML) for ds01-mig-partition --config")
+    parser.add_argument('--json', action='store_true', help="Output all simulated layouts as JSON")
+    args = parser.parse_args()
+
+    try:
+        config = yaml.safe_load(args.config.read_text()) or {}
+    except (OSError, yaml.YAMLError):
+        config = {}
+    mig_per_gpu = int((config.get('gpu_allocation') or {}).get('mig_instances_per_gpu') or DEFAULT_MIG_PER_GPU)
+
+    current, profile = current_layout(mig_per_gpu)
+    if not current:
+        current = configured_layout(config, mig_per_gpu)
+    if not current:
+        print("mig-advisor: no GPUs found (nvidia-smi -L failed and no gpu_allocation.mig_gpus in config)",
+              file=sys.stderr)
+        sys.exit(1)
+    profile = args.profile or profile or DEFAULT_PROFILE
+
+    now = datetime.now(timezone.utc).timestamp()
+    requests = build_demand(read_events(args.events, now - args.days * 86400), mig_per_gpu, now)
+    full_requests = sum(1 for r in requests if r['full'])
+    min_full = args.min_full if args.min_full is not None else int(full_requests > 0)
+    results = advise(requests, current, mig_per_gpu, min_full, args.max_wait * 60)
+    best = results[0]
+    baseline = next(r for r in results if r['current'])
+
+    if args.json:
+        print(json.dumps({'requests': len(requests), 'full_gpu_requests': full_requests, 'min_full': min_full,
+                          'profile': profile, 'layouts': results}, indent=2))
+        return
+
+    summary = [
+        f"DS01 MIG layout plan (mig-advisor.py, {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')})",
+        f"Demand: {len(requests)} GPU requests ({full_requests} full-GPU) over {args.days} days, "
+        f"max queue wait {args.max_wait} min",
+        f"Current:     {describe(current)} - {baseline['rejected']} rejected, {baseline['wait_hours']:.1f}h queued",
+        f"Recommended: {describe(best['layout'])} - {best['rejected']} rejected, {best['wait_hours']:.1f}h queued",
+        "Apply: sudo ds01-mig-partition --config <this file> --dry-run",
+    ]
+
+    print(f"MIG layout advisor: {len(requests)} requests ({full_requests} full-GPU), last {args.days} days")
+    print(f"{'Layout':<32} {'Rejected':>9} {'Full rej.':>10} {'Waited':>7} {'Wait-h':>8} {'Changes':>8}")
+    print("-" * 79)
+    for r in results:
+        mark = "*" if r is best else ("=" if r['current'] else " ")
+        note = "" if r['full_gpus'] >= min_full else "  (below --min-full)"
+        print(f"{mark} {describe(r['layout']):<30} {r['rejected']:>9} {r['rejected_full']:>10} "
+              f"{r['waited']:>7} {r['wait_hours']:>8.1f} {r['changes']:>8}{note}")
+    print("\n* recommended   = current\n")
+
+    plan = plan_yaml(best, profile, summary)
+    if best['current']:
+        print("Current layout is already the best fit for observed demand.")
+    if args.output:
+        args.output.write_text(plan)
+        print(f"Plan written to {args.output}")
+        print(f"Preview: sudo ds01-mig-partition --config {args.output} --dry-run")
+    else:
+        print(plan, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,12 @@
 DS01 MIG Utilization Monitor
 /opt/ds01-infra/scripts/monitoring/mig-utilization-monitor.py
 
-Tracks actual MIG instance utilization (not just allocation) and shows per-instance usage.
+Tracks actual MIG instance activity (not just allocation) and shows per-instance usage.
+
+nvidia-smi has no per-instance utilization.gpu, so an instance is active
+when compute processes run on it; their memory and owning containers come
+from scripts/lib/gpu_attribution.py (via the metrics-sampler ring when it
+is running).
 
 Usage:
     mig-utilization-monitor.py                 # Current MIG utilization snapshot
@@ -30,9 +35,20 @@ EVENT_LOGGER = INFRA_ROOT / "scripts/docker/event-logger.py"
 DOCKER_BIN = "/usr/bin/docker"
 
 # Thresholds
-WASTE_THRESHOLD = 5  # GPU utilization below this % is considered "wasted"
+WASTE_THRESHOLD = 5  # Parent GPU utilization below this % counts as idle (pre-attribution history)
 WASTE_DURATION_MINUTES = 30  # Must be wasted for this long to alert
 
+# Live samples published by metrics-sampler.py (shared-memory ring) - optional
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "lib"))
+try:
+    from metrics_ring import latest as ring_latest
+except ImportError:
+    ring_latest = None
+try:
+    from gpu_attribution import query_compute_apps, attribute
+except ImportError:
+    query_compute_apps = None
+
 
 def now_utc():
     """Get current UTC time (timezone-aware)."""
@@ -46,6 +62,18 @@ def now_utc_iso():
 
 def get_mig_instances():
     """Get list of MIG instances with their GPU parent and index."""
+    migs = ring_latest('mig') if ring_latest else None
+    if migs:
+        gpu_names = {int(g['key']): g['label'] for g in ring_latest('gpu') or []}
+        return [{
+            "gpu": int(m['gpu']),
+            "gpu_name": gpu_names.get(int(m['gpu']), ''),
+            "device_id": int(m['key'].split('.')[1]),
+            "slot": m['key'],
+            "uuid": m['id'],
+            "profile": m['label']
+        } for m in migs]
+
     try:
         result = subprocess.run(
             ["nvidia-smi", "-L"],
@@ -95,79 +123,67 @@ def get_mig_instances():
 
 
 def get_mig_utilization(mig_instances):
-    """Get utilization for each MIG instance."""
+    """Get per-instance activity: compute processes, their memory and containers.
+
+    nvidia-smi reports no utilization.gpu per MIG instance - only the parent
+    GPU's, which the instances share. Activity is therefore judged from the
+    compute processes running on each instance (MIG UUID); the parent GPU's
+    utilization is kept as parent_gpu_util_percent for context.
+    """
     if not mig_instances:
         return []
 
-    try:
-        # Query nvidia-smi for MIG-specific utilization
-        # Format: GPU index, MIG UUID, utilization, memory used, memory total
-        result = subprocess.run(
-            [
-                "nvidia-smi",
-                "--query-compute-apps=gpu_uuid,used_gpu_memory",
-                "--format=csv,noheader,nounits"
-            ],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+    # Sampler ring: same fields without further nvidia-smi calls
+    gpus = ring_latest('gpu') if ring_latest else None
+    migs = ring_latest('mig') if gpus else None
+    if gpus and migs is not None:
+        gpu_stats = {int(g['key']): g for g in gpus}
+        usage = {m['id']: m for m in migs}
+        for instance in mig_instances:
+            parent = gpu_stats.get(instance["gpu"], {})
+            used = usage.get(instance["uuid"], {})
+            _set_activity(instance, used.get('procs'), used.get('mem_used'), used.get('containers'),
+                          parent.get('util'), parent.get('temp'))
+        return mig_instances
 
-        # Map running processes to MIG instances
-        process_memory = {}
-        if result.returncode == 0:
-            for line in result.stdout.strip().split('\n'):
-                if not line.strip():
-                    continue
-                parts = [p.strip() for p in line.split(',')]
-                if len(parts) >= 2:
-                    uuid = parts[0]
-                    mem = int(parts[1]) if parts[1] != '[N/A]' else 0
-                    process_memory[uuid] = process_memory.get(uuid, 0) + mem
-
-        # Get detailed utilization per GPU (MIG instances share parent GPU stats)
-        result2 = subprocess.run(
-            [
-                "nvidia-smi",
-                "--query-gpu=index,utilization.gpu,utilization.memory,temperature.gpu",
-                "--format=csv,noheader,nounits"
-            ],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+    try:
+        # One compute-apps sample, each process mapped to its container via /proc/<pid>/cgroup
+        apps = query_compute_apps() if query_compute_apps else None
+        devices = attribute(apps)['devices'] if apps is not None else {}
 
+        # Parent GPU stats (shared by its MIG instances) - context only
         gpu_stats = {}
-        if result2.returncode == 0:
-            for line in result2.stdout.strip().split('\n'):
+        try:
+            result = subprocess.run(
+                [
+                    "nvidia-smi",
+                    "--query-gpu=index,utilization.gpu,temperature.gpu",
+                    "--format=csv,noheader,nounits"
+                ],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            result = None
+
+        if result is not None and result.returncode == 0:
+            for line in result.stdout.strip().split('\n'):
                 if not line.strip():
                     continue
                 parts = [p.strip() for p in line.split(',')]
-                if len(parts) >= 4:
-                    gpu_idx = int(parts[0])
-                    gpu_stats[gpu_idx] = {
-                        "gpu_util_percent": int(parts[1]) if parts[1] != '[N/A]' else 0,
-                        "mem_util_percent": int(parts[2]) if parts[2] != '[N/A]' else 0,
-                        "temperature_c": int(parts[3]) if parts[3] != '[N/A]' else 0
+                if len(parts) >= 3:
+                    gpu_stats[int(parts[0])] = {
+                        "util": int(parts[1]) if parts[1] != '[N/A]' else None,
+                        "temp": int(parts[2]) if parts[2] != '[N/A]' else None
                     }
 
-        # Enrich MIG instances with utilization data
         for instance in mig_instances:
-            gpu_idx = instance["gpu"]
-            uuid = instance["uuid"]
-
-            # Get parent GPU stats
-            if gpu_idx in gpu_stats:
-                instance["gpu_util_percent"] = gpu_stats[gpu_idx]["gpu_util_percent"]
-                instance["mem_util_percent"] = gpu_stats[gpu_idx]["mem_util_percent"]
-                instance["temperature_c"] = gpu_stats[gpu_idx]["temperature_c"]
-            else:
-                instance["gpu_util_percent"] = 0
-                instance["mem_util_percent"] = 0
-                instance["temperature_c"] = 0
-
-            # Add process memory if any
-            instance["process_mem_mb"] = process_memory.get(uuid, 0)
+            parent = gpu_stats.get(instance["gpu"], {})
+            used = devices.get(instance["uuid"], {})
+            _set_activity(instance, used.get('procs'), used.get('mem'),
+                          len([c for c in used.get('containers', []) if c]),
+                          parent.get('util'), parent.get('temp'))
 
         return mig_instances
     except Exception as e:
@@ -175,6 +191,22 @@ def get_mig_utilization(mig_instances):
         return mig_instances
 
 
+def _set_activity(instance, procs, mem_mb, containers, parent_util, temp):
+    """Store one instance's activity fields (missing values count as idle)."""
+    instance["procs"] = int(procs or 0)
+    instance["process_mem_mb"] = int(mem_mb or 0)
+    instance["containers"] = int(containers or 0)
+    instance["active"] = instance["procs"] > 0
+    instance["parent_gpu_util_percent"] = int(parent_util) if parent_util is not None else None
+    instance["temperature_c"] = int(temp) if temp is not None else None
+
+
+def profile_memory_mb(profile):
+    """Memory of a MIG profile ("3g.20gb" -> 20480), None if not encoded in the name."""
+    match = re.search(r'\.(\d+)gb', profile or "")
+    return int(match.group(1)) * 1024 if match else None
+
+
 # Cache the gpu-state-reader module for performance
 _gpu_state_module = None
 
@@ -268,8 +300,9 @@ def record_utilization(mig_instances, allocations):
             {
                 "slot": m["slot"],
                 "profile": m["profile"],
-                "gpu_util_percent": m.get("gpu_util_percent", 0),
-                "process_mem_mb": m.get("process_mem_mb", 0)
+                "procs": m.get("procs", 0),
+                "process_mem_mb": m.get("process_mem_mb", 0),
+                "containers": m.get("containers", 0)
             }
             for m in mig_instances
         ],
@@ -337,7 +370,11 @@ def check_wasted_allocations():
             for mig in entry.get("mig_instances", []):
                 if mig.get("slot") == mig_slot:
                     container_usage[container]["samples"] += 1
-                    if mig.get("gpu_util_percent", 0) < WASTE_THRESHOLD:
+                    if "procs" in mig:
+                        idle = mig["procs"] == 0
+                    else:  # Recorded before attribution: parent GPU utilization
+                        idle = mig.get("gpu_util_percent", 0) < WASTE_THRESHOLD
+                    if idle:
                         container_usage[container]["low_util_samples"] += 1
                     break
 
@@ -410,34 +447,37 @@ def format_utilization_display(mig_instances, allocations):
         for instance in gpu_info["instances"]:
             slot = instance["slot"]
             profile = instance["profile"]
-            util = instance.get("gpu_util_percent", 0)
+            procs = instance.get("procs", 0)
             process_mem = instance.get("process_mem_mb", 0)
+            profile_mem = profile_memory_mb(profile)
+            mem_pct = min(100, int(process_mem * 100 / profile_mem)) if profile_mem else 0
 
-            # Color coding (ANSI)
-            if util >= 80:
+            # Color coding (ANSI) by memory held on the instance
+            if not procs:
+                color = "\033[0;90m"  # Gray (idle)
+            elif mem_pct >= 80:
                 color = "\033[0;31m"  # Red
-            elif util >= 50:
+            elif mem_pct >= 50:
                 color = "\033[1;33m"  # Yellow
-            elif util > 0:
-                color = "\033[0;32m"  # Green
             else:
-                color = "\033[0;90m"  # Gray (idle)
+                color = "\033[0;32m"  # Green
             reset = "\033[0m"
+            activity = f"BUSY {procs:2d} proc" if procs else "idle       "
 
             # Find container using this MIG instance
             alloc = alloc_map.get(slot)
             if alloc:
                 container_info = f" -> {alloc['user']}:{alloc['container']}"
-                status = "ALLOCATED"
+                status = "ALLOCATED" if procs else "ALLOCATED (idle)"
             else:
                 container_info = ""
-                status = "FREE"
+                status = "FREE" if not procs else "UNALLOCATED (in use)"
 
-            lines.append(f"  MIG {slot} [{profile}]: {color}{util:3d}%{reset} | Mem: {process_mem:5d}MB | {status}{container_info}")
+            lines.append(f"  MIG {slot} [{profile}]: {color}{activity}{reset} | Mem: {process_mem:5d}MB | {status}{container_info}")
 
-            # Simple bar
+            # Simple bar (process memory of the instance's memory)
             bar_width = 30
-            filled = int(util * bar_width / 100)
+            filled = int(mem_pct * bar_width / 100)
             bar = "\u2588" * filled + "\u2591" * (bar_width - filled)
             lines.append(f"    [{color}{bar}{reset}]")
 
@@ -448,11 +488,10 @@ def format_utilization_display(mig_instances, allocations):
     allocated = len(allocations)
     free = total_instances - allocated
 
-    active_util = [m.get("gpu_util_percent", 0) for m in mig_instances if alloc_map.get(m["slot"])]
-    avg_util = sum(active_util) / len(active_util) if active_util else 0
+    idle_allocated = sum(1 for m in mig_instances if alloc_map.get(m["slot"]) and not m.get("procs"))
 
     lines.append("-" * 70)
-    lines.append(f"Total MIG Instances: {total_instances} | Allocated: {allocated} | Free: {free} | Avg Util (allocated): {avg_util:.1f}%")
+    lines.append(f"Total MIG Instances: {total_instances} | Allocated: {allocated} | Free: {free} | Allocated but idle: {idle_allocated}")
 
     return "\n".join(lines)
 
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+DS01 Resource Alert Engine
+/opt/ds01-infra/scripts/monitoring/resource-alert-engine.py
+
+Evaluates the resource alert rules for every user against one snapshot
+and writes the alert changes in one batch. Replaces the per-user loop in
+resource-alert-checker.sh, which ran get_resource_limits.py twice,
+`gpu-state-reader.py user` (a fleet scan) and a `docker ps` per user, plus
+several python3 -c programs per alert insert/clear.
+
+Per run:
+    snapshot   one `docker ps -a` + one bulk `docker inspect` of all
+               ds01.user-labelled containers; limits from one
+               ResourceLimitParser; MIG UUID -> slot from the
+               metrics-sampler ring when fresh
+    rules      GPU (MIG-equivalents) and container count against the
+               user's limits, limit reached / above 80% (user-status.py)
+    index      existing alerts keyed by (user, type) - a firing rule
+               refreshes its alert instead of duplicating it, a rule that
+               stopped firing clears it, anything not refreshed within
+               ALERT_RETENTION_HOURS expires (other producers' alerts,
+               e.g. gpu-queue-manager's gpu_available, are kept until then)
+    write      only alert files whose content changed (atomic replace);
+               events are logged only for newly raised alerts
+
+If `docker ps` or `docker inspect` fails, no rule is evaluated (a failed
+snapshot is not zero usage - it would clear every limit alert); only
+expiry runs.
+
+Usage:
+    resource-alert-engine.py              # Check all users
+    resource-alert-engine.py <username>   # Check specific user
+    resource-alert-engine.py --clean      # Remove old alerts
+    resource-alert-engine.py --dry-run    # Show changes without writing
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import importlib.util
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INFRA_ROOT = Path("/opt/ds01-infra")
+ALERTS_DIR = Path("/var/lib/ds01/alerts")
+EVENT_LOGGER = INFRA_ROOT / "scripts/docker/event-logger.py"
+# Use real docker binary directly (bypass wrapper filtering)
+DOCKER_BIN = "/usr/bin/docker"
+
+# Alert retention (hours) - alerts not refreshed for this long expire
+ALERT_RETENTION_HOURS = 24
+
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "docker"))
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "lib"))
+from get_resource_limits import ResourceLimitParser
+from gpu_state_reader import GPUStateReader
+from user_status import summarize_limits, notices
+
+# Live samples published by metrics-sampler.py (shared-memory ring) - optional
+try:
+    from metrics_ring import latest as ring_latest
+except ImportError:
+    ring_latest = None
+
+# user-status notice type -> (alert type, event type, message template)
+RULES = {
+    'gpu_limit': ('gpu_limit_reached', 'alert.gpu_limit',
+                  "GPU limit reached: {used}/{limit} GPUs allocated"),
+    'gpu_high': ('gpu_usage_high', 'alert.gpu_warning',
+                 "GPU usage high: {used}/{limit} GPUs ({percent}%)"),
+    'containers_limit': ('container_limit_reached', 'alert.container_limit',
+                         "Container limit reached: {used}/{limit}"),
+    'containers_high': ('container_usage_high', 'alert.container_warning',
+                        "Container usage high: {used}/{limit} ({percent}%)"),
+}
+RULE_TYPES = {alert_type for alert_type, _, _ in RULES.values()}
+
+
+def _timestamp(now: datetime) -> str:
+    return now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Alert timestamps ("...Z", with or without fractional seconds) as aware UTC datetimes."""
+    try:
+        parsed = datetime.fromisoformat(str(value).rstrip('Z'))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+
+
+class Snapshot:
+    """Per-user container and GPU usage from one ps + one bulk inspect."""
+
+    def __init__(self, docker_bin: str = DOCKER_BIN, state_reader: Optional[GPUStateReader] = None):
+        self.docker_bin = docker_bin
+        self.state_reader = state_reader or GPUStateReader()
+        if state_reader is None and ring_latest:
+            migs = ring_latest('mig')
+            if migs:
+                self.state_reader.seed_mig_slots({m['id']: m['key'] for m in migs})
+
+    def _docker(self, *args) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker_bin, *args], capture_output=True, text=True, timeout=60)
+
+    def usage(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        {user: {'containers': count, 'mig_equiv': MIG-equivalents allocated}}
+
+        Returns None if either docker call fails (usage unknown).
+        """
+        try:
+            result = self._docker('ps', '-aq', '--no-trunc', '--filter', 'label=ds01.user')
+            if result.returncode != 0:
+                return None
+            ids = result.stdout.split()
+            if not ids:
+                return {}
+            result = self._docker('inspect', *ids)
+            if result.returncode != 0:
+                return None
+            containers = json.loads(result.stdout or "[]")
+        except (subprocess.SubprocessError, OSError, ValueError):
+            return None
+        usage = {}
+        for data in containers:
+            user = ((data.get('Config') or {}).get('Labels') or {}).get('ds01.user')
+            if not user:
+                continue
+            entry = usage.setdefault(user, {'containers': 0, 'mig_equiv': 0})
+            entry['containers'] += 1
+            gpu = self.state_reader.gpu_from_inspect(data)
+            if gpu:
+                entry['mig_equiv'] += gpu['mig_equiv']
+        return usage
+
+
+class AlertIndex:
+    """All users' alerts, keyed by (user, type) for the engine's rules."""
+
+    def __init__(self, alerts_dir: Path = ALERTS_DIR):
+        self.alerts_dir = Path(alerts_dir)
+        self.loaded: Dict[str, List[Dict]] = {}
+        for path in sorted(self.alerts_dir.glob("*.json")) if self.alerts_dir.is_dir() else []:
+            try:
+                alerts = json.loads(path.read_text())
+            except (IOError, OSError, ValueError):
+                continue
+            if isinstance(alerts, list):
+                self.loaded[path.stem] = [a for a in alerts if isinstance(a, dict)]
+        self.alerts = {user: [dict(a) for a in alerts] for user, alerts in self.loaded.items()}
+        self.raised: List[Tuple[str, str, str]] = []   # (user, event type, message) of new alerts
+
+    def users(self) -> List[str]:
+        return list(self.alerts)
+
+    def apply(self, user: str, firing: Dict[str, Tuple[str, str]], now: datetime):
+        """Set the user's rule alerts to exactly `firing` ({alert type: (event type, message)})."""
+        stamp = _timestamp(now)
+        alerts = [a for a in self.alerts.get(user, [])
+                  if a.get('type') not in RULE_TYPES or a.get('type') in firing]
+        for alert_type, (event_type, message) in firing.items():
+            existing = next((a for a in alerts if a.get('type') == alert_type), None)
+            if existing is None:
+                alerts.append({'type': alert_type, 'message': message, 'created_at': stamp, 'updated_at': stamp})
+                self.raised.append((user, event_type, message))
+            else:
+                existing.update(message=message, updated_at=stamp)
+        self.alerts[user] = alerts
+
+    def expire(self, now: datetime, retention_hours: float = ALERT_RETENTION_HOURS):
+        cutoff = now - timedelta(hours=retention_hours)
+        for user, alerts in self.alerts.items():
+            self.alerts[user] = [a for a in alerts
+                                 if (_parse_timestamp(a.get('updated_at')) or now) > cutoff]
+
+    def changes(self) -> Dict[str, List[Dict]]:
+        """{user: new alert list} for every user whose alerts differ from what was loaded."""
+        return {user: alerts for user, alerts in self.alerts.items()
+                if alerts != self.loaded.get(user, [])}
+
+    def write(self) -> int:
+        """Write changed alert files in one pass (empty lists remove the file); returns files touched."""
+        changes = self.changes()
+        if changes:
+            self.alerts_dir.mkdir(parents=True, exist_ok=True)
+            os.chmod(self.alerts_dir, 0o755)
+        for user, alerts in changes.items():
+            path = self.alerts_dir / f"{user}.json"
+            if not alerts:
+                path.unlink(missing_ok=True)
+                continue
+            tmp = path.parent / f".{path.name}.{os.getpid()}"
+            tmp.write_text(json.dumps(alerts, indent=2))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        return len(changes)
+
+
+def firing_alerts(usage: Dict[str, int], limits: Dict) -> Dict[str, Tuple[str, str]]:
+    """Alert type -> (event type, message) for one user's usage and summarize_limits() result."""
+    status = {
+        'gpu': {'mig_equiv': usage.get('mig_equiv', 0), 'limit': limits['max_gpus']},
+        'containers': {'total': usage.get('containers', 0), 'limit': limits['max_containers']},
+    }
+    firing = {}
+    for notice in notices(status):
+        alert_type, event_type, template = RULES[notice['type']]
+        firing[alert_type] = (event_type, template.format(**notice))
+    return firing
+
+
+def _event_logger():
+    """event-logger.py's EventLogger, loaded in-process (None if unavailable)."""
+    try:
+        spec = importlib.util.spec_from_file_location("event_logger", EVENT_LOGGER)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.EventLogger()
+    except (OSError, ImportError, AttributeError):
+        return None
+
+
+def run(users: Optional[List[str]] = None, alerts_dir: Path = ALERTS_DIR,
+        parser: Optional[ResourceLimitParser] = None, snapshot: Optional[Snapshot] = None,
+        now: Optional[datetime] = None, dry_run: bool = False) -> Dict:
+    """
+    One engine pass. With `users`, only those users' rules are evaluated
+    (no expiry); otherwise every user with containers or existing alerts.
+    If the Docker snapshot fails no rules are evaluated ('failed': True).
+    """
+    now = now or datetime.now(timezone.utc)
+    parser = parser or ResourceLimitParser()
+    usage = (snapshot or Snapshot()).usage()
+    index = AlertIndex(alerts_dir)
+
+    if users is None:
+        index.expire(now)
+        users = sorted(set(usage or {}) | set(index.users()))
+    if usage is None:
+        users = []
+    for user in users:
+        limits = summarize_limits(parser.get_user_limits(user))
+        index.apply(user, firing_alerts(usage.get(user, {}), limits), now)
+
+    changes = index.changes()
+    if not dry_run:
+        index.write()
+        logger = _event_logger() if index.raised else None
+        for user, event_type, message in index.raised if logger else []:
+            logger.log(event_type, user=user, message=message)
+    return {'checked': users, 'changes': changes, 'raised': index.raised, 'alerts': index.alerts,
+            'failed': usage is None}
+
+
+def clean(alerts_dir: Path = ALERTS_DIR, now: Optional[datetime] = None, dry_run: bool = False) -> int:
+    """Expire old alerts only; returns the number of alert files changed."""
+    index = AlertIndex(alerts_dir)
+    index.expire(now or datetime.now(timezone.utc))
+    return len(index.changes()) if dry_run else index.write()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate resource alert rules for all users in one pass")
+    parser.add_argument('username', nargs='?', help="Check a specific user only")
+    parser.add_argument('--clean', action='store_true', help=f"Remove alerts older than {ALERT_RETENTION_HOURS}h")
+    parser.add_argument('--dry-run', action='store_true', help="Show changes without writing")
+    args = parser.parse_args()
+
+    if args.clean:
+        print("Cleaning old alerts...")
+        print(f"Done ({clean(dry_run=args.dry_run)} alert file(s) changed).")
+        return
+
+    if args.username:
+        print(f"Checking resource alerts for user: {args.username}")
+    else:
+        print("Checking resource alerts for all DS01 users...")
+    try:
+        result = run([args.username] if args.username else None, dry_run=args.dry_run)
+    except ValueError as e:  # Empty or invalid resource-limits.yaml
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if result['failed']:
+        print("Error: docker ps/inspect failed - rules not evaluated, alerts left as they were",
+              file=sys.stderr)
+    for user, alerts in sorted(result['changes'].items()):
+        types = ", ".join(a['type'] for a in alerts) or "cleared"
+        print(f"  {user}: {types}")
+    for user, event_type, message in result['raised']:
+        print(f"  new alert for {user}: {message}")
+
+    if result['failed']:
+        sys.exit(1)
+    if args.username:
+        alerts = result['alerts'].get(args.username, [])
+        if alerts:
+            print(f"{len(alerts)} alert(s) for {args.username}")
+            print(f"Alerts file: {ALERTS_DIR / (args.username + '.json')}")
+        else:
+            print(f"No alerts needed for {args.username} (usage below threshold)")
+    elif not result['checked']:
+        print("No DS01 users with containers found.")
+    else:
+        print(f"Checked {len(result['checked'])} user(s), {len(result['changes'])} alert file(s) changed.")
+        print(f"Alerts written to: {ALERTS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
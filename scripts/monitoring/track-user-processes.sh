@@ -1,39 +1,58 @@
 # File: /opt/ds01-infra/scripts/monitoring/track-user-processes.sh
 #!/bin/bash
 # Track processes by user across containers and host
+#
+# One host-side sweep (scripts/lib/process_inventory.py: cgroup.procs and
+# /proc) instead of `docker exec <container> ps aux` per container - works
+# on minimal images and never runs anything inside user containers.
+
+INFRA_ROOT="/opt/ds01-infra"
 
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 echo "DS01 Process Tracking by User"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 echo ""
 
-# Get all DS01 users
-USERS=$(docker ps -a --filter "label=aime.mlc.DS01_USER" --format "{{index .Config.Labels \"aime.mlc.DS01_USER\"}}" | sort -u)
+# DS01 containers: short id, name, owner, state (one docker ps; users with
+# only stopped containers are listed too, with host processes)
+CONTAINERS=$(docker ps -a --filter "label=aime.mlc.DS01_USER" \
+    --format '{{.ID}}|{{.Names}}|{{.Label "aime.mlc.DS01_USER"}}|{{.State}}' 2>/dev/null)
+
+# One sweep, both tables derived from its JSON
+SWEEP=$(python3 "$INFRA_ROOT/scripts/lib/process_inventory.py" --json 2>/dev/null)
+# short id <TAB> procs <TAB> top commands (comma-separated)
+INVENTORY=$(jq -r '.containers | to_entries[]
+    | [.key[:12], .value.procs, (.value.top | map(.comm) | join(","))] | @tsv' <<< "$SWEEP" 2>/dev/null)
+# uid <TAB> host processes <TAB> container processes
+USER_COUNTS=$(jq -r '.users | to_entries[] | [.key, .value.host, .value.containers] | @tsv' \
+    <<< "$SWEEP" 2>/dev/null)
+
+USERS=$(cut -d'|' -f3 <<< "$CONTAINERS" | grep -v '^$' | sort -u)
 
 for user in $USERS; do
     echo "User: $user"
     echo "────────────────────────────────────────────────────"
-    
+
     user_id=$(id -u "$user" 2>/dev/null)
-    
+
     if [ -n "$user_id" ]; then
         # Host processes
-        host_procs=$(ps -U "$user_id" --no-headers | wc -l)
-        echo "  Host processes: $host_procs"
-        
+        host_procs=$(awk -F'\t' -v uid="$user_id" '$1 == uid {print $2}' <<< "$USER_COUNTS")
+        echo "  Host processes: ${host_procs:-0}"
+
         # Container processes
-        user_containers=$(docker ps --filter "label=aime.mlc.DS01_USER=$user" --format "{{.Names}}")
-        
-        for container in $user_containers; do
+        while IFS='|' read -r id container owner state; do
+            [ "$owner" = "$user" ] && [ "$state" = "running" ] || continue
             short_name=$(echo "$container" | cut -d'.' -f1)
-            container_procs=$(docker exec "$container" ps aux 2>/dev/null | tail -n +2 | wc -l)
-            echo "  Container '$short_name': $container_procs processes"
-            
+            line=$(awk -F'\t' -v id="$id" '$1 == id' <<< "$INVENTORY")
+            container_procs=$(cut -f2 <<< "$line")
+            echo "  Container '$short_name': ${container_procs:-0} processes"
+
             # Show top processes
             echo "    Top processes:"
-            docker exec "$container" ps aux --sort=-%cpu 2>/dev/null | head -n 4 | tail -n 3 | awk '{print "      " $11}'
-        done
+            cut -f3 <<< "$line" | tr ',' '\n' | grep -v '^$' | sed 's/^/      /'
+        done <<< "$CONTAINERS"
     fi
-    
+
     echo ""
-done
\ No newline at end of file
+done
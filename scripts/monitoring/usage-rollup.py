@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+DS01 Usage Rollup
+/opt/ds01-infra/scripts/monitoring/usage-rollup.py
+
+Materialized GPU usage accounting per user, group and GPU slot.
+
+`update` (cron, hourly) tails /var/log/ds01/events.jsonl and the metrics
+sampler's GPU/MIG samples (/var/log/ds01/metrics/YYYY-MM-DD.jsonl) from where
+the previous run stopped and folds them into hourly buckets keyed by
+(user, slot):
+
+    mig_hours    MIG-hours allocated (gpu.allocated -> gpu.released /
+                 gpu.removed_stale / container.removed; a full GPU counts as
+                 mig_instances_per_gpu MIG-equivalents)
+    busy_hours   MIG-hours of that allocation with compute processes running
+    created      container.created events (slot "")
+    rejected     gpu.rejected events (slot "")
+
+Closed hours are appended once to hourly/YYYY-MM.jsonl and, when the day
+is over, summed into daily.jsonl, so a report over a week or a semester
+reads a few hundred daily rows instead of rescanning logs. The open hour,
+the current day, live allocations and the read offsets are kept in
+state.json. Records that arrive for an already closed hour count towards
+the oldest open hour.
+
+Usage:
+    usage-rollup.py update
+    usage-rollup.py report [--by user|group|slot|day] [--days N] [--user NAME]
+                           [--format table|tsv|json]
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import heapq
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+INFRA_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "lib"))
+sys.path.insert(0, str(INFRA_ROOT / "scripts" / "docker"))
+from ds01_metrics import METRICS_DIR, segments
+
+try:
+    from get_resource_limits import ResourceLimitParser
+except ImportError:
+    ResourceLimitParser = None
+
+USAGE_DIR = Path("/var/log/ds01/usage")
+EVENTS_FILE = Path("/var/log/ds01/events.jsonl")
+STATE_FILE = "state.json"
+DAILY_FILE = "daily.jsonl"
+MAX_SAMPLE_GAP = 300  # A GPU sample never stands for more than this many seconds
+DEFAULT_MIG_PER_GPU = 4
+
+RELEASE_EVENTS = ('gpu.released', 'gpu.removed_stale', 'container.removed')
+
+# Bucket counters: [mig_seconds, busy_seconds, created, rejected]
+ALLOC, BUSY, CREATED, REJECTED = range(4)
+
+
+def _hour_of(ts: float) -> int:
+    return int(ts // 3600) * 3600
+
+
+def _day_of(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+
+def _row(counters: List[float], **keys) -> Dict:
+    return dict(keys, mig_hours=round(counters[ALLOC] / 3600, 3), busy_hours=round(counters[BUSY] / 3600, 3),
+                created=int(counters[CREATED]), rejected=int(counters[REJECTED]))
+
+
+def _event_ts(event: Dict) -> Optional[float]:
+    try:
+        return datetime.strptime(event['ts'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _read_lines(path: Path, offset: int) -> Iterator[Tuple[bytes, int]]:
+    """Complete lines from offset on, each with the offset just after it."""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # Line still being written - read it next time
+            offset += len(line)
+            yield line, offset
+
+
+class UsageRollup:
+    def __init__(self, usage_dir: Path = USAGE_DIR, events_file: Path = EVENTS_FILE,
+                 metrics_dir: Path = METRICS_DIR, group_of: Optional[Callable[[str], str]] = None,
+                 mig_per_gpu: Optional[int] = None):
+        self.usage_dir = Path(usage_dir)
+        self.events_file = Path(events_file)
+        self.metrics_dir = Path(metrics_dir)
+        parser = None
+        if (group_of is None or mig_per_gpu is None) and ResourceLimitParser is not None:
+            try:
+                parser = ResourceLimitParser()
+            except Exception:
+                parser = None
+        self.group_of = group_of or (parser.get_user_group if parser else (lambda user: 'unknown'))
+        if mig_per_gpu is None and parser is not None:
+            mig_per_gpu = (parser.config.get('gpu_allocation') or {}).get('mig_instances_per_gpu')
+        self.mig_per_gpu = int(mig_per_gpu or DEFAULT_MIG_PER_GPU)
+        self.state = self._load_state()
+        # GPU sample being assembled (gpu, gpu_proc and mig records share a ts)
+        self._sample_ts: Optional[float] = None
+        self._sample_gpus: Dict[str, Tuple[str, bool]] = {}
+        self._sample_busy_uuids = set()
+        self._sample_busy_slots = set()
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict:
+        try:
+            state = json.loads((self.usage_dir / STATE_FILE).read_text())
+        except (IOError, OSError, ValueError):
+            state = {}
+        for key, default in (('events', {}), ('metrics', {}), ('clock', None), ('gpu_ts', None),
+                             ('allocations', {}), ('open', {}), ('days', {}), ('closed_until', 0)):
+            state.setdefault(key, default)
+        return state
+
+    def _save_state(self):
+        path = self.usage_dir / STATE_FILE
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(json.dumps(self.state, separators=(',', ':')))
+        os.replace(tmp, path)
+
+    def _bucket(self, ts: float, user: str, slot: str) -> List[float]:
+        hour = max(_hour_of(ts), self.state['closed_until'])
+        return self.state['open'].setdefault(str(hour), {}).setdefault(f"{user}|{slot}", [0, 0, 0, 0])
+
+    def _weight(self, slot: str) -> int:
+        return 1 if '.' in slot else self.mig_per_gpu
+
+    def _add_span(self, start: float, end: float, user: str, slot: str, field: int):
+        weight = self._weight(slot)
+        while start < end:
+            stop = min(end, _hour_of(start) + 3600)
+            self._bucket(start, user, slot)[field] += (stop - start) * weight
+            start = stop
+
+    # ------------------------------------------------------------------
+    # Sources (incremental)
+    # ------------------------------------------------------------------
+
+    def _events(self) -> Iterator[Tuple[float, str, Dict]]:
+        """New events since the last run, following rotation (events.<stamp>.jsonl)."""
+        cursor = self.state['events']
+        try:
+            inode = self.events_file.stat().st_ino
+        except OSError:
+            inode = None
+        rotated = sorted(self.events_file.parent.glob(f"{self.events_file.stem}.*.jsonl"))
+        if not cursor:
+            todo = [(path, 0) for path in rotated]           # First run: whole history
+        elif cursor.get('inode') != inode:
+            todo = [(path, cursor['offset']) for path in rotated
+                    if path.stat().st_ino == cursor.get('inode')][:1]
+        else:
+            todo = []
+        todo.append((self.events_file, cursor.get('offset', 0) if cursor.get('inode') == inode else 0))
+
+        for path, offset in todo:
+            for line, offset in _read_lines(path, offset):
+                if path == self.events_file:
+                    self.state['events'] = {'inode': inode, 'offset': offset}
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                ts = _event_ts(event)
+                if ts is not None:
+                    yield ts, 'event', event
+        if inode is not None and self.state['events'].get('inode') != inode:
+            self.state['events'] = {'inode': inode, 'offset': 0}
+
+    def _samples(self) -> Iterator[Tuple[float, str, Dict]]:
+        """New GPU/MIG sampler records since the last run."""
+        cursor = self.state['metrics']
+        for path in segments(metrics_dir=self.metrics_dir):
+            day = path.name[:10]
+            if cursor and day < cursor['day']:
+                continue
+            offset = cursor['offset'] if cursor and day == cursor['day'] else 0
+            for line, offset in _read_lines(path, offset):
+                self.state['metrics'] = cursor = {'day': day, 'offset': offset}
+                if b'"kind":"gpu' not in line and b'"kind":"mig"' not in line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                yield rec.get('ts', 0), 'sample', rec
+
+    # ------------------------------------------------------------------
+    # Folding
+    # ------------------------------------------------------------------
+
+    def _advance(self, ts: float):
+        """Accrue allocated time of every live allocation up to ts."""
+        clock = self.state['clock']
+        if clock is not None and ts > clock:
+            for alloc in self.state['allocations'].values():
+                for slot in alloc['slots']:
+                    self._add_span(clock, ts, alloc['user'], slot, ALLOC)
+        if clock is None or ts > clock:
+            self.state['clock'] = ts
+
+    def _event(self, ts: float, event: Dict):
+        kind = event.get('event')
+        user, container = event.get('user') or 'unknown', event.get('container')
+        if kind == 'gpu.allocated' and container:
+            slots = [s.strip() for s in str(event.get('gpu') or '').split(',') if s.strip()]
+            if slots:
+                self.state['allocations'][container] = {'user': user, 'slots': slots}
+        elif kind in RELEASE_EVENTS and container:
+            self.state['allocations'].pop(container, None)
+        elif kind == 'container.created':
+            self._bucket(ts, user, '')[CREATED] += 1
+        elif kind == 'gpu.rejected':
+            self._bucket(ts, user, '')[REJECTED] += 1
+
+    def _sample(self, ts: float, rec: Dict):
+        if ts != self._sample_ts:
+            self._flush_sample()
+            self._sample_ts = ts
+        kind = rec.get('kind')
+        if kind == 'gpu':
+            self._sample_gpus[rec.get('uuid')] = (str(rec.get('index')), bool(rec.get('mig')))
+        elif kind == 'gpu_proc':
+            self._sample_busy_uuids.add(rec.get('uuid'))
+        elif kind == 'mig' and rec.get('procs'):
+            self._sample_busy_slots.add(str(rec.get('slot')))
+
+    def _flush_sample(self):
+        """Credit busy time of the assembled sample to whoever holds each busy slot."""
+        ts = self._sample_ts
+        if ts is None:
+            return
+        busy = set(self._sample_busy_slots)
+        busy.update(index for uuid, (index, mig) in self._sample_gpus.items()
+                    if not mig and uuid in self._sample_busy_uuids)
+        previous = self.state['gpu_ts']
+        if previous is not None and ts > previous and busy:
+            owners = {slot: alloc['user'] for alloc in self.state['allocations'].values()
+                      for slot in alloc['slots']}
+            start = ts - min(ts - previous, MAX_SAMPLE_GAP)
+            for slot in busy & owners.keys():
+                self._add_span(start, ts, owners[slot], slot, BUSY)
+        self.state['gpu_ts'] = ts if previous is None else max(ts, previous)
+        self._sample_ts = None
+        self._sample_gpus, self._sample_busy_uuids, self._sample_busy_slots = {}, set(), set()
+
+    def _append(self, path: Path, rows: List[Dict]):
+        if rows:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a') as f:
+                f.write("".join(json.dumps(row, separators=(',', ':')) + "\n" for row in rows))
+
+    def _close(self, now: float):
+        """Write every finished hour once, then every finished day."""
+        current = _hour_of(now)
+        groups: Dict[str, str] = {}
+        for hour in sorted((h for h in self.state['open'] if int(h) < current), key=int):
+            rows = []
+            day = self.state['days'].setdefault(_day_of(int(hour)), {})
+            for key, counters in sorted(self.state['open'].pop(hour).items()):
+                user, slot = key.split('|', 1)
+                if user not in groups:
+                    groups[user] = self.group_of(user)
+                rows.append(_row(counters, ts=int(hour), hour=time.strftime("%Y-%m-%dT%H:00", time.localtime(int(hour))),
+                                 user=user, group=groups[user], slot=slot))
+                total = day.setdefault(key, [0, 0, 0, 0])
+                for i, value in enumerate(counters):
+                    total[i] += value
+            self._append(self.usage_dir / "hourly" / f"{time.strftime('%Y-%m', time.localtime(int(hour)))}.jsonl", rows)
+        self.state['closed_until'] = max(self.state['closed_until'], current)
+
+        today = _day_of(now)
+        for day in sorted(d for d in self.state['days'] if d < today):
+            rows = []
+            for key, counters in sorted(self.state['days'].pop(day).items()):
+                user, slot = key.split('|', 1)
+                if user not in groups:
+                    groups[user] = self.group_of(user)
+                rows.append(_row(counters, day=day, user=user, group=groups[user], slot=slot))
+            self._append(self.usage_dir / DAILY_FILE, rows)
+            self.state['daily_until'] = day
+
+    def update(self, now: Optional[float] = None) -> int:
+        """Fold new events and samples in and close finished hours. Returns records read."""
+        now = now or time.time()
+        self.usage_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.usage_dir / ".lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.state = self._load_state()
+            count = 0
+            for ts, source, rec in heapq.merge(self._events(), self._samples(), key=lambda item: item[0]):
+                count += 1
+                if self._sample_ts is not None and ts != self._sample_ts:
+                    self._flush_sample()
+                self._advance(ts)
+                if source == 'event':
+                    self._event(ts, rec)
+                else:
+                    self._sample(ts, rec)
+            self._flush_sample()
+            self._advance(now)
+            self._close(now)
+            self._save_state()
+        return count
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def _rows(self, first: str, last: str) -> Iterator[Dict]:
+        """Rows for the days first..last: daily rows where closed, hourly/open buckets after."""
+        daily_until = self.state.get('daily_until', '')
+        if first <= daily_until:
+            for line, _ in _read_lines(self.usage_dir / DAILY_FILE, 0):
+                row = json.loads(line)
+                if first <= row['day'] <= min(last, daily_until):
+                    yield row
+        if last <= daily_until:
+            return
+        start = max(first, (date.fromisoformat(daily_until) + timedelta(days=1)).isoformat()
+                    if daily_until else first)
+        months, month = [], date.fromisoformat(start).replace(day=1)
+        while month.isoformat()[:7] <= last[:7]:
+            months.append(month.isoformat()[:7])
+            month = (month + timedelta(days=32)).replace(day=1)
+        for month in months:
+            for line, _ in _read_lines(self.usage_dir / "hourly" / f"{month}.jsonl", 0):
+                row = json.loads(line)
+                row['day'] = row['hour'][:10]
+                if start <= row['day'] <= last:
+                    yield row
+        # Hours not yet closed (closed ones of open days are in the hourly rows)
+        for hour, buckets in self.state['open'].items():
+            day = _day_of(int(hour))
+            if start <= day <= last:
+                for key, counters in buckets.items():
+                    user, slot = key.split('|', 1)
+                    yield _row(counters, day=day, user=user, group=self.group_of(user), slot=slot)
+
+    def report(self, by: str = 'user', days: int = 7, user: Optional[str] = None,
+               today: Optional[date] = None) -> List[Dict]:
+        """Usage totals over the last `days` days (including today), grouped by user/group/slot/day."""
+        today = today or date.today()
+        first = (today - timedelta(days=days - 1)).isoformat()
+        totals: Dict[str, List[float]] = {}
+        for row in self._rows(first, today.isoformat()):
+            if user and row['user'] != user:
+                continue
+            key = row[by] if by != 'slot' else (row['slot'] or '-')
+            total = totals.setdefault(key, [0, 0, 0, 0])
+            for i, field in enumerate(('mig_hours', 'busy_hours', 'created', 'rejected')):
+                total[i] += row[field]
+        result = []
+        for key, (mig, busy, created, rejected) in totals.items():
+            result.append({by: key, 'mig_hours': round(mig, 2), 'busy_hours': round(busy, 2),
+                           'busy_pct': round(busy / mig * 100, 1) if mig else None,
+                           'created': int(created), 'rejected': int(rejected)})
+        if by == 'day':
+            return sorted(result, key=lambda r: r['day'])
+        return sorted(result, key=lambda r: (-r['mig_hours'], r[by]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DS01 GPU usage rollups")
+    parser.add_argument('--usage-dir', type=Path, default=USAGE_DIR)
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('update', help="Fold new events/samples in (cron)")
+    p = sub.add_parser('report', help="Usage totals from the rollups")
+    p.add_argument('--by', choices=('user', 'group', 'slot', 'day'), default='user')
+    p.add_argument('--days', type=int, default=7, help="Last N days including today (default: 7)")
+    p.add_argument('--user', help="Only this user")
+    p.add_argument('--format', choices=('table', 'tsv', 'json'), default='table')
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        rollup = UsageRollup(args.usage_dir)
+        count = rollup.update()
+        print(f"usage-rollup: {count} records folded, closed until "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(rollup.state['closed_until']))}")
+    elif args.command == 'report':
+        rows = UsageRollup(args.usage_dir).report(args.by, max(args.days, 1), args.user)
+        columns = (args.by, 'mig_hours', 'busy_hours', 'busy_pct', 'created', 'rejected')
+        if args.format == 'json':
+            print(json.dumps(rows, indent=2))
+        elif args.format == 'tsv':
+            for row in rows:
+                print("\t".join("-" if row[c] is None else str(row[c]) for c in columns))
+        elif not rows:
+            print(f"No usage recorded in the last {args.days} days")
+        else:
+            print(f"{args.by.capitalize():<32} {'MIG-h':>9} {'Busy-h':>9} {'Busy%':>6} {'Created':>8} {'Rejected':>9}")
+            print("-" * 78)
+            for row in rows:
+                busy_pct = "-" if row['busy_pct'] is None else f"{row['busy_pct']:.0f}%"
+                print(f"{row[args.by]:<32} {row['mig_hours']:>9.1f} {row['busy_hours']:>9.1f} {busy_pct:>6} "
+                      f"{row['created']:>8} {row['rejected']:>9}")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@
 #
 # This script is called automatically by container-create to ensure
 # each user gets their own monitoring slice within their group.
+# Configured users are normally pre-provisioned in bulk (one daemon-reload)
+# by provision-user-slices.py; this remains the fallback for everyone else.
 #
 # Hierarchy: ds01.slice → ds01-{group}.slice → ds01-{group}-{username}.slice
 
@@ -132,6 +132,20 @@ chmod 755 "$INFRA_ROOT"/scripts/monitoring/*.sh "$INFRA_ROOT"/scripts/monitoring
 chmod 755 "$INFRA_ROOT"/scripts/maintenance/*.sh 2>/dev/null
 chmod 755 "$INFRA_ROOT"/scripts/system/*.sh 2>/dev/null
 chmod 644 "$INFRA_ROOT"/config/*.yaml "$INFRA_ROOT"/config/*.yml 2>/dev/null
+
+# GPU claim shards (gpu-claims.py): docker group only
+install -d -m 2770 -g docker /var/log/ds01/gpu-locks 2>/dev/null && \
+    chmod 660 /var/log/ds01/gpu-locks/* 2>/dev/null
+# User-setup cache stamps (setup-cache.py): docker users add their own, nobody rewrites others'
+install -d -m 1730 -g docker /var/log/ds01/setup-cache 2>/dev/null && \
+    chmod 644 /var/log/ds01/setup-cache/* 2>/dev/null
+# Root-only state (root_state.py): readers ignore these unless root-owned and not writable by others
+for state in image-index.json host-gpu.json gpu-topology.json aime-catalog.json; do
+    [ -f "/var/log/ds01/$state" ] && chown root:root "/var/log/ds01/$state" && chmod 644 "/var/log/ds01/$state"
+done
+python3 "$INFRA_ROOT/scripts/lib/host_gpu.py" >/dev/null 2>&1
+python3 "$INFRA_ROOT/scripts/lib/host_gpu.py" topo >/dev/null 2>&1
+python3 "$INFRA_ROOT/scripts/lib/aime_catalog.py" rebuild >/dev/null 2>&1
 echo ""
 
 # ============================================================================
@@ -190,6 +204,7 @@ deploy_cmd "$USER_HELPERS/ssh-setup" "ssh-setup" "Helpers"
 deploy_cmd "$USER_HELPERS/vscode-setup" "vscode-setup" "Helpers"
 deploy_cmd "$USER_HELPERS/check-limits" "check-limits" "Helpers"
 deploy_cmd "$USER_HELPERS/check-limits" "get-limits" "Helpers"
+deploy_cmd "$INFRA_ROOT/scripts/docker/user-status.py" "user-status" "Helpers"
 deploy_cmd "$INFRA_ROOT/scripts/docker/gpu-queue-manager.py" "gpu-queue" "Helpers"
 
 # --- Help & Info ---
@@ -215,7 +230,9 @@ deploy_cmd "$INFRA_ROOT/scripts/monitoring/mig-utilization-monitor.py" "ds01-mig
 deploy_cmd "$INFRA_ROOT/scripts/admin/ds01-users" "ds01-users" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/admin/ds01-logs" "ds01-logs" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/monitoring/ds01-events" "ds01-events" "Admin"
+deploy_cmd "$INFRA_ROOT/scripts/monitoring/ds01-trace" "ds01-trace" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/admin/ds01-mig-partition" "ds01-mig-partition" "Admin"
+deploy_cmd "$INFRA_ROOT/scripts/monitoring/mig-advisor.py" "ds01-mig-advisor" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/monitoring/who-owns-containers.sh" "ds01-who" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/monitoring/ds01-health-check" "ds01-health" "Admin"
 deploy_cmd "$INFRA_ROOT/scripts/monitoring/audit-system.sh" "ds01-audit" "Admin"
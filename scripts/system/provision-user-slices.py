@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Provision Per-User Slices - Bulk ds01-{group}-{user}.slice Sync
+
+create-user-slice.sh writes one unit and runs `systemctl daemon-reload` per
+new user, lazily from the Docker wrappers on a user's first container. This
+computes the slice every configured user (groups/*.members, inline members
+and user overrides) should have, writes only the difference to
+/etc/systemd/system and reloads systemd once:
+
+    + add     configured user without a slice unit
+    ~ update  unit content differs (e.g. description)
+    - remove  user now resolves to another group (group move / removal)
+
+Slices of users who still resolve to the group of their slice - including
+lazily created default-group slices of unconfigured users - are left alone.
+A stale slice whose cgroup is still populated (running containers) is kept
+and retried on the next run. Users whose group has no parent slice
+(e.g. 'override') are skipped, as create-user-slice.sh would refuse them.
+
+Usage:
+    provision-user-slices.py [--dry-run] [--quiet]
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "docker"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from get_resource_limits import ResourceLimitParser, sanitize_username_for_slice
+
+UNIT_DIR = Path("/etc/systemd/system")
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+_DESCRIPTION = re.compile(r"^Description=DS01 .+ - (.+) \((.*)\)$", re.M)
+_PARENT = re.compile(r"^Slice=ds01-(.+)\.slice$", re.M)
+
+
+def slice_name(group: str, username: str) -> str:
+    return f"ds01-{group}-{sanitize_username_for_slice(username)}.slice"
+
+
+def slice_unit(group: str, username: str) -> str:
+    """Unit file content, identical to what create-user-slice.sh writes."""
+    return (f"[Unit]\n"
+            f"Description=DS01 {group[:1].upper()}{group[1:]} - {username} ({sanitize_username_for_slice(username)})\n"
+            f"Before=slices.target\n"
+            f"\n"
+            f"[Slice]\n"
+            f"Slice=ds01-{group}.slice\n"
+            f"CPUAccounting=true\n"
+            f"MemoryAccounting=true\n"
+            f"TasksAccounting=true\n"
+            f"IOAccounting=true\n")
+
+
+def configured_users(parser: ResourceLimitParser) -> List[str]:
+    names = set()
+    for group in (parser.config.get('groups') or {}).values():
+        names.update(str(m) for m in (group or {}).get('members') or [])
+    names.update(str(u) for u in parser.config.get('user_overrides') or {})
+    names.discard('')
+    return sorted(names)
+
+
+def existing_slices(unit_dir: Path = UNIT_DIR) -> Dict[str, Tuple[str, str, str]]:
+    """Per-user slice units on disk: name -> (group, username, content)."""
+    found = {}
+    for path in unit_dir.glob("ds01-*-*.slice"):
+        try:
+            content = path.read_text()
+        except OSError:
+            continue
+        parent = _PARENT.search(content)
+        if not parent or not path.name.startswith(f"ds01-{parent.group(1)}-"):
+            continue   # Group slices (Slice=ds01.slice) and foreign units
+        described = _DESCRIPTION.search(content)
+        username = described.group(1) if described else path.name[len(f"ds01-{parent.group(1)}-"):-len(".slice")]
+        found[path.name] = (parent.group(1), username, content)
+    return found
+
+
+def plan(parser: ResourceLimitParser, unit_dir: Path = UNIT_DIR) -> Dict[str, list]:
+    """Diff desired vs existing slices: {'add', 'update', 'remove', 'skipped'}."""
+    desired, skipped = {}, []
+    for username in configured_users(parser):
+        group = parser.get_user_group(username)
+        if not (unit_dir / f"ds01-{group}.slice").exists():
+            skipped.append((username, group))
+            continue
+        desired.setdefault(slice_name(group, username), (group, username))
+
+    existing = existing_slices(unit_dir)
+    result = {'add': [], 'update': [], 'remove': [], 'skipped': skipped}
+    for name, (group, username) in sorted(desired.items()):
+        if name not in existing:
+            result['add'].append((name, group, username))
+        elif existing[name][2] != slice_unit(group, username):
+            result['update'].append((name, group, username))
+    for name, (group, username, _) in sorted(existing.items()):
+        if name not in desired and slice_name(parser.get_user_group(username), username) != name:
+            result['remove'].append((name, group, username))
+    return result
+
+
+def slice_in_use(name: str, group: str, cgroup_root: Path = CGROUP_ROOT) -> bool:
+    """True if the slice's cgroup still has processes (or child cgroups)."""
+    cgroup = cgroup_root / "ds01.slice" / f"ds01-{group}.slice" / name
+    try:
+        if (cgroup / "cgroup.procs").read_text().strip():
+            return True
+        return any(p.is_dir() for p in cgroup.iterdir())
+    except OSError:
+        return False
+
+
+def _daemon_reload():
+    subprocess.run(["systemctl", "daemon-reload"], check=True)
+
+
+def apply(changes: Dict[str, list], unit_dir: Path = UNIT_DIR, cgroup_root: Path = CGROUP_ROOT,
+          reload: Optional[Callable[[], None]] = _daemon_reload) -> Dict[str, list]:
+    """Write adds/updates, delete idle stale slices, then reload systemd once if anything changed."""
+    done = {'add': [], 'update': [], 'remove': [], 'busy': []}
+    for kind in ('add', 'update'):
+        for name, group, username in changes[kind]:
+            path = unit_dir / name
+            tmp = path.with_name(f".{name}.{os.getpid()}")
+            tmp.write_text(slice_unit(group, username))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+            done[kind].append(name)
+    for name, group, username in changes['remove']:
+        if slice_in_use(name, group, cgroup_root):
+            done['busy'].append(name)
+            continue
+        try:
+            (unit_dir / name).unlink()
+            done['remove'].append(name)
+        except FileNotFoundError:
+            pass
+    if reload and (done['add'] or done['update'] or done['remove']):
+        reload()
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision per-user systemd slices from group config")
+    parser.add_argument('--dry-run', action='store_true', help="Show the diff without writing anything")
+    parser.add_argument('--quiet', action='store_true', help="Only print a summary line")
+    args = parser.parse_args()
+
+    if not args.dry_run and os.geteuid() != 0:
+        print("Error: This script must be run as root (use sudo)", file=sys.stderr)
+        sys.exit(1)
+
+    changes = plan(ResourceLimitParser())
+    if not args.quiet:
+        for kind, mark in (('add', '+'), ('update', '~'), ('remove', '-')):
+            for name, group, username in changes[kind]:
+                print(f"{mark} {name}  ({username})")
+        for username, group in changes['skipped']:
+            print(f"  skipped {username}: no parent slice ds01-{group}.slice")
+
+    if args.dry_run:
+        print(f"DRY RUN: {len(changes['add'])} to add, {len(changes['update'])} to update, "
+              f"{len(changes['remove'])} to remove")
+        return
+
+    try:
+        done = apply(changes)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    for name in done['busy']:
+        print(f"  kept {name}: cgroup still in use (retry on next run)")
+    reloads = 1 if done['add'] or done['update'] or done['remove'] else 0
+    print(f"User slices: {len(done['add'])} added, {len(done['update'])} updated, "
+          f"{len(done['remove'])} removed, {len(done['busy'])} busy ({reloads} daemon-reload)")
+
+
+if __name__ == "__main__":
+    main()
@@ -470,7 +470,7 @@ echo ""
 log_info "What was configured:"
 echo "  - ds01-admin group: Members have full access to all containers"
 echo "  - ds01-dashboard user: Service account for dashboard"
-echo "  - Container ownership sync: Updates every 5 seconds"
+echo "  - Container ownership sync: Docker events (full resync every 5 minutes)"
 echo "  - Docker filter proxy: Controls container visibility and access"
 echo ""
 log_info "Architecture:"
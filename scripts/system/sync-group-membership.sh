@@ -12,6 +12,8 @@
 #   MERGE into config/groups/*.members (ADD only, never remove)
 #       ↓
 #   Downstream: resource-limits.yaml reads these files
+#       ↓
+#   provision-user-slices.py (one daemon-reload for all slice changes)
 #
 # KEY BEHAVIOR:
 #   - MERGES new users (adds if not present)
@@ -36,6 +38,7 @@ INFRA_ROOT="${SCRIPT_DIR}/../.."
 GROUPS_DIR="${INFRA_ROOT}/config/groups"
 OVERRIDES_FILE="${INFRA_ROOT}/config/group-overrides.txt"
 ARCHIVED_FILE="${GROUPS_DIR}/archived.members"
+PROVISION_SLICES="${SCRIPT_DIR}/provision-user-slices.py"
 LOG_TAG="DS01-sync-groups"
 
 # Options
@@ -317,9 +320,21 @@ sync_linux_groups() {
 # Run main sync
 sync_groups
 
+# Provision per-user slices for the (new) membership in one batch,
+# so first containers don't pay for a daemon-reload
+provision_slices() {
+    [[ -f "$PROVISION_SLICES" ]] || return 0
+    local args=()
+    [[ "$DRY_RUN" == "true" ]] && args+=(--dry-run)
+    [[ "$VERBOSE" == "true" ]] || args+=(--quiet)
+    log "Provisioning user slices"
+    python3 "$PROVISION_SLICES" "${args[@]}" || log "Slice provisioning failed" "always"
+}
+
 # Optionally sync Linux groups (only if running as root)
 if [[ $EUID -eq 0 ]]; then
     sync_linux_groups
+    provision_slices
 else
     log "Not running as root - skipping Linux group sync"
 fi
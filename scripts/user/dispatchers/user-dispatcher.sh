@@ -26,12 +26,14 @@ show_usage() {
     echo -e "${BOLD}Subcommands:${NC}"
     echo -e "  ${GREEN}setup${NC}, ${GREEN}new${NC}          Educational first-time user onboarding wizard"
     echo -e "  ${GREEN}get-limits${NC}, ${GREEN}limits${NC}   Show your resource limits and usage dashboard"
+    echo -e "  ${GREEN}status${NC}               One-shot status summary (--json for scripts)"
     echo ""
     echo -e "${BOLD}Examples:${NC}"
     echo -e "  ${CYAN}user setup${NC}           # Run educational onboarding wizard"
     echo -e "  ${CYAN}user new${NC}             # Same as above"
     echo -e "  ${CYAN}user get-limits${NC}      # Show resource dashboard"
     echo -e "  ${CYAN}user limits${NC}          # Short alias"
+    echo -e "  ${CYAN}user status --json${NC}   # Limits, usage, containers, queue, alerts"
     echo ""
     echo -e "${YELLOW}Tip:${NC} You can also use: ${CYAN}user-setup${NC}, ${CYAN}new-user${NC}, ${CYAN}get-limits${NC}"
     echo ""
@@ -57,10 +59,14 @@ case "$SUBCOMMAND" in
         shift
         exec "$SCRIPT_DIR/get-limits" "$@"
         ;;
+    status)
+        shift
+        exec "$SCRIPT_DIR/user-status" "$@"
+        ;;
     *)
         echo -e "${RED}Error:${NC} Unknown subcommand: ${BOLD}$SUBCOMMAND${NC}"
         echo ""
-        echo "Available subcommands: setup, new, get-limits, limits"
+        echo "Available subcommands: setup, new, get-limits, limits, status"
         echo "Run 'user help' for more information"
         exit 1
         ;;
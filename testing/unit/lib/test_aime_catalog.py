@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for aime_catalog.py
+/opt/ds01-infra/testing/unit/lib/test_aime_catalog.py
+
+Run: pytest testing/unit/lib/test_aime_catalog.py -v
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import aime_catalog
+import root_state
+from aime_catalog import load_catalog, frameworks_for, find_image
+
+CATALOG = """Pytorch, 2.4.0, [CUDA_ADA], aimehub/pytorch-2.4.0-aime-cuda12.1.1
+Pytorch, 2.10.0, [CUDA_ADA;CUDA_BLACKWELL], aimehub/pytorch-2.10.0-aime-cuda12.8
+Pytorch, 2.5.1, [CUDA_ADA], aimehub/pytorch-2.5.1-aime-cuda12.1.1
+Tensorflow, 2.14.0, [CUDA_AMPERE], aimehub/tensorflow-2.14.0-aime-cuda11.8
+"""
+
+
+@pytest.fixture
+def catalog_files(temp_dir, monkeypatch):
+    monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid())  # Stand in for root
+    repo = temp_dir / "ml_images.repo"
+    repo.write_text(CATALOG)
+    return repo, temp_dir / "aime-catalog.json"
+
+
+class TestCatalogIndex:
+    """Tests for the compiled catalog layout and queries."""
+
+    def test_versions_sorted_newest_first(self, catalog_files):
+        """Versions compare numerically (2.10.0 > 2.5.1 > 2.4.0)."""
+        catalog = load_catalog(*catalog_files)
+        versions = [v for v, _ in frameworks_for(catalog, "CUDA_ADA")["Pytorch"]]
+        assert versions == ["2.10.0", "2.5.1", "2.4.0"]
+        assert list(frameworks_for(catalog, "CUDA_BLACKWELL")) == ["Pytorch"]
+
+    def test_find_image_and_reverse_map(self, catalog_files):
+        """Latest/specific lookups are case-insensitive; images map back to metadata."""
+        catalog = load_catalog(*catalog_files)
+        assert find_image(catalog, "pytorch", "CUDA_ADA") == "aimehub/pytorch-2.10.0-aime-cuda12.8"
+        assert find_image(catalog, "Pytorch", "CUDA_ADA", "2.4.0") == "aimehub/pytorch-2.4.0-aime-cuda12.1.1"
+        assert find_image(catalog, "pytorch", "CUDA_AMPERE") is None
+        info = catalog['images']["aimehub/pytorch-2.10.0-aime-cuda12.8"]
+        assert info == {'framework': "Pytorch", 'version': "2.10.0",
+                        'architectures': ["CUDA_ADA", "CUDA_BLACKWELL"]}
+
+    def test_rebuilt_only_when_catalog_changes(self, catalog_files, monkeypatch):
+        """The compiled index is reused until the repo file changes."""
+        repo, index = catalog_files
+        load_catalog(repo, index)
+        calls = []
+        real = aime_catalog.compile_catalog
+        monkeypatch.setattr(aime_catalog, "compile_catalog", lambda path: calls.append(path) or real(path))
+
+        load_catalog(repo, index)
+        assert calls == []
+
+        repo.write_text(CATALOG + "Mxnet, 1.8.0, [CUDA_AMPERE], aimehub/mxnet-1.8.0\n")
+        os.utime(repo, (1, 1))
+        assert "Mxnet" in frameworks_for(load_catalog(repo, index), "CUDA_AMPERE")
+        assert len(calls) == 1
+
+    def test_index_only_trusted_from_root(self, catalog_files, monkeypatch):
+        """An index others could have rewritten is recompiled; non-root never writes one."""
+        repo, index = catalog_files
+        load_catalog(repo, index)
+        assert index.stat().st_mode & 0o777 == 0o644
+
+        forged = load_catalog(repo, index)
+        forged['architectures']["CUDA_ADA"]["Pytorch"][0][1] = "someone/backdoor"
+        index.write_text(json.dumps(forged))
+        os.chmod(index, 0o666)
+        assert find_image(load_catalog(repo, index), "pytorch", "CUDA_ADA") == \
+            "aimehub/pytorch-2.10.0-aime-cuda12.8"
+
+        index.unlink()
+        monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid() + 1)
+        assert load_catalog(repo, index) is not None
+        assert not index.exists()
+
+    def test_missing_catalog(self, temp_dir):
+        """No catalog file means no index (callers fall back)."""
+        assert load_catalog(temp_dir / "missing.repo", temp_dir / "idx.json") is None
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for disk_usage.py
+/opt/ds01-infra/testing/unit/lib/test_disk_usage.py
+
+Run: pytest testing/unit/lib/test_disk_usage.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import disk_usage
+
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))
+
+
+def du_bytes(root):
+    """Reference: du -sB1 -x with hard links counted once."""
+    total, seen = os.lstat(root).st_blocks * 512, set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames:
+            total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+        for name in filenames:
+            st = os.lstat(os.path.join(dirpath, name))
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_blocks * 512
+    return total
+
+
+@pytest.fixture
+def home(temp_dir):
+    alice = temp_dir / "home" / "alice"
+    write(alice / "workspace" / "proj" / "data.bin", 200_000)
+    write(alice / ".conda" / "pkgs" / "lib.so", 80_000)
+    (alice / ".conda" / "envs" / "x").mkdir(parents=True)
+    os.link(alice / ".conda" / "pkgs" / "lib.so", alice / ".conda" / "envs" / "x" / "lib.so")
+    write(alice / "notes.txt", 10)
+    return alice
+
+
+class TestIndex:
+    """Tests for the incremental walk."""
+
+    @pytest.mark.unit
+    def test_totals_match_du(self, temp_dir, home):
+        """Home and workspace totals equal du (hard links once); summary is readable by others."""
+        summary = disk_usage.index_user("alice", home, temp_dir / "index", now=1000)
+        assert summary['home_bytes'] == du_bytes(home)
+        assert summary['workspace_bytes'] == du_bytes(home / "workspace")
+        assert summary['home_files'] == 4 and summary['rescanned'] == summary['dirs'] == 7
+        assert disk_usage.load_summary("alice", temp_dir / "index") == summary
+        assert oct((temp_dir / "index" / "alice.json").stat().st_mode & 0o777) == "0o644"
+        assert oct((temp_dir / "index" / ".state" / "alice.json").stat().st_mode & 0o777) == "0o600"
+
+    @pytest.mark.unit
+    def test_only_changed_directories_are_relisted(self, temp_dir, home):
+        """Unchanged directories reuse the cache; a new file re-lists just its directory."""
+        index = temp_dir / "index"
+        disk_usage.index_user("alice", home, index, now=1000)
+        assert disk_usage.index_user("alice", home, index, now=1100)['rescanned'] == 0
+
+        write(home / "workspace" / "proj" / "more.bin", 50_000)
+        summary = disk_usage.index_user("alice", home, index, now=1200)
+        assert summary['rescanned'] == 1
+        assert summary['workspace_bytes'] == du_bytes(home / "workspace")
+
+        # Files growing in place are picked up once the directory's cache entry expires
+        with open(home / "notes.txt", "ab") as f:
+            f.write(os.urandom(100_000))
+        assert disk_usage.index_user("alice", home, index, now=1300)['home_bytes'] < du_bytes(home)
+        expired = disk_usage.index_user("alice", home, index, now=1300 + disk_usage.RESCAN_AFTER)
+        assert expired['home_bytes'] == du_bytes(home)
+
+    @pytest.mark.unit
+    def test_rescans_spread_over_runs(self, temp_dir, home):
+        """Directories of one first scan expire at different runs, none before half the period."""
+        index = temp_dir / "index"
+        disk_usage.index_user("alice", home, index, now=0)
+        half = disk_usage.RESCAN_AFTER / 2
+        assert disk_usage.index_user("alice", home, index, now=half - 1)['rescanned'] == 0
+
+        lifetimes = {disk_usage._expires_after(str(n), disk_usage.RESCAN_AFTER) for n in range(100, 110)}
+        assert len(lifetimes) > 1 and all(half <= t <= disk_usage.RESCAN_AFTER for t in lifetimes)
+
+    @pytest.mark.unit
+    def test_quota_preferred_and_removed_homes_dropped(self, temp_dir, home, monkeypatch):
+        """Quota accounting overrides the walk; indexes of deleted homes are pruned."""
+        index = temp_dir / "index"
+        monkeypatch.setattr(disk_usage, "read_quotas", lambda home_root: {
+            'alice': {'used_bytes': 5 * 1024 ** 3, 'soft_bytes': None, 'hard_bytes': 10 * 1024 ** 3}})
+        (index / ".state").mkdir(parents=True)
+        (index / "bob.json").write_text("{}")
+        (index / ".state" / "bob.json").write_text("{}")
+
+        [summary] = disk_usage.update(home_root=temp_dir / "home", index_dir=index)
+        assert disk_usage.used_bytes(summary) == 5 * 1024 ** 3
+        assert summary['home_bytes'] == du_bytes(home)
+        assert not (index / "bob.json").exists() and not (index / ".state" / "bob.json").exists()
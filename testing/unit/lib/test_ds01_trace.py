@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ds01_trace.py
+/opt/ds01-infra/testing/unit/lib/test_ds01_trace.py
+
+Run: pytest testing/unit/lib/test_ds01_trace.py -v
+"""
+
+import sys
+import gzip
+import json
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import ds01_trace
+from ds01_trace import span, traced, flush, load_spans, summarize, percentile, run_profiled, phase_report
+
+
+@pytest.fixture
+def trace_env(temp_dir, monkeypatch):
+    """Point the trace log at a temp file with a fixed request ID."""
+    trace_path = temp_dir / "trace.jsonl"
+    monkeypatch.setenv("DS01_TRACE_FILE", str(trace_path))
+    monkeypatch.setenv("DS01_REQUEST_ID", "req123")
+    monkeypatch.delenv("DS01_TRACE", raising=False)
+    monkeypatch.delenv("DS01_PROFILE", raising=False)
+    monkeypatch.setattr(ds01_trace, "_buffer", [])
+    return trace_path
+
+
+class TestSpans:
+    """Tests for span recording."""
+
+    def test_span_written_on_flush(self, trace_env):
+        """Spans are buffered and appended as compact JSON lines."""
+        with span("allocator.lock_wait"):
+            pass
+        assert not trace_env.exists()
+
+        flush()
+        lines = trace_env.read_text().splitlines()
+        assert len(lines) == 1
+        assert ', ' not in lines[0]
+        entry = json.loads(lines[0])
+        assert entry["span"] == "allocator.lock_wait"
+        assert entry["rid"] == "req123"
+        assert entry["ms"] >= 0
+
+    def test_span_attributes(self, trace_env):
+        """Attributes set inside the block are recorded."""
+        with span("state.docker_scan", source="test") as s:
+            s["containers"] = 7
+        flush()
+        entry = json.loads(trace_env.read_text())
+        assert entry["containers"] == 7
+        assert entry["source"] == "test"
+
+    def test_span_records_error(self, trace_env):
+        """Exceptions propagate and are recorded on the span."""
+        with pytest.raises(ValueError):
+            with span("mlc.docker_create"):
+                raise ValueError("boom")
+        flush()
+        assert json.loads(trace_env.read_text())["error"] == "ValueError"
+
+    def test_traced_decorator(self, trace_env):
+        """traced() records one span per call and returns the result."""
+        @traced("events.write")
+        def work(x):
+            return x * 2
+
+        assert work(21) == 42
+        flush()
+        assert json.loads(trace_env.read_text())["span"] == "events.write"
+
+    def test_disabled(self, trace_env, monkeypatch):
+        """DS01_TRACE=0 disables recording."""
+        monkeypatch.setenv("DS01_TRACE", "0")
+        with span("allocator.allocate"):
+            pass
+        flush()
+        assert not trace_env.exists()
+
+    def test_unwritable_log_is_ignored(self, temp_dir, monkeypatch):
+        """Flushing to an unwritable path never raises."""
+        blocker = temp_dir / "not-a-dir"
+        blocker.write_text("")
+        monkeypatch.setenv("DS01_TRACE_FILE", str(blocker / "trace.jsonl"))
+        monkeypatch.setattr(ds01_trace, "_buffer", [])
+        with span("allocator.allocate"):
+            pass
+        flush()
+
+    def test_request_id_generated_and_exported(self, monkeypatch):
+        """A missing request ID is generated and exported for children."""
+        monkeypatch.delenv("DS01_REQUEST_ID", raising=False)
+        rid = ds01_trace.get_request_id()
+        assert rid
+        assert ds01_trace.get_request_id() == rid
+
+
+class TestSummaries:
+    """Tests for trace reading and aggregation."""
+
+    def test_percentile(self):
+        """Nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile([5.0], 95) == 5.0
+        assert percentile([], 50) == 0.0
+
+    def test_summarize(self):
+        """Spans are grouped by name."""
+        spans = [{"span": "a", "ms": v} for v in (1, 2, 3, 4)] + [{"span": "b", "ms": 10}]
+        summary = summarize(spans)
+        assert summary["a"]["count"] == 4
+        assert summary["a"]["p50"] == 2
+        assert summary["a"]["max"] == 4
+        assert summary["b"]["p95"] == 10
+
+    def test_load_spans_filters(self, trace_env):
+        """load_spans filters by time window and request ID."""
+        old = (datetime.now(timezone.utc) - timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        trace_env.write_text(
+            json.dumps({"ts": old, "rid": "r1", "span": "x", "ms": 1}) + "\n"
+            + json.dumps({"ts": now, "rid": "r2", "span": "x", "ms": 2}) + "\n"
+            + "not json\n"
+        )
+        assert len(load_spans(trace_env)) == 2
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert [s["rid"] for s in load_spans(trace_env, since=since)] == ["r2"]
+        assert [s["rid"] for s in load_spans(trace_env, request_id="r1")] == ["r1"]
+
+    def test_load_spans_missing_file(self, temp_dir):
+        """Missing trace log yields no spans."""
+        assert load_spans(temp_dir / "missing.jsonl") == []
+
+
+    def test_load_spans_rotated(self, trace_env):
+        """Rotated and gzipped logs are read for multi-day windows."""
+        def line(day, rid):
+            return json.dumps({"ts": f"2026-03-{day:02d}T12:00:00Z", "rid": rid, "span": "x", "ms": 1}) + "\n"
+
+        trace_env.write_text(line(5, "today"))
+        (trace_env.parent / "trace.jsonl-20260304").write_text(line(4, "yesterday"))
+        with gzip.open(trace_env.parent / "trace.jsonl-20260301.gz", "wt") as f:
+            f.write(line(1, "old"))
+
+        assert [s["rid"] for s in load_spans(trace_env)] == ["today"]
+        assert [s["rid"] for s in load_spans(trace_env, include_rotated=True)] == ["old", "yesterday", "today"]
+        since = datetime(2026, 3, 3, tzinfo=timezone.utc)
+        assert [s["rid"] for s in load_spans(trace_env, since=since, include_rotated=True)] == ["yesterday", "today"]
+
+    def test_phase_report(self):
+        """Phase shares and skip/parallel candidates from wrapper spans."""
+        spans = []
+        for rid in ("r1", "r2"):
+            spans += [
+                {"rid": rid, "span": "wrapper.total", "ms": 1000},
+                {"rid": rid, "span": "wrapper.preflight", "ms": 100, "hint": "skippable"},
+                {"rid": rid, "span": "wrapper.resource_limits", "ms": 200, "hint": "parallel:limits"},
+                {"rid": rid, "span": "wrapper.gpu_limits", "ms": 150, "hint": "parallel:limits"},
+                {"rid": rid, "span": "wrapper.mlc_patched", "ms": 500},
+                {"rid": rid, "span": "allocator.allocate", "ms": 50},
+            ]
+        report = phase_report(spans)
+
+        assert report["requests"] == 2
+        assert report["total"]["p50"] == 1000
+        assert set(report["phases"]) == {"wrapper.preflight", "wrapper.resource_limits",
+                                         "wrapper.gpu_limits", "wrapper.mlc_patched"}
+        assert report["phases"]["wrapper.mlc_patched"]["share"] == 0.5
+        assert report["candidates"] == [
+            {"kind": "parallel (limits)", "phases": ["wrapper.gpu_limits", "wrapper.resource_limits"],
+             "p50_saving": 150},
+            {"kind": "skip", "phases": ["wrapper.preflight"], "p50_saving": 100},
+        ]
+
+
+class TestShellPhases:
+    """Tests for the bash helpers in ds01-trace.sh."""
+
+    def test_phase_written_as_span(self, trace_env):
+        """Shell phases land in the trace log in the Python span format."""
+        script = (
+            f"source {lib_path / 'ds01-trace.sh'}; "
+            "ds01_phase_begin wrapper.preflight; "
+            "ds01_phase_end wrapper.preflight hint=skippable; "
+            "ds01_phase_end wrapper.never_started"
+        )
+        subprocess.run(["bash", "-c", script], check=True)
+
+        spans = load_spans(trace_env)
+        assert len(spans) == 1
+        assert spans[0]["span"] == "wrapper.preflight"
+        assert spans[0]["rid"] == "req123"
+        assert spans[0]["hint"] == "skippable"
+        assert spans[0]["ms"] >= 0
+
+
+class TestProfiling:
+    """Tests for run_profiled()."""
+
+    def test_not_profiled_by_default(self, trace_env):
+        """Without the flag or DS01_PROFILE the function runs directly."""
+        assert run_profiled(lambda: 5, "test") == 5
+
+    def test_profile_dumped(self, trace_env, temp_dir, monkeypatch):
+        """DS01_PROFILE=<dir> writes <label>-<rid>.prof there."""
+        monkeypatch.setenv("DS01_PROFILE", str(temp_dir / "profiles"))
+        assert run_profiled(lambda: 5, "unit") == 5
+        assert (temp_dir / "profiles" / "unit-req123.prof").exists()
+
+    def test_profile_dumped_on_system_exit(self, trace_env, temp_dir, monkeypatch):
+        """CLI mains that sys.exit() still get a profile."""
+        monkeypatch.setenv("DS01_PROFILE", str(temp_dir))
+
+        def cli():
+            sys.exit(3)
+
+        with pytest.raises(SystemExit):
+            run_profiled(cli, "cli")
+        assert (temp_dir / "cli-req123.prof").exists()
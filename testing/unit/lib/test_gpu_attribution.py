@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for gpu_attribution.py
+/opt/ds01-infra/testing/unit/lib/test_gpu_attribution.py
+
+Run: pytest testing/unit/lib/test_gpu_attribution.py -v
+"""
+
+import sys
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import gpu_attribution
+
+ALICE = "ab" * 32
+BOB = "cd" * 32
+
+
+def write_cgroup(proc, pid, content):
+    (proc / str(pid)).mkdir(parents=True)
+    (proc / str(pid) / "cgroup").write_text(content)
+
+
+class TestAttribution:
+    """Tests for compute-process -> container/device attribution."""
+
+    @pytest.mark.unit
+    def test_parse_compute_apps(self):
+        """Rows parse; [N/A] memory is None; headers and blank lines are skipped."""
+        out = "pid, gpu_uuid, used_memory\n4242, MIG-aaa, 8000\n\n4243, GPU-bbb, [N/A]\n"
+        assert gpu_attribution.parse_compute_apps(out) == [
+            {'pid': 4242, 'uuid': 'MIG-aaa', 'mem': 8000.0},
+            {'pid': 4243, 'uuid': 'GPU-bbb', 'mem': None}]
+
+    @pytest.mark.unit
+    def test_container_of_cgroup_layouts(self, temp_dir):
+        """systemd-driver scopes and cgroupfs paths both resolve; host processes do not."""
+        write_cgroup(temp_dir, 1, f"0::/ds01.slice/ds01-students.slice/docker-{ALICE}.scope\n")
+        write_cgroup(temp_dir, 2, f"12:memory:/docker/{BOB}\n0::/docker/{BOB}\n")
+        write_cgroup(temp_dir, 3, "0::/user.slice/user-1001.slice/session-4.scope\n")
+        assert gpu_attribution.container_of(1, temp_dir) == ALICE
+        assert gpu_attribution.container_of(2, temp_dir) == BOB
+        assert gpu_attribution.container_of(3, temp_dir) is None
+        assert gpu_attribution.container_of(99, temp_dir) is None
+
+    @pytest.mark.unit
+    def test_scope_patterns_agree(self):
+        """The /proc and cgroup-tree patterns accept the same scopes (slices, nesting, cgroupfs parents)."""
+        cid = gpu_attribution.container_id_from_cgroup
+        assert cid(f"0::/ds01-students.slice/{ALICE}\n") == ALICE
+        assert cid(f"0::/system.slice/docker-{ALICE}.scope/init.scope\n") == ALICE
+        assert cid(f"0::/user.slice/{ALICE[:12]}\n") is None
+        for name in (f"docker-{ALICE}.scope", ALICE):
+            assert gpu_attribution.SCOPE_DIR.match(name).group(1) == ALICE
+        assert not gpu_attribution.SCOPE_DIR.match("session-4.scope")
+
+    @pytest.mark.unit
+    def test_attribute_per_container_and_device(self, temp_dir):
+        """Two containers on slices of one GPU are told apart; bare-metal processes map to None."""
+        write_cgroup(temp_dir, 10, f"0::/system.slice/docker-{ALICE}.scope\n")
+        write_cgroup(temp_dir, 11, f"0::/system.slice/docker-{ALICE}.scope\n")
+        write_cgroup(temp_dir, 20, f"0::/system.slice/docker-{BOB}.scope\n")
+        apps = [{'pid': 10, 'uuid': 'MIG-a', 'mem': 3000.0}, {'pid': 11, 'uuid': 'MIG-a', 'mem': 1000.0},
+                {'pid': 20, 'uuid': 'MIG-b', 'mem': None}, {'pid': 30, 'uuid': 'MIG-b', 'mem': 500.0}]
+        result = gpu_attribution.attribute(apps, temp_dir)
+
+        assert result['containers'][ALICE] == {'mem': 4000.0, 'procs': 2, 'devices': ['MIG-a']}
+        assert result['containers'][BOB] == {'mem': 0.0, 'procs': 1, 'devices': ['MIG-b']}
+        assert result['containers'][None]['procs'] == 1
+        assert result['devices']['MIG-a'] == {'mem': 4000.0, 'procs': 2, 'containers': [ALICE]}
+        assert result['devices']['MIG-b']['containers'] == [BOB, None]
+        assert [p['container'] for p in result['processes']] == [ALICE, ALICE, BOB, None]
+        assert gpu_attribution.attribute(None, temp_dir) == {'containers': {}, 'devices': {}, 'processes': []}
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Unit tests for host_gpu.py
+/opt/ds01-infra/testing/unit/lib/test_host_gpu.py
+
+Run: pytest testing/unit/lib/test_host_gpu.py -v
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import host_gpu
+import root_state
+from host_gpu import detect, host_gpu_info, installed_packages, HostGpuError
+
+
+def dpkg_entry(package, version, status="install ok installed"):
+    return f"Package: {package}\nStatus: {status}\nVersion: {version}\nArchitecture: amd64\n\n"
+
+
+@pytest.fixture
+def host(temp_dir, monkeypatch):
+    """Fake dpkg status, driver version file and cache path (test user stands in for root)."""
+    monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid())
+    status = temp_dir / "status"
+    status.write_text(dpkg_entry("libc6", "2.35") + dpkg_entry("cuda-toolkit-12-2", "12.2.2-1"))
+    driver = temp_dir / "version"
+    driver.write_text("NVRM version: NVIDIA UNIX x86_64 Kernel Module  535.104.05  Sat Aug 19 2023\n")
+    return {'cache_file': temp_dir / "host-gpu.json", 'dpkg_status': status, 'driver_files': (driver,)}
+
+
+class TestDetect:
+    """Tests for detect() package rules."""
+
+    def test_cuda_versions(self):
+        """CUDA version maps to the catalog architecture."""
+        assert detect("cuda-11-8/now 11.8.0-1") == ("CUDA", "CUDA_AMPERE", 11.8)
+        assert detect("cuda-toolkit-12-2/now 12.2.2-1") == ("CUDA", "CUDA_ADA", 12.2)
+        assert detect("libcudnn8/now 8.9.7.29-1+cuda12.8") == ("CUDA", "CUDA_BLACKWELL", 12.8)
+
+    def test_highest_cuda_wins(self):
+        """With several toolkits installed the newest one counts, whatever the listing order."""
+        packages = ["cuda-12-8/now 12.8.0-1", "cuda-11-8/now 11.8.0-1", "cuda-12-10/now 12.10.0-1"]
+        assert detect("\n".join(packages))[:2] == ("CUDA", "CUDA_BLACKWELL")
+        assert detect("\n".join(reversed(packages[:2]))) == ("CUDA", "CUDA_BLACKWELL", 12.8)
+
+    def test_rocm_and_missing(self):
+        """ROCm is read from rocm-dev; nothing installed is an error."""
+        assert detect("rocm-dev/now 6.3.3.60303-74~22.04") == ("ROCM", "ROCM6", "6.3.3")
+        with pytest.raises(HostGpuError):
+            detect("libc6/now 2.35")
+
+    def test_dpkg_status_only_lists_installed(self, temp_dir):
+        """Removed (config-files) packages are ignored."""
+        status = temp_dir / "status"
+        status.write_text(dpkg_entry("cuda-11-8", "11.8.0-1", "deinstall ok config-files")
+                          + dpkg_entry("cuda-12-2", "12.2.2-1"))
+        assert installed_packages(status) == "cuda-12-2/now 12.2.2-1"
+
+
+class TestHostGpuCache:
+    """Tests for cache use and invalidation."""
+
+    def test_cached_until_fingerprint_changes(self, host, monkeypatch):
+        """Second call reads the cache; a dpkg or driver change re-detects."""
+        info = host_gpu_info(**host)
+        assert info['architecture'] == "CUDA_ADA" and info['driver'] == "535.104.05"
+
+        calls = []
+        real = host_gpu.installed_packages
+        monkeypatch.setattr(host_gpu, "installed_packages", lambda path: calls.append(path) or real(path))
+        assert host_gpu_info(**host)['architecture'] == "CUDA_ADA"
+        assert calls == []
+
+        host['dpkg_status'].write_text(dpkg_entry("cuda-toolkit-12-8", "12.8.0-1"))
+        os.utime(host['dpkg_status'], (1, 1))
+        assert host_gpu_info(**host)['architecture'] == "CUDA_BLACKWELL"
+
+        host['driver_files'][0].write_text("NVRM version: NVIDIA UNIX x86_64 Kernel Module  570.86.10\n")
+        assert host_gpu_info(**host)['driver'] == "570.86.10"
+        assert len(calls) == 2
+
+    def test_cache_only_trusted_from_root(self, host, monkeypatch):
+        """A cache others could have written is ignored; non-root callers never write it."""
+        host_gpu_info(**host)
+        assert host['cache_file'].stat().st_mode & 0o777 == 0o644
+
+        forged = dict(host_gpu_info(**host), architecture="CUDA_EVIL")
+        host['cache_file'].write_text(json.dumps(forged))
+        os.chmod(host['cache_file'], 0o666)
+        assert host_gpu_info(**host)['architecture'] == "CUDA_ADA"
+
+        host['cache_file'].unlink()
+        monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid() + 1)
+        assert host_gpu_info(**host)['architecture'] == "CUDA_ADA"
+        assert not host['cache_file'].exists()
+
+    def test_failure_is_not_cached(self, host):
+        """A host without CUDA/ROCm raises and leaves no cache entry."""
+        host['dpkg_status'].write_text(dpkg_entry("libc6", "2.35"))
+        with pytest.raises(HostGpuError):
+            host_gpu_info(**host)
+        assert not host['cache_file'].exists()
+
+
+TOPO = (
+    "\t\x1b[4mGPU0\tGPU1\tGPU2\tGPU3\tNIC0\tCPU Affinity\tNUMA Affinity\tGPU NUMA ID\x1b[0m\n"
+    "GPU0\t X \tNV12\tPIX\tSYS\tSYS\t0-31\t0\t\tN/A\n"
+    "GPU1\tNV12\t X \tPXB\tSYS\tSYS\t0-31\t0\t\tN/A\n"
+    "GPU2\tPIX\tPXB\t X \tSYS\tSYS\t0-31\t0\t\tN/A\n"
+    "GPU3\tSYS\tSYS\tSYS\t X \tNODE\t32-63\t1\t\tN/A\n"
+    "NIC0\tSYS\tSYS\tSYS\tNODE\t X \n\nLegend:\n\n  X    = Self\n"
+)
+
+
+class TestTopology:
+    """Tests for the `nvidia-smi topo -m` parser, locality scores and cache."""
+
+    def test_parse_and_locality(self):
+        """Links and NUMA are read per GPU pair; a set scores by its worst link."""
+        topology = host_gpu.parse_topology(TOPO)
+        assert topology['links']['0'] == {'1': 'NV12', '2': 'PIX', '3': 'SYS'}
+        assert topology['numa'] == {'0': '0', '1': '0', '2': '0', '3': '1'}
+        assert host_gpu.locality(topology, ['1']) == (1.0, 'same-gpu')
+        assert host_gpu.locality(topology, ['0', '1']) == (0.9, 'NV12')
+        assert host_gpu.locality(topology, ['0', '1', '2']) == (0.6, 'PXB')
+        assert host_gpu.locality({'numa': {'0': '0', '1': '0'}}, ['0', '1']) == (0.25, 'NODE')
+        assert host_gpu.locality({}, ['0', '1']) == (None, 'unknown')
+
+    def test_topology_cached(self, host, temp_dir, monkeypatch):
+        """nvidia-smi runs once per fingerprint; failures return {} uncached."""
+        calls = []
+
+        def run(cmd, **kwargs):
+            calls.append(cmd)
+            return host_gpu.subprocess.CompletedProcess(cmd, 0, TOPO, "")
+
+        gpus_dir = temp_dir / "gpus"
+        (gpus_dir / "0000:17:00.0").mkdir(parents=True)
+        kwargs = dict(host, cache_file=temp_dir / "gpu-topology.json", gpus_dir=gpus_dir)
+        monkeypatch.setattr(host_gpu.subprocess, "run", run)
+        assert host_gpu.gpu_topology(**kwargs)['links']['3']['0'] == "SYS"
+        assert host_gpu.gpu_topology(**kwargs)['numa']['3'] == "1"
+        assert len(calls) == 1
+
+        (gpus_dir / "0000:31:00.0").mkdir()
+        monkeypatch.setattr(host_gpu.subprocess, "run", lambda cmd, **kw: (_ for _ in ()).throw(OSError()))
+        assert host_gpu.gpu_topology(**kwargs) == {}
+
+    def test_topology_cache_only_trusted_from_root(self, host, temp_dir, monkeypatch):
+        """A topology cache others could have written is ignored and rewritten 0644."""
+        calls = []
+
+        def run(cmd, **kwargs):
+            calls.append(cmd)
+            return host_gpu.subprocess.CompletedProcess(cmd, 0, TOPO, "")
+
+        kwargs = dict(host, cache_file=temp_dir / "gpu-topology.json", gpus_dir=temp_dir / "gpus")
+        monkeypatch.setattr(host_gpu.subprocess, "run", run)
+        record = host_gpu.gpu_topology(**kwargs)
+        assert kwargs['cache_file'].stat().st_mode & 0o777 == 0o644
+
+        record['links']['0']['3'] = "NV12"
+        kwargs['cache_file'].write_text(json.dumps(record))
+        os.chmod(kwargs['cache_file'], 0o666)
+        assert host_gpu.gpu_topology(**kwargs)['links']['0']['3'] == "SYS"
+        assert len(calls) == 2
+        assert kwargs['cache_file'].stat().st_mode & 0o777 == 0o644
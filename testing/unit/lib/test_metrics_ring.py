@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for metrics_ring.py
+/opt/ds01-infra/testing/unit/lib/test_metrics_ring.py
+
+Run: pytest testing/unit/lib/test_metrics_ring.py -v
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import metrics_ring
+from metrics_ring import RingWriter, RingReader, RingUnavailable, latest, stats_line
+
+
+@pytest.fixture
+def ring(temp_dir):
+    writer = RingWriter(temp_dir / "ring", slots=4, depth=3)
+    yield writer
+    writer.close()
+
+
+class TestRing:
+    """Tests for publishing and lock-free reads."""
+
+    def test_latest_sample_per_entity(self, ring):
+        """Readers see the newest sample with labels; missing values read as None."""
+        ring.publish('gpu', '1', 10, {'util': 50, 'mem_used': 1024, 'mig': False}, ident="GPU-b", label="A100")
+        ring.publish('gpu', '0', 10, {'util': 20}, ident="GPU-a", label="A100")
+        ring.publish('gpu', '1', 20, {'util': 75, 'mig': True}, ident="GPU-b", label="A100")
+        ring.publish('container', 'proj._.1000', 20, {'cpu': 150.5, 'mem': 200}, ident="abc", user="alice")
+        ring.commit()
+
+        reader = RingReader(ring.path)
+        gpus = reader.entities('gpu')
+        assert [g['key'] for g in gpus] == ['0', '1']
+        assert gpus[1]['util'] == 75 and gpus[1]['mig'] == 1 and gpus[1]['mem_used'] is None
+        assert gpus[1]['id'] == "GPU-b" and gpus[1]['ts'] == 20
+        container, = reader.entities('container')
+        assert container['user'] == "alice" and container['cpu'] == 150.5
+
+    def test_history_wraps_at_depth(self, ring):
+        """Only the last `depth` samples are kept, oldest first."""
+        for ts in range(1, 6):
+            ring.publish('container', 'c1', ts, {'cpu': ts * 10})
+        ring.commit()
+        entity, = RingReader(ring.path).entities('container', history=True)
+        assert [s['ts'] for s in entity['samples']] == [3, 4, 5]
+
+    def test_retire_frees_slots(self, ring):
+        """Vanished entities disappear and their slot is reused."""
+        for name in ('a', 'b', 'c', 'd'):
+            ring.publish('container', name, 1, {'cpu': 1})
+        ring.publish('container', 'e', 1, {'cpu': 1})   # Ring full - skipped
+        ring.retire('container', ['a', 'b', 'c'])
+        ring.publish('container', 'e', 2, {'cpu': 2})
+        ring.commit()
+        entities = RingReader(ring.path).entities('container', history=True)
+        assert [e['key'] for e in entities] == ['a', 'b', 'c', 'e']
+        assert len(entities[-1]['samples']) == 1
+
+    def test_slot_being_written_is_skipped(self, ring):
+        """An odd sequence counter (writer mid-update) is never returned as data."""
+        ring.publish('gpu', '0', 1, {'util': 5})
+        ring.commit()
+        ring._begin(metrics_ring.HEADER_SIZE)   # Leave slot 0 "in progress"
+        assert RingReader(ring.path).entities() == []
+
+
+class TestLatest:
+    """Tests for the latest() convenience reader and shell formatting."""
+
+    def test_missing_or_stale_ring(self, ring, temp_dir):
+        """None when there is no ring, or it was not published recently."""
+        assert latest('gpu', path=temp_dir / "missing") is None
+        with pytest.raises(RingUnavailable):
+            RingReader(temp_dir / "missing")
+
+        ring.publish('gpu', '0', time.time(), {'util': 5})
+        assert latest('gpu', path=ring.path) is None   # Never committed
+        ring.commit()
+        assert latest('gpu', path=ring.path)[0]['util'] == 5
+
+    def test_stats_line_matches_docker_stats(self):
+        """stats output uses docker stats fields and units."""
+        line = stats_line({'key': 'proj._.1000', 'cpu': 12.345, 'mem': 512, 'mem_limit': 2048, 'pids': 7,
+                           'net_rx': 1500000, 'net_tx': 2000, 'blk_read': None, 'blk_write': 0})
+        assert line.split("\t") == ['proj._.1000', '12.35%', '512.00MiB / 2.00GiB', '25.00%',
+                                    '1.5MB / 2kB', '-- / 0B', '7']
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for process_inventory.py
+/opt/ds01-infra/testing/unit/lib/test_process_inventory.py
+
+Run: pytest testing/unit/lib/test_process_inventory.py -v
+"""
+
+import sys
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import process_inventory
+
+TICKS = 100  # SC_CLK_TCK on Linux
+ALICE = "ab" * 32
+BOB = "cd" * 32
+
+
+def write_proc(proc, pid, comm, cpu_ticks, started_at, cmdline=""):
+    d = proc / str(pid)
+    d.mkdir(parents=True)
+    rest = ["S", "1"] + ["0"] * 9 + [str(cpu_ticks), "0"] + ["0"] * 6 + [str(started_at * TICKS), "0", "256"]
+    (d / "stat").write_text(f"{pid} ({comm}) " + " ".join(rest) + "\n")
+    (d / "cmdline").write_bytes(cmdline.replace(" ", "\0").encode())
+    return d
+
+
+@pytest.fixture
+def tree(temp_dir, monkeypatch):
+    """Two container scopes (one with a nested cgroup) and a host process."""
+    monkeypatch.setattr(process_inventory.os, "sysconf",
+                        lambda name: TICKS if name == 'SC_CLK_TCK' else 4096)
+    proc, cgroup = temp_dir / "proc", temp_dir / "cgroup"
+    proc.mkdir()
+    (proc / "uptime").write_text("1000.00 0.00\n")
+    user_slice = cgroup / "ds01.slice" / "ds01-students.slice" / "ds01-students-alice.slice"
+    alice = user_slice / f"docker-{ALICE}.scope"
+    (alice / "inner").mkdir(parents=True)
+    (alice / "cgroup.procs").write_text("10\n11\n")
+    (alice / "inner" / "cgroup.procs").write_text("12\n")
+    bob = cgroup / "system.slice" / f"docker-{BOB}.scope"
+    bob.mkdir(parents=True)
+    (bob / "cgroup.procs").write_text("20\n")
+
+    write_proc(proc, 10, "bash", 0, 0)
+    write_proc(proc, 11, "python", 45000, 100, "python train.py")   # 450s over 900s -> 50%
+    write_proc(proc, 12, "jupyter-lab", 9000, 100)                   # 10%
+    (write_proc(proc, 20, "sleep", 0, 0) / "root" / "workspace").mkdir(parents=True)
+    (proc / "20" / "root" / "workspace" / ".keep-alive").touch()
+    write_proc(proc, 30, "sshd", 0, 0)
+    return cgroup, proc
+
+
+class TestInventory:
+    """Tests for the one-sweep container/user inventory."""
+
+    @pytest.mark.unit
+    def test_container_counts_and_top(self, tree):
+        """Scope PIDs (nested included) are counted; shells don't count as busy; top by CPU %."""
+        cgroup, proc = tree
+        result = process_inventory.inventory(cgroup, proc, top=2)
+        alice = result['containers'][ALICE]
+        assert (alice['procs'], alice['busy'], alice['cpu_percent'], alice['keep_alive']) == (3, 2, 60.0, False)
+        assert [(p['comm'], p['cmdline'], p['cpu_percent']) for p in alice['top']] == \
+            [("python", "python train.py", 50.0), ("jupyter-lab", "[jupyter-lab]", 10.0)]
+        bob = result['containers'][BOB]
+        assert (bob['procs'], bob['busy'], bob['keep_alive']) == (1, 0, True)
+
+    @pytest.mark.unit
+    def test_user_counts(self, tree):
+        """Processes outside any scope count as host processes of their UID."""
+        cgroup, proc = tree
+        users = process_inventory.inventory(cgroup, proc)['users']
+        assert sum(u['containers'] for u in users.values()) == 4
+        assert sum(u['host'] for u in users.values()) == 1
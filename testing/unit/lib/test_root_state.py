@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for root_state.py
+/opt/ds01-infra/testing/unit/lib/test_root_state.py
+
+Run: pytest testing/unit/lib/test_root_state.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add lib to path
+lib_path = Path(__file__).resolve().parent.parent.parent.parent / "scripts" / "lib"
+sys.path.insert(0, str(lib_path))
+
+import pytest
+import root_state
+from root_state import read_root_json, write_root_json
+
+
+@pytest.fixture
+def as_owner(monkeypatch):
+    """Treat the test user as the trusted owner (the suite may not run as root)."""
+    monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid())
+
+
+class TestRootState:
+    """Tests for read_root_json()/write_root_json()."""
+
+    def test_round_trip_is_0644(self, temp_dir, as_owner):
+        """Written by the owner, the file is 0644 and read back."""
+        path = temp_dir / "state.json"
+        assert write_root_json(path, {'a': 1}) is True
+        assert path.stat().st_mode & 0o777 == 0o644
+        assert read_root_json(path) == {'a': 1}
+        assert not [p for p in temp_dir.iterdir() if p.name.startswith('.')]
+
+    def test_writable_by_others_is_ignored(self, temp_dir, as_owner):
+        """A group- or world-writable file is never trusted."""
+        path = temp_dir / "state.json"
+        write_root_json(path, {'a': 1})
+        for mode in (0o664, 0o666):
+            os.chmod(path, mode)
+            assert read_root_json(path) is None
+
+    def test_other_owner_is_ignored(self, temp_dir, monkeypatch):
+        """A file owned by anyone but the trusted owner is never trusted."""
+        path = temp_dir / "state.json"
+        path.write_text('{"a": 1}')
+        os.chmod(path, 0o644)
+        monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid() + 1)
+        assert read_root_json(path) is None
+
+    def test_non_owner_does_not_write(self, temp_dir, monkeypatch):
+        """Only the trusted owner writes; others keep their value in memory."""
+        path = temp_dir / "state.json"
+        monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid() + 1)
+        assert write_root_json(path, {'a': 1}) is False
+        assert not path.exists()
+
+    def test_missing_or_invalid(self, temp_dir, as_owner):
+        """Missing or unparsable files read as None."""
+        path = temp_dir / "state.json"
+        assert read_root_json(path) is None
+        path.write_text("{not json")
+        os.chmod(path, 0o644)
+        assert read_root_json(path) is None
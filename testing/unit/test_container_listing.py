@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Container Listing Backend
+Tests ownership filtering, record extraction and rendering with mocked Docker
+"""
+
+import json
+import subprocess
+import pytest
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from container_listing import ContainerListing, render_simple, render_detailed
+
+PS_OUTPUT = "\n".join([
+    "aaaaaaaaaaaa|proj._.1001|Up 2 hours|alice|||",
+    "bbbbbbbbbbbb|old._.1001|Exited (0) 3 hours ago||alice||",
+    "cccccccccccc|dev-box|Up 5 minutes||||/home/alice/code",
+    "dddddddddddd|other._.1002|Up 1 hour|bob|||",
+])
+
+INSPECT = [
+    {
+        "Id": "aaaaaaaaaaaa" + "0" * 52,
+        "Created": "2026-10-01T08:00:00.123456Z",
+        "State": {"Status": "running"},
+        "Config": {"Image": "aimehub/pytorch:latest", "Labels": {"aime.mlc.FRAMEWORK": "Pytorch"}},
+        "HostConfig": {"NanoCpus": 16_000_000_000, "Memory": 32 * 1024 ** 3,
+                       "DeviceRequests": [{"Driver": "nvidia"}]},
+        "Mounts": [{"Destination": "/workspace", "Source": "/home/alice/workspace"}],
+        "NetworkSettings": {"Ports": {"8888/tcp": [{"HostIp": "0.0.0.0", "HostPort": "8888"}],
+                                      "22/tcp": None}},
+    },
+    {
+        "Id": "bbbbbbbbbbbb" + "0" * 52,
+        "Created": "2026-09-01T08:00:00Z",
+        "State": {"Status": "exited"},
+        "Config": {"Image": "ds01-1001/old:latest", "Labels": {}},
+        "HostConfig": {"NanoCpus": 0, "Memory": 0, "DeviceRequests": None},
+        "Mounts": [],
+        "NetworkSettings": {"Ports": {}},
+    },
+    {
+        "Id": "cccccccccccc" + "0" * 52,
+        "Config": {"Image": "mcr.microsoft.com/devcontainers/python", "Labels": None},
+        "HostConfig": {},
+    },
+]
+
+
+class FakeDocker:
+    """Answers the two calls the backend makes and records them."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        if args[0] == 'ps':
+            lines = PS_OUTPUT.splitlines()
+            if 'status=running' in args:
+                lines = [line for line in lines if "|Up " in line]
+            return subprocess.CompletedProcess(args, 0, "\n".join(lines) + "\n", "")
+        wanted = set(args[1:])
+        out = json.dumps([c for c in INSPECT if c["Id"][:12] in wanted])
+        return subprocess.CompletedProcess(args, 0, out, "")
+
+
+@pytest.fixture
+def listing():
+    listing = ContainerListing("alice", 1001)
+    listing._docker = FakeDocker()
+    return listing
+
+
+class TestContainerListing:
+    """Tests for ContainerListing.containers()."""
+
+    @pytest.mark.unit
+    def test_owner_labels_and_two_docker_calls(self, listing):
+        """All owner label sources match; other users are excluded; 2 docker calls total."""
+        records = listing.containers(show_all=True)
+        assert [r['full_name'] for r in records] == ["proj._.1001", "old._.1001", "dev-box"]
+        assert len(listing._docker.calls) == 2
+
+    @pytest.mark.unit
+    def test_running_only_by_default(self, listing):
+        """Without --all only running containers are listed."""
+        assert [r['name'] for r in listing.containers()] == ["proj", "dev-box"]
+
+    @pytest.mark.unit
+    def test_record_fields(self, listing):
+        """Resources, mounts and published ports come from the bulk inspect."""
+        proj, old, _ = listing.containers(show_all=True)
+        assert proj['id'] == "aaaaaaaaaaaa"
+        assert proj['created'] == "2026-10-01 08:00:00"
+        assert (proj['cpus'], proj['memory_gb'], proj['gpu']) == (16, 32, True)
+        assert proj['mounts']['workspace'] == "/home/alice/workspace"
+        assert proj['ports'] == ["8888/tcp -> 0.0.0.0:8888"]
+        assert (old['gpu'], old['cpus'], old['ports']) == (False, 0, [])
+
+
+class TestRendering:
+    """Tests for the summary and detailed views."""
+
+    @pytest.mark.unit
+    def test_views(self, listing, temp_dir):
+        """Summary counts running/stopped; detailed shows resources and ports."""
+        records = listing.containers(show_all=True)
+        simple = render_simple(records, show_all=True, guided=False)
+        assert "3 container(s)" in simple and "2 running" in simple and "1 stopped" in simple
+        assert "GPU:    " in simple
+
+        detailed = render_detailed(records, temp_dir)
+        assert "16 cores" in detailed and "32GB" in detailed and "8888/tcp -> 0.0.0.0:8888" in detailed
+        assert "CPU-only" in detailed
+
+    @pytest.mark.unit
+    def test_empty(self):
+        """No containers gives the deploy hint."""
+        assert "container-deploy my-project" in render_simple([], show_all=False, guided=False)
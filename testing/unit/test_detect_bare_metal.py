@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Bare Metal Detector Engine
+Tests cgroup classification and the /proc sweep against a fake /proc tree
+"""
+
+import json
+import importlib.util
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "detect_bare_metal", "/opt/ds01-infra/scripts/monitoring/detect-bare-metal.py")
+detect_bare_metal = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(detect_bare_metal)
+
+CONTAINER_ID = "ab" * 32
+TICKS = 100  # SC_CLK_TCK on Linux
+
+
+def add_process(proc_root, pid, name, cgroup, started_at, cmdline="", cpu_ticks=0, rss_pages=256):
+    """Create /proc/<pid> with stat, cgroup and cmdline."""
+    d = proc_root / str(pid)
+    d.mkdir()
+    # Fields after "(comm) ": state ppid ... utime(11) stime(12) ... starttime(19) vsize(20) rss(21)
+    rest = ["S", "1"] + ["0"] * 9 + [str(cpu_ticks), "0"] + ["0"] * 6 + [str(started_at * TICKS), "0", str(rss_pages)]
+    (d / "stat").write_text(f"{pid} ({name}) " + " ".join(rest) + "\n")
+    (d / "cgroup").write_text(cgroup)
+    (d / "cmdline").write_text(cmdline.replace(" ", "\x00"))
+
+
+@pytest.fixture
+def proc_root(temp_dir, monkeypatch):
+    root = temp_dir / "proc"
+    root.mkdir()
+    (root / "uptime").write_text("1000.00 5000.00\n")
+    monkeypatch.setattr(detect_bare_metal, "MIN_UID", 0)
+    monkeypatch.setattr(detect_bare_metal, "gpu_compute_pids", lambda: {102: 4096})
+    monkeypatch.setattr(detect_bare_metal.os, "sysconf",
+                        lambda name: TICKS if name == 'SC_CLK_TCK' else 4096)
+    return root
+
+
+class TestContainerCgroup:
+    """Tests for container_id_from_cgroup()."""
+
+    @pytest.mark.unit
+    def test_container_and_session_paths(self):
+        """Docker scopes (both drivers, DS01 slices) are containers; sessions are not."""
+        cid = detect_bare_metal.container_id_from_cgroup
+        assert cid(f"0::/ds01.slice/ds01-student.slice/ds01-student-alice.slice/docker-{CONTAINER_ID}.scope\n") == CONTAINER_ID[:12]
+        assert cid(f"12:memory:/docker/{CONTAINER_ID}\n0::/\n") == CONTAINER_ID[:12]
+        assert cid("0::/user.slice/user-1001.slice/session-4.scope\n") is None
+        assert cid("0::/\n") is None
+
+
+class TestGpuComputePids:
+    """Tests for gpu_compute_pids()."""
+
+    @pytest.mark.unit
+    def test_sums_memory_across_gpus(self, monkeypatch):
+        """Rows come from gpu_attribution; a PID on several GPUs sums, [N/A] counts as 0."""
+        apps = [{'pid': 101, 'uuid': 'GPU-a', 'mem': 1024.0},
+                {'pid': 101, 'uuid': 'GPU-b', 'mem': 512.0},
+                {'pid': 102, 'uuid': 'GPU-a', 'mem': None}]
+        monkeypatch.setattr(detect_bare_metal.gpu_attribution, "query_compute_apps", lambda: apps)
+        assert detect_bare_metal.gpu_compute_pids() == {101: 1536, 102: 0}
+
+        monkeypatch.setattr(detect_bare_metal.gpu_attribution, "query_compute_apps", lambda: None)
+        assert detect_bare_metal.gpu_compute_pids() == {}
+
+
+class TestDetect:
+    """Tests for BareMetalDetector.detect() over a fake /proc."""
+
+    @pytest.mark.unit
+    def test_classifies_in_one_sweep(self, proc_root, temp_dir):
+        """Host compute processes are reported; containers, shells and new processes are not."""
+        session = "0::/user.slice/user-1001.slice/session-4.scope\n"
+        add_process(proc_root, 101, "python3", session, started_at=100, cmdline="python3 train.py", cpu_ticks=45000)
+        add_process(proc_root, 102, "worker", session, started_at=100)
+        add_process(proc_root, 103, "python3", f"0::/system.slice/docker-{CONTAINER_ID}.scope\n", started_at=100)
+        add_process(proc_root, 104, "bash", session, started_at=100)
+        add_process(proc_root, 105, "python3", session, started_at=990)
+
+        detector = detect_bare_metal.BareMetalDetector(proc_root=proc_root, state_file=temp_dir / "state.json")
+        result = detector.detect()
+        procs = {p['pid']: p for p in result['processes']}
+
+        assert set(procs) == {101, 102}
+        assert procs[101]['cmdline'] == "python3 train.py"
+        assert procs[101]['cpu_percent'] == 50.0 and procs[101]['mem_mb'] == 1.0
+        assert procs[102]['is_compute'] and procs[102]['gpu_mem_mb'] == 4096
+
+    @pytest.mark.unit
+    def test_state_skips_rereading_known_processes(self, proc_root, temp_dir):
+        """A process seen before is classified from the state file, not re-read."""
+        session = "0::/user.slice/user-1001.slice/session-4.scope\n"
+        add_process(proc_root, 101, "python3", session, started_at=100, cmdline="python3 train.py")
+        state = temp_dir / "state.json"
+        detect_bare_metal.BareMetalDetector(proc_root=proc_root, state_file=state).detect()
+        assert json.loads(state.read_text()) == {"101:10000": {"container": None, "cmdline": "python3 train.py"}}
+
+        (proc_root / "101" / "cgroup").unlink()
+        (proc_root / "101" / "cmdline").unlink()
+        result = detect_bare_metal.BareMetalDetector(proc_root=proc_root, state_file=state).detect()
+        assert [p['pid'] for p in result['processes']] == [101]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Docker Wrapper Cache
+Tests the precomputed user -> group/slice cache and the wrapper's lookup of it
+"""
+
+import os
+import subprocess
+import importlib.util
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "docker_wrapper_cache", "/opt/ds01-infra/scripts/docker/docker-wrapper-cache.py")
+docker_wrapper_cache = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(docker_wrapper_cache)
+
+from get_resource_limits import ResourceLimitParser
+
+WRAPPER = "/opt/ds01-infra/scripts/docker/docker-wrapper.sh"
+
+
+class TestBuild:
+    """Tests for cache generation."""
+
+    @pytest.mark.unit
+    def test_entries_and_format(self, temp_dir, temp_config_file, monkeypatch):
+        """Members, overrides and home dirs are cached; overrides are left to the slow path."""
+        monkeypatch.setattr(docker_wrapper_cache.pwd, "getpwall", lambda: [])
+        home = temp_dir / "home"
+        (home / "h.baker@hertie-school.lan").mkdir(parents=True)
+
+        default, entries = docker_wrapper_cache.build_entries(ResourceLimitParser(temp_config_file), home)
+        by_name = {e['name']: e for e in entries}
+        assert default == 'student'
+        assert by_name['researcher1']['slice'] == "ds01-researchers-researcher1.slice"
+        assert by_name['h.baker@hertie-school.lan']['slice'] == "ds01-student-h_baker.slice"
+        assert 'h_baker' in by_name
+        assert (by_name['special_user']['group'], by_name['special_user']['slice']) == ('-', '-')
+
+        cache = temp_dir / "docker-wrapper.cache"
+        docker_wrapper_cache.write_cache(default, entries, cache)
+        lines = cache.read_text().splitlines()
+        assert lines[0].startswith("#") and lines[1] == "default\tstudent"
+        assert "user\tresearcher1\t-\tresearchers\tds01-researchers-researcher1.slice" in lines
+        assert oct(cache.stat().st_mode & 0o777) == "0o644"
+
+
+class TestWrapperLookup:
+    """Tests for docker-wrapper.sh reading the cache."""
+
+    def run_wrapper(self, temp_dir, cache_lines, *args):
+        fake = temp_dir / "docker"
+        fake.write_text("#!/bin/bash\nprintf '%s\\n' \"$@\"\n")
+        fake.chmod(0o755)
+        (temp_dir / "slices").mkdir(exist_ok=True)
+        (temp_dir / "slices" / "ds01-researcher-bob.slice").touch()
+        cache = temp_dir / "cache"
+        cache.write_text("# test\n" + "".join(line + "\n" for line in cache_lines))
+
+        script = open(WRAPPER).read()
+        for var, value in (("REAL_DOCKER", fake), ("WRAPPER_CACHE", cache),
+                           ("SLICE_DIR", temp_dir / "slices")):
+            script = script.replace(f'\n{var}="', f'\n{var}="{value}"\n_unused="', 1)
+        wrapper = temp_dir / "docker-wrapper.sh"
+        wrapper.write_text(script)
+        result = subprocess.run(["bash", str(wrapper), *args], capture_output=True, text=True)
+        return result.stdout.splitlines()
+
+    @pytest.mark.unit
+    def test_uid_hit_injects_cached_slice(self, temp_dir):
+        """The calling UID's cached group/slice and name are injected without get_resource_limits.py."""
+        out = self.run_wrapper(temp_dir, ["default\tstudent",
+                                          f"user\tbob\t{os.geteuid()}\tresearcher\tds01-researcher-bob.slice"],
+                               "run", "--rm", "img")
+        assert out == ["run", "--cgroup-parent=ds01-researcher-bob.slice", "--label", "ds01.user=bob",
+                       "--label", "ds01.managed=true", "--rm", "img"]
+
+    @pytest.mark.unit
+    def test_unknown_user_gets_default_group(self, temp_dir):
+        """Users not in the cache fall into the default group; devcontainer owners come from the path."""
+        out = self.run_wrapper(temp_dir, ["default\tstudent"], "create", "--label",
+                               "devcontainer.local_folder=/home/carol/proj", "img")
+        user = subprocess.run(["whoami"], capture_output=True, text=True).stdout.strip()
+        assert out[1] == f"--cgroup-parent=ds01-student-{user.replace('.', '_')}.slice"
+        assert out[2:6] == ["--label", "ds01.user=carol", "--label", "ds01.managed=devcontainer"]
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: GPU Allocator batch allocation
+Tests allocate_batch() planning with mocked Docker and nvidia-smi
+"""
+
+import pytest
+import importlib.util
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from gpu_claims import GPUClaimLedger
+
+
+def mig(gpu, device):
+    return {'profile': '1g.10gb', 'uuid': f'MIG-{gpu}-{device}', 'physical_gpu': str(gpu), 'device_id': str(device)}
+
+
+@pytest.fixture
+def allocator(temp_dir):
+    """GPUAllocatorSmart with GPU 0 full, GPUs 1-2 split into 4 MIG slots each."""
+    spec = importlib.util.spec_from_file_location(
+        "gpu_allocator_v2", "/opt/ds01-infra/scripts/docker/gpu_allocator_v2.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.COMMIT_BACKOFF = 0
+
+    allocator = module.GPUAllocatorSmart.__new__(module.GPUAllocatorSmart)
+    allocator.config = {'gpu_allocation': {'mig_instances_per_gpu': 4}}
+    allocator.claims = GPUClaimLedger(state_dir=temp_dir / "gpu-locks")
+    allocator._log_event = MagicMock()
+
+    limits = {
+        'student': {'max_mig_instances': 2, 'max_mig_per_container': 1},
+        'researcher': {'max_mig_instances': 8, 'max_mig_per_container': 8, 'allow_full_gpu': True},
+    }
+    allocator._get_user_limits = lambda user: limits.get(user.rstrip('0123456789'), limits['student'])
+
+    allocator.availability_checker = MagicMock()
+    allocator.availability_checker.mig_instances.return_value = {
+        f"{g}.{d}": mig(g, d) for g in (1, 2) for d in range(4)
+    }
+    allocator.availability_checker.physical_gpus.return_value = {
+        str(g): {'id': str(g), 'name': 'NVIDIA A100', 'uuid': f'GPU-{g}'} for g in range(3)
+    }
+    allocator.state_reader = MagicMock()
+    allocator.state_reader.get_all_allocations.return_value = {
+        "2.0": {'containers': ['busy._.9'], 'users': {'student9': 1}},
+    }
+    return allocator
+
+
+class TestAllocateBatch:
+    """Tests for GPUAllocatorSmart.allocate_batch()."""
+
+    @pytest.mark.unit
+    def test_one_scan_for_whole_batch(self, allocator):
+        """A batch reads Docker and nvidia-smi once per attempt, however many requests."""
+        requests = [{'user': f'student{i}', 'container': f'c{i}._.{i}'} for i in range(5)]
+        results = allocator.allocate_batch(requests)
+
+        assert [r['status'] for r in results] == ["SUCCESS"] * 5
+        assert allocator.state_reader.get_all_allocations.call_count == 1
+        assert allocator.availability_checker.mig_instances.call_count == 1
+        slots = [s for r in results for s in r['gpu_slots']]
+        assert len(set(slots)) == 5
+
+    @pytest.mark.unit
+    def test_packing_keeps_whole_gpus_free(self, allocator):
+        """Packing fills the partially used GPU before touching an empty one."""
+        requests = [{'user': f'student{i}', 'container': f'c{i}._.{i}'} for i in range(3)]
+        results = allocator.allocate_batch(requests, pack=True)
+
+        assert [r['gpu_slots'] for r in results] == [["2.1"], ["2.2"], ["2.3"]]
+        assert results[0]['docker_ids'] == ["MIG-2-1"]
+
+    @pytest.mark.unit
+    def test_spread_uses_least_allocated_gpu(self, allocator):
+        """Without packing the emptiest GPU is used first."""
+        results = allocator.allocate_batch([{'user': 'student1', 'container': 'c._.1'}], pack=False)
+        assert results[0]['gpu_slots'] == ["1.0"]
+
+    @pytest.mark.unit
+    def test_limits_apply_across_batch(self, allocator):
+        """Per-user totals include earlier requests in the same batch."""
+        requests = [
+            {'user': 'student1', 'container': 'a._.1'},
+            {'user': 'student1', 'container': 'b._.1'},
+            {'user': 'student1', 'container': 'c._.1'},
+            {'user': 'student2', 'container': 'd._.2', 'num_migs': 2},
+        ]
+        results = allocator.allocate_batch(requests)
+
+        assert results[0]['status'] == "SUCCESS"
+        assert results[1]['status'] == "SUCCESS"
+        assert results[2]['status'].startswith("EXCEEDS_TOTAL_LIMIT")
+        assert results[3]['status'].startswith("EXCEEDS_CONTAINER_LIMIT")
+
+    @pytest.mark.unit
+    def test_already_allocated(self, allocator):
+        """Containers with GPU labels are reported, not re-allocated."""
+        results = allocator.allocate_batch([{'user': 'student9', 'container': 'busy._.9'}])
+        assert results[0]['status'] == "ALREADY_ALLOCATED"
+        assert results[0]['gpu_slots'] == ["2.0"]
+
+    @pytest.mark.unit
+    def test_full_gpu_only_when_allowed(self, allocator):
+        """Full GPUs cover whole multiples after MIG slots, only for allowed users."""
+        allocator.state_reader.get_all_allocations.return_value.update({
+            f"1.{d}": {'containers': [f'm{d}._.9'], 'users': {'student9': 1}} for d in range(4)
+        })
+        requests = [
+            {'user': 'researcher1', 'container': 'big._.1', 'num_migs': 7},
+            {'user': 'researcher2', 'container': 'odd._.2', 'num_migs': 2},
+        ]
+        results = allocator.allocate_batch(requests)
+
+        assert results[0]['status'] == "SUCCESS"
+        assert results[0]['gpu_slots'] == ["2.1", "2.2", "2.3", "0"]
+        assert results[0]['mig_equiv'] == 7
+        assert results[1]['status'] == "NO_GPU_AVAILABLE"
+
+    @pytest.mark.unit
+    def test_all_or_nothing_claims_nothing_on_failure(self, allocator):
+        """One failing request aborts the whole batch."""
+        requests = [
+            {'user': 'student1', 'container': 'a._.1'},
+            {'user': 'student2', 'container': 'b._.2', 'num_migs': 3},
+        ]
+        results = allocator.allocate_batch(requests, all_or_nothing=True)
+
+        assert results[0]['status'].startswith("ABORTED")
+        assert results[1]['status'].startswith("EXCEEDS_CONTAINER_LIMIT")
+        assert allocator.claims.claimed_slots(allocator.claims.snapshot()) == []
+
+    @pytest.mark.unit
+    def test_best_effort_claims_successes(self, allocator):
+        """Best-effort mode claims what it can in one commit."""
+        requests = [
+            {'user': 'student1', 'container': 'a._.1'},
+            {'user': 'student2', 'container': 'b._.2', 'num_migs': 3},
+        ]
+        results = allocator.allocate_batch(requests)
+
+        assert results[0]['status'] == "SUCCESS"
+        claimed = allocator.claims.claimed_slots(allocator.claims.snapshot())
+        assert claimed == results[0]['gpu_slots']
+
+    @pytest.mark.unit
+    def test_claims_from_other_requests_respected(self, allocator):
+        """Slots claimed by in-flight single allocations are not reused."""
+        ledger = allocator.claims
+        ledger.commit(["2.1", "2.2", "2.3"], "other._.7", "student7", ledger.snapshot("student7"))
+
+        results = allocator.allocate_batch([{'user': 'student1', 'container': 'a._.1'}])
+        assert results[0]['gpu_slots'] == ["1.0"]
+
+    @pytest.mark.unit
+    def test_docker_rescanned_after_each_snapshot(self, allocator):
+        """A claim released after its container appeared in Docker is never planned again."""
+        ledger = allocator.claims
+        order = []
+        snapshot = ledger.snapshot
+        ledger.snapshot = lambda *users: order.append('snapshot') or snapshot(*users)
+        docker = {"2.0": {'containers': ['busy._.9'], 'users': {'student9': 1}}}
+        allocator.state_reader.get_all_allocations.side_effect = lambda: order.append('scan') or dict(docker)
+
+        # Between planning and commit a single request claims 2.1, its container
+        # shows up in Docker and the wrapper releases the claim
+        commit_many = ledger.commit_many
+
+        def racing_commit(entries, snap, all_or_nothing=False):
+            if not docker.get("2.1"):
+                commit_many([(["2.1"], "single._.7", "student7")], snapshot("student7"))
+                docker["2.1"] = {'containers': ['single._.7'], 'users': {'student7': 1}}
+                ledger.release("single._.7")
+            return commit_many(entries, snap, all_or_nothing)
+        ledger.commit_many = racing_commit
+
+        results = allocator.allocate_batch([{'user': 'student1', 'container': 'a._.1'}])
+        assert results[0]['status'] == "SUCCESS"
+        assert results[0]['gpu_slots'] == ["2.2"]
+        # Two attempts, each scanning Docker after its snapshot (release() takes one too)
+        assert order.count('scan') == 2
+        assert order[:2] == ['snapshot', 'scan'] and order[-2:] == ['snapshot', 'scan']
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: GPU Claims (per-physical-GPU lock shards)
+Tests optimistic commit, conflict detection and claim expiry
+"""
+
+import pytest
+import time
+import importlib.util
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from gpu_claims import GPUClaimLedger, gpu_shard, user_shard
+
+
+@pytest.fixture
+def ledger(temp_dir):
+    """Claim ledger in a temp directory."""
+    return GPUClaimLedger(state_dir=temp_dir / "gpu-locks")
+
+
+class TestShardNames:
+    """Tests for shard naming."""
+
+    @pytest.mark.unit
+    def test_gpu_shard_uses_physical_gpu(self):
+        """MIG slots share their physical GPU's shard."""
+        assert gpu_shard("1.2") == "gpu-1"
+        assert gpu_shard("1.0") == "gpu-1"
+        assert gpu_shard("0") == "gpu-0"
+
+    @pytest.mark.unit
+    def test_user_shard_is_filesystem_safe(self):
+        """Usernames with @ and . map to safe file names."""
+        assert user_shard("h.baker@hertie-school.lan") == "user-h-baker-hertie-school-lan"
+
+
+class TestOptimisticCommit:
+    """Tests for GPUClaimLedger.commit()."""
+
+    @pytest.mark.unit
+    def test_commit_records_claim(self, ledger):
+        """A commit against a fresh snapshot claims the slot."""
+        snapshot = ledger.snapshot("alice")
+        assert ledger.commit(["1.2"], "proj._.1001", "alice", snapshot)
+
+        after = ledger.snapshot("alice")
+        assert after["gpu-1"]["generation"] == 1
+        assert after["gpu-1"]["claims"]["1.2"]["container"] == "proj._.1001"
+        assert ledger.claimed_slots(after) == ["1.2"]
+        assert ledger.claimed_slots(after, exclude_container="proj._.1001") == []
+
+    @pytest.mark.unit
+    def test_same_slot_conflicts(self, ledger):
+        """Two requests planned on the same snapshot cannot claim the same slot."""
+        snap_a = ledger.snapshot("alice")
+        snap_b = ledger.snapshot("bob")
+        assert ledger.commit(["1.2"], "a._.1001", "alice", snap_a)
+        assert not ledger.commit(["1.2"], "b._.1002", "bob", snap_b)
+
+    @pytest.mark.unit
+    def test_moved_gpu_generation_conflicts(self, ledger):
+        """Any commit on the same physical GPU since the snapshot forces a re-plan."""
+        snap_a = ledger.snapshot("alice")
+        snap_b = ledger.snapshot("bob")
+        assert ledger.commit(["1.2"], "a._.1001", "alice", snap_a)
+        assert not ledger.commit(["1.3"], "b._.1002", "bob", snap_b)
+        assert ledger.commit(["1.3"], "b._.1002", "bob", ledger.snapshot("bob"))
+
+    @pytest.mark.unit
+    def test_claimed_and_released_slot_conflicts(self, ledger):
+        """A slot claimed and released again (now in a Docker label) is not handed out twice."""
+        stale = ledger.snapshot("bob")
+        ledger.commit(["1.2"], "a._.1001", "alice", ledger.snapshot("alice"))
+        ledger.release("a._.1001")
+        assert ledger.claimed_slots(ledger.snapshot()) == []
+        assert not ledger.commit(["1.2"], "b._.1002", "bob", stale)
+
+    @pytest.mark.unit
+    def test_claim_files_not_world_writable(self, ledger):
+        """Claim directory and shard files are group-only (docker group)."""
+        ledger.commit(["1.2"], "a._.1001", "alice", ledger.snapshot("alice"))
+        assert ledger.state_dir.stat().st_mode & 0o7777 == 0o2770
+        for path in ledger.state_dir.iterdir():
+            assert path.stat().st_mode & 0o007 == 0
+
+    @pytest.mark.unit
+    def test_different_gpus_are_independent(self, ledger):
+        """Allocations on different physical GPUs never conflict."""
+        snapshot = ledger.snapshot()
+        assert ledger.commit(["1.0"], "a._.1001", "alice", snapshot)
+        assert ledger.commit(["2.0"], "b._.1002", "bob", snapshot)
+        assert ledger.commit(["0"], "c._.1003", "carol", snapshot)
+
+    @pytest.mark.unit
+    def test_same_user_concurrent_commit_conflicts(self, ledger):
+        """A second request by the same user must re-check limits."""
+        snap_1 = ledger.snapshot("alice")
+        snap_2 = ledger.snapshot("alice")
+        assert ledger.commit(["1.0"], "one._.1001", "alice", snap_1)
+        assert not ledger.commit(["2.0"], "two._.1001", "alice", snap_2)
+
+    @pytest.mark.unit
+    def test_user_pending_excludes_known_containers(self, ledger):
+        """Claims of containers already visible in Docker are not double counted."""
+        ledger.commit(["1.0", "1.1"], "one._.1001", "alice", ledger.snapshot("alice"))
+        ledger.commit(["2.0"], "two._.1001", "alice", ledger.snapshot("alice"))
+
+        snapshot = ledger.snapshot("alice")
+        pending = ledger.user_pending(snapshot, "alice", ["two._.1001"])
+        assert pending == {"one._.1001": ["1.0", "1.1"]}
+
+    @pytest.mark.unit
+    def test_claims_expire(self, temp_dir):
+        """Claims older than the TTL are ignored."""
+        ledger = GPUClaimLedger(state_dir=temp_dir / "gpu-locks", ttl=1)
+        ledger.commit(["1.0"], "a._.1001", "alice", ledger.snapshot("alice"))
+        assert ledger.claimed_slots(ledger.snapshot()) == ["1.0"]
+
+        time.sleep(1.1)
+        assert ledger.claimed_slots(ledger.snapshot()) == []
+
+    @pytest.mark.unit
+    def test_release_drops_claims(self, ledger):
+        """release() removes every claim of the container."""
+        ledger.commit(["1.0", "2.0"], "a._.1001", "alice", ledger.snapshot("alice"))
+        released = ledger.release("a._.1001")
+
+        assert sorted(released) == ["1.0", "2.0"]
+        assert released["1.0"]["user"] == "alice"
+        assert ledger.claimed_slots(ledger.snapshot()) == []
+        assert ledger.release("a._.1001") == {}
+
+
+class TestAllocatorRetry:
+    """Tests for GPUAllocatorSmart._plan_and_commit()."""
+
+    @pytest.fixture
+    def allocator(self, ledger):
+        spec = importlib.util.spec_from_file_location(
+            "gpu_allocator_v2", "/opt/ds01-infra/scripts/docker/gpu_allocator_v2.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.COMMIT_BACKOFF = 0
+
+        allocator = module.GPUAllocatorSmart.__new__(module.GPUAllocatorSmart)
+        allocator.claims = ledger
+        allocator._log_event = MagicMock()
+        return allocator
+
+    @pytest.mark.unit
+    def test_replans_after_lost_race(self, allocator, ledger):
+        """A conflicting claim between plan and commit triggers a re-plan."""
+        calls = []
+
+        def plan(snapshot):
+            claimed = ledger.claimed_slots(snapshot)
+            slot = "1.0" if "1.0" not in claimed else "1.1"
+            if not calls:
+                # Another request wins 1.0 after our snapshot
+                ledger.commit(["1.0"], "other._.1002", "bob", ledger.snapshot("bob"))
+            calls.append(slot)
+            return [slot], (slot, "SUCCESS"), "ALLOCATED"
+
+        result = allocator._plan_and_commit("alice", "mine._.1001", plan,
+                                            reject=lambda reason: (None, reason))
+
+        assert result == ("1.1", "SUCCESS")
+        assert calls == ["1.0", "1.1"]
+        allocator._log_event.assert_called_once_with(
+            "ALLOCATED", "alice", "mine._.1001", "1.1", "ALLOCATED")
+
+    @pytest.mark.unit
+    def test_rejection_skips_commit(self, allocator, ledger):
+        """Rejected plans return immediately without claiming."""
+        result = allocator._plan_and_commit(
+            "alice", "mine._.1001",
+            lambda snapshot: ([], (None, "USER_AT_LIMIT (1/1)"), None),
+            reject=lambda reason: (None, reason))
+
+        assert result == (None, "USER_AT_LIMIT (1/1)")
+        assert ledger.claimed_slots(ledger.snapshot()) == []
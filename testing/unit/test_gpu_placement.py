@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: GPU Allocator topology-aware multi-MIG placement
+Tests allocate_multi_gpu() slot choice with mocked availability and topology
+"""
+
+import pytest
+import importlib.util
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from gpu_claims import GPUClaimLedger
+
+# GPUs 0-1 share an NVLink, 2 sits on GPU 0's PCIe switch, 3 is on the other socket
+TOPOLOGY = {
+    'links': {
+        '0': {'1': 'NV12', '2': 'PIX', '3': 'SYS'},
+        '1': {'0': 'NV12', '2': 'PXB', '3': 'SYS'},
+        '2': {'0': 'PIX', '1': 'PXB', '3': 'SYS'},
+        '3': {'0': 'SYS', '1': 'SYS', '2': 'SYS'},
+    },
+    'numa': {'0': '0', '1': '0', '2': '0', '3': '1'},
+}
+
+
+@pytest.fixture
+def allocator(temp_dir):
+    """GPUAllocatorSmart over 4 GPUs x 4 MIG slots; set free slots per test."""
+    spec = importlib.util.spec_from_file_location(
+        "gpu_allocator_v2", "/opt/ds01-infra/scripts/docker/gpu_allocator_v2.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.gpu_topology = lambda: TOPOLOGY
+
+    allocator = module.GPUAllocatorSmart.__new__(module.GPUAllocatorSmart)
+    allocator.module = module
+    allocator.config = {'gpu_allocation': {'mig_instances_per_gpu': 4}}
+    allocator.claims = GPUClaimLedger(state_dir=temp_dir / "gpu-locks")
+    allocator._log_event = MagicMock()
+    allocator._get_user_limits = lambda user: {'max_mig_instances': 8, 'max_mig_per_container': 8}
+    allocator.state_reader = MagicMock()
+    allocator.state_reader.get_container_gpu.return_value = None
+    allocator.state_reader.get_user_allocations.return_value = []
+    allocator.availability_checker = MagicMock()
+
+    def free(*slots):
+        allocator.availability_checker.get_available_gpus.return_value = {
+            slot: {'slot': slot, 'uuid': f'MIG-{slot}', 'physical_gpu': slot.split('.')[0]} for slot in slots
+        }
+    allocator.free = free
+    return allocator
+
+
+class TestMultiMigPlacement:
+    """Tests for GPUAllocatorSmart._place_multi_mig() via allocate_multi_gpu()."""
+
+    @pytest.mark.unit
+    def test_same_gpu_preferred(self, allocator):
+        """Slices stay on one GPU - the fullest one that fits - instead of the lowest slot IDs."""
+        allocator.free("0.3", "1.2", "1.3", "2.0", "2.1", "2.2", "2.3", "3.1", "3.2", "3.3")
+        slots, equiv, status = allocator.allocate_multi_gpu("researcher1", "proj._.1001", 3)
+        assert (slots, equiv, status) == (["3.1", "3.2", "3.3"], 3, "SUCCESS")
+        assert allocator.placement['locality'] == 1.0
+        allocator.availability_checker.suggest_gpu_for_user.assert_not_called()
+        assert "locality: same-gpu 1.0" in allocator._log_event.call_args[0][4]
+
+    @pytest.mark.unit
+    def test_closest_gpus_when_split(self, allocator):
+        """A split request takes the best-linked GPUs, not the ones with the most free slots."""
+        allocator.free("0.2", "0.3", "1.3", "2.2", "2.3", "3.0", "3.1")
+        slots, _, status = allocator.allocate_multi_gpu("researcher1", "proj._.1001", 3)
+        assert status == "SUCCESS" and sorted(slots) == ["0.2", "0.3", "1.3"]
+        assert (allocator.placement['link'], allocator.placement['locality']) == ("NV12", 0.9)
+
+        # Slots claimed above are skipped; without topology fewer GPUs still win
+        allocator.module.gpu_topology = lambda: {}
+        slots, _, _ = allocator.allocate_multi_gpu("researcher1", "proj2._.1001", 4)
+        assert slots == ["2.2", "2.3", "3.0", "3.1"]
+        assert (allocator.placement['link'], allocator.placement['locality']) == ("unknown", None)
+
+    @pytest.mark.unit
+    def test_falls_back_to_suggestions(self, allocator):
+        """Too few free MIG slots leaves the request to the slot-by-slot path."""
+        allocator.free("0.1")
+        allocator.availability_checker.suggest_gpu_for_user.return_value = {
+            'success': False, 'error': 'No GPUs available (all allocated)'}
+        assert allocator.allocate_multi_gpu("researcher1", "proj._.1001", 2) == \
+            ([], 0, 'No GPUs available (all allocated)')
+        assert allocator.placement is None
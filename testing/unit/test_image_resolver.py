@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Image Resolver
+Tests refresh policies, the pull index and prefetch ranking with mocked Docker
+"""
+
+import os
+import json
+import time
+import subprocess
+import pytest
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+import image_resolver
+import root_state
+from image_resolver import ImageResolver, prefetch_candidates
+
+DAY = 86400
+
+
+class FakeDocker:
+    """Local image store answering `docker image inspect`."""
+
+    def __init__(self):
+        self.images = {}   # ref -> (id, LastTagTime[, RepoDigests])
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        ref = args[-1]
+        if ref not in self.images:
+            return subprocess.CompletedProcess(args, 1, "", "No such image")
+        image_id, tag_time, *digests = self.images[ref]
+        if args[-2] == '{{.Id}}':
+            out = image_id
+        else:
+            out = f"{image_id}|{tag_time}|{json.dumps(digests[0] if digests else [])}"
+        return subprocess.CompletedProcess(args, 0, out + "\n", "")
+
+
+@pytest.fixture
+def resolver(temp_dir, monkeypatch):
+    monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid())  # Stand in for root
+    resolver = ImageResolver(index_path=temp_dir / "image-index.json")
+    resolver._docker = FakeDocker()
+    resolver.pulls = []
+
+    def fake_run(cmd, **kwargs):
+        image = cmd[-1]
+        resolver.pulls.append(image)
+        if image.startswith("offline/"):
+            return subprocess.CompletedProcess(cmd, 1, "", "registry unreachable")
+        resolver._docker.images[image] = ("sha256:new", "2026-01-01T00:00:00Z", [f"{image}@sha256:d"])
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(image_resolver.subprocess, "run", fake_run)
+    return resolver
+
+
+class TestRefreshPolicy:
+    """Tests for needs_pull()/resolve() under each policy."""
+
+    @pytest.mark.unit
+    def test_missing_image_is_pulled_and_indexed(self, resolver):
+        """Every policy pulls a missing image; the pull is recorded."""
+        assert resolver.resolve("aimehub/pytorch", "never", 7 * DAY) == 'pulled'
+        index = json.loads(resolver.index_path.read_text())
+        assert index["aimehub/pytorch"]["id"] == "sha256:new"
+        assert resolver.index_path.stat().st_mode & 0o777 == 0o644
+
+    @pytest.mark.unit
+    def test_present_image_skips_registry(self, resolver):
+        """A fresh local image is used without pulling."""
+        resolver._docker.images["aimehub/pytorch"] = ("sha256:a", "2026-01-01T00:00:00Z")
+        resolver._record_pull("aimehub/pytorch", "sha256:a")
+        for policy in ("never", "if-older-than"):
+            assert resolver.resolve("aimehub/pytorch", policy, 7 * DAY) == 'present'
+        assert resolver.pulls == []
+        assert resolver.resolve("aimehub/pytorch", "always", 7 * DAY) == 'pulled'
+
+    @pytest.mark.unit
+    def test_if_older_than_uses_index_then_tag_time(self, resolver):
+        """Index age counts while the ID matches; otherwise Docker's tag time."""
+        digests = ["aimehub/pytorch@sha256:d"]
+        resolver._docker.images["aimehub/pytorch"] = ("sha256:a", "2020-01-01T00:00:00.123456789Z")
+        resolver._record_pull("aimehub/pytorch", "sha256:a")
+        assert resolver.needs_pull("aimehub/pytorch", "if-older-than", 7 * DAY)[0] is False
+
+        resolver._docker.images["aimehub/pytorch"] = ("sha256:b", "2020-01-01T00:00:00.123456789Z", digests)
+        pull, reason = resolver.needs_pull("aimehub/pytorch", "if-older-than", 7 * DAY)
+        assert pull and "days old" in reason
+
+        resolver._docker.images["aimehub/pytorch"] = ("sha256:b", "0001-01-01T00:00:00Z", digests)
+        assert resolver.needs_pull("aimehub/pytorch", "if-older-than", 7 * DAY)[0] is True
+        assert resolver.needs_pull("aimehub/pytorch", "if-older-than", -1)[0] is False
+
+    @pytest.mark.unit
+    def test_failed_refresh_falls_back_to_local(self, resolver):
+        """Registry failure keeps a local copy usable, but not a missing image."""
+        resolver._docker.images["offline/pytorch"] = ("sha256:a", "2020-01-01T00:00:00Z",
+                                                      ["offline/pytorch@sha256:d"])
+        assert resolver.resolve("offline/pytorch", "always", 7 * DAY) == 'stale'
+        assert resolver.resolve("offline/tensorflow", "never", 7 * DAY) == 'failed'
+
+        resolver._docker.images["offline/keras"] = ("sha256:x", "2026-01-01T00:00:00Z")
+        assert resolver.resolve("offline/keras", "never", 7 * DAY) == 'failed'
+
+    @pytest.mark.unit
+    def test_retagged_image_is_pulled(self, resolver):
+        """A fresh-looking local tag of another repository's image is replaced under every policy."""
+        resolver._docker.images["aimehub/pytorch:2.1"] = ("sha256:evil", "2026-10-01T00:00:00Z",
+                                                          ["someone/backdoor@sha256:e"])
+        pull, reason = resolver.needs_pull("aimehub/pytorch:2.1", "never", -1)
+        assert pull and reason == image_resolver.UNTRUSTED
+        assert resolver.resolve("aimehub/pytorch:2.1", "never", -1) == 'pulled'
+        assert resolver.pulls == ["aimehub/pytorch:2.1"]
+
+        resolver._docker.images["aimehub/pytorch:2.1"] = ("sha256:ok", "2026-10-01T00:00:00Z",
+                                                          ["docker.io/aimehub/pytorch@sha256:d"])
+        assert resolver.needs_pull("aimehub/pytorch:2.1", "never", -1)[0] is False
+
+    @pytest.mark.unit
+    def test_index_only_trusted_from_root(self, resolver, monkeypatch):
+        """An index other users could have written is ignored, and only root writes it."""
+        resolver._docker.images["aimehub/pytorch"] = ("sha256:a", "0001-01-01T00:00:00Z")
+        resolver._record_pull("aimehub/pytorch", "sha256:a")
+        assert resolver.load_index()
+
+        os.chmod(resolver.index_path, 0o666)
+        assert resolver.load_index() == {}
+        assert resolver.needs_pull("aimehub/pytorch", "never", -1)[0] is True
+
+        resolver.index_path.unlink()
+        monkeypatch.setattr(root_state, "OWNER_UID", os.geteuid() + 1)
+        resolver._record_pull("aimehub/pytorch", "sha256:a")
+        assert not resolver.index_path.exists()
+
+    @pytest.mark.unit
+    def test_resolve_reuses_callers_decision(self, resolver):
+        """A needs_pull() result passed in is not recomputed (one image inspect per create)."""
+        decision = resolver.needs_pull("aimehub/pytorch", "never", 7 * DAY)
+        assert resolver.resolve("aimehub/pytorch", "never", 7 * DAY, decision=decision) == 'pulled'
+        assert len([a for a in resolver._docker.calls if a[-2] != '{{.Id}}']) == 1
+
+
+class TestPrefetchCandidates:
+    """Tests for prefetch ranking from events.jsonl."""
+
+    @pytest.mark.unit
+    def test_ranks_catalog_images_by_creates(self, temp_dir):
+        """Most-created catalog images first; non-catalog images skipped."""
+        ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        counts = {"aimehub/pytorch": 3, "aimehub/tensorflow": 1, "ds01-alice/custom": 5}
+        with open(temp_dir / "events.jsonl", "w") as f:
+            for image, count in counts.items():
+                for _ in range(count):
+                    f.write(json.dumps({"ts": ts, "event": "container.created", "image": image}) + "\n")
+
+        catalog = {"aimehub/pytorch", "aimehub/tensorflow"}
+        assert prefetch_candidates(5, 30, events_dir=temp_dir, catalog=catalog) == \
+            ["aimehub/pytorch", "aimehub/tensorflow"]
+        assert prefetch_candidates(1, 30, events_dir=temp_dir, catalog=None) == ["ds01-alice/custom"]
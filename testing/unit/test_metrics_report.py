@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Metrics Report
+Tests one-pass day aggregation, cached day summaries and multi-day rollups
+"""
+
+import time
+import importlib.util
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "metrics_report", "/opt/ds01-infra/scripts/monitoring/metrics-report.py")
+metrics_report = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(metrics_report)
+
+from ds01_metrics import append_records
+
+Stat = metrics_report.Stat
+
+
+def write_day(metrics_dir, day, util_values, user_mem=(500, 300), hour=1):
+    """One GPU, host and container sample per minute; two GPU processes of alice."""
+    base = time.mktime(time.strptime(day, "%Y-%m-%d")) + hour * 3600
+    records = []
+    for i, util in enumerate(util_values):
+        ts = base + i * 60
+        records += [
+            {'ts': ts, 'kind': 'gpu', 'index': 0, 'name': 'A100', 'util': util, 'mem_used': 1000,
+             'mem_total': 40960, 'temp': 40, 'power': 100},
+            {'ts': ts, 'kind': 'gpu_proc', 'pid': 1, 'uid': 1000, 'user': 'alice', 'mem': user_mem[0]},
+            {'ts': ts, 'kind': 'gpu_proc', 'pid': 2, 'uid': 1000, 'user': 'alice', 'mem': user_mem[1]},
+            {'ts': ts, 'kind': 'host', 'cpu': 10, 'load1': 1.0, 'mem_total': 1000, 'mem_used': 500},
+            {'ts': ts, 'kind': 'container', 'name': 'proj._.1000', 'user': 'alice', 'cpu': util, 'mem': 200},
+            {'ts': ts, 'kind': 'disk', 'mount': '/', 'total_gb': 100, 'used_gb': i, 'pct': i},
+        ]
+    append_records(records, metrics_dir)
+
+
+class TestStat:
+    """Tests for the bounded-memory accumulator."""
+
+    @pytest.mark.unit
+    def test_quantiles_and_merge(self):
+        """p95 within histogram precision; merging equals adding everything to one Stat."""
+        a, b, whole = Stat(), Stat(), Stat()
+        for v in range(1, 1001):
+            (a if v % 2 else b).add(v)
+            whole.add(v)
+        a.merge(b)
+        assert a.count == 1000 and a.mean == 500.5 and a.max == 1000
+        assert abs(a.quantile(0.95) - 950) < 950 * 0.02
+        assert a.quantile(0.95) == whole.quantile(0.95)
+        assert len(a.buckets) < 400
+        assert Stat.from_json(a.to_json()['_stat']).summary() == a.summary()
+
+
+class TestDaySummary:
+    """Tests for day aggregation and the summary cache."""
+
+    @pytest.mark.unit
+    def test_one_pass_summary(self, temp_dir):
+        """Per-GPU, per-user (processes summed per sample) and per-container stats."""
+        metrics = temp_dir / "metrics"
+        metrics.mkdir()
+        write_day(metrics, "2026-10-12", [0, 50, 100])
+        summary = metrics_report.day_summary("2026-10-12", metrics, temp_dir / "summaries")
+
+        assert summary['samples']['gpu'] == 3 and summary['samples']['gpu_proc'] == 3
+        assert summary['gpus']['0']['util'].summary()['mean'] == 50.0
+        assert summary['users']['alice']['gpu_mem'].max == 800
+        assert summary['containers']['proj._.1000']['cpu'].max == 100
+        assert summary['disks']['/']['pct'] == 2 and summary['disks']['/']['peak_pct'].max == 2
+        markdown = metrics_report.render_markdown(summary)
+        assert "# 📊 Daily Server Performance Report" in markdown and "| alice | 800 MB |" in markdown
+
+    @pytest.mark.unit
+    def test_cached_until_segment_changes(self, temp_dir, monkeypatch):
+        """A cached summary is reused (even after pruning) unless the segment grew."""
+        metrics, cache = temp_dir / "metrics", temp_dir / "summaries"
+        metrics.mkdir()
+        write_day(metrics, "2026-10-12", [10])
+        metrics_report.day_summary("2026-10-12", metrics, cache)
+
+        reads = []
+        real = metrics_report.read_samples
+        monkeypatch.setattr(metrics_report, "read_samples", lambda **kw: reads.append(1) or real(**kw))
+        assert metrics_report.day_summary("2026-10-12", metrics, cache)['samples']['gpu'] == 1
+        assert reads == []
+
+        write_day(metrics, "2026-10-12", [20], hour=2)
+        assert metrics_report.day_summary("2026-10-12", metrics, cache)['samples']['gpu'] == 2
+        assert reads == [1]
+
+        (metrics / "2026-10-12.jsonl").unlink()
+        assert metrics_report.day_summary("2026-10-12", metrics, cache)['samples']['gpu'] == 2
+        assert metrics_report.day_summary("2026-10-13", metrics, cache) is None
+
+
+class TestRollup:
+    """Tests for multi-day rollups from day summaries."""
+
+    @pytest.mark.unit
+    def test_week_merges_days(self, temp_dir):
+        """Stats and sample counts add up across days; days without data are skipped."""
+        metrics = temp_dir / "metrics"
+        metrics.mkdir()
+        write_day(metrics, "2026-10-12", [10, 20])
+        write_day(metrics, "2026-10-14", [90], user_mem=(1000, 1000))
+        week = metrics_report.rollup("2026-10-12", "2026-10-18", metrics, temp_dir / "summaries")
+
+        assert week['days'] == 2 and week['start'] == "2026-10-12" and week['end'] == "2026-10-18"
+        assert week['samples']['gpu'] == 3
+        util = week['gpus']['0']['util']
+        assert util.count == 3 and util.mean == 40 and util.max == 90
+        assert week['users']['alice']['gpu_mem'].max == 2000
+        assert week['disks']['/']['used_gb'] == 0   # Latest snapshot (last day)
+        rendered = metrics_report.render_json(week)
+        assert rendered['gpus']['0']['util']['samples'] == 3
+        assert "**Period:** 2026-10-12 to 2026-10-18 (2 days with data)" in metrics_report.render_markdown(week)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Metrics Sampler
+Tests /proc and cgroup sampling against fake trees, and segment output
+"""
+
+import json
+import time
+import importlib.util
+import subprocess
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "metrics_sampler", "/opt/ds01-infra/scripts/monitoring/metrics-sampler.py")
+metrics_sampler = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(metrics_sampler)
+
+from ds01_metrics import read_samples, recent, day_of, segment_path
+
+TICKS = 100  # SC_CLK_TCK on Linux
+CONTAINER_ID = "cd" * 32
+
+
+def write_proc(root, uptime, cpu_line, procs):
+    """Host counters plus /proc/<pid>/stat for (pid, cpu_ticks, started_at, rss_pages)."""
+    (root / "uptime").write_text(f"{uptime:.2f} 0.00\n")
+    (root / "stat").write_text(f"cpu  {cpu_line}\ncpu0 0 0 0 0\n")
+    (root / "loadavg").write_text("1.50 1.00 0.50 2/300 1234\n")
+    (root / "meminfo").write_text("MemTotal: 16777216 kB\nMemFree: 4194304 kB\nMemAvailable: 8388608 kB\n"
+                                  "Buffers: 1048576 kB\nCached: 2097152 kB\nSReclaimable: 0 kB\n"
+                                  "SwapTotal: 2097152 kB\nSwapFree: 1048576 kB\n")
+    for pid, cpu_ticks, started_at, rss_pages in procs:
+        d = root / str(pid)
+        d.mkdir(exist_ok=True)
+        rest = ["S", "1"] + ["0"] * 9 + [str(cpu_ticks), "0"] + ["0"] * 6 + [str(started_at * TICKS), "0", str(rss_pages)]
+        (d / "stat").write_text(f"{pid} (python) " + " ".join(rest) + "\n")
+
+
+@pytest.fixture
+def sampler(temp_dir, monkeypatch):
+    proc = temp_dir / "proc"
+    proc.mkdir()
+    monkeypatch.setattr(metrics_sampler, "MIN_UID", 0)
+    monkeypatch.setattr(metrics_sampler.os, "sysconf",
+                        lambda name: TICKS if name == 'SC_CLK_TCK' else 4096)
+    config = dict(metrics_sampler.DEFAULT_CONFIG, ring_size=3, disk_mounts=[str(temp_dir)])
+    return metrics_sampler.MetricsSampler(config, metrics_dir=temp_dir / "metrics",
+                                          proc_root=proc, cgroup_root=temp_dir / "cgroup",
+                                          disk_index_dir=temp_dir / "disk-usage")
+
+
+class TestHostSampling:
+    """Tests for /proc host and per-user records."""
+
+    @pytest.mark.unit
+    def test_cpu_is_delta_between_samples(self, sampler):
+        """First sample has no CPU %; the next one uses counter deltas."""
+        proc = sampler.proc_root
+        write_proc(proc, 1000, "100 0 100 800 0 0 0 0", [(101, 500, 10, 256)])
+        first = sampler.sample_host(1)
+        assert first[0]['cpu'] is None and first[1]['cpu'] is None
+        assert first[0]['mem_total'] == 16384 and first[0]['mem_used'] == 9216
+        assert first[0]['swap_used'] == 1024 and first[0]['load1'] == 1.5
+
+        # 10s later: pid 101 used 2s of CPU, pid 102 started in between with 1s
+        write_proc(proc, 1010, "250 0 250 1300 0 0 0 0", [(101, 700, 10, 256), (102, 100, 1005, 512)])
+        host, user = sampler.sample_host(2)
+        assert host['cpu'] == 37.5
+        assert user['cpu'] == 30.0 and user['procs'] == 2 and user['mem'] == 3.0
+
+
+class TestContainerSampling:
+    """Tests for cgroup v2 container records."""
+
+    @pytest.mark.unit
+    def test_cgroup_counters(self, sampler, monkeypatch):
+        """Scopes are found under slices; CPU % from usage_usec, memory without page cache."""
+        scope = sampler.cgroup_root / "ds01.slice" / "ds01-student.slice" / f"docker-{CONTAINER_ID}.scope"
+        scope.mkdir(parents=True)
+        (scope / "memory.current").write_text(str(300 * 1024 * 1024))
+        (scope / "memory.stat").write_text(f"anon 1\ninactive_file {100 * 1024 * 1024}\n")
+        (scope / "pids.current").write_text("7\n")
+        (scope / "memory.max").write_text(f"{1024 * 1024 * 1024}\n")
+        (scope / "io.stat").write_text("8:0 rbytes=4096 wbytes=8192 rios=1 wios=2\n")
+        monkeypatch.setattr(sampler, "_run", lambda *cmd: f"{CONTAINER_ID}|proj._.1000|alice\n")
+        clock = [100.0, 110.0]
+        monkeypatch.setattr(metrics_sampler.time, "monotonic", lambda: clock.pop(0) if clock else 110.0)
+
+        (scope / "cpu.stat").write_text("usage_usec 1000000\n")
+        first, = sampler.sample_container(1)
+        assert first['cpu'] is None and first['mem'] == 200.0 and first['pids'] == 7
+        (scope / "cpu.stat").write_text("usage_usec 16000000\n")
+        second, = sampler.sample_container(2)
+        assert second == {'ts': 2, 'kind': 'container', 'id': CONTAINER_ID[:12], 'name': 'proj._.1000',
+                          'user': 'alice', 'cpu': 150.0, 'mem': 200.0, 'mem_limit': 1024.0, 'pids': 7,
+                          'blk_read': 4096, 'blk_write': 8192, 'net_rx': None, 'net_tx': None}
+
+
+class TestSegments:
+    """Tests for segment files and the ring buffer."""
+
+    @pytest.mark.unit
+    def test_sample_writes_segments_and_ring(self, sampler, monkeypatch):
+        """Records land in the day segment and latest.json keeps the last ring_size per kind."""
+        write_proc(sampler.proc_root, 1000, "1 0 1 8 0 0 0 0", [])
+        monkeypatch.setattr(metrics_sampler.subprocess, "run",
+                            lambda cmd, **kw: subprocess.CompletedProcess(cmd, 1, "", ""))
+        sampler.metrics_dir.mkdir()
+        for _ in range(4):
+            sampler.sample()
+
+        kinds = [rec['kind'] for rec in read_samples(metrics_dir=sampler.metrics_dir)]
+        assert kinds.count('host') == 4 and kinds.count('disk') == 4 and 'gpu' not in kinds
+        assert len(recent('host', metrics_dir=sampler.metrics_dir)) == 3
+        latest = json.loads((sampler.metrics_dir / "latest.json").read_text())
+        assert set(latest['samples']) == {'gpu', 'gpu_proc', 'gpu_container', 'mig', 'host', 'user', 'container', 'disk', 'home'}
+
+    @pytest.mark.unit
+    def test_home_usage_once_per_index_update(self, sampler):
+        """Disk-usage index summaries become home records only when they were re-indexed."""
+        index = sampler.disk_index_dir
+        index.mkdir()
+        summary = {'user': 'alice', 'updated': 100, 'home_bytes': 3 * 1024 ** 3,
+                   'workspace_bytes': 1024 ** 3, 'home_files': 42, 'quota': None}
+        (index / "alice.json").write_text(json.dumps(summary))
+        [home] = [r for r in sampler.sample_disk(1) if r['kind'] == 'home']
+        assert (home['user'], home['home_gb'], home['workspace_gb'], home['quota_gb']) == ('alice', 3.0, 1.0, None)
+        assert not [r for r in sampler.sample_disk(2) if r['kind'] == 'home']
+        (index / "alice.json").write_text(json.dumps(dict(summary, updated=200)))
+        assert len([r for r in sampler.sample_disk(3) if r['kind'] == 'home']) == 1
+
+    @pytest.mark.unit
+    def test_prune_keeps_retention_window(self, sampler):
+        """Segments past the configured retention go; recent ones and summaries stay."""
+        sampler.metrics_dir.mkdir()
+        old, fresh = day_of(time.time() - 40 * 86400), day_of(time.time() - 86400)
+        for day in (old, fresh):
+            segment_path(day, sampler.metrics_dir).write_text("{}\n")
+        (sampler.metrics_dir / "summaries").mkdir()
+
+        assert sampler.prune() == 1
+        assert sorted(p.name for p in sampler.metrics_dir.iterdir()) == [f"{fresh}.jsonl", "summaries"]
+
+
+class TestGpuSampling:
+    """Tests for GPU/MIG records and the shared-memory ring."""
+
+    @pytest.mark.unit
+    def test_mig_instances_and_ring(self, sampler, temp_dir, monkeypatch):
+        """MIG memory comes from compute processes, attributed to containers; samples reach the ring."""
+        from metrics_ring import RingWriter, RingReader
+        outputs = {
+            '--query-gpu': "0, GPU-aaa, NVIDIA A100, [N/A], [N/A], 9000, 40960, 41, 60.5, 250.00, Enabled\n",
+            '--query-compute-apps=pid,gpu_uuid,used_memory': "4242, MIG-bbb, 8000\n4243, MIG-bbb, 1000\n",
+            '-L': ("GPU 0: NVIDIA A100 (UUID: GPU-aaa)\n"
+                   "  MIG 3g.20gb     Device  0: (UUID: MIG-bbb)\n"
+                   "  MIG 3g.20gb     Device  1: (UUID: MIG-ccc)\n"),
+        }
+        monkeypatch.setattr(sampler, "_run", lambda *cmd: next(
+            out for flag, out in outputs.items() if cmd[1].startswith(flag)))
+        (sampler.proc_root / "4242").mkdir()
+        (sampler.proc_root / "4242" / "cgroup").write_text(
+            f"0::/ds01.slice/ds01-students.slice/ds01-students-alice.slice/docker-{CONTAINER_ID}.scope\n")
+        sampler._container_names = {CONTAINER_ID[:12]: ("train._.1001", "alice")}
+
+        records = sampler.sample_gpu(5)
+        gpu = records[0]
+        assert gpu['util'] is None and gpu['mig'] is True and gpu['mem_used'] == 9000
+        procs = [r for r in records if r['kind'] == 'gpu_proc']
+        assert [p['container'] for p in procs] == [CONTAINER_ID[:12], None]
+        migs = [r for r in records if r['kind'] == 'mig']
+        assert [(m['slot'], m['mem_used'], m['procs'], m['containers']) for m in migs] == \
+            [('0.0', 9000, 2, 1), ('0.1', 0, 0, 0)]
+        [usage] = [r for r in records if r['kind'] == 'gpu_container']
+        assert (usage['name'], usage['user'], usage['gpu_mem'], usage['procs'], usage['devices']) == \
+            ("train._.1001", "alice", 8000, 1, ['0.0'])
+
+        sampler.shm = RingWriter(temp_dir / "ring", slots=8, depth=4)
+        sampler._publish_shm(('gpu',), records)
+        reader = RingReader(temp_dir / "ring")
+        assert reader.published > 0
+        assert [(e['kind'], e['key'], e['label']) for e in reader.entities()] == \
+            [('gpu', '0', 'NVIDIA A100'), ('gpu_container', 'train._.1001', '0.0'),
+             ('mig', '0.0', '3g.20gb'), ('mig', '0.1', '3g.20gb')]
+        sampler.shm.close()
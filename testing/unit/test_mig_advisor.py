@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: MIG Layout Advisor
+Tests demand reconstruction from events and layout simulation/ranking
+"""
+
+import json
+import importlib.util
+import pytest
+import yaml
+
+spec = importlib.util.spec_from_file_location(
+    "mig_advisor", "/opt/ds01-infra/scripts/monitoring/mig-advisor.py")
+advisor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(advisor)
+
+T0 = 1_790_000_000
+HOUR = 3600
+
+
+def event(ts, kind, container, **fields):
+    return {'_ts': T0 + ts, 'event': kind, 'user': 'alice', 'container': container, **fields}
+
+
+def request(arrival, size=1, full=False, duration=2 * HOUR):
+    return {'arrival': T0 + arrival, 'duration': duration, 'size': size, 'full': full}
+
+
+class TestDemand:
+    """Tests for build_demand()."""
+
+    @pytest.mark.unit
+    def test_requests_from_events(self):
+        """Allocations are sized by slots; retried rejections keep their first arrival; limits are ignored."""
+        events = [
+            event(0, 'gpu.allocated', 'a', gpu='1.0,1.1,1.2'),
+            event(0, 'gpu.allocated', 'b', gpu='0'),
+            event(HOUR, 'gpu.rejected', 'c', reason='No GPUs available (all allocated)', migs=2),
+            event(2 * HOUR, 'gpu.rejected', 'c', reason='NO_GPU_AVAILABLE'),
+            event(2 * HOUR, 'gpu.released', 'a', gpu='1.0,1.1,1.2'),
+            event(3 * HOUR, 'gpu.allocated', 'c', gpu='1.0,1.1'),
+            event(3 * HOUR, 'gpu.rejected', 'd', reason='EXCEEDS_TOTAL_LIMIT (2+1>2)'),
+            event(4 * HOUR, 'gpu.rejected', 'e', reason='No full GPUs available (all GPUs have allocated MIG instances)',
+                  migs=4),
+            event(5 * HOUR, 'container.removed', 'c'),
+        ]
+        demand = advisor.build_demand(events, mig_per_gpu=4, now=T0 + 6 * HOUR)
+        assert [(r['container'], r['arrival'] - T0, r['duration'], r['size'], r['full']) for r in demand] == [
+            ('a', 0, 2 * HOUR, 3, False),
+            ('b', 0, 6 * HOUR, 1, True),           # still held: counted until now
+            ('c', HOUR, 2 * HOUR, 2, False),       # arrived at its first rejection
+            ('e', 4 * HOUR, 2 * HOUR, 1, True),    # never served: median duration
+        ]
+
+    @pytest.mark.unit
+    def test_read_events_filters_window(self, temp_dir):
+        """Only GPU/removal events in the window are read, rotated files first."""
+        rotated, current = temp_dir / "events.20261001_000000.jsonl", temp_dir / "events.jsonl"
+        rotated.write_text(json.dumps({'ts': '2026-10-01T00:00:00Z', 'event': 'gpu.allocated', 'container': 'x'}) + "\n"
+                           + json.dumps({'ts': '2026-10-10T00:00:00Z', 'event': 'gpu.allocated', 'container': 'y'}) + "\n")
+        current.write_text(json.dumps({'ts': '2026-10-11T00:00:00Z', 'event': 'container.started'}) + "\n"
+                           + json.dumps({'ts': '2026-10-12T00:00:00Z', 'event': 'gpu.released', 'container': 'y'}) + "\n")
+        since = advisor._ts({'ts': '2026-10-05T00:00:00Z'})
+        assert [e['container'] for e in advisor.read_events(current, since)] == ['y', 'y']
+
+
+class TestLayouts:
+    """Tests for simulate() and advise()."""
+
+    @pytest.mark.unit
+    def test_recommends_layout_for_demand(self):
+        """Twelve concurrent slices fit 3 MIG GPUs; the one full-GPU user keeps a whole GPU."""
+        demand = [request(0, full=True)] + [request(60 * i) for i in range(12)]
+        current = {'0': 0, '1': 0, '2': 4, '3': 4}
+        results = advisor.advise(demand, current, mig_per_gpu=4, min_full=1, max_wait=4 * HOUR)
+
+        best = results[0]
+        assert best['layout'] == {'0': 4, '1': 0, '2': 4, '3': 4}
+        assert (best['rejected'], best['wait_hours'], best['changes']) == (0, 0, 1)
+        baseline = next(r for r in results if r['current'])
+        assert (baseline['rejected'], baseline['waited']) == (0, 4)
+        # Without a queue the current layout turns the overflow away
+        assert advisor.simulate(demand, current, max_wait=0)['rejected'] == 4
+
+        plan = yaml.safe_load(advisor.plan_yaml(best, "1g.10gb", ["summary"]))
+        assert plan['gpu_allocation']['mig_gpus'][1] == {'enable': False, 'profile': None}
+        assert plan['gpu_allocation']['mig_gpus'][0] == {'enable': True, 'profile': '1g.10gb', 'instances': 4}
+
+    @pytest.mark.unit
+    def test_full_gpu_demand_preserved(self):
+        """Full-GPU rejections outrank MIG rejections: slices would fragment the GPUs researchers need."""
+        demand = [request(60 * i) for i in range(8)] + [request(1800, full=True), request(1800, full=True)]
+        results = advisor.advise(demand, {'0': 4, '1': 4, '2': 4}, mig_per_gpu=4, min_full=0, max_wait=0)
+        assert (results[0]['full_gpus'], results[0]['rejected_full'], results[0]['rejected']) == (2, 0, 4)
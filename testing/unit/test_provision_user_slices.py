@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Provision User Slices
+Tests the desired-vs-existing slice diff and the single daemon-reload
+"""
+
+import importlib.util
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "provision_user_slices", "/opt/ds01-infra/scripts/system/provision-user-slices.py")
+provision = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(provision)
+
+from get_resource_limits import ResourceLimitParser
+
+
+@pytest.fixture
+def units(temp_dir):
+    unit_dir = temp_dir / "systemd"
+    unit_dir.mkdir()
+    for group in ("students", "researchers", "admins"):
+        (unit_dir / f"ds01-{group}.slice").write_text("[Slice]\nSlice=ds01.slice\n")
+    return unit_dir
+
+
+class TestProvision:
+    """Tests for bulk slice provisioning."""
+
+    @pytest.mark.unit
+    def test_first_run_adds_all_with_one_reload(self, temp_dir, temp_config_file, units):
+        """Every configured member gets a slice; overrides without a parent slice are skipped."""
+        parser = ResourceLimitParser(temp_config_file)
+        changes = provision.plan(parser, units)
+        assert [name for name, _, _ in changes['add']] == [
+            "ds01-admins-admin1.slice", "ds01-researchers-researcher1.slice",
+            "ds01-students-student1.slice", "ds01-students-student2.slice"]
+        assert changes['skipped'] == [('special_user', 'override')]
+
+        reloads = []
+        done = provision.apply(changes, units, temp_dir / "cgroup", reload=lambda: reloads.append(1))
+        assert len(done['add']) == 4 and reloads == [1]
+        assert "Slice=ds01-students.slice" in (units / "ds01-students-student1.slice").read_text()
+
+        again = provision.plan(parser, units)
+        assert not (again['add'] or again['update'] or again['remove'])
+        provision.apply(again, units, temp_dir / "cgroup", reload=lambda: reloads.append(1))
+        assert reloads == [1]
+
+    @pytest.mark.unit
+    def test_group_move_and_busy_slice(self, temp_dir, temp_config_file, units, sample_resource_limits):
+        """A moved user gets the new slice; the old one is removed unless its cgroup is populated."""
+        import yaml
+        parser = ResourceLimitParser(temp_config_file)
+        provision.apply(provision.plan(parser, units), units, temp_dir / "cgroup", reload=None)
+        # Lazily created default-group slice of an unconfigured user is kept
+        (units / "ds01-students-walkin.slice").write_text(provision.slice_unit("students", "walkin"))
+
+        sample_resource_limits['default_group'] = 'students'
+        sample_resource_limits['groups']['researchers']['members'] = ["researcher1", "student1"]
+        sample_resource_limits['groups']['students']['members'] = ["student2"]
+        sample_resource_limits['groups']['admins']['members'] = []
+        temp_config_file.write_text(yaml.safe_dump(sample_resource_limits))
+        busy = temp_dir / "cgroup" / "ds01.slice" / "ds01-admins.slice" / "ds01-admins-admin1.slice"
+        busy.mkdir(parents=True)
+        (busy / "cgroup.procs").write_text("4242\n")
+
+        changes = provision.plan(ResourceLimitParser(temp_config_file), units)
+        assert [name for name, _, _ in changes['add']] == ["ds01-researchers-student1.slice"]
+        assert [name for name, _, _ in changes['remove']] == ["ds01-admins-admin1.slice",
+                                                             "ds01-students-student1.slice"]
+        done = provision.apply(changes, units, temp_dir / "cgroup", reload=None)
+        assert done['remove'] == ["ds01-students-student1.slice"]
+        assert done['busy'] == ["ds01-admins-admin1.slice"]
+        assert (units / "ds01-students-walkin.slice").exists()
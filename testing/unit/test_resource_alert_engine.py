@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Resource Alert Engine
+Tests batch rule evaluation, alert dedup/clearing/expiry and write-on-change
+"""
+
+import json
+import importlib.util
+import subprocess
+from datetime import datetime, timezone
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "resource_alert_engine", "/opt/ds01-infra/scripts/monitoring/resource-alert-engine.py")
+engine = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(engine)
+
+from get_resource_limits import ResourceLimitParser
+from gpu_state_reader import GPUStateReader
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def container(user, *mig_uuids):
+    requests = [{"Driver": "nvidia", "DeviceIDs": list(mig_uuids)}] if mig_uuids else []
+    return {"Config": {"Labels": {"ds01.user": user}}, "HostConfig": {"DeviceRequests": requests}}
+
+
+class FakeSnapshot(engine.Snapshot):
+    """Snapshot over canned inspect data, counting docker calls."""
+
+    def __init__(self, containers, state_reader, fail=None):
+        super().__init__(state_reader=state_reader)
+        self.containers, self.calls, self.fail = containers, [], fail
+
+    def _docker(self, *args):
+        self.calls.append(args)
+        if args[0] == self.fail:
+            return subprocess.CompletedProcess(args, 1, "", "Cannot connect to the Docker daemon")
+        if args[0] == 'ps':
+            return subprocess.CompletedProcess(args, 0, "\n".join(str(i) for i in range(len(self.containers))), "")
+        return subprocess.CompletedProcess(args, 0, json.dumps(self.containers), "")
+
+
+@pytest.fixture
+def setup(temp_dir, temp_config_file, monkeypatch):
+    monkeypatch.setattr(engine, "_event_logger", lambda: None)
+    reader = GPUStateReader(config_path=str(temp_config_file))
+    reader.seed_mig_slots({"MIG-a": "0.0", "MIG-b": "0.1"})
+    alerts = temp_dir / "alerts"
+    alerts.mkdir()
+    return {'alerts': alerts, 'reader': reader, 'parser': ResourceLimitParser(str(temp_config_file))}
+
+
+def run(setup, containers, now=NOW, **kwargs):
+    snapshot = FakeSnapshot(containers, setup['reader'])
+    result = engine.run(alerts_dir=setup['alerts'], parser=setup['parser'], snapshot=snapshot, now=now, **kwargs)
+    assert len(snapshot.calls) == (2 if containers else 1)
+    return result
+
+
+class TestAlertEngine:
+    """Tests for engine.run()."""
+
+    @pytest.mark.unit
+    def test_rules_for_all_users_in_one_snapshot(self, setup):
+        """GPU and container rules fire per user from one ps + one inspect."""
+        result = run(setup, [container("researcher1", "MIG-a", "MIG-b"), container("researcher1"),
+                             container("student1")])
+        researcher = json.loads((setup['alerts'] / "researcher1.json").read_text())
+        assert [(a['type'], a['message']) for a in researcher] == [
+            ("gpu_limit_reached", "GPU limit reached: 2/2 GPUs allocated"),
+            ("container_limit_reached", "Container limit reached: 2/2")]
+        assert not (setup['alerts'] / "student1.json").exists()
+        assert [r[1] for r in result['raised']] == ["alert.gpu_limit", "alert.container_limit"]
+
+    @pytest.mark.unit
+    def test_dedup_clear_and_write_on_change(self, setup):
+        """Firing alerts are refreshed, not duplicated; cleared rules drop; other alerts are kept."""
+        queue_alert = {"type": "gpu_available", "message": "GPU now available!",
+                       "created_at": "2026-10-19T11:00:00.5Z", "updated_at": "2026-10-19T11:00:00.5Z"}
+        (setup['alerts'] / "researcher1.json").write_text(json.dumps([queue_alert]))
+        run(setup, [container("researcher1"), container("researcher1")])
+        second = run(setup, [container("researcher1"), container("researcher1")],
+                     now=datetime(2026, 10, 19, 12, 15, tzinfo=timezone.utc))
+        alerts = json.loads((setup['alerts'] / "researcher1.json").read_text())
+        assert [a['type'] for a in alerts] == ["gpu_available", "container_limit_reached"]
+        assert (alerts[1]['created_at'], alerts[1]['updated_at']) == ("2026-10-19T12:00:00Z", "2026-10-19T12:15:00Z")
+        assert second['raised'] == []
+
+        cleared = run(setup, [container("researcher1")], dry_run=True)
+        assert [a['type'] for a in cleared['changes']["researcher1"]] == ["gpu_available"]
+        run(setup, [container("researcher1")])
+        assert run(setup, [container("researcher1")])['changes'] == {}
+
+    @pytest.mark.unit
+    def test_expiry(self, setup):
+        """Alerts not refreshed within the retention window expire; empty files are removed."""
+        stale = {"type": "gpu_available", "message": "old", "created_at": "2026-10-17T08:00:00Z",
+                 "updated_at": "2026-10-17T08:00:00Z"}
+        (setup['alerts'] / "student1.json").write_text(json.dumps([stale]))
+        assert engine.clean(setup['alerts'], now=NOW) == 1
+        assert not (setup['alerts'] / "student1.json").exists()
+
+    @pytest.mark.unit
+    def test_docker_failure_keeps_alerts(self, setup):
+        """A failed ps or inspect is not zero usage: no rule is evaluated, alerts stay."""
+        run(setup, [container("researcher1"), container("researcher1")])
+        before = (setup['alerts'] / "researcher1.json").read_text()
+        for fail in ('ps', 'inspect'):
+            snapshot = FakeSnapshot([container("researcher1")], setup['reader'], fail=fail)
+            result = engine.run(alerts_dir=setup['alerts'], parser=setup['parser'], snapshot=snapshot, now=NOW)
+            assert result['failed'] and result['checked'] == [] and result['changes'] == {}
+        assert (setup['alerts'] / "researcher1.json").read_text() == before
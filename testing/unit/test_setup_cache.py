@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: User-Setup Image Cache
+Tests cache keys, hit/miss handling and LRU eviction with mocked Docker
+"""
+
+import os
+import time
+import subprocess
+import pytest
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from setup_cache import UserSetupCache, setup_key, KEY_LABEL
+
+
+class FakeDocker:
+    """In-memory image store answering the docker calls the cache makes."""
+
+    def __init__(self):
+        self.images = {}   # name -> {'id': str, 'labels': {}, 'size': int}
+        self.in_use = set()
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        out, code = "", 0
+        if args[:2] == ('image', 'inspect'):
+            image = self.find(args[-1])
+            if image is None:
+                code = 1
+            else:
+                out = f"{image['id']}|{image['labels'].get(KEY_LABEL, '')}\n"
+        elif args[0] == 'commit':
+            labels = dict(a.split(' ', 1)[1].split('=', 1) for a in args[1:-2] if a.startswith('LABEL'))
+            self.tag(args[-1], labels)
+            out = self.images[args[-1]]['id'] + "\n"
+        elif args[0] == 'history':
+            out = f"{self.find(args[-1])['size']}\n0\n"
+        elif args[0] == 'images':
+            out = "\n".join(n.split(':', 1)[1] for n in self.images if n.startswith(args[1] + ':'))
+        elif args[0] == 'rmi':
+            if args[1] in self.in_use:
+                code = 1
+            else:
+                del self.images[args[1]]
+        return subprocess.CompletedProcess(args, code, out, "")
+
+    def tag(self, name, labels):
+        """Create an image under name (what docker commit / docker tag would do)."""
+        image_id = f"sha256:{len(self.calls):064x}"
+        self.images[name] = {'id': image_id, 'labels': labels, 'size': 1000}
+        return image_id
+
+    def find(self, ref):
+        for name, image in self.images.items():
+            if ref in (name, image['id']):
+                return image
+        return None
+
+
+@pytest.fixture
+def cache(temp_dir):
+    cache = UserSetupCache(cache_dir=temp_dir / "setup-cache", max_entries=2, max_size_gb=1)
+    cache._docker = FakeDocker()
+    return cache
+
+
+class TestSetupKey:
+    """Tests for setup_key()."""
+
+    @pytest.mark.unit
+    def test_key_depends_on_every_input(self):
+        """Base image, UID, GID and script all change the key."""
+        base = setup_key("sha256:aaa", 1001, 1001, "script")
+        assert setup_key("sha256:aaa", 1001, 1001, "script") == base
+        assert setup_key("sha256:bbb", 1001, 1001, "script") != base
+        assert setup_key("sha256:aaa", 1002, 1001, "script") != base
+        assert setup_key("sha256:aaa", 1001, 1002, "script") != base
+        assert setup_key("sha256:aaa", 1001, 1001, "other") != base
+
+
+class TestUserSetupCache:
+    """Tests for UserSetupCache lookup/store/prune."""
+
+    @pytest.mark.unit
+    def test_miss_then_hit(self, cache):
+        """A stored layer is found again under the same key."""
+        key = setup_key("sha256:aaa", 1001, 1001, "script")
+        assert cache.lookup(key) is None
+
+        image_id = cache.store("proj._.1001", key, "aimehub/pytorch", 1001, 1001)
+        assert image_id == cache._docker.images[cache.image_for(key)]['id']
+        assert cache.image_for(key).startswith("ds01-user-setup:")
+        assert cache.lookup(key) == image_id
+
+    @pytest.mark.unit
+    def test_forged_tag_is_a_miss(self, cache):
+        """A cache tag without this user's stamp is never trusted, even with the right label."""
+        key = setup_key("sha256:aaa", 1001, 1001, "script")
+        cache._docker.tag(cache.image_for(key), {KEY_LABEL: key})
+        assert cache.lookup(key) is None
+
+    @pytest.mark.unit
+    def test_retagged_image_is_not_used(self, cache):
+        """Re-pointing the tag after a store does not change what a hit returns."""
+        key = setup_key("sha256:aaa", 1001, 1001, "script")
+        image_id = cache.store("proj._.1001", key, "aimehub/pytorch", 1001, 1001)
+        cache._docker.images["still-present"] = cache._docker.images[cache.image_for(key)]
+        forged = cache._docker.tag(cache.image_for(key), {KEY_LABEL: key})
+        assert cache.lookup(key) == image_id != forged
+
+    @pytest.mark.unit
+    def test_stamp_writable_by_others_is_a_miss(self, cache):
+        """A stamp anyone could have rewritten does not count as a hit."""
+        key = setup_key("sha256:aaa", 1001, 1001, "script")
+        cache.store("proj._.1001", key, "aimehub/pytorch", 1001, 1001)
+        os.chmod(cache._stamp(key), 0o666)
+        assert cache.lookup(key) is None
+
+    @pytest.mark.unit
+    def test_truncated_tag_collision_is_a_miss(self, cache):
+        """The full key label must match, not just the tag."""
+        key = setup_key("sha256:aaa", 1001, 1001, "script")
+        cache.store("proj._.1001", key, "aimehub/pytorch", 1001, 1001)
+        other = key[:24] + "0" * (len(key) - 24)
+        assert cache.lookup(other) is None
+
+    @pytest.mark.unit
+    def test_prune_evicts_least_recently_used(self, cache):
+        """Entries beyond max_entries go, oldest last use first."""
+        keys = [setup_key("sha256:aaa", uid, uid, "script") for uid in (1001, 1002, 1003)]
+        for i, key in enumerate(keys):
+            cache.store(f"c._.{i}", key, "aimehub/pytorch", 1001, 1001)
+            past = time.time() - 1000 + i * 100
+            os.utime(cache._stamp(key), (past, past))
+
+        cache.lookup(keys[0])  # Most recently used now
+        removed = cache.prune()
+        assert removed == [cache.image_for(keys[1])]
+        assert cache.lookup(keys[0]) and cache.lookup(keys[2])
+
+    @pytest.mark.unit
+    def test_prune_respects_size_and_in_use(self, cache):
+        """Size bound evicts too, but images used by containers stay."""
+        keys = [setup_key("sha256:aaa", uid, uid, "script") for uid in (1001, 1002)]
+        for key in keys:
+            cache.store("c._.1", key, "aimehub/pytorch", 1001, 1001)
+        cache._docker.in_use.add(cache.image_for(keys[0]))
+
+        removed = cache.prune(max_entries=10, max_bytes=0)
+        assert removed == [cache.image_for(keys[1])]
+        assert cache.image_for(keys[0]) in cache._docker.images
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Container Ownership Sync
+Tests event application to the ownership map and write-on-change output
+"""
+
+import json
+import importlib.util
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "sync_container_owners", "/opt/ds01-infra/scripts/docker/sync-container-owners.py")
+sync = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sync)
+
+FULL_ID = "ab" * 32
+
+
+def event(action, **attributes):
+    return {"Type": "container", "Action": action, "Actor": {"ID": FULL_ID, "Attributes": attributes}}
+
+
+class TestOwnershipMap:
+    """Tests for OwnershipMap.apply_event()."""
+
+    @pytest.mark.unit
+    def test_create_rename_destroy(self):
+        """Events update the map without an inspect; lookups cover short ID, full ID and name."""
+        ownership = sync.OwnershipMap()
+        assert ownership.apply_event(event("create", name="proj._.1001", image="x",
+                                           **{"ds01.user": "alice", "ds01.managed": "true"}))
+        assert ownership.lookup()[FULL_ID[:12]] == {"owner": "alice", "name": "proj._.1001", "ds01_managed": True}
+        assert ownership.apply_event(event("rename", name="/renamed", oldName="/proj._.1001"))
+        assert set(ownership.lookup()) == {FULL_ID, FULL_ID[:12], "renamed"}
+        assert not ownership.apply_event(event("start", name="renamed"))
+        assert ownership.apply_event(event("destroy", name="renamed"))
+        assert ownership.lookup() == {}
+
+
+class TestOwnershipWriter:
+    """Tests for content-hash write skipping."""
+
+    @pytest.mark.unit
+    def test_write_only_on_change(self, temp_dir, monkeypatch):
+        """Identical content (new timestamp only) is not rewritten; output is compact."""
+        monkeypatch.setattr(sync, "OUTPUT_DIR", temp_dir)
+        monkeypatch.setattr(sync, "OUTPUT_FILE", temp_dir / "container-owners.json")
+        ownership = sync.OwnershipMap()
+        ownership.apply_event(event("create", name="proj", **{"ds01.user": "alice"}))
+
+        writer = sync.OwnershipWriter()
+        assert writer.write(sync.build_ownership_data(ownership, ["admin1"])) is True
+        text = sync.OUTPUT_FILE.read_text()
+        assert "\n" not in text and json.loads(text)["containers"]["proj"]["owner"] == "alice"
+        assert writer.write(dict(sync.build_ownership_data(ownership, ["admin1"]), updated_at="later")) is None
+        # A restarted writer picks up the hash of the file on disk
+        assert sync.OwnershipWriter().write(sync.build_ownership_data(ownership, ["admin1"])) is None
+        assert writer.write(sync.build_ownership_data(ownership, ["admin1", "admin2"])) is True
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Usage Rollup
+Tests incremental hourly/daily GPU usage buckets from events and sampler records
+"""
+
+import json
+import time
+import importlib.util
+from datetime import date
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "usage_rollup", "/opt/ds01-infra/scripts/monitoring/usage-rollup.py")
+usage_rollup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(usage_rollup)
+
+from ds01_metrics import append_records
+
+DAY = "2026-10-12"
+T0 = time.mktime(time.strptime(DAY, "%Y-%m-%d")) + 10 * 3600   # 10:00 local
+
+
+def iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+def append_events(path, *events):
+    with open(path, 'a') as f:
+        for ts, event, fields in events:
+            f.write(json.dumps({'ts': iso(ts), 'event': event, **fields}) + "\n")
+
+
+@pytest.fixture
+def rollup(temp_dir):
+    (temp_dir / "metrics").mkdir()
+
+    def make():
+        return usage_rollup.UsageRollup(temp_dir / "usage", temp_dir / "events.jsonl", temp_dir / "metrics",
+                                        group_of=lambda user: 'student', mig_per_gpu=4)
+    make.dir = temp_dir
+    return make
+
+
+class TestUpdate:
+    """Tests for folding events and samples into buckets."""
+
+    @pytest.mark.unit
+    def test_allocated_and_busy_hours(self, rollup):
+        """Allocation spans are split per hour; busy time only while the holder's slot has processes."""
+        events = rollup.dir / "events.jsonl"
+        append_events(events,
+                      (T0 + 600, 'container.created', {'user': 'alice', 'container': 'a'}),
+                      (T0 + 600, 'gpu.allocated', {'user': 'alice', 'container': 'a', 'gpu': '1.0'}),
+                      (T0 + 900, 'gpu.rejected', {'user': 'bob', 'container': 'b'}),
+                      (T0 + 600 + 2 * 3600, 'gpu.released', {'user': 'alice', 'container': 'a', 'gpu': '1.0'}))
+        # 31 MIG samples one minute apart with processes on 1.0 = 30 busy minutes
+        append_records([{'ts': T0 + 1200 + i * 60, 'kind': 'mig', 'slot': '1.0', 'procs': 1}
+                        for i in range(31)], rollup.dir / "metrics")
+
+        r = rollup()
+        r.update(now=T0 + 3 * 3600 + 300)
+        hourly = [json.loads(line) for line in
+                  (rollup.dir / "usage" / "hourly" / f"{DAY[:7]}.jsonl").read_text().splitlines()]
+        alice = [row for row in hourly if row['user'] == 'alice' and row['slot'] == '1.0']
+        assert [row['mig_hours'] for row in alice] == [pytest.approx(50 / 60, abs=1e-3), 1.0,
+                                                       pytest.approx(10 / 60, abs=1e-3)]
+        assert sum(row['busy_hours'] for row in alice) == pytest.approx(0.5)
+        assert {(row['user'], row['created'], row['rejected']) for row in hourly if row['slot'] == ''} == \
+            {('alice', 1, 0), ('bob', 0, 1)}
+        assert all(row['group'] == 'student' for row in hourly)
+
+    @pytest.mark.unit
+    def test_incremental_runs_do_not_double_count(self, rollup):
+        """A second run only reads what was appended; full GPUs count as MIG-equivalents."""
+        events = rollup.dir / "events.jsonl"
+        append_events(events, (T0, 'gpu.allocated', {'user': 'carol', 'container': 'c', 'gpu': '0'}))
+        rollup().update(now=T0 + 1800)
+        append_events(events, (T0 + 3600, 'container.removed', {'user': 'carol', 'container': 'c'}),
+                      (T0 + 3700, 'container.created', {'user': 'carol', 'container': 'd'}))
+        rollup().update(now=T0 + 2 * 3600 + 60)
+
+        rows = rollup().report(by='user', days=1, today=date.fromisoformat(DAY))
+        assert rows == [{'user': 'carol', 'mig_hours': 4.0, 'busy_hours': 0.0, 'busy_pct': 0.0,
+                         'created': 1, 'rejected': 0}]
+
+    @pytest.mark.unit
+    def test_days_close_into_daily_rows(self, rollup):
+        """Finished days are summed into daily.jsonl and reports read them."""
+        append_events(rollup.dir / "events.jsonl",
+                      (T0, 'gpu.allocated', {'user': 'alice', 'container': 'a', 'gpu': '1.0,1.1'}),
+                      (T0 + 3600, 'gpu.released', {'user': 'alice', 'container': 'a'}))
+        r = rollup()
+        r.update(now=T0 + 86400)
+        daily = [json.loads(line) for line in (rollup.dir / "usage" / "daily.jsonl").read_text().splitlines()]
+        assert [(row['day'], row['slot'], row['mig_hours']) for row in daily] == \
+            [(DAY, '1.0', 1.0), (DAY, '1.1', 1.0)]
+
+        by_slot = rollup().report(by='slot', days=7, today=date.fromisoformat("2026-10-13"))
+        assert [(row['slot'], row['mig_hours']) for row in by_slot] == [('1.0', 1.0), ('1.1', 1.0)]
+        assert rollup().report(by='group', days=7, today=date.fromisoformat("2026-10-13"))[0]['group'] == 'student'
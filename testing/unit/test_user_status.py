@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: User Status Backend
+Tests one-shot gathering of limits, GPU usage, containers, queue and alerts
+"""
+
+import json
+import subprocess
+import pytest
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from container_listing import ContainerListing
+from get_resource_limits import ResourceLimitParser
+from gpu_state_reader import GPUStateReader
+from user_status import UserStatus, shell_assignments
+
+PS_OUTPUT = "\n".join([
+    "aaaaaaaaaaaa|train._.1001|Up 2 hours|researcher1|||",
+    "bbbbbbbbbbbb|old._.1001|Exited (0) 3 hours ago|researcher1|||",
+    "cccccccccccc|other._.1002|Up 1 hour|student1|||",
+])
+
+INSPECT = [
+    {"Id": "aaaaaaaaaaaa" + "0" * 52, "State": {"Running": True},
+     "HostConfig": {"DeviceRequests": [{"Driver": "nvidia", "DeviceIDs": ["MIG-aaa"]}]},
+     "Config": {"Labels": {"ds01.user": "researcher1"}}},
+    {"Id": "bbbbbbbbbbbb" + "0" * 52, "State": {"Running": False},
+     "HostConfig": {}, "Config": {"Labels": {"ds01.user": "researcher1"}}},
+]
+
+
+class FakeDocker:
+    """Answers `docker ps` and the bulk `docker inspect`, recording calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        if args[0] == 'ps':
+            return subprocess.CompletedProcess(args, 0, PS_OUTPUT + "\n", "")
+        out = json.dumps([c for c in INSPECT if c["Id"][:12] in args[1:]])
+        return subprocess.CompletedProcess(args, 0, out, "")
+
+
+@pytest.fixture
+def user_status(temp_dir, temp_config_file):
+    listing = ContainerListing("researcher1", 1001)
+    listing._docker = FakeDocker()
+    reader = GPUStateReader(config_path=str(temp_config_file))
+    reader.seed_mig_slots({"MIG-aaa": "1.2"})
+    (temp_dir / "gpu-queue.json").write_text(json.dumps([
+        {"user": "student1", "container": "a", "max_gpus": 1},
+        {"user": "researcher1", "container": "big", "max_gpus": 2, "notified": False},
+    ]))
+    (temp_dir / "alerts").mkdir()
+    (temp_dir / "alerts" / "researcher1.json").write_text(json.dumps([
+        {"type": "container_limit", "message": "You have 2 containers\n(limit: 2)"},
+    ]))
+    return UserStatus("researcher1", parser=ResourceLimitParser(str(temp_config_file)),
+                      listing=listing, state_reader=reader, queue_file=temp_dir / "gpu-queue.json",
+                      alerts_dir=temp_dir / "alerts", disk_index_dir=temp_dir / "disk-usage")
+
+
+class TestUserStatus:
+    """Tests for UserStatus.gather()."""
+
+    @pytest.mark.unit
+    def test_gather_all_sections(self, user_status):
+        """Limits, MIG-equivalents, counts, queue position, alerts and notices in one pass."""
+        status = user_status.gather()
+        assert status['group'] == "researchers" and status['limits']['max_gpus'] == 2
+        assert status['gpu'] == {'mig_equiv': 1, 'limit': 2, 'remaining': 1, 'allocations': [
+            {'container': "train", 'slots': ["1.2"], 'mig_equiv': 1, 'running': True}]}
+        assert (status['containers']['total'], status['containers']['running']) == (2, 1)
+        assert status['queue'] == [{'position': 2, 'container': "big", 'max_gpus': 2,
+                                    'requested_at': None, 'notified': False}]
+        assert status['storage'] is None and len(status['alerts']) == 1
+        assert [n['type'] for n in status['notices']] == ["containers_limit"]
+        assert len(user_status.listing._docker.calls) == 2
+
+    @pytest.mark.unit
+    def test_sections_skip_docker(self, user_status):
+        """Callers that only need alerts and storage never query Docker."""
+        status = user_status.gather(['storage', 'alerts'])
+        assert 'containers' not in status and 'gpu' not in status
+        assert user_status.listing._docker.calls == []
+
+    @pytest.mark.unit
+    def test_shell_assignments_eval(self, user_status):
+        """--shell output evaluates in bash to the same values (alert text kept on one line)."""
+        script = shell_assignments(user_status.gather()) + \
+            '\nprintf "%s|%s|%s|%s|%s" "$STATUS_GPU_USED" "$STATUS_MAX_GPUS" "$STATUS_QUEUE" ' \
+            '"$STATUS_ALERTS" "$STATUS_NOTICES"'
+        result = subprocess.run(["bash", "-c", script], capture_output=True, text=True)
+        assert result.stdout == "1|2|#2: big|container_limit\tYou have 2 containers (limit: 2)|containers_limit"
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit Tests: Warm Pool
+Tests demand-based pool sizing and refill/claim with mocked Docker
+"""
+
+import json
+import subprocess
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import sys
+sys.path.insert(0, "/opt/ds01-infra/scripts/docker")
+
+from warm_pool import WarmPool, image_demand, pool_targets, image_key, member_docker_args, POOL_PREFIX
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+TORCH = "aimehub/pytorch-2.3.0-cuda12.1"
+TF = "aimehub/tensorflow-2.14.0-cuda12.1"
+CONFIG = {'enabled': True, 'lookback_days': 7, 'max_images': 1, 'min_per_image': 0, 'max_per_image': 5}
+
+
+def created(ts, image):
+    return json.dumps({"ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"), "event": "container.created",
+                       "user": "alice", "container": "c._.1001", "image": image})
+
+
+class FakeDocker:
+    """Records docker calls and answers ps/rename."""
+
+    def __init__(self, members):
+        self.members = members  # list of (name, image, state)
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append(args)
+        stdout, code = "", 0
+        if args[0] == 'ps':
+            prefix = args[args.index('--filter') + 1].split('^')[1]
+            stdout = "\n".join(f"{n}|{i}|{s}" for n, i, s in self.members if n.startswith(prefix))
+        elif args[0] == 'rename':
+            names = [m[0] for m in self.members]
+            code = 0 if args[1] in names else 1
+            self.members = [m for m in self.members if m[0] != args[1]]
+        return subprocess.CompletedProcess(args, code, stdout, "")
+
+
+@pytest.fixture
+def events_dir(temp_dir):
+    hour = NOW - timedelta(hours=3)
+    lines = [created(hour + timedelta(minutes=m), TORCH) for m in (1, 5, 9)]
+    lines += [created(NOW - timedelta(hours=1), TORCH), created(NOW - timedelta(hours=1), TF)]
+    lines += [created(NOW - timedelta(days=10), TF) for _ in range(4)]
+    lines += [json.dumps({"ts": "2026-03-02T10:00:00Z", "event": "container.started"}), "garbage"]
+    (temp_dir / "events.jsonl").write_text("\n".join(lines) + "\n")
+    return temp_dir
+
+
+class TestDemand:
+    """Tests for image_demand() and pool_targets()."""
+
+    @pytest.mark.unit
+    def test_counts_creates_per_image(self, events_dir):
+        """Creates are counted per image with the busiest hour, inside the window only."""
+        demand = image_demand(events_dir, lookback_days=7, now=NOW)
+        assert demand[TORCH] == {'total': 4, 'peak_hourly': 3}
+        assert demand[TF] == {'total': 1, 'peak_hourly': 1}
+
+    @pytest.mark.unit
+    def test_targets_top_images_clamped(self, events_dir):
+        """Only the most-created images get a pool, sized by peak hourly creates."""
+        demand = image_demand(events_dir, lookback_days=7, now=NOW)
+        assert pool_targets(demand, CONFIG) == {TORCH: 3}
+        assert pool_targets(demand, dict(CONFIG, max_per_image=2, max_images=2)) == {TORCH: 2, TF: 1}
+
+    @pytest.mark.unit
+    def test_disabled_pool_has_no_targets(self, events_dir):
+        """A disabled pool is drained by refill."""
+        demand = image_demand(events_dir, lookback_days=7, now=NOW)
+        assert pool_targets(demand, dict(CONFIG, enabled=False)) == {}
+
+
+class TestPool:
+    """Tests for WarmPool refill and claim."""
+
+    @pytest.mark.unit
+    def test_refill_replaces_stale_and_tops_up(self):
+        """Stale, stopped and surplus members go; missing members are started."""
+        key = image_key(TORCH)
+        fake = FakeDocker([
+            (f"{POOL_PREFIX}{key}-aaaaaa", TORCH, "running"),
+            (f"{POOL_PREFIX}{key}-bbbbbb", "sha256:0123", "running"),   # tag re-pulled
+            (f"{POOL_PREFIX}{key}-cccccc", TORCH, "exited"),
+            (f"{POOL_PREFIX}{image_key(TF)}-dddddd", TF, "running"),    # no longer popular
+        ])
+        pool = WarmPool()
+        pool._docker = fake
+
+        changes = pool.refill({TORCH: 3}, dry_run=True)
+        assert sorted(changes['removed']) == [
+            f"{POOL_PREFIX}{key}-bbbbbb", f"{POOL_PREFIX}{key}-cccccc",
+            f"{POOL_PREFIX}{image_key(TF)}-dddddd"]
+        assert changes['started'] == [TORCH, TORCH]
+        assert all(call[0] == 'ps' for call in fake.calls)
+
+        assert pool.refill({TORCH: 0}, dry_run=True)['removed'][-1] == f"{POOL_PREFIX}{key}-aaaaaa"
+
+    @pytest.mark.unit
+    def test_claim_renames_oldest_running_member(self):
+        """Claiming renames a current member; stale members are never claimed."""
+        key = image_key(TORCH)
+        fake = FakeDocker([
+            (f"{POOL_PREFIX}{key}-new", TORCH, "running"),
+            (f"{POOL_PREFIX}{key}-old", TORCH, "running"),
+            (f"{POOL_PREFIX}{key}-stale", "sha256:0123", "running"),
+        ])
+        pool = WarmPool()
+        pool._docker = fake
+
+        assert pool.claim(TORCH, "proj._.1001")
+        assert ('rename', f"{POOL_PREFIX}{key}-old", "proj._.1001") in fake.calls
+        assert pool.claim(TORCH, "two._.1001")
+        assert not pool.claim(TORCH, "three._.1001")
+        assert not pool.claim(TF, "four._.1001")
+
+    @pytest.mark.unit
+    def test_members_spawn_with_default_group_limits(self, temp_config_file):
+        """Members get the default group's limits under its group slice; no limits, no spawn."""
+        fake = FakeDocker([])
+        pool = WarmPool(run_args=member_docker_args(temp_config_file))
+        pool._docker = fake
+
+        assert pool.spawn(TORCH)
+        run = fake.calls[-1]
+        assert '--cgroup-parent=ds01-student.slice' in run
+        assert [arg for arg in run if arg.startswith(('--cpus=', '--memory=', '--pids-limit='))]
+        assert not [arg for arg in run if arg.startswith('--cgroup-parent=ds01-student-')]
+
+        unlimited = WarmPool()
+        unlimited._docker = fake
+        assert unlimited.spawn(TORCH) is None
+
+    @pytest.mark.unit
+    def test_from_config_disabled(self, temp_dir):
+        """A disabled pool is not built, so creates never list members."""
+        config = temp_dir / "resource-limits.yaml"
+        config.write_text("warm_pool:\n  enabled: false\n")
+        assert WarmPool.from_config(config) is None
+        config.write_text("warm_pool:\n  enabled: true\n")
+        assert WarmPool.from_config(config) is not None